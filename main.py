@@ -1,79 +1,407 @@
 import yaml
-import configparser
+import signal
+import asyncio
 import logging
+import argparse
+import threading
+import quickfix as fix
 from src.fix_client import FIXClient
 from src.fix_application import FIXApplication
+from src.session_group import SessionGroup, MultiSessionApplication
+from src.session_registry import SessionProfile, SessionRegistry
+from src.log_writer import DurabilityPolicy
+from src.dedup import DedupPolicy
+from src.offload import OffloadPolicy
+from src.daemon import Daemon
+from src.metrics import Metrics, MetricsServer
+from src.archive import Archiver
+from src.supervisor import Supervisor
+from src.report_ring import RingPublisher
+from src.fanout import FanoutServer, REPORT_TAGS
+from src.fix_application import EXECUTION_REPORT_TAGS
+from src import menu
 from src.menu import main_menu
-from typing import List, Optional
+from typing import Callable, List, Optional
 
 # Configure the logger
 #logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def load_clients(config_path: str) -> List[FIXClient]:
+def read_config(config_path: str) -> Optional[dict]:
     """
-    Load FIX clients based on the provided configuration file.
-
-    Args:
-        config_path (str): Path to the YAML configuration file.
+    Read the YAML configuration file.
 
     Returns:
-        List[FIXClient]: List of FIXClient instances.
+        Optional[dict]: The configuration, or None if it cannot be read.
     """
-    clients = []
     try:
         with open(config_path, 'r') as file:
-            config = yaml.safe_load(file)
+            return yaml.safe_load(file) or {}
     except FileNotFoundError:
         logging.error(f"Configuration file {config_path} not found.")
-        return clients
     except yaml.YAMLError as e:
         logging.error(f"Error parsing YAML configuration: {e}")
-        return clients
+    return None
+
+def create_metrics(config: dict) -> Optional[Metrics]:
+    """
+    Create the metrics registry if the `metrics` section enables it.
+    """
+    return Metrics() if (config.get('metrics') or {}).get('enabled', False) else None
+
+def create_archiver(config: dict) -> Optional[Archiver]:
+    """
+    Create and start the background log archiver if the `archive` section enables it.
+    """
+    settings = config.get('archive') or {}
+    if not settings.get('enabled', False):
+        return None
+    rate_mb = settings.get('rate_mb', 20)
+    archiver = Archiver(
+        settings.get('directories', ['human_readable_logs']),
+        interval=float(settings.get('interval', 3600)),
+        min_age=float(settings.get('min_age', 300)),
+        frame_bytes=int(settings.get('frame_kb', 1024)) << 10,
+        max_bytes_per_second=float(rate_mb) * 1e6 if rate_mb else None,
+        keep_source=bool(settings.get('keep_source', False)),
+    )
+    archiver.start()
+    return archiver
+
+def create_fanout(config: dict) -> Optional[FanoutServer]:
+    """
+    Create and start the execution report fan-out server if the `fanout` section enables it.
+    """
+    settings = config.get('fanout') or {}
+    if not settings.get('enabled', False):
+        return None
+    fanout = FanoutServer(
+        host=settings.get('host', '127.0.0.1'),
+        port=int(settings.get('port', 8766)),
+        path=settings.get('path'),
+        max_buffer=int(settings.get('max_buffer', 10000)),
+    )
+    fanout.start()
+    return fanout
+
+def create_registry(config_path: str, clients: List[FIXClient],
+                    logon_added: Optional[Callable[[], bool]] = None, config: Optional[dict] = None,
+                    metrics: Optional[Metrics] = None,
+                    fanout: Optional[FanoutServer] = None) -> Optional[SessionRegistry]:
+    """
+    Build the session registry for a configuration file and start its sessions.
+
+    `clients` is kept up to date as the registry adds and removes sessions, so
+    the menu always works on the live set.
+
+    Args:
+        config_path (str): Path to the YAML configuration file.
+        clients (List[FIXClient]): List the registry appends clients to and removes them from.
+        logon_added (Callable[[], bool]): Whether sessions added at runtime should log on
+            straight away; defaults to "the menu has logged on".
+        config (dict): The configuration, if already read from `config_path`.
+        metrics (Metrics): Instrumentation shared by every application and client.
+        fanout (FanoutServer): Server every application streams its execution reports to.
+
+    Returns:
+        Optional[SessionRegistry]: The registry, or None if the configuration is invalid.
+    """
+    if config is None:
+        config = read_config(config_path)
+        if config is None:
+            return None
 
-    for session in config.get('sessions', []):
-        config_file = session.get('config_file')
-        if not config_file:
-            logging.warning("No config_file found for a session in the configuration.")
-            continue
+    message_log_settings = dict(config.get('message_log') or {})
+    max_segment_bytes = message_log_settings.pop('max_segment_bytes', None)
+    index_message_logs = bool(message_log_settings.pop('index', True))
+    binary_journal = bool(message_log_settings.pop('binary', False))
+    try:
+        durability = DurabilityPolicy(**message_log_settings)
+    except (TypeError, ValueError) as e:
+        logging.error(f"Invalid message_log settings in {config_path}: {e}")
+        return None
 
+    dedup = None
+    dedup_settings = dict(config.get('dedup') or {})
+    if dedup_settings.pop('enabled', False):
         try:
-            # Load raw_data directly from the configuration file
-            config_parser = configparser.ConfigParser()
-            config_parser.read(config_file)
-            raw_data = config_parser['SESSION']['RawData']
-        except FileNotFoundError:
-            logging.error(f"Config file {config_file} not found.")
-            continue
-        except KeyError as e:
-            logging.error(f"Key error in config file {config_file}: {e}")
-            continue
-        except configparser.Error as e:
-            logging.error(f"ConfigParser error reading {config_file}: {e}")
-            continue
+            dedup = DedupPolicy(**dedup_settings)
+        except (TypeError, ValueError) as e:
+            logging.error(f"Invalid dedup settings in {config_path}: {e}")
+            return None
 
+    offload = None
+    offload_settings = dict(config.get('offload') or {})
+    if offload_settings.pop('enabled', False):
         try:
-            application = FIXApplication(raw_data)
-            client = FIXClient(config_file, application)
-            clients.append(client)
-        except Exception as e:
-            logging.error(f"Error creating FIXClient for config file {config_file}: {e}")
+            offload = OffloadPolicy(**offload_settings)
+        except (TypeError, ValueError) as e:
+            logging.error(f"Invalid offload settings in {config_path}: {e}")
+            return None
+
+    readable_log_settings = config.get('human_readable_log') or {}
+    log_level = logging.getLevelName(str(readable_log_settings.get('level', 'DEBUG')).upper())
+    if not isinstance(log_level, int):
+        logging.error(f"Invalid human_readable_log level in {config_path}: {readable_log_settings.get('level')}")
+        return None
+    data_dictionary = readable_log_settings.get('data_dictionary')
+    log_dir = readable_log_settings.get('directory', 'human_readable_logs')
+
+    report_ring = None
+    ring_settings = config.get('report_ring') or {}
+    if ring_settings.get('enabled', False):
+        try:
+            report_ring = RingPublisher(str(ring_settings.get('name', 'fix_execution_reports')),
+                                        int(ring_settings.get('capacity', 65536)))
+        except (TypeError, ValueError, OSError) as e:
+            logging.error(f"Invalid report_ring settings in {config_path}: {e}")
+            return None
+
+    resend_settings = config.get('resend') or {}
+    client_options = {
+        'resend_chunk_size': int(resend_settings.get('chunk_size', 1000)),
+        'resend_max_in_flight': int(resend_settings.get('max_in_flight', 2)),
+        'resend_timeout': float(resend_settings.get('timeout', 60.0)),
+        'logon_timeout': float(config.get('logon_timeout', 10.0)),
+    }
+    failover_settings = config.get('failover') or {}
+    client_options['failover'] = failover_settings.get('mode', 'sequential')
+    client_options['probe_timeout'] = float(failover_settings.get('probe_timeout', 2.0))
+    if failover_settings.get('heartbeat_timeout') is not None:
+        client_options['heartbeat_timeout'] = float(failover_settings['heartbeat_timeout'])
+    application_options = {
+        'durability': durability,
+        'max_segment_bytes': max_segment_bytes,
+        'log_level': log_level,
+        'data_dictionary': data_dictionary,
+        'index_message_logs': index_message_logs,
+        'binary_journal': binary_journal,
+        'dedup': dedup,
+        'offload': offload,
+        'log_dir': log_dir,
+        'report_ring': report_ring,
+        'metrics': metrics,
+    }
+
+    # initiator: shared runs every session on one SocketInitiator and one application
+    group = None
+    if config.get('initiator', 'per_session') == 'shared':
+        group = SessionGroup(MultiSessionApplication(**application_options))
+        if fanout is not None:
+            group.application.dispatcher.subscribe(fix.MsgType_ExecutionReport, fanout.on_execution_report,
+                                                   REPORT_TAGS)
+
+    def add_session(profile: SessionProfile) -> None:
+        if profile.raw_data is None:
+            raise KeyError('RawData')
+        if group is not None:
+            client = group.add_client(profile.config_file, profile.raw_data, profile=profile, metrics=metrics,
+                                      **profile.options)
+        else:
+            application = FIXApplication(profile.raw_data, **application_options)
+            if fanout is not None:
+                application.dispatcher.subscribe(fix.MsgType_ExecutionReport, fanout.on_execution_report,
+                                                 REPORT_TAGS)
+            client = FIXClient(profile.config_file, application, profile=profile, metrics=metrics, **profile.options)
+        clients.append(client)
+        if logon_added() if logon_added is not None else menu.sessions_live:
+            # Sessions added after the operator logged on start straight away
+            threading.Thread(target=client.logon, name=f'logon-{profile.sender_comp_id}', daemon=True).start()
 
+    def remove_session(profile: SessionProfile) -> None:
+        for client in list(clients):
+            if client.profile is profile:
+                clients.remove(client)
+                client.logout()
+                if metrics is not None:
+                    metrics.forget(client)
+
+    reload_settings = config.get('reload') or {}
+    registry = SessionRegistry(
+        config_path, add_session, remove_session, client_options,
+        poll_interval=float(reload_settings.get('interval', 2.0)),
+        # A started shared initiator cannot take sessions, so additions and edits wait for a restart
+        frozen=(lambda: group.initiator is not None) if group is not None else None
+    )
+    registry.sync(config)
+    if reload_settings.get('watch', False):
+        registry.start()
+    return registry
+
+def load_clients(config_path: str) -> List[FIXClient]:
+    """
+    Load FIX clients based on the provided configuration file.
+
+    Args:
+        config_path (str): Path to the YAML configuration file.
+
+    Returns:
+        List[FIXClient]: List of FIXClient instances.
+    """
+    clients = []
+    create_registry(config_path, clients)
     return clients
 
-def main() -> None:
+def create_shard_clients(config_path: str, config: dict) -> List[FIXClient]:
+    """
+    Build the clients of one supervisor shard from its slice of the configuration.
+
+    Runs in the shard process; the supervisor logs them on.
+    """
+    clients = []
+    create_registry(config_path, clients, logon_added=lambda: False, config=config)
+    return clients
+
+def run_supervisor(config_path: str, workers: Optional[int] = None) -> None:
+    """
+    Run the sessions headless across several processes until SIGTERM or SIGINT.
+
+    Args:
+        config_path (str): Path to the YAML configuration file.
+        workers (int): Shard processes; overrides `supervisor.workers` in the configuration.
+    """
+    config = read_config(config_path)
+    if config is None:
+        return
+    settings = config.get('supervisor') or {}
+    fanout = None
+
+    def on_reports(shard: int, batch: list) -> None:
+        if fanout is not None:
+            for session, values in batch:
+                fanout.publish(dict(zip(EXECUTION_REPORT_TAGS, values)).get, session)
+
+    try:
+        supervisor = Supervisor(
+            config_path, config, create_shard_clients,
+            workers=int(workers if workers is not None else settings.get('workers', 2)),
+            heartbeat_interval=float(settings.get('heartbeat_interval', 1.0)),
+            heartbeat_timeout=float(settings.get('heartbeat_timeout', 10.0)),
+            restart_delay=float(settings.get('restart_delay', 1.0)),
+            max_restart_delay=float(settings.get('max_restart_delay', 60.0)),
+            on_reports=on_reports,
+        )
+    except (TypeError, ValueError) as e:
+        logging.error(f"Invalid supervisor settings in {config_path}: {e}")
+        return
+    if not supervisor.shards:
+        logging.error("No clients loaded. Exiting.")
+        return
+    stopped = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda signum, frame: stopped.set())
+    fanout = create_fanout(config)
+    supervisor.start()
+    archiver = create_archiver(config)
+    try:
+        while not stopped.wait(60):
+            for shard in supervisor.stats():
+                logging.info(f"Shard {shard['shard']}: {shard['logged_on']}/{shard['sessions']} logged on, "
+                             f"{shard['reports']} reports, {shard['lost_reports']} lost, {shard['restarts']} restarts")
+    finally:
+        supervisor.stop()
+        if archiver is not None:
+            archiver.stop()
+        if fanout is not None:
+            fanout.stop()
+
+def run_daemon(config_path: str, host: Optional[str] = None, port: Optional[int] = None) -> None:
+    """
+    Run every session headless, controlled over the local API instead of the menu.
+
+    Args:
+        config_path (str): Path to the YAML configuration file.
+        host (str): Control API address; overrides `daemon.host` in the configuration.
+        port (int): Control API port; overrides `daemon.port` in the configuration.
+    """
+    config = read_config(config_path)
+    if config is None:
+        return
+    clients = []
+    daemon = None
+    metrics = create_metrics(config)
+    fanout = create_fanout(config)
+    registry = create_registry(config_path, clients, logon_added=lambda: daemon is not None and daemon.live,
+                               config=config, metrics=metrics, fanout=fanout)
+    if registry is None:
+        logging.error("No clients loaded. Exiting.")
+        if fanout is not None:
+            fanout.stop()
+        return
+    archiver = create_archiver(config)
+
+    def shutdown() -> None:
+        registry.stop()
+        if archiver is not None:
+            archiver.stop()
+        if fanout is not None:
+            fanout.stop()
+
+    settings = config.get('daemon') or {}
+    daemon = Daemon(
+        clients,
+        host=host or settings.get('host', '127.0.0.1'),
+        port=int(port if port is not None else settings.get('port', 8765)),
+        logon_on_start=bool(settings.get('logon_on_start', True)),
+        on_shutdown=shutdown,
+        metrics=metrics,
+    )
+    asyncio.run(daemon.run())
+
+def main(argv: Optional[List[str]] = None) -> None:
     """
     Main function to initialize and start the FIX clients.
     """
-    config_path = "config.yaml"
-    clients = load_clients(config_path)
+    parser = argparse.ArgumentParser(description="FIX drop copy client.")
+    parser.add_argument('--config', default="config.yaml", help="Path to config.yaml")
+    parser.add_argument('--daemon', action='store_true', help="Run headless with the local control API instead of the menu")
+    parser.add_argument('--control-host', default=None, help="Control API address (daemon mode)")
+    parser.add_argument('--control-port', type=int, default=None, help="Control API port (daemon mode)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Run headless with the sessions split across this many processes")
+    args = parser.parse_args(argv)
+
+    if args.workers is not None:
+        run_supervisor(args.config, args.workers)
+        return
+    if args.daemon:
+        run_daemon(args.config, args.control_host, args.control_port)
+        return
+
+    config_path = args.config
+    config = read_config(config_path)
+    if config is None:
+        return
+    clients = []
+    metrics = create_metrics(config)
+    fanout = create_fanout(config)
+    registry = create_registry(config_path, clients, config=config, metrics=metrics, fanout=fanout)
     if not clients:
         logging.error("No clients loaded. Exiting.")
+        if registry is not None:
+            registry.stop()
+        if fanout is not None:
+            fanout.stop()
         return
 
+    metrics_server = None
+    if metrics is not None:
+        metrics_settings = config.get('metrics') or {}
+        metrics_server = MetricsServer(metrics, metrics_settings.get('host', '127.0.0.1'),
+                                       int(metrics_settings.get('port', 9108)))
+        metrics_server.start()
+    archiver = create_archiver(config)
     try:
-        main_menu(*clients)
+        main_menu(clients)
     except Exception as e:
         logging.error(f"An error occurred in the main menu: {e}")
+    finally:
+        registry.stop()
+        if metrics_server is not None:
+            metrics_server.stop()
+        if archiver is not None:
+            archiver.stop()
+        if fanout is not None:
+            fanout.stop()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,397 @@
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import ctypes
+import logging
+import argparse
+import platform
+import multiprocessing
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Set
+from .log_index import _field, index_path, parse_sending_time, parse_time_arg
+
+ARCHIVE_SUFFIX = '.gz'
+FRAMES_SUFFIX = '.frames'
+
+# Closed segments: dated files from an earlier day, segments sealed by JournalFile
+# (name.20240717-153000.log) and QuickFIX FileLog backups (prefix.messages.backup.3.log)
+_DATED = re.compile(r'^(\d{4}-\d{2}-\d{2})_')
+_SEALED = re.compile(r'\.\d{8}-\d{6}(-\d+)?\.log$')
+_BACKUP = re.compile(r'\.backup\.\d+\.log$')
+
+_SENDER = b'\x0149='
+_TARGET = b'\x0156='
+_SEQNUM = b'\x0134='
+_SENDING_TIME = b'\x0152='
+
+# ioprio_set syscall numbers; the idle I/O class only gets the disk when nothing else wants it
+_IOPRIO_SET = {'x86_64': 251, 'aarch64': 30, 'i686': 289, 'armv7l': 314}
+_IOPRIO_WHO_PROCESS, _IOPRIO_CLASS_IDLE, _IOPRIO_CLASS_SHIFT = 1, 3, 13
+
+
+def archive_path(log_path: str) -> str:
+    return log_path + ARCHIVE_SUFFIX
+
+
+def frames_path(archive: str) -> str:
+    return archive + FRAMES_SUFFIX
+
+
+def is_closed(name: str, today: Optional[date] = None) -> bool:
+    """
+    Whether a log file name marks a segment that is no longer written to.
+
+    Live files (communal_*.log, today's dated files, QuickFIX *.current.log
+    and store files) are never candidates, whatever their age.
+    """
+    if not name.endswith('.log'):
+        return False
+    dated = _DATED.match(name)
+    if dated:
+        return dated.group(1) < (today or date.today()).isoformat()
+    return bool(_SEALED.search(name) or _BACKUP.search(name))
+
+
+def open_files() -> Optional[Set[str]]:
+    """
+    Real paths of the files any process readable here holds open, or None where
+    /proc is not available.
+
+    A dated log from an earlier day stays open until its writer logs again after
+    midnight, and the archiver runs in a process of its own, so it has to ask
+    the system rather than the writers.
+    """
+    if not os.path.isdir('/proc/self/fd'):
+        return None
+    held = set()
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        fd_dir = f'/proc/{pid}/fd'
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue  # exited, or another user's process
+        for fd in fds:
+            try:
+                held.add(os.readlink(os.path.join(fd_dir, fd)))
+            except OSError:
+                pass
+    return held
+
+
+def _session(line: bytes) -> Optional[str]:
+    sender, target = _field(line, _SENDER, 0, len(line)), _field(line, _TARGET, 0, len(line))
+    if sender is None or target is None:
+        return None
+    return f"{sender.decode('latin-1')}->{target.decode('latin-1')}"
+
+
+def _frame_entry(lines: List[bytes], offset: int, length: int, raw_offset: int, raw_length: int) -> dict:
+    first_time = last_time = None
+    sessions: Dict[str, List[int]] = {}
+    for line in lines:
+        sending_time = _field(line, _SENDING_TIME, 0, len(line))
+        ms = parse_sending_time(sending_time) if sending_time else 0
+        if ms:
+            first_time = ms if first_time is None else min(first_time, ms)
+            last_time = ms if last_time is None else max(last_time, ms)
+        seqnum = _field(line, _SEQNUM, 0, len(line))
+        session = _session(line)
+        if session is not None and seqnum and seqnum.isdigit():
+            seq = int(seqnum)
+            bounds = sessions.get(session)
+            if bounds is None:
+                sessions[session] = [seq, seq]
+            else:
+                bounds[0], bounds[1] = min(bounds[0], seq), max(bounds[1], seq)
+    return {
+        'offset': offset, 'length': length, 'raw_offset': raw_offset, 'raw_length': raw_length,
+        'lines': len(lines), 'first_time': first_time, 'last_time': last_time, 'sessions': sessions,
+    }
+
+
+def archive_file(path: str, frame_bytes: int = 1 << 20, max_bytes_per_second: Optional[float] = None,
+                 keep_source: bool = False, level: int = 6) -> str:
+    """
+    Compress a closed log into independently decompressible gzip frames plus a frame index.
+
+    Each frame is a complete gzip member holding whole lines, so the archive
+    is also an ordinary .gz file (zcat works), while readers can seek to and
+    inflate single frames. The frame index (`<archive>.frames`, JSON)
+    records each frame's offsets, SendingTime range and MsgSeqNum range per
+    session. Both files are written under temporary names and renamed when
+    complete; only then is the source (and its .idx sidecar) removed.
+
+    Args:
+        path (str): The log to archive.
+        frame_bytes (int): Uncompressed bytes per frame.
+        max_bytes_per_second (float): Read throttle, so archiving never saturates the disk.
+        keep_source (bool): Keep the original log after archiving.
+        level (int): gzip compression level.
+
+    Returns:
+        str: Path of the archive.
+    """
+    target = archive_path(path)
+    partial = target + '.partial'
+    frames = []
+    started = time.monotonic()
+    raw_offset = offset = 0
+    with open(path, 'rb') as source, open(partial, 'wb') as out:
+        while True:
+            data = source.read(frame_bytes)
+            if not data:
+                break
+            if not data.endswith(b'\n'):
+                data += source.readline()  # frames hold whole lines
+            lines = [line for line in data.split(b'\n') if line]
+            compressed = gzip.compress(data, compresslevel=level, mtime=0)
+            out.write(compressed)
+            frames.append(_frame_entry(lines, offset, len(compressed), raw_offset, len(data)))
+            offset += len(compressed)
+            raw_offset += len(data)
+            if max_bytes_per_second:
+                ahead = raw_offset / max_bytes_per_second - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+        out.flush()
+        os.fsync(out.fileno())
+    with open(frames_path(partial), 'w') as f:
+        json.dump({'version': 1, 'source': os.path.basename(path), 'codec': 'gzip', 'frames': frames}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(frames_path(partial), frames_path(target))
+    os.replace(partial, target)
+    if not keep_source:
+        os.remove(path)
+        if os.path.exists(index_path(path)):
+            os.remove(index_path(path))
+    logging.info(f"Archived {path} ({raw_offset} bytes) into {len(frames)} frames, {offset} bytes")
+    return target
+
+
+def archive_pass(directories: List[str], min_age: float = 300.0, today: Optional[date] = None, **options) -> List[str]:
+    """
+    Archive every closed segment in `directories` not modified for `min_age` seconds
+    and no longer held open by any process.
+
+    Returns:
+        List[str]: The archives written.
+    """
+    written = []
+    now = time.time()
+    held = open_files()
+    for directory in directories:
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError as e:
+            logging.error(f"Cannot list {directory} for archiving: {e}")
+            continue
+        for name in names:
+            path = os.path.join(directory, name)
+            if not is_closed(name, today) or os.path.exists(archive_path(path)):
+                continue
+            try:
+                if now - os.path.getmtime(path) < min_age:
+                    continue
+                if held is not None and os.path.realpath(path) in held:
+                    logging.info(f"Not archiving {path}: still open")
+                    continue
+                written.append(archive_file(path, **options))
+            except OSError as e:
+                logging.error(f"Error archiving {path}: {e}")
+    return written
+
+
+def lower_priority() -> None:
+    """
+    Drop this process to the lowest CPU priority and, on Linux, to the idle I/O class.
+    """
+    try:
+        os.nice(19)
+    except OSError as e:
+        logging.warning(f"Cannot lower the archiver's CPU priority: {e}")
+    number = _IOPRIO_SET.get(platform.machine())
+    if sys.platform.startswith('linux') and number is not None:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.syscall(number, _IOPRIO_WHO_PROCESS, 0, _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT) != 0:
+            logging.warning(f"Cannot set the archiver's I/O priority: errno {ctypes.get_errno()}")
+
+
+def _run_archiver(directories: List[str], interval: float, min_age: float, options: dict, stop) -> None:
+    lower_priority()
+    while not stop.is_set():
+        try:
+            archive_pass(directories, min_age, **options)
+        except Exception as e:
+            logging.error(f"Archiver pass failed: {e}")
+        stop.wait(interval)
+
+
+class Archiver:
+    def __init__(self, directories: List[str], interval: float = 3600.0, min_age: float = 300.0,
+                 frame_bytes: int = 1 << 20, max_bytes_per_second: Optional[float] = 20e6,
+                 keep_source: bool = False):
+        """
+        Background archiver of closed log segments.
+
+        It runs in its own process at nice 19 and in the idle I/O class, so it
+        never holds the GIL of the process running the sessions and only gets
+        CPU and disk time nobody else wants. Reads are additionally throttled
+        to `max_bytes_per_second`.
+
+        Args:
+            directories (List[str]): Directories to sweep, e.g. human_readable_logs and the FileLogPath.
+            interval (float): Seconds between sweeps.
+            min_age (float): Seconds a closed segment must have been left untouched.
+            frame_bytes (int): Uncompressed bytes per frame.
+            max_bytes_per_second (float): Read throttle; None for no limit.
+            keep_source (bool): Keep the original logs after archiving.
+        """
+        self.directories = [os.path.abspath(directory) for directory in directories]
+        self.interval = interval
+        self.min_age = min_age
+        self.options = {'frame_bytes': frame_bytes, 'max_bytes_per_second': max_bytes_per_second,
+                        'keep_source': keep_source}
+        self._context = multiprocessing.get_context('spawn')
+        self._stop = self._context.Event()
+        self._process = None
+
+    def start(self) -> None:
+        self._process = self._context.Process(
+            target=_run_archiver, name='archiver', daemon=True,
+            args=(self.directories, self.interval, self.min_age, self.options, self._stop)
+        )
+        self._process.start()
+        logging.info(f"Archiver started for {', '.join(self.directories)}")
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """
+        Stop after the file being archived, if any, is finished.
+        """
+        if self._process is None:
+            return
+        self._stop.set()
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
+
+
+class ArchiveReader:
+    def __init__(self, path: str):
+        """
+        Reads an archive written by archive_file, inflating only the frames a query needs.
+
+        Args:
+            path (str): The archive (.gz); its frame index is read from `<path>.frames`.
+        """
+        self.path = path
+        with open(frames_path(path)) as f:
+            self.frames = json.load(f)['frames']
+        self.frames_read = 0
+        self._file = open(path, 'rb')
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def read_frame(self, i: int) -> bytes:
+        frame = self.frames[i]
+        self._file.seek(frame['offset'])
+        self.frames_read += 1
+        return gzip.decompress(self._file.read(frame['length']))
+
+    def _lines(self, frame_numbers) -> Iterator[bytes]:
+        for i in frame_numbers:
+            for line in self.read_frame(i).split(b'\n'):
+                if line:
+                    yield line
+
+    def iter_lines(self) -> Iterator[bytes]:
+        return self._lines(range(len(self.frames)))
+
+    def time_range(self, begin_ms: int, end_ms: int) -> Iterator[bytes]:
+        """
+        Messages with SendingTime in [begin_ms, end_ms] (ms since the epoch, UTC).
+        """
+        needed = [i for i, frame in enumerate(self.frames)
+                  if frame['first_time'] is not None and frame['first_time'] <= end_ms
+                  and frame['last_time'] >= begin_ms]
+        for line in self._lines(needed):
+            sending_time = _field(line, _SENDING_TIME, 0, len(line))
+            if sending_time and begin_ms <= parse_sending_time(sending_time) <= end_ms:
+                yield line
+
+    def seqnums(self, sender_comp_id: str, target_comp_id: str, begin: int, end: int) -> Iterator[bytes]:
+        """
+        Messages of one session direction with MsgSeqNum in [begin, end].
+        """
+        session = f"{sender_comp_id}->{target_comp_id}"
+        needed = [i for i, frame in enumerate(self.frames)
+                  if session in frame['sessions']
+                  and frame['sessions'][session][0] <= end and frame['sessions'][session][1] >= begin]
+        for line in self._lines(needed):
+            seqnum = _field(line, _SEQNUM, 0, len(line))
+            if seqnum and seqnum.isdigit() and begin <= int(seqnum) <= end and _session(line) == session:
+                yield line
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point: python -m src.archive {run,file,time,seq} ...
+    """
+    parser = argparse.ArgumentParser(description="Archive closed FIX log segments and query the archives.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="Archive every closed segment in the given directories once")
+    run.add_argument('directories', nargs='+')
+    run.add_argument('--min-age', type=float, default=300.0, help="Seconds a segment must be untouched")
+    run.add_argument('--keep-source', action='store_true')
+    single = commands.add_parser('file', help="Archive one log, closed or not")
+    single.add_argument('log')
+    single.add_argument('--keep-source', action='store_true')
+    times = commands.add_parser('time', help="Read a SendingTime range (YYYYMMDD-HH:MM:SS or epoch ms)")
+    times.add_argument('archive')
+    times.add_argument('begin')
+    times.add_argument('end')
+    seq = commands.add_parser('seq', help="Read a MsgSeqNum range of one session direction")
+    seq.add_argument('archive')
+    seq.add_argument('sender')
+    seq.add_argument('target')
+    seq.add_argument('begin', type=int)
+    seq.add_argument('end', type=int)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'run':
+        lower_priority()
+        for path in archive_pass(args.directories, args.min_age, keep_source=args.keep_source):
+            print(path)
+        return
+    if args.command == 'file':
+        print(archive_file(args.log, keep_source=args.keep_source))
+        return
+
+    reader = ArchiveReader(args.archive)
+    try:
+        if args.command == 'time':
+            found = reader.time_range(parse_time_arg(args.begin), parse_time_arg(args.end))
+        else:
+            found = reader.seqnums(args.sender, args.target, args.begin, args.end)
+        out = sys.stdout.buffer
+        for line in found:
+            out.write(line + b'\n')
+        out.flush()
+        print(f"{reader.frames_read} of {len(reader)} frames read", file=sys.stderr)
+    finally:
+        reader.close()
+
+
+if __name__ == '__main__':
+    main()
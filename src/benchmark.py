@@ -0,0 +1,512 @@
+import os
+import sys
+import json
+import time
+import socket
+import logging
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+import multiprocessing
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import quickfix as fix
+import quickfix44 as fix44
+from .fix_application import FIXApplication
+from .fix_client import FIXClient
+from .metrics import LatencyHistogram, Metrics
+
+DATA_DICTIONARY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'FIX44.xml')
+BROKER_COMP_ID = 'BROKER'
+
+SETTINGS_DEFAULT = """
+[DEFAULT]
+ConnectionType={connection_type}
+FileStorePath={workdir}/store
+FileLogPath={workdir}/log
+StartTime=00:00:00
+EndTime=00:00:00
+HeartBtInt=30
+ReconnectInterval=1
+UseDataDictionary=Y
+DataDictionary={data_dictionary}
+ResetOnLogon=Y
+ResetOnLogout=Y
+ResetOnDisconnect=Y
+PersistMessages=Y
+"""
+
+ACCEPTOR_SESSION = """
+[SESSION]
+BeginString=FIX.4.4
+SenderCompID={broker}
+TargetCompID={client}
+SocketAcceptPort={port}
+"""
+
+CLIENT_SESSION = """
+[SESSION]
+BeginString=FIX.4.4
+SenderCompID={client}
+TargetCompID={broker}
+RawData=benchmark
+SocketConnectPort={port}
+SocketConnectHostPrimary=127.0.0.1
+"""
+
+QUANTILES = {'p50': 0.5, 'p99': 0.99, 'p999': 0.999}
+
+
+def client_comp_id(index: int) -> str:
+    return f"BENCH{index:04d}"
+
+
+def write_configs(workdir: str, sessions: int, port: int) -> List[str]:
+    """
+    Write the acceptor's config and one config per client session.
+
+    Returns:
+        List[str]: The acceptor config path, followed by the client config paths.
+    """
+    acceptor = SETTINGS_DEFAULT.format(connection_type='acceptor', workdir=f"{workdir}/acceptor",
+                                       data_dictionary=DATA_DICTIONARY)
+    paths = [os.path.join(workdir, 'acceptor.cfg')]
+    for index in range(sessions):
+        client = client_comp_id(index)
+        acceptor += ACCEPTOR_SESSION.format(broker=BROKER_COMP_ID, client=client, port=port)
+        path = os.path.join(workdir, f"{client}.cfg")
+        with open(path, 'w') as f:
+            f.write(SETTINGS_DEFAULT.format(connection_type='initiator', workdir=f"{workdir}/{client}",
+                                            data_dictionary=DATA_DICTIONARY))
+            f.write(CLIENT_SESSION.format(client=client, broker=BROKER_COMP_ID, port=port))
+        paths.append(path)
+    with open(paths[0], 'w') as f:
+        f.write(acceptor)
+    return paths
+
+
+class BenchmarkAcceptor(fix.Application):
+    def __init__(self):
+        """
+        Local stand-in for the broker: accepts every logon and sends
+        ExecutionReports on demand. ResendRequests are answered by QuickFIX
+        itself from the message store, the same way a real counterparty replays.
+        """
+        super().__init__()
+        self.sessions: Dict[str, fix.SessionID] = {}
+        self._lock = threading.Lock()
+
+    def onCreate(self, sessionID: fix.SessionID) -> None:
+        pass
+
+    def onLogon(self, sessionID: fix.SessionID) -> None:
+        with self._lock:
+            self.sessions[sessionID.toString()] = fix.SessionID(
+                sessionID.getBeginString().getValue(), sessionID.getSenderCompID().getValue(),
+                sessionID.getTargetCompID().getValue()
+            )
+
+    def onLogout(self, sessionID: fix.SessionID) -> None:
+        with self._lock:
+            self.sessions.pop(sessionID.toString(), None)
+
+    def toAdmin(self, message: fix.Message, sessionID: fix.SessionID) -> None:
+        pass
+
+    def fromAdmin(self, message: fix.Message, sessionID: fix.SessionID) -> None:
+        pass
+
+    def toApp(self, message: fix.Message, sessionID: fix.SessionID) -> None:
+        pass
+
+    def fromApp(self, message: fix.Message, sessionID: fix.SessionID) -> None:
+        pass
+
+    def blast(self, count: int) -> int:
+        """
+        Send `count` ExecutionReports to every logged on session, one sending thread per session.
+
+        Returns:
+            int: The number of messages sent.
+        """
+        with self._lock:
+            sessions = list(self.sessions.values())
+        sent = [0] * len(sessions)
+
+        def send(index: int, session_id: fix.SessionID) -> None:
+            try:
+                message = execution_report()
+                for sequence in range(count):
+                    message.setField(fix.ExecID(f"E{sequence}"))
+                    message.setField(fix.ClOrdID(f"C{sequence % 1000}"))
+                    message.setField(fix.OrderID(f"O{sequence % 1000}"))
+                    fix.Session.sendToTarget(message, session_id)
+                    sent[index] += 1
+            except Exception as e:
+                logging.error(f"Benchmark acceptor stopped sending to {session_id}: {e}")
+
+        threads = [threading.Thread(target=send, args=(i, s), daemon=True) for i, s in enumerate(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(sent)
+
+
+def execution_report() -> fix44.ExecutionReport:
+    """
+    A partial fill that passes FIX44.xml validation and exercises the whole
+    ExecutionReport path: order store, positions and the execution report log.
+    """
+    message = fix44.ExecutionReport()
+    for field in (fix.OrderID("O0"), fix.ClOrdID("C0"), fix.ExecID("E0"), fix.ExecType(fix.ExecType_TRADE),
+                  fix.OrdStatus(fix.OrdStatus_PARTIALLY_FILLED), fix.Account("ACC1"), fix.Symbol("PETR4"),
+                  fix.Side(fix.Side_BUY), fix.OrderQty(1000), fix.LastQty(100), fix.LastPx(25.5),
+                  fix.LeavesQty(900), fix.CumQty(100), fix.AvgPx(25.5), fix.TransactTime()):
+        message.setField(field)
+    return message
+
+
+def _run_acceptor(config_path: str, connection) -> None:
+    """
+    Acceptor process: serves `('blast', count)` and `('stop',)` commands over a pipe.
+    """
+    application = BenchmarkAcceptor()
+    settings = fix.SessionSettings(config_path)
+    acceptor = fix.SocketAcceptor(application, fix.MemoryStoreFactory(), settings)
+    acceptor.start()
+    connection.send('ready')
+    try:
+        while True:
+            command = connection.recv()
+            if command[0] == 'blast':
+                connection.send(application.blast(command[1]))
+            elif command[0] == 'sessions':
+                connection.send(len(application.sessions))
+            else:
+                break
+    finally:
+        acceptor.stop()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _resources() -> Dict[str, float]:
+    rss = 0
+    try:
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        pass
+    return {
+        'cpu': time.process_time(),
+        'rss': rss,
+        'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,  # KiB on Linux
+        'wall': time.perf_counter(),
+    }
+
+
+def _latency(before: LatencyHistogram, after: LatencyHistogram) -> Dict[str, float]:
+    """
+    Quantiles, in microseconds, of the values recorded between two snapshots.
+    """
+    window = LatencyHistogram()
+    window.counts = [a - b for a, b in zip(after.counts, before.counts)]
+    window.count = after.count - before.count
+    window.total = after.total - before.total
+    window.max = after.max
+    result = {name: window.quantile(q) / 1e3 for name, q in QUANTILES.items()}
+    result['mean'] = window.total / window.count / 1e3 if window.count else 0.0
+    return result
+
+
+class Scenario:
+    def __init__(self, sessions: int, messages: int, resend: int, workdir: str,
+                 log_level: int = logging.INFO, timeout: float = 300.0):
+        """
+        One benchmark run: a local acceptor, `sessions` FIXClients logged on to it,
+        `messages` ExecutionReports per session, then a ResendRequest replay of
+        the last `resend` of them.
+
+        Throughput and CPU are measured in this process, which runs only the
+        clients; the acceptor runs in a child process.
+
+        Args:
+            sessions (int): Number of client sessions.
+            messages (int): ExecutionReports sent to each session.
+            resend (int): Seqnums replayed per session through a ResendRequest; 0 skips the replay.
+            workdir (str): Directory for configs, stores and logs.
+            log_level (int): Level of the clients' human readable logs.
+            timeout (float): Seconds to wait for each phase.
+        """
+        self.sessions = sessions
+        self.messages = messages
+        self.resend = min(resend, messages)
+        self.workdir = workdir
+        self.log_level = log_level
+        self.timeout = timeout
+        self.metrics = Metrics()
+        self.clients: List[FIXClient] = []
+
+    def run(self) -> dict:
+        os.makedirs(self.workdir, exist_ok=True)
+        os.chdir(self.workdir)  # the applications log to ./human_readable_logs
+        port = free_port()
+        acceptor_config, *client_configs = write_configs(self.workdir, self.sessions, port)
+        context = multiprocessing.get_context('spawn')
+        connection, child_connection = context.Pipe()
+        acceptor = context.Process(target=_run_acceptor, args=(acceptor_config, child_connection), daemon=True)
+        acceptor.start()
+        try:
+            if not connection.poll(30) or connection.recv() != 'ready':
+                raise RuntimeError("Benchmark acceptor did not start")
+            idle = _resources()
+            logon = self._logon(client_configs, connection)
+            result = {
+                'sessions': self.sessions,
+                'messages_per_session': self.messages,
+                'logon_seconds': logon,
+                'idle_rss_mb': idle['rss'] / 2 ** 20,
+                'execution_reports': self._measure(lambda: connection.send(('blast', self.messages)),
+                                                   self.messages * self.sessions, acceptor=connection),
+            }
+            if self.resend:
+                result['resend_replay'] = self._measure(self._request_replays, self.resend * self.sessions,
+                                                        replay=True)
+            return result
+        finally:
+            for client in self.clients:
+                try:
+                    client.logout()
+                except Exception as e:
+                    logging.error(f"Error stopping benchmark client {client.session_id}: {e}")
+            connection.send(('stop',))
+            acceptor.join(10)
+            if acceptor.is_alive():
+                acceptor.terminate()
+
+    def _logon(self, client_configs: List[str], connection) -> float:
+        started = time.perf_counter()
+        for path in client_configs:
+            application = FIXApplication('benchmark', log_level=self.log_level, metrics=self.metrics)
+            self.clients.append(FIXClient(path, application, metrics=self.metrics, logon_timeout=30.0))
+        threads = [threading.Thread(target=client.logon, daemon=True) for client in self.clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if not all(client.application.wait_for_logon(0) for client in self.clients):
+            raise RuntimeError("Not every benchmark session logged on")
+        # The acceptor's onLogon can trail the client's by a moment
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            connection.send(('sessions',))
+            if connection.recv() == self.sessions:
+                break
+            time.sleep(0.05)
+        return time.perf_counter() - started
+
+    def _request_replays(self) -> None:
+        """
+        Ask the acceptor to replay every client's last `resend` seqnums through the
+        client's own paced ResendRequests.
+        """
+        for client in self.clients:
+            end = fix.Session.lookupSession(client.session_id).getExpectedTargetNum() - 1
+            client.send_resend_request(end - self.resend + 1, end)
+
+    def _received(self) -> int:
+        return self.metrics.callback_stats('fromApp').messages.get(fix.MsgType_ExecutionReport, 0)
+
+    def _measure(self, start, expected: int, replay: bool = False, acceptor=None) -> dict:
+        """
+        Run `start`, then wait until `expected` more ExecutionReports have reached fromApp.
+
+        With `acceptor`, the count the acceptor reports having sent replaces
+        `expected` once it arrives, so a failed send ends the wait early.
+
+        With `replay`, the wait ends once every client's gap tracker has seen its
+        last resend chunk acknowledged. QuickFIX drops the resent copies of
+        seqnums it already has before fromApp, so `expected` is then the number
+        of seqnums replayed rather than callbacks, and the latency is that of
+        fromAdmin, which sees the replay's SequenceResets and marker Heartbeats.
+        """
+        callback = 'fromAdmin' if replay else 'fromApp'
+        received_before = self._received()
+        latency_before = self.metrics.callback_stats(callback)
+        before = _resources()
+        start()
+        deadline = time.monotonic() + self.timeout
+        while replay or self._received() - received_before < expected:
+            if acceptor is not None and acceptor.poll():
+                sent = acceptor.recv()
+                if sent < expected:
+                    logging.error(f"Benchmark acceptor sent {sent} of {expected} messages")
+                    expected = sent
+                acceptor = None
+                continue
+            if replay and all(client.gap_tracker.pending() == 0 for client in self.clients):
+                break
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Timed out with {self._received() - received_before} of {expected} messages")
+            time.sleep(0.005)
+        after = _resources()
+        drain_started = time.perf_counter()
+        writers = [writer for client in self.clients
+                   for writer in (client.application.message_writer, client.application.execution_report_writer)]
+        while any(writer.pending() for writer in writers) and time.monotonic() < deadline:
+            time.sleep(0.005)
+        drain = time.perf_counter() - drain_started
+        received = expected if replay else self._received() - received_before
+        seconds = after['wall'] - before['wall']
+        return {
+            'messages': received,
+            'seconds': seconds,
+            'messages_per_second': received / seconds if seconds else 0.0,
+            'callback_latency_us': _latency(latency_before, self.metrics.callback_stats(callback)),
+            'cpu_seconds': after['cpu'] - before['cpu'],
+            'cpu_percent': 100 * (after['cpu'] - before['cpu']) / seconds if seconds else 0.0,
+            'rss_mb': after['rss'] / 2 ** 20,
+            'peak_rss_mb': after['peak_rss'] / 2 ** 20,
+            'writer_drain_seconds': drain,
+        }
+
+
+def _run_scenario(arguments: dict, connection) -> None:
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        connection.send(Scenario(**arguments).run())
+    except Exception as e:
+        connection.send(e)
+
+
+def run_suite(session_counts: List[int], messages: int, resend: int, workdir: Optional[str] = None,
+              log_level: int = logging.INFO, timeout: float = 300.0) -> dict:
+    """
+    Run one scenario per session count, each in a fresh process so CPU and RSS are its own.
+
+    Returns:
+        dict: Environment details and one result per session count, ready to be saved as JSON.
+    """
+    workdir = workdir or tempfile.mkdtemp(prefix='fix-benchmark-')
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for sessions in session_counts:
+        arguments = {
+            'sessions': sessions, 'messages': messages, 'resend': resend, 'log_level': log_level,
+            'workdir': os.path.join(os.path.abspath(workdir), f"sessions-{sessions}"), 'timeout': timeout,
+        }
+        # A plain process rather than a pool worker: pool workers may not start the acceptor process
+        connection, child_connection = context.Pipe()
+        process = context.Process(target=_run_scenario, args=(arguments, child_connection))
+        process.start()
+        result = connection.recv()
+        process.join()
+        if isinstance(result, Exception):
+            raise result
+        results.append(result)
+    return {
+        'commit': _git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'log_level': logging.getLevelName(log_level),
+        'results': results,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, current: dict) -> List[str]:
+    """
+    Lines comparing throughput and p99 latency per session count against a baseline run.
+    """
+    lines = []
+    previous = {result['sessions']: result for result in baseline['results']}
+    for result in current['results']:
+        old = previous.get(result['sessions'])
+        if old is None:
+            continue
+        for phase in ('execution_reports', 'resend_replay'):
+            if phase not in result or phase not in old:
+                continue
+            rate, old_rate = result[phase]['messages_per_second'], old[phase]['messages_per_second']
+            p99, old_p99 = result[phase]['callback_latency_us']['p99'], old[phase]['callback_latency_us']['p99']
+            lines.append(
+                f"{result['sessions']:>5} sessions {phase:<17} "
+                f"{rate:>10.0f} msg/s ({_change(rate, old_rate)})  p99 {p99:>8.1f}us ({_change(p99, old_p99)})"
+            )
+    return lines
+
+
+def _change(value: float, old: float) -> str:
+    return f"{100 * (value - old) / old:+.1f}%" if old else "n/a"
+
+
+def format_results(suite: dict) -> List[str]:
+    lines = [f"commit {suite['commit']}, {suite['cpus']} CPUs, Python {suite['python']}"]
+    for result in suite['results']:
+        for phase in ('execution_reports', 'resend_replay'):
+            if phase not in result:
+                continue
+            r = result[phase]
+            latency = r['callback_latency_us']
+            lines.append(
+                f"{result['sessions']:>5} sessions {phase:<17} {r['messages']:>8} msgs {r['messages_per_second']:>10.0f} msg/s"
+                f"  p50 {latency['p50']:.1f}us p99 {latency['p99']:.1f}us p999 {latency['p999']:.1f}us"
+                f"  cpu {r['cpu_percent']:.0f}%  rss {r['rss_mb']:.0f}MB"
+            )
+    return lines
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point: python -m src.benchmark [options]
+    """
+    parser = argparse.ArgumentParser(description="End-to-end throughput benchmark against a local FIX acceptor.")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4], help="Session counts to run")
+    parser.add_argument('--messages', type=int, default=10000, help="ExecutionReports per session")
+    parser.add_argument('--resend', type=int, default=2000, help="Seqnums replayed per session (0: no replay)")
+    parser.add_argument('--log-level', default='INFO', help="Level of the clients' human readable logs")
+    parser.add_argument('--workdir', help="Directory for configs, stores and logs (default: a temp dir)")
+    parser.add_argument('--timeout', type=float, default=300.0, help="Seconds to wait for each phase")
+    parser.add_argument('--output', help="Save the results as JSON")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    args = parser.parse_args(argv)
+
+    log_level = logging.getLevelName(args.log_level.upper())
+    if not isinstance(log_level, int):
+        parser.error(f"unknown log level {args.log_level}")
+    suite = run_suite(args.sessions, args.messages, args.resend, args.workdir, log_level, args.timeout)
+    for line in format_results(suite):
+        print(line)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"against {args.baseline} (commit {baseline.get('commit')}):")
+        for line in compare(baseline, suite):
+            print(line)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(suite, f, indent=2)
+        print(f"saved {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+import os
+import sys
+import mmap
+import time
+import zlib
+import struct
+import logging
+import argparse
+from typing import Dict, Iterable, Iterator, List, Optional
+from .journal import JournalFile, shared_journal
+from .log_index import _field, parse_sending_time
+from .log_parser import NEWLINE, MessageView
+
+# File header: magic and format version, written once at the start of every segment
+FILE_HEADER = b'FIXJ\x01\x00\x00\x00'
+# Record header: raw length, CRC-32 of session and raw bytes, receive time (ns since the
+# epoch), direction, session id length; followed by the session id and the raw message
+RECORD = struct.Struct('<IIqBH')
+
+INCOMING, OUTGOING, UNKNOWN = 0, 1, 2
+DIRECTIONS = {INCOMING: 'in', OUTGOING: 'out', UNKNOWN: '?'}
+
+
+def encode_record(raw: bytes, timestamp_ns: int, direction: int, session: bytes) -> bytes:
+    """
+    Frame one message as a binary journal record.
+
+    Args:
+        raw (bytes): The message as sent or received; may contain newlines.
+        timestamp_ns (int): Receive (or send) time, nanoseconds since the epoch.
+        direction (int): INCOMING, OUTGOING or UNKNOWN.
+        session (bytes): The session id, e.g. b'FIX.4.4:CLIENT->BROKER'.
+    """
+    return RECORD.pack(len(raw), zlib.crc32(raw, zlib.crc32(session)), timestamp_ns, direction,
+                       len(session)) + session + raw
+
+
+class JournalRecord:
+    __slots__ = ('buf', 'offset', 'start', 'end', 'timestamp_ns', 'direction', 'session')
+
+    def __init__(self, buf, offset: int, start: int, end: int, timestamp_ns: int, direction: int, session: str):
+        """
+        One record of a binary journal; the message is not copied out of the mapped file.
+
+        Args:
+            buf: The mapped journal.
+            offset (int): Offset of the record header.
+            start (int): Offset of the first byte of the message.
+            end (int): Offset just past the message.
+            timestamp_ns (int): Receive time, nanoseconds since the epoch.
+            direction (int): INCOMING, OUTGOING or UNKNOWN.
+            session (str): The session id.
+        """
+        self.buf = buf
+        self.offset = offset
+        self.start = start
+        self.end = end
+        self.timestamp_ns = timestamp_ns
+        self.direction = direction
+        self.session = session
+
+    @property
+    def raw(self) -> memoryview:
+        return memoryview(self.buf)[self.start:self.end]
+
+    def view(self) -> MessageView:
+        """
+        The message as a MessageView, for the same field access as LogParser gives on text logs.
+        """
+        return MessageView(self.buf, self.start, self.end)
+
+    def __repr__(self) -> str:
+        return (f"JournalRecord({self.session} {DIRECTIONS.get(self.direction, self.direction)} "
+                f"at {self.timestamp_ns}, {self.end - self.start} bytes)")
+
+
+class BinaryJournalReader:
+    def __init__(self, path: str, verify: bool = False):
+        """
+        Memory-maps a binary journal and iterates its records without copying them.
+
+        Framing is by length, so messages with newlines in free-text fields
+        read back intact. A record cut short by a crash ends the iteration
+        with a warning; with `verify`, so does a record whose CRC does not match.
+
+        Args:
+            path (str): The journal, e.g. human_readable_logs/2024-07-17_messages.current.fixj.
+            verify (bool): Check every record's CRC while reading.
+        """
+        self.path = path
+        self.verify = verify
+        self.truncated = False
+        self._sessions: Dict[bytes, str] = {}
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self.buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        if size and self.buf[:len(FILE_HEADER)] != FILE_HEADER:
+            self.close()
+            raise ValueError(f"{path} is not a binary journal")
+
+    def __iter__(self) -> Iterator[JournalRecord]:
+        buf, verify, sessions = self.buf, self.verify, self._sessions
+        unpack_from, header = RECORD.unpack_from, RECORD.size
+        end = len(buf)
+        pos = len(FILE_HEADER) if end else 0
+        while pos < end:
+            if pos + header > end:
+                self._torn(pos)
+                return
+            length, crc, timestamp_ns, direction, session_length = unpack_from(buf, pos)
+            start = pos + header + session_length
+            stop = start + length
+            if stop > end or (verify and zlib.crc32(buf[pos + header:stop]) != crc):
+                self._torn(pos)
+                return
+            key = buf[pos + header:start]
+            session = sessions.get(key)
+            if session is None:
+                session = sessions[key] = key.decode('latin-1')
+            yield JournalRecord(buf, pos, start, stop, timestamp_ns, direction, session)
+            pos = stop
+
+    def _torn(self, pos: int) -> None:
+        self.truncated = True
+        logging.warning(f"{self.path}: incomplete or corrupt record at offset {pos}; stopping there")
+
+    def views(self) -> Iterator[MessageView]:
+        for record in self:
+            yield MessageView(self.buf, record.start, record.end)
+
+    def close(self) -> None:
+        if isinstance(self.buf, mmap.mmap):
+            self.buf.close()
+        self._file.close()
+
+
+def open_journal(path_template: str, max_bytes: Optional[int] = None) -> JournalFile:
+    """
+    A JournalFile for binary records: every new segment starts with FILE_HEADER and there is no line index.
+
+    Like the text journals it is shared per path (see shared_journal), so
+    applications logging to the same directory do not write a second header
+    into the middle of each other's segment.
+    """
+    return shared_journal(path_template, max_bytes, header=FILE_HEADER)
+
+
+def to_text(path: str, output: str, index: bool = True) -> int:
+    """
+    Write the messages of a binary journal as a raw text log, one message per line.
+
+    Returns:
+        int: Messages written. Messages containing newlines are written as
+        they are, so they split lines exactly as they would in a text log.
+    """
+    reader = BinaryJournalReader(path)
+    journal = JournalFile(output, index=index)
+    count = 0
+    try:
+        records = []
+        for record in reader:
+            records.append(bytes(record.raw) + NEWLINE)
+            if len(records) == 4096:
+                journal.write(b''.join(records), records)
+                count += len(records)
+                records = []
+        if records:
+            journal.write(b''.join(records), records)
+            count += len(records)
+    finally:
+        journal.close()
+        reader.close()
+    return count
+
+
+def from_text(path: str, output: str, local_comp_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    Convert a raw text log into a binary journal.
+
+    Text logs carry no receive time, direction or session, so they are
+    derived from the message: the time is its SendingTime, and with
+    `local_comp_ids` a message from one of them is OUTGOING, one to them
+    INCOMING, with the session id seen from our side as QuickFIX names it.
+    Otherwise the direction is UNKNOWN and the session is SenderCompID->TargetCompID.
+
+    Returns:
+        int: Records written.
+    """
+    local = {comp_id.encode() for comp_id in local_comp_ids or ()}
+    journal = open_journal(output)
+    count = 0
+    try:
+        with open(path, 'rb') as f:
+            records = []
+            for line in f:
+                line = line.rstrip(b'\r\n')
+                if not line:
+                    continue
+                end = len(line)
+                begin = _field(line, b'8=', 0, end) or b''
+                sender = _field(line, b'\x0149=', 0, end) or b''
+                target = _field(line, b'\x0156=', 0, end) or b''
+                sending_time = _field(line, b'\x0152=', 0, end)
+                timestamp_ns = parse_sending_time(sending_time) * 1000000 if sending_time else 0
+                if sender in local:
+                    direction, session = OUTGOING, begin + b':' + sender + b'->' + target
+                elif target in local:
+                    direction, session = INCOMING, begin + b':' + target + b'->' + sender
+                else:
+                    direction, session = UNKNOWN, begin + b':' + sender + b'->' + target
+                records.append(encode_record(line, timestamp_ns, direction, session))
+                if len(records) == 4096:
+                    journal.write(b''.join(records))
+                    count += len(records)
+                    records = []
+            if records:
+                journal.write(b''.join(records))
+                count += len(records)
+    finally:
+        journal.close()
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point: python -m src.binary_journal {dump,to-text,from-text,scan} ...
+    """
+    parser = argparse.ArgumentParser(description="Read and convert binary FIX message journals.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    dump = commands.add_parser('dump', help="Print every record")
+    dump.add_argument('journal')
+    dump.add_argument('--verify', action='store_true', help="Check record CRCs")
+    text = commands.add_parser('to-text', help="Convert a binary journal to a raw text log")
+    text.add_argument('journal')
+    text.add_argument('output')
+    binary = commands.add_parser('from-text', help="Convert a raw text log to a binary journal")
+    binary.add_argument('log')
+    binary.add_argument('output')
+    binary.add_argument('--local', action='append', help="Our own CompID, to tell directions apart (repeatable)")
+    scan = commands.add_parser('scan', help="Count records and time a full pass")
+    scan.add_argument('journal')
+    scan.add_argument('--verify', action='store_true')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.command == 'to-text':
+        print(f"{to_text(args.journal, args.output)} messages written to {args.output}", file=sys.stderr)
+        return
+    if args.command == 'from-text':
+        print(f"{from_text(args.log, args.output, args.local)} records written to {args.output}", file=sys.stderr)
+        return
+
+    reader = BinaryJournalReader(args.journal, verify=args.verify)
+    try:
+        if args.command == 'scan':
+            started = time.perf_counter()
+            count = sum(1 for _ in reader)
+            elapsed = time.perf_counter() - started
+            print(f"{count} records in {elapsed:.3f}s ({count / elapsed if elapsed else 0:.0f} records/s)")
+            return
+        out = sys.stdout
+        for record in reader:
+            raw = bytes(record.raw).decode('latin-1').replace('\x01', '|')
+            out.write(f"{record.timestamp_ns} {record.session} {DIRECTIONS.get(record.direction, '?')} {raw}\n")
+    finally:
+        reader.close()
+
+
+if __name__ == '__main__':
+    main()
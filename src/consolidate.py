@@ -0,0 +1,248 @@
+import os
+import sys
+import heapq
+import logging
+import argparse
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+from .journal import JournalFile
+from .log_index import index_path
+from .log_parser import NEWLINE, SOH, _open_map, chunk_boundaries
+
+_SENDING_TIME = b'\x0152='
+_ORIG_SENDING_TIME = b'\x01122='
+_POSS_DUP = b'\x0143=Y\x01'
+_SEQNUM = b'\x0134='
+_SENDER = b'\x0149='
+_TARGET = b'\x0156='
+
+# (time, MsgSeqNum, SenderCompID, TargetCompID, PossDup)
+Key = Tuple[bytes, int, bytes, bytes, bool]
+
+
+def _field(line: bytes, pattern: bytes) -> bytes:
+    pos = line.find(pattern)
+    if pos < 0:
+        return b''
+    pos += len(pattern)
+    stop = line.find(SOH, pos)
+    return line[pos:stop if stop >= 0 else len(line)]
+
+
+def _time(value: bytes) -> bytes:
+    """
+    UTCTimestamp with the fraction padded to nanoseconds, so values of any precision compare as bytes.
+    """
+    return value[:17] + value[18:].ljust(9, b'0') if value else b''
+
+
+def merge_key(line: bytes) -> Key:
+    """
+    Sort key of one logged message: SendingTime, then MsgSeqNum.
+
+    A PossDup resend is placed by its OrigSendingTime, i.e. where the
+    original message sits, so the two end up next to each other and the
+    copy can be dropped without remembering anything else.
+    """
+    poss_dup = _POSS_DUP in line
+    sending_time = (poss_dup and _field(line, _ORIG_SENDING_TIME)) or _field(line, _SENDING_TIME)
+    seqnum = _field(line, _SEQNUM)
+    return (_time(sending_time), int(seqnum) if seqnum.isdigit() else 0,
+            _field(line, _SENDER), _field(line, _TARGET), poss_dup)
+
+
+class MergeStats:
+    __slots__ = ('inputs', 'runs', 'read', 'written', 'possdup_dropped', 'duplicates_dropped', 'out_of_order',
+                 'seconds')
+
+    def __init__(self, inputs: int = 0):
+        """
+        Counters of one consolidation.
+        """
+        self.inputs = inputs
+        self.runs = 0
+        self.read = 0
+        self.written = 0
+        self.possdup_dropped = 0
+        self.duplicates_dropped = 0
+        self.out_of_order = 0
+        self.seconds = 0.0
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (f"MergeStats({self.read} read, {self.written} written, {self.possdup_dropped} PossDup and "
+                f"{self.duplicates_dropped} duplicates dropped, {self.out_of_order} out of order)")
+
+
+def _read_sorted(path: str, stats: MergeStats) -> Iterator[Tuple[Key, bytes]]:
+    """
+    Stream (key, line) pairs from a log that is expected to be in key order already.
+    """
+    previous = None
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.rstrip(b'\r\n')
+            if not line:
+                continue
+            key = merge_key(line)
+            if previous is not None and key < previous:
+                stats.out_of_order += 1
+            previous = key
+            yield key, line
+
+
+def _sort_run(path: str, start: int, end: int, run_path: str) -> int:
+    """
+    Worker: sort the messages in one newline-aligned chunk of a log into a run file.
+    """
+    buf = _open_map(path)
+    try:
+        lines = [line.rstrip(b'\r') for line in buf[start:end].split(NEWLINE)]
+    finally:
+        buf.close()
+    records = sorted((merge_key(line), line) for line in lines if line)
+    with open(run_path, 'wb') as f:
+        f.writelines(line + NEWLINE for _, line in records)
+    return len(records)
+
+
+def presort(paths: List[str], directory: str, run_bytes: int = 64 << 20, workers: Optional[int] = None) -> List[str]:
+    """
+    External sort, first phase: cut every input into runs of about `run_bytes`
+    and sort each run in a process pool.
+
+    Memory stays bounded by `run_bytes` per worker, whatever the input size.
+
+    Returns:
+        List[str]: Paths of the sorted run files, to be merged.
+    """
+    jobs = []
+    for path in paths:
+        buf = _open_map(path)
+        if buf is None:
+            continue
+        try:
+            chunks = chunk_boundaries(buf, len(buf), -(-len(buf) // run_bytes), min_chunk=1)
+        finally:
+            buf.close()
+        for start, end in chunks:
+            jobs.append((path, start, end, os.path.join(directory, f"run-{len(jobs):05d}.log")))
+    with ProcessPoolExecutor(workers or os.cpu_count() or 1) as pool:
+        futures = [pool.submit(_sort_run, *job) for job in jobs]
+        for future in futures:
+            future.result()
+    return [job[3] for job in jobs]
+
+
+def consolidate(paths: List[str], output: str, sort_inputs: bool = False, workers: Optional[int] = None,
+                run_bytes: int = 64 << 20, index: bool = True, dedupe: bool = True,
+                batch_bytes: int = 1 << 20) -> MergeStats:
+    """
+    Merge per-session/per-day message logs into one log ordered by SendingTime, then MsgSeqNum.
+
+    Inputs are merged as streams with a k-way heap merge, so memory holds one
+    line per input plus the current output batch, regardless of input size.
+    Each input must already be in key order; with `sort_inputs` they are
+    first cut into sorted runs in a process pool (see presort), which also
+    bounds memory. Without it, inputs found out of order are reported in
+    `out_of_order` and the output is only as ordered as they are.
+
+    PossDup resends are ordered by their OrigSendingTime and dropped when the
+    original is present. Messages seen in several inputs, such as a per-day
+    log and the communal log, are written once.
+
+    Args:
+        paths (List[str]): Raw message logs to merge.
+        output (str): Consolidated log to write; replaced atomically when done.
+        sort_inputs (bool): Sort the inputs into runs first.
+        workers (int): Processes used for sorting runs.
+        run_bytes (int): Target size of a sorted run.
+        index (bool): Write a sidecar index (see log_index) for the output.
+        dedupe (bool): Drop PossDup copies and repeated messages.
+        batch_bytes (int): Size of output writes.
+
+    Returns:
+        MergeStats: Records read, written and dropped.
+    """
+    started = time.perf_counter()
+    stats = MergeStats(len(paths))
+    directory = os.path.dirname(os.path.abspath(output))
+    with tempfile.TemporaryDirectory(prefix='.consolidate-', dir=directory) as scratch:
+        inputs = paths
+        if sort_inputs:
+            inputs = presort(paths, scratch, run_bytes, workers)
+            stats.runs = len(inputs)
+        partial = os.path.join(scratch, os.path.basename(output))
+        journal = JournalFile(partial, index=index)
+        try:
+            _merge(inputs, journal, stats, dedupe, batch_bytes)
+        finally:
+            journal.close()
+        os.replace(partial, output)
+        if index:
+            os.replace(index_path(partial), index_path(output))
+    stats.seconds = time.perf_counter() - started
+    if stats.out_of_order:
+        logging.warning(f"{stats.out_of_order} messages were out of order in the inputs; "
+                        f"consolidate with sorting enabled for a fully ordered output")
+    return stats
+
+
+def _merge(inputs: List[str], journal: JournalFile, stats: MergeStats, dedupe: bool, batch_bytes: int) -> None:
+    records: List[bytes] = []
+    size = 0
+    current_time = None
+    seen = set()  # identities written at current_time; cleared when the time moves on
+    for key, line in heapq.merge(*(_read_sorted(path, stats) for path in inputs), key=lambda item: item[0]):
+        stats.read += 1
+        if dedupe and key[1]:  # without a MsgSeqNum there is nothing to identify the message by
+            if key[0] != current_time:
+                current_time = key[0]
+                seen.clear()
+            identity = key[:4]
+            if identity in seen:
+                if key[4]:
+                    stats.possdup_dropped += 1
+                else:
+                    stats.duplicates_dropped += 1
+                continue
+            seen.add(identity)
+        record = line + NEWLINE
+        records.append(record)
+        size += len(record)
+        stats.written += 1
+        if size >= batch_bytes:
+            journal.write(b''.join(records), records)
+            records, size = [], 0
+    if records:
+        journal.write(b''.join(records), records)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point: python -m src.consolidate OUTPUT LOG [LOG ...] [options]
+    """
+    parser = argparse.ArgumentParser(description="Merge raw FIX message logs by SendingTime and MsgSeqNum.")
+    parser.add_argument('output', help="Consolidated log to write")
+    parser.add_argument('paths', nargs='+', help="Per-session or per-day raw message logs")
+    parser.add_argument('--sort', action='store_true', help="Sort unsorted inputs into runs first")
+    parser.add_argument('--workers', type=int, default=None, help="Processes for sorting (default: CPU count)")
+    parser.add_argument('--run-mb', type=int, default=64, help="Size of a sorted run in MB")
+    parser.add_argument('--no-index', action='store_true', help="Do not write a sidecar index")
+    parser.add_argument('--keep-duplicates', action='store_true', help="Keep PossDup copies and repeats")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    stats = consolidate(args.paths, args.output, args.sort, args.workers, args.run_mb << 20,
+                        index=not args.no_index, dedupe=not args.keep_duplicates)
+    print(f"{stats.written} of {stats.read} messages written to {args.output} in {stats.seconds:.2f}s "
+          f"({stats.possdup_dropped} PossDup and {stats.duplicates_dropped} duplicates dropped, "
+          f"{stats.out_of_order} out of order)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
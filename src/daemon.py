@@ -0,0 +1,251 @@
+import json
+import signal
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+class Daemon:
+    def __init__(self, clients: List, host: str = '127.0.0.1', port: int = 8765, logon_on_start: bool = True,
+                 on_shutdown: Optional[Callable[[], None]] = None, request_timeout: float = 10.0,
+                 metrics=None):
+        """
+        Runs the FIX clients headless, controlled over a local HTTP/JSON API.
+
+        QuickFIX runs the sessions on its own threads; the event loop only serves
+        the control API. Every blocking client call (logon, logout, resend) runs
+        in a thread pool, so a slow logon never stalls other requests, and
+        message processing never waits on the API.
+
+        Endpoints (sessions are selected with `session`, matching the SessionID
+        or SenderCompID; all sessions when omitted):
+            GET  /status             Logon state and host per session.
+            GET  /stats              Writer, resend, order and position counters.
+            GET  /metrics            Prometheus text format, when `metrics` is given.
+            POST /logon              Log sessions on.
+            POST /logout             Log sessions off; they can log on again.
+            POST /resend             ResendRequest, with `begin` and `end`.
+            POST /shutdown           Log everything off, drain the writers and exit.
+
+        Args:
+            clients (List[FIXClient]): The clients to run. The list may change while running (config reload).
+            host (str): Address to listen on; keep it on localhost.
+            port (int): Port to listen on.
+            logon_on_start (bool): Log every session on when the daemon starts.
+            on_shutdown (Callable[[], None]): Called after all sessions are stopped, e.g. to stop the registry.
+            request_timeout (float): Seconds to wait for a request to arrive in full.
+            metrics (Metrics): Instrumentation to export on /metrics.
+        """
+        self.clients = clients
+        self.host = host
+        self.port = port
+        self.logon_on_start = logon_on_start
+        self.on_shutdown = on_shutdown
+        self.request_timeout = request_timeout
+        self.metrics = metrics
+        self.live = False  # set once sessions have been logged on; sessions added later follow
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='daemon')
+        self.server = None
+        self._stop: Optional[asyncio.Event] = None
+        self.routes: Dict[Tuple[str, str], Callable] = {
+            ('GET', '/status'): self.status,
+            ('GET', '/stats'): self.stats,
+            ('POST', '/logon'): self.logon,
+            ('POST', '/logout'): self.logout,
+            ('POST', '/resend'): self.resend,
+            ('POST', '/shutdown'): self.shutdown,
+        }
+        if metrics is not None:
+            self.routes[('GET', '/metrics')] = self.render_metrics
+
+    async def run(self) -> None:
+        """
+        Serve the control API until shutdown is requested or a SIGTERM/SIGINT arrives.
+        """
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self._stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # not on the main thread, or not supported on this platform
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logging.info(f"Control API listening on http://{self.host}:{self.port}")
+        try:
+            if self.logon_on_start:
+                await self.logon({})
+            await self._stop.wait()
+        finally:
+            self.server.close()
+            await self.server.wait_closed()
+            await self._stop_clients()
+
+    async def _stop_clients(self) -> None:
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self.executor, client.logout) for client in list(self.clients)),
+            return_exceptions=True
+        )
+        for client, result in zip(list(self.clients), results):
+            if isinstance(result, Exception):
+                logging.error(f"Error stopping session {client.session_id}: {result}")
+        if self.on_shutdown is not None:
+            self.on_shutdown()
+        self.executor.shutdown(wait=True)
+        logging.info("Daemon stopped; message writers drained")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Only reading is bounded: a logon may legitimately take longer than request_timeout
+        try:
+            request = await asyncio.wait_for(self._read_request(reader), self.request_timeout)
+        except asyncio.TimeoutError:
+            status, payload = 400, {'error': 'request timed out'}
+        except Exception as e:
+            status, payload = 500, {'error': str(e)}
+        else:
+            try:
+                status, payload = await self._dispatch(*request) if request else (400, {'error': 'malformed request'})
+            except Exception as e:
+                status, payload = 500, {'error': str(e)}
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            body, content_type = json.dumps(payload, default=str).encode(), 'application/json'
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bytes]]:
+        """
+        Read the method, target and body of a request, or None if the request line is malformed.
+        """
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) < 2:
+            return None
+        method, target = request_line[0].upper(), request_line[1]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get('content-length') or 0))
+        return method, target, body
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, object]:
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if body:
+            try:
+                params.update(json.loads(body))
+            except (ValueError, TypeError) as e:
+                return 400, {'error': f"invalid JSON body: {e}"}
+
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            known = any(path == url.path for _, path in self.routes)
+            return (405, {'error': f"{method} not allowed"}) if known else (404, {'error': 'not found'})
+        try:
+            return 200, await handler(params)
+        except (KeyError, ValueError) as e:
+            return 400, {'error': str(e)}
+
+    def _select(self, params: dict) -> List:
+        name = params.get('session')
+        clients = list(self.clients)
+        if not name:
+            return clients
+        selected = [c for c in clients if name in (c.session_id.toString(), c.session_id.getSenderCompID().getValue())]
+        if not selected:
+            raise KeyError(f"unknown session {name}")
+        return selected
+
+    async def _run_each(self, clients: List, call: Callable) -> List[dict]:
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self.executor, call, client) for client in clients), return_exceptions=True
+        )
+        return [
+            {'session': client.session_id.toString(),
+             'ok': not isinstance(result, Exception),
+             **({'error': str(result)} if isinstance(result, Exception) else {})}
+            for client, result in zip(clients, results)
+        ]
+
+    async def status(self, params: dict) -> List[dict]:
+        return [
+            {
+                'session': client.session_id.toString(),
+                'logged_on': client.application.wait_for_logon(0, client.session_id),
+                'host': client.connected_host,
+            }
+            for client in self._select(params)
+        ]
+
+    async def stats(self, params: dict) -> List[dict]:
+        return [client_stats(client) for client in self._select(params)]
+
+    async def logon(self, params: dict) -> List[dict]:
+        self.live = True
+        return await self._run_each(self._select(params), lambda client: client.logon())
+
+    async def logout(self, params: dict) -> List[dict]:
+        return await self._run_each(self._select(params), lambda client: client.logout(drain=False))
+
+    async def resend(self, params: dict) -> List[dict]:
+        begin, end = int(params['begin']), int(params.get('end', 0))
+        return await self._run_each(self._select(params), lambda client: client.send_resend_request(begin, end))
+
+    async def render_metrics(self, params: dict) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.metrics.render)
+
+    async def shutdown(self, params: dict) -> dict:
+        self._stop.set()
+        return {'stopping': True}
+
+
+def _writer_stats(writer) -> dict:
+    return {
+        'records_written': writer.records_written,
+        'records_dropped': writer.records_dropped,
+        'commits': writer.commits,
+        'blocked_writes': writer.blocked_writes,
+        'pending': writer.pending(),
+    }
+
+
+def client_stats(client) -> dict:
+    """
+    Counters for one client's session, application writers and derived state.
+    """
+    application = client.application
+    stats = {
+        'session': client.session_id.toString(),
+        'message_log': _writer_stats(application.message_writer),
+        'execution_report_log': _writer_stats(application.execution_report_writer),
+        'resend': {'pending': client.gap_tracker.pending(), 'requests_sent': client.gap_tracker.requests_sent},
+        'orders': len(application.orders),
+        'fills': application.positions.fills,
+    }
+    if application.duplicates is not None:
+        stats['duplicates'] = application.duplicates.stats()
+    if application.pipeline is not None:
+        stats['offload'] = application.pipeline.stats()
+    if client.failover_monitor is not None:
+        stats['failover'] = {
+            'recoveries': client.failover_monitor.recoveries,
+            'last_recovery_seconds': client.failover_monitor.last_recovery_seconds,
+        }
+    return stats
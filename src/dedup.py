@@ -0,0 +1,208 @@
+import math
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+import numpy as np
+
+
+def _masks(count: int = 65536, bits: int = 4, seed: int = 0x5EED) -> List[int]:
+    """
+    `count` 64-bit masks with `bits` distinct bits set each; two of them make the 8 bits of one key.
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.integers(0, 64, (count, bits))
+    while True:
+        ordered = np.sort(positions, axis=1)
+        repeated = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+        if not repeated.any():
+            break
+        positions[repeated] = rng.integers(0, 64, (int(repeated.sum()), bits))
+    return np.bitwise_or.reduce(np.left_shift(np.uint64(1), positions.astype(np.uint64)), axis=1).tolist()
+
+
+_MASKS: List[int] = []  # built by the first BloomFilter, so importing this module stays cheap
+_MIX = 0x9E3779B97F4A7C15  # spreads hash() over all 64 bits; tuple hashes alone are too regular
+_BITS64 = 0xFFFFFFFFFFFFFFFF
+
+
+class DedupPolicy:
+    def __init__(self, capacity: int = 1000000, error_rate: float = 0.001, window: int = 65536):
+        """
+        Sizes the memory-bounded duplicate filter of an application.
+
+        Args:
+            capacity (int): Keys per Bloom filter generation; two generations are kept,
+                so between `capacity` and twice that many keys are remembered.
+            error_rate (float): False positive rate of each Bloom filter at capacity.
+            window (int): Keys kept exactly in the LRU window.
+        """
+        if capacity < 1 or window < 1:
+            raise ValueError("capacity and window must be at least 1")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.window = window
+
+
+class BloomFilter:
+    __slots__ = ('words', 'size', 'count')
+
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        A blocked Bloom filter over Python-hashable keys.
+
+        Every key sets 8 bits inside a single 64-bit word, chosen with two
+        table lookups, so adding or testing a key costs the same few
+        operations whatever the error rate. Blocking costs some accuracy,
+        made up for by sizing the filter 30% above a classic one.
+        Hashes come from hash(), so they are only comparable within one
+        process, which is all an in-memory filter needs.
+        """
+        if not _MASKS:
+            _MASKS.extend(_masks())
+        bits = -capacity * math.log(error_rate) / math.log(2) ** 2 * 1.3
+        self.size = max(1, math.ceil(bits / 64))
+        self.words = array('Q', bytes(8 * self.size))
+        self.count = 0
+
+    def add(self, key: Hashable) -> None:
+        h = hash(key) * _MIX & _BITS64
+        self.words[h % self.size] |= _MASKS[h >> 48] | _MASKS[(h >> 32) & 0xFFFF]
+        self.count += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        h = hash(key) * _MIX & _BITS64
+        mask = _MASKS[h >> 48] | _MASKS[(h >> 32) & 0xFFFF]
+        return self.words[h % self.size] & mask == mask
+
+
+def _field(raw: str, tag: str) -> Optional[str]:
+    start = raw.find(tag)
+    if start < 0:
+        return None
+    start += len(tag)
+    end = raw.find('\x01', start)
+    return raw[start:end if end >= 0 else len(raw)]
+
+
+class DuplicateFilter:
+    def __init__(self, policy: Optional[DedupPolicy] = None):
+        """
+        Recognises messages received again, by (session, MsgSeqNum) and by ExecID.
+
+        Recent keys are kept exactly in an LRU window; every key also goes
+        into a Bloom filter, which remembers far more of them in bounded
+        memory. A key found in the window is a certain duplicate and is
+        always dropped. A key only the Bloom filter claims to have seen may be
+        a false positive, so it is dropped only for messages marked as resent
+        (PossDupFlag or PossResend) and only when all of their keys match.
+        A message that fills a real gap is therefore lost with a probability
+        of about error_rate squared, and a fresh message never.
+
+        MsgSeqNum keys carry a per-session epoch that moves on whenever the
+        session's seqnums are reset, so reused seqnums are not mistaken for repeats.
+
+        Args:
+            policy (DedupPolicy): Sizes of the filter and window.
+        """
+        self.policy = policy or DedupPolicy()
+        self.checked = 0
+        self.suppressed_seqnum = 0
+        self.suppressed_exec_id = 0
+        self.suppressed_probable = 0
+        self._recent: 'OrderedDict[Tuple, None]' = OrderedDict()
+        self._bloom = BloomFilter(self.policy.capacity, self.policy.error_rate)
+        self._previous: Optional[BloomFilter] = None
+        self._epochs: Dict[str, int] = {}
+        self._highest: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def suppressed(self) -> int:
+        return self.suppressed_seqnum + self.suppressed_exec_id + self.suppressed_probable
+
+    def seen(self, session: str, seqnum: Optional[int] = None, exec_id: Optional[str] = None,
+             poss_dup: bool = False) -> bool:
+        """
+        Check a received message against everything seen before, then remember it.
+
+        Args:
+            session (str): The session id, e.g. 'FIX.4.4:CLIENT->BROKER'.
+            seqnum (int): The message's MsgSeqNum.
+            exec_id (str): The ExecID of an ExecutionReport.
+            poss_dup (bool): Whether the message is marked as resent.
+
+        Returns:
+            bool: True if the message is a duplicate and should be dropped.
+        """
+        with self._lock:
+            self.checked += 1
+            seq_key = exec_key = None
+            if seqnum is not None:
+                seq_key = (session, self._epochs.get(session, 0), seqnum)
+                if seq_key in self._recent:
+                    self._recent.move_to_end(seq_key)
+                    self.suppressed_seqnum += 1
+                    return True
+            if exec_id:
+                exec_key = (session, exec_id)
+                if exec_key in self._recent:
+                    self._recent.move_to_end(exec_key)
+                    self.suppressed_exec_id += 1
+                    return True
+            keys = [key for key in (seq_key, exec_key) if key is not None]
+            if poss_dup and keys and all(self._maybe_seen(key) for key in keys):
+                self.suppressed_probable += 1
+                return True
+            for key in keys:
+                self._remember(key)
+            if seqnum is not None and seqnum > self._highest.get(session, 0):
+                self._highest[session] = seqnum
+            return False
+
+    def seen_message(self, session: str, raw: str) -> bool:
+        """
+        seen() for a serialized message, reading the fields straight from the string.
+        """
+        seqnum = _field(raw, '\x0134=')
+        exec_id = _field(raw, '\x0117=') if '\x0135=8\x01' in raw else None
+        poss_dup = '\x0143=Y\x01' in raw or '\x0197=Y\x01' in raw
+        return self.seen(session, int(seqnum) if seqnum and seqnum.isdigit() else None, exec_id, poss_dup)
+
+    def sequence_reset(self, session: str, next_expected: Optional[int]) -> None:
+        """
+        Note the next expected MsgSeqNum after a logon or SequenceReset; seqnums
+        at or below ones already seen start a new epoch for the session.
+        """
+        if next_expected is None:
+            return
+        with self._lock:
+            if next_expected <= self._highest.get(session, 0):
+                self._epochs[session] = self._epochs.get(session, 0) + 1
+                self._highest[session] = next_expected - 1
+
+    def _maybe_seen(self, key: Tuple) -> bool:
+        return key in self._bloom or (self._previous is not None and key in self._previous)
+
+    def _remember(self, key: Tuple) -> None:
+        self._recent[key] = None
+        if len(self._recent) > self.policy.window:
+            self._recent.popitem(last=False)
+        if self._bloom.count >= self.policy.capacity:
+            self._previous = self._bloom
+            self._bloom = BloomFilter(self.policy.capacity, self.policy.error_rate)
+        self._bloom.add(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'checked': self.checked,
+            'suppressed': self.suppressed,
+            'suppressed_seqnum': self.suppressed_seqnum,
+            'suppressed_exec_id': self.suppressed_exec_id,
+            'suppressed_probable': self.suppressed_probable,
+        }
+
+    def __repr__(self) -> str:
+        return f"DuplicateFilter({self.suppressed} of {self.checked} suppressed)"
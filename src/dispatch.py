@@ -0,0 +1,183 @@
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import quickfix as fix
+
+Handler = Callable[['FieldRecord', fix.Message, Optional[fix.SessionID]], None]
+
+
+class FieldRecord:
+    __slots__ = ('tags', 'values', '_positions')
+
+    def __init__(self, tags: Tuple[int, ...], positions: Dict[int, int]):
+        """
+        The values of a fixed set of tags for one message, as strings or None when absent.
+
+        Records are filled in place by FieldExtractor.extract and reused for the
+        next message, so keep values, not the record.
+        """
+        self.tags = tags
+        self.values: List[Optional[str]] = [None] * len(tags)
+        self._positions = positions
+
+    def get(self, tag: int, default: Optional[str] = None) -> Optional[str]:
+        position = self._positions.get(tag)
+        if position is None:
+            return default
+        value = self.values[position]
+        return default if value is None else value
+
+    def __getitem__(self, tag: int) -> str:
+        value = self.values[self._positions[tag]]
+        if value is None:
+            raise KeyError(tag)
+        return value
+
+    def __contains__(self, tag: int) -> bool:
+        position = self._positions.get(tag)
+        return position is not None and self.values[position] is not None
+
+    def to_dict(self) -> Dict[int, str]:
+        return {tag: value for tag, value in zip(self.tags, self.values) if value is not None}
+
+    def __repr__(self) -> str:
+        return f"FieldRecord({self.to_dict()})"
+
+
+class FieldExtractor:
+    def __init__(self, tags: Iterable[int]):
+        """
+        Pulls a declared set of tags out of a serialized message.
+
+        Each declared tag is found with str.find on `<SOH><tag>=` and only its
+        value is sliced out, so the only objects created are the values
+        themselves; the message is never split, and fields nobody declared
+        cost nothing but the scan. No QuickFIX field objects are created. The
+        first occurrence of a tag wins, so repeating groups keep their leading
+        entry, and missing tags are simply None.
+
+        Args:
+            tags (Iterable[int]): The tags to extract.
+        """
+        self.tags = tuple(dict.fromkeys(int(tag) for tag in tags))
+        # (slot, `<SOH><tag>=`, its length); the first field has no SOH before it and is read apart
+        self._needles = tuple((i, f'\x01{tag}=', len(str(tag)) + 2) for i, tag in enumerate(self.tags))
+        self._slots = {str(tag): i for i, tag in enumerate(self.tags)}
+        self._positions = {tag: i for i, tag in enumerate(self.tags)}
+
+    def new_record(self) -> FieldRecord:
+        return FieldRecord(self.tags, self._positions)
+
+    def extract(self, raw: str, record: Optional[FieldRecord] = None) -> FieldRecord:
+        """
+        Fill `record` (or a new one) with the declared tags of `raw`, e.g. message.toString().
+        """
+        if record is None:
+            record = self.new_record()
+        values = record.values
+        find = raw.find
+        for i, needle, length in self._needles:
+            start = find(needle)
+            if start < 0:
+                values[i] = None
+                continue
+            start += length
+            end = find('\x01', start)
+            values[i] = raw[start:end] if end >= 0 else raw[start:]
+        equals = find('=')
+        first = self._slots.get(raw[:equals]) if equals > 0 else None
+        if first is not None:  # e.g. BeginString, which is always the first field
+            end = find('\x01', equals)
+            values[first] = raw[equals + 1:end] if end >= 0 else raw[equals + 1:]
+        return record
+
+
+class MessageDispatcher:
+    def __init__(self):
+        """
+        Routes application messages to the handlers subscribed to their MsgType.
+
+        Each handler declares the tags it reads. They are extracted once per
+        message for all handlers of its MsgType, into a FieldRecord that is
+        reused from message to message, and every handler gets that record,
+        the QuickFIX message and the SessionID. A handler that raises is logged
+        and counted in `errors`; the others still run.
+
+        Routes are replaced, never modified, on subscribe and unsubscribe, so
+        dispatching needs no lock. dispatch() may run on several threads at
+        once, the QuickFIX callback threads or the offload workers of one
+        application, so each thread fills a FieldRecord of its own.
+        """
+        self.logger = logging.getLogger('MessageDispatcher')
+        self.errors = 0
+        self._subscriptions: Dict[str, List[Tuple[Handler, Tuple[int, ...]]]] = {}
+        self._routes: Dict[str, Tuple[FieldExtractor, Tuple[Handler, ...]]] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()  # .records: MsgType -> (extractor, this thread's record)
+
+    def subscribe(self, msg_type: str, handler: Handler, tags: Iterable[int] = ()) -> None:
+        """
+        Call `handler(fields, message, sessionID)` for every message of `msg_type`.
+
+        Args:
+            msg_type (str): MsgType, e.g. fix.MsgType_OrderCancelReject ('9').
+            handler (Handler): Receives the FieldRecord, the message and the SessionID.
+            tags (Iterable[int]): Tags the handler reads from the FieldRecord.
+        """
+        with self._lock:
+            self._subscriptions.setdefault(msg_type, []).append((handler, tuple(tags)))
+            self._rebuild(msg_type)
+
+    def unsubscribe(self, msg_type: str, handler: Handler) -> None:
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions.get(msg_type, []) if s[0] != handler]
+            if subscriptions:
+                self._subscriptions[msg_type] = subscriptions
+            else:
+                self._subscriptions.pop(msg_type, None)
+            self._rebuild(msg_type)
+
+    def _rebuild(self, msg_type: str) -> None:
+        subscriptions = self._subscriptions.get(msg_type)
+        routes = dict(self._routes)
+        if subscriptions:
+            extractor = FieldExtractor(tag for _, tags in subscriptions for tag in tags)
+            routes[msg_type] = (extractor, tuple(handler for handler, _ in subscriptions))
+        else:
+            routes.pop(msg_type, None)
+        self._routes = routes
+
+    def handles(self, msg_type: str) -> bool:
+        return msg_type in self._routes
+
+    def msg_types(self) -> List[str]:
+        return sorted(self._routes)
+
+    def dispatch(self, msg_type: str, raw: str, message: fix.Message,
+                 sessionID: Optional[fix.SessionID] = None) -> int:
+        """
+        Extract the subscribed tags of `raw` and call every handler of `msg_type`.
+
+        Returns:
+            int: Number of handlers called; 0 if nothing is subscribed to the MsgType.
+        """
+        route = self._routes.get(msg_type)
+        if route is None:
+            return 0
+        extractor, handlers = route
+        try:
+            records = self._local.records
+        except AttributeError:
+            records = self._local.records = {}
+        cached = records.get(msg_type)
+        if cached is None or cached[0] is not extractor:
+            cached = records[msg_type] = (extractor, extractor.new_record())
+        record = cached[1]
+        extractor.extract(raw, record)
+        for handler in handlers:
+            try:
+                handler(record, message, sessionID)
+            except Exception as e:
+                self.errors += 1
+                self.logger.error(f"Error in {getattr(handler, '__qualname__', handler)} for MsgType {msg_type}: {e}")
+        return len(handlers)
@@ -0,0 +1,143 @@
+import time
+import socket
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Optional
+
+
+def _connect(host: str, port: int, timeout: float, delay: float) -> str:
+    if delay:
+        time.sleep(delay)
+    with socket.create_connection((host, port), timeout=timeout):
+        return host
+
+
+def probe_hosts(hosts: List[str], port: int, timeout: float = 2.0, stagger: float = 0.05) -> Optional[str]:
+    """
+    Race TCP connections to several hosts and return the first that accepts.
+
+    Happy-eyeballs style: hosts are tried in order of preference, each started
+    `stagger` seconds after the previous one, without waiting for earlier
+    attempts to fail. The probe connection is closed straight away.
+
+    Args:
+        hosts (List[str]): Hosts in order of preference; empty entries are skipped.
+        port (int): Port to connect to.
+        timeout (float): Connect timeout per host, in seconds.
+        stagger (float): Head start given to each more preferred host, in seconds.
+
+    Returns:
+        Optional[str]: The first host to accept a connection, or None.
+    """
+    hosts = [host for host in hosts if host]
+    if not hosts:
+        return None
+    pool = ThreadPoolExecutor(max_workers=len(hosts), thread_name_prefix='probe')
+    try:
+        pending = {pool.submit(_connect, host, port, timeout, i * stagger) for i, host in enumerate(hosts)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                logging.debug(f"Probe failed: {future.exception()}")
+        return None
+    finally:
+        pool.shutdown(wait=False)
+
+
+class FailoverMonitor:
+    def __init__(self, client, heartbeat_timeout: Optional[float] = None, check_interval: float = 1.0,
+                 retry_interval: float = 5.0):
+        """
+        Watches a FIXClient's session and fails over to the other host when it dies.
+
+        The session counts as dead when the application reports an unexpected
+        logout, or when nothing has been received for `heartbeat_timeout` seconds
+        while logged on. Recovery races both hosts with probe_hosts, preferring
+        the one we were not connected to, and only restarts this client's own
+        initiator, so other sessions are not affected.
+
+        Args:
+            client (FIXClient): The client to watch.
+            heartbeat_timeout (float): Seconds of silence that count as heartbeat loss; None disables the check.
+            check_interval (float): Seconds between heartbeat checks.
+            retry_interval (float): Seconds to wait before retrying when neither host comes back.
+        """
+        self.client = client
+        self.heartbeat_timeout = heartbeat_timeout
+        self.check_interval = check_interval
+        self.retry_interval = retry_interval
+        self.last_recovery_seconds: Optional[float] = None
+        self.recoveries = 0
+        self._stopped = threading.Event()
+        self._stopped.set()  # inactive until start(), so failures during the first logon are ignored
+        self._recovering = threading.Lock()
+        self._thread = None
+
+    def start(self) -> None:
+        self._stopped.clear()
+        if self.heartbeat_timeout and self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name='FailoverMonitor', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+
+    def _watch(self) -> None:
+        application = self.client.application
+        while not self._stopped.wait(self.check_interval):
+            if not application.logged_on.is_set() or self._recovering.locked():
+                continue
+            silence = time.monotonic() - application.last_received
+            if silence > self.heartbeat_timeout:
+                self.trigger(f"no messages for {silence:.1f}s")
+
+    def trigger(self, reason: str) -> None:
+        """
+        Start recovery on a background thread, unless one is already running.
+
+        Safe to call from QuickFIX callbacks: the initiator is never stopped on
+        the calling thread.
+        """
+        if self._stopped.is_set() or not self._recovering.acquire(blocking=False):
+            return
+        logging.warning(f"Session {self.client.session_id} on {self.client.connected_host} is down: {reason}")
+        threading.Thread(target=self._recover, args=(time.monotonic(),), name='FailoverRecovery', daemon=True).start()
+
+    def _recover(self, started: float) -> None:
+        try:
+            client = self.client
+            primary_host, secondary_host = client._get_hosts()
+            failed_host = client.connected_host
+            hosts = [h for h in (primary_host, secondary_host) if h and h != failed_host]
+            if failed_host:
+                hosts.append(failed_host)
+            try:
+                client.initiator.stop()
+            except Exception as e:
+                logging.error(f"Error stopping initiator during failover: {e}")
+
+            while not self._stopped.is_set():
+                winner = probe_hosts(hosts, client.port, client.probe_timeout)
+                ordered = [winner] + [h for h in hosts if h != winner] if winner else hosts
+                for host in ordered:
+                    if self._stopped.is_set():
+                        return
+                    if client._try_logon(host):
+                        client.connected_host = host
+                        self.last_recovery_seconds = time.monotonic() - started
+                        self.recoveries += 1
+                        logging.info(
+                            f"Session {client.session_id} recovered on {host} "
+                            f"in {self.last_recovery_seconds:.2f}s"
+                        )
+                        return
+                logging.error(f"Session {client.session_id}: no host reachable, retrying in {self.retry_interval}s")
+                self._stopped.wait(self.retry_interval)
+        finally:
+            self._recovering.release()
@@ -0,0 +1,397 @@
+import json
+import asyncio
+import logging
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+import quickfix as fix
+from .order_store import (CL_ORD_ID, ORDER_ID, ORIG_CL_ORD_ID, EXEC_ID, SYMBOL, SIDE, ACCOUNT, ORDER_QTY,
+                          CUM_QTY, AVG_PX, LEAVES_QTY, LAST_QTY, LAST_PX, ORD_STATUS, TRANSACT_TIME)
+from .positions import EXEC_TYPE
+
+try:
+    import msgpack
+except ImportError:  # optional; JSON lines are always available
+    msgpack = None
+
+FILTER_KEYS = ('symbol', 'account', 'side', 'session')
+FORMATS = ('json', 'msgpack')
+MODES = ('drop', 'conflate')
+
+# (name, tag, numeric) of each field of a normalized report, after 'session'
+REPORT_FIELDS = (
+    ('exec_id', EXEC_ID, False), ('cl_ord_id', CL_ORD_ID, False), ('orig_cl_ord_id', ORIG_CL_ORD_ID, False),
+    ('order_id', ORDER_ID, False), ('symbol', SYMBOL, False), ('account', ACCOUNT, False), ('side', SIDE, False),
+    ('exec_type', EXEC_TYPE, False), ('ord_status', ORD_STATUS, False), ('order_qty', ORDER_QTY, True),
+    ('last_qty', LAST_QTY, True), ('last_px', LAST_PX, True), ('cum_qty', CUM_QTY, True),
+    ('avg_px', AVG_PX, True), ('leaves_qty', LEAVES_QTY, True), ('transact_time', TRANSACT_TIME, False),
+)
+REPORT_TAGS = tuple(tag for _, tag, _ in REPORT_FIELDS)
+# Built once: json.dumps with non-default separators creates an encoder per call
+_JSON = json.JSONEncoder(separators=(',', ':'))
+
+
+def normalize(get: Callable[[int], Optional[str]], session: str = '') -> dict:
+    """
+    An execution report, read through `get(tag)`, as a flat dict; quantities and prices are floats, absent values None.
+    """
+    report = {'session': session}
+    for name, tag, numeric in REPORT_FIELDS:
+        value = get(tag)
+        report[name] = (float(value) if value else None) if numeric else value
+    return report
+
+
+def encode(report: dict, format: str) -> bytes:
+    if format == 'msgpack':
+        return msgpack.packb(report)
+    return _JSON.encode(report).encode() + b'\n'
+
+
+class _Subscriber:
+    __slots__ = ('id', 'filters', 'format', 'mode', 'peer', 'pending', 'lock', 'ready', 'closed',
+                 'sent', 'conflated', 'overflowed')
+
+    def __init__(self, id: int, filters: Dict[str, FrozenSet[str]], format: str, mode: str, peer: str):
+        self.id = id
+        self.filters = filters
+        self.format = format
+        self.mode = mode
+        self.peer = peer
+        # drop: encoded reports in order; conflate: the latest encoded report per order
+        self.pending = deque() if mode == 'drop' else OrderedDict()
+        self.lock = threading.Lock()
+        self.ready: Optional[asyncio.Event] = None
+        self.closed = False
+        self.sent = 0
+        self.conflated = 0   # reports replaced by a later one for the same order
+        self.overflowed = 0  # reports discarded because the buffer was full
+
+    def offer(self, key: str, data: bytes, max_buffer: int) -> bool:
+        """
+        Buffer one report. Returns False if the subscriber is too slow and must be dropped.
+        """
+        with self.lock:
+            pending = self.pending
+            if self.mode == 'drop':
+                if len(pending) >= max_buffer:
+                    pending.clear()
+                    self.overflowed += 1
+                    return False
+                pending.append(data)
+                return True
+            if key in pending:
+                del pending[key]
+                self.conflated += 1
+            elif len(pending) >= max_buffer:
+                pending.popitem(last=False)
+                self.overflowed += 1
+            pending[key] = data
+            return True
+
+    def take(self) -> List[bytes]:
+        with self.lock:
+            if self.mode == 'drop':
+                taken = list(self.pending)
+            else:
+                taken = list(self.pending.values())
+            self.pending.clear()
+            return taken
+
+
+class FanoutServer:
+    def __init__(self, host: Optional[str] = '127.0.0.1', port: int = 8766, path: Optional[str] = None,
+                 max_buffer: int = 10000, handshake_timeout: float = 10.0):
+        """
+        Streams normalized execution reports to local tools over TCP and/or a UNIX socket.
+
+        A client connects and sends one JSON line with its subscription, e.g.
+        {"symbol": ["PETR4"], "side": "1", "format": "json", "mode": "drop"};
+        filters on symbol, account, side and session are optional and a report
+        must match all of those given. Reports are then sent as compact JSON
+        lines or, when msgpack is installed, as a stream of msgpack maps.
+
+        Matching runs on the publishing thread against per-key indexes of the
+        subscribers, and the result for each (symbol, account, side, session)
+        is cached, so a report is matched with one dict lookup. Reports nobody
+        subscribed to are not even normalized. Each subscriber has a buffer of
+        `max_buffer` reports that the server's event loop drains to the
+        socket. A slow 'drop' subscriber is disconnected when its buffer
+        fills; a 'conflate' subscriber keeps only the latest report per order,
+        discarding the oldest order when still full. Either way the
+        publishing thread never waits for a client.
+
+        Args:
+            host (str): TCP address to listen on; None for no TCP listener.
+            port (int): TCP port; 0 picks a free one.
+            path (str): UNIX socket path, if any.
+            max_buffer (int): Reports buffered per subscriber.
+            handshake_timeout (float): Seconds a client has to send its subscription.
+        """
+        self.host = host
+        self.port = port
+        self.path = path
+        self.max_buffer = max_buffer
+        self.handshake_timeout = handshake_timeout
+        self.subscribers: Dict[int, _Subscriber] = {}
+        self.published = 0
+        self.dropped = 0
+        self._next_id = 1
+        self._lock = threading.Lock()
+        # (values per filter key -> subscriber ids, ids not filtering on a key, cached matches), replaced as a whole
+        self._state: Tuple[Dict, Dict, Dict] = ({key: {} for key in FILTER_KEYS},
+                                                {key: frozenset() for key in FILTER_KEYS}, {})
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._wake_scheduled = False
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        # Open connections by their handler task, closed on stop
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    def subscribe(self, filters: Dict, format: str = 'json', mode: str = 'drop', peer: str = '') -> _Subscriber:
+        """
+        Register a subscriber; filters map FILTER_KEYS to a value or a list of values.
+        Values are compared as strings, so `{"side": 1}` matches Side=1.
+
+        Raises:
+            ValueError: An unknown filter key, format or mode, or msgpack asked for but not installed.
+            TypeError: A filter value that is neither a scalar nor a list.
+        """
+        unknown = set(filters) - set(FILTER_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown filter {', '.join(sorted(unknown))}; use {', '.join(FILTER_KEYS)}")
+        if format not in FORMATS or (format == 'msgpack' and msgpack is None):
+            raise ValueError(f"Unsupported format {format}")
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        normalized = {}
+        for key, values in filters.items():
+            if values is None:
+                values = []
+            elif isinstance(values, (str, int, float)):
+                values = [values]
+            elif not isinstance(values, (list, tuple, set, frozenset)):
+                raise TypeError(f"Filter {key} must be a value or a list of values")
+            if values:
+                normalized[key] = frozenset(str(value) for value in values)
+        with self._lock:
+            subscriber = _Subscriber(self._next_id, normalized, format, mode, peer)
+            self._next_id += 1
+            subscribers = dict(self.subscribers)
+            subscribers[subscriber.id] = subscriber
+            self._rebuild(subscribers)
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        subscriber.closed = True
+        with self._lock:
+            if subscriber.id in self.subscribers:
+                subscribers = dict(self.subscribers)
+                del subscribers[subscriber.id]
+                self._rebuild(subscribers)
+
+    def _rebuild(self, subscribers: Dict[int, _Subscriber]) -> None:
+        index = {key: {} for key in FILTER_KEYS}
+        any_value = {key: set() for key in FILTER_KEYS}
+        for subscriber in subscribers.values():
+            for key in FILTER_KEYS:
+                values = subscriber.filters.get(key)
+                if values is None:
+                    any_value[key].add(subscriber.id)
+                    continue
+                for value in values:
+                    index[key].setdefault(value, set()).add(subscriber.id)
+        self.subscribers = subscribers
+        self._state = ({key: {value: frozenset(ids) for value, ids in values.items()} for key, values in index.items()},
+                       {key: frozenset(ids) for key, ids in any_value.items()}, {})
+
+    def match(self, symbol: Optional[str], account: Optional[str], side: Optional[str], session: str) -> FrozenSet[int]:
+        """
+        Ids of the subscribers a report with these values goes to.
+        """
+        index, any_value, matches = self._state
+        key = (symbol, account, side, session)
+        matched = matches.get(key)
+        if matched is None:
+            for name, value in zip(FILTER_KEYS, key):
+                ids = any_value[name] | index[name].get(value, frozenset())
+                matched = ids if matched is None else matched & ids
+                if not matched:
+                    break
+            if len(matches) >= 65536:
+                matches.clear()
+            matches[key] = matched
+        return matched
+
+    def on_execution_report(self, fields, message, sessionID: Optional[fix.SessionID] = None) -> None:
+        """
+        MessageDispatcher handler; subscribe it to ExecutionReports with REPORT_TAGS.
+        """
+        try:
+            self.publish(fields.get, sessionID.toString() if sessionID is not None else '')
+        except ValueError as e:
+            logging.error(f"Error streaming an execution report: {e}")
+
+    def publish(self, get: Callable[[int], Optional[str]], session: str = '') -> int:
+        """
+        Send one execution report, read through `get(tag)`, to every matching subscriber.
+
+        Returns:
+            int: Number of subscribers it was buffered for.
+        """
+        self.published += 1
+        matched = self.match(get(SYMBOL), get(ACCOUNT), get(SIDE), session)
+        if not matched:
+            return 0
+        report = normalize(get, session)
+        key = report['cl_ord_id'] or report['order_id'] or report['exec_id'] or ''
+        encoded = {}
+        subscribers = self.subscribers
+        delivered = 0
+        for id in matched:
+            subscriber = subscribers.get(id)
+            if subscriber is None or subscriber.closed:
+                continue
+            data = encoded.get(subscriber.format)
+            if data is None:
+                data = encoded[subscriber.format] = encode(report, subscriber.format)
+            if subscriber.offer(key, data, self.max_buffer):
+                delivered += 1
+            else:
+                logging.warning(f"Fan-out subscriber {subscriber.id} ({subscriber.peer}) is too slow; dropping it")
+                self.dropped += 1
+                self.unsubscribe(subscriber)
+        self._schedule_wake()
+        return delivered
+
+    def _schedule_wake(self) -> None:
+        loop = self._loop
+        if loop is not None and not self._wake_scheduled:
+            self._wake_scheduled = True
+            try:
+                loop.call_soon_threadsafe(self._wake)
+            except RuntimeError:  # loop closed while stopping
+                pass
+
+    def _wake(self) -> None:
+        self._wake_scheduled = False
+        for subscriber in list(self.subscribers.values()):
+            if subscriber.ready is not None and (subscriber.pending or subscriber.closed):
+                subscriber.ready.set()
+
+    def start(self) -> None:
+        """
+        Start listening on a background thread with its own event loop.
+        """
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._serve()), name='FanoutServer', daemon=True)
+        self._thread.start()
+        self._started.wait(10)
+
+    async def _serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        servers = []
+        try:
+            if self.host is not None:
+                server = await asyncio.start_server(self._handle, self.host, self.port)
+                self.port = server.sockets[0].getsockname()[1]
+                servers.append(server)
+                logging.info(f"Fan-out server listening on {self.host}:{self.port}")
+            if self.path is not None:
+                servers.append(await asyncio.start_unix_server(self._handle, self.path))
+                logging.info(f"Fan-out server listening on {self.path}")
+        finally:
+            self._started.set()
+        try:
+            await self._stop.wait()
+        finally:
+            for server in servers:
+                server.close()
+            for subscriber in list(self.subscribers.values()):
+                self.unsubscribe(subscriber)
+            self._wake()
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            for server in servers:
+                await server.wait_closed()
+            self._loop = None
+
+    def stop(self) -> None:
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(10)
+            self._thread = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = str(writer.get_extra_info('peername') or 'unix')
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            await self._subscribe(reader, writer, peer)
+        finally:
+            del self._connections[task]
+
+    async def _subscribe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, peer: str) -> None:
+        try:
+            line = await asyncio.wait_for(reader.readline(), self.handshake_timeout)
+            request = json.loads(line or b'{}')
+            if not isinstance(request, dict):
+                raise ValueError("subscription must be a JSON object")
+            format, mode = request.pop('format', 'json'), request.pop('mode', 'drop')
+            subscriber = self.subscribe(request, format, mode, peer)
+        except (asyncio.TimeoutError, ValueError, TypeError) as e:
+            writer.write(json.dumps({'error': str(e) or 'no subscription received'}).encode() + b'\n')
+            await self._close(writer)
+            return
+        subscriber.ready = asyncio.Event()
+        writer.write(json.dumps({'subscribed': subscriber.id}).encode() + b'\n')
+        pump = asyncio.ensure_future(self._pump(subscriber, writer))
+        try:
+            while not subscriber.closed and await reader.read(4096):
+                pass  # clients have nothing more to say; this only notices them leaving
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.unsubscribe(subscriber)
+            subscriber.ready.set()
+            await pump
+            await self._close(writer)
+
+    async def _pump(self, subscriber: _Subscriber, writer: asyncio.StreamWriter) -> None:
+        try:
+            while not subscriber.closed:
+                await subscriber.ready.wait()
+                subscriber.ready.clear()
+                chunk = subscriber.take()
+                if chunk:
+                    writer.write(b''.join(chunk))
+                    await writer.drain()
+                    subscriber.sent += len(chunk)
+        except (ConnectionError, OSError):
+            self.unsubscribe(subscriber)
+        if subscriber.closed and not writer.is_closing():
+            writer.close()
+
+    @staticmethod
+    async def _close(writer: asyncio.StreamWriter) -> None:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+    def stats(self) -> Dict:
+        return {
+            'subscribers': len(self.subscribers),
+            'published': self.published,
+            'dropped_subscribers': self.dropped,
+            'clients': [{
+                'id': subscriber.id, 'peer': subscriber.peer, 'mode': subscriber.mode, 'sent': subscriber.sent,
+                'buffered': len(subscriber.pending), 'conflated': subscriber.conflated,
+                'overflowed': subscriber.overflowed,
+            } for subscriber in self.subscribers.values()],
+        }
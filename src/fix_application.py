@@ -1,57 +1,144 @@
 import quickfix as fix
 import os
 import logging
-from datetime import datetime
+import threading
+import time
+from typing import Optional
+from .log_writer import LogWriter, DurabilityPolicy
+from .journal import DatedFileHandler, shared_journal
+from .binary_journal import INCOMING, OUTGOING, encode_record, open_journal
+from .fix_dictionary import load_dictionary
+from .message_format import MessageFormatter, LazyMessage
+from .order_store import (OrderStore, ORDER_TAGS, EXEC_ID, SYMBOL, SIDE, ORDER_QTY, LAST_PX, LAST_QTY,
+                          TRANSACT_TIME, ORD_STATUS)
+from .positions import PositionEngine, FILL_TAGS, EXEC_TYPE
+from .metrics import Metrics
+from .dedup import DedupPolicy, DuplicateFilter
+from .dispatch import FieldRecord, MessageDispatcher
+from .offload import MessagePipeline, OffloadPolicy
+from .report_ring import RingPublisher
 
-class FIXApplication(fix.Application):
-    def __init__(self, raw_data: str):
-        super().__init__()
-        self.raw_data = raw_data
-        self.logger = logging.getLogger('FIXApplication')
-        self._setup_logger()
-
-    import quickfix as fix
-import os
-import logging
-from datetime import datetime
+# Everything the default ExecutionReport handler reads: order state, fills and the report log line
+EXECUTION_REPORT_TAGS = tuple(dict.fromkeys(ORDER_TAGS + FILL_TAGS))
+# Session-level MsgTypes, which QuickFIX hands to fromAdmin/toAdmin
+ADMIN_MSG_TYPES = frozenset((fix.MsgType_Heartbeat, fix.MsgType_TestRequest, fix.MsgType_ResendRequest,
+                             fix.MsgType_Reject, fix.MsgType_SequenceReset, fix.MsgType_Logout, fix.MsgType_Logon))
 
 class FIXApplication(fix.Application):
-    def __init__(self, raw_data: str):
+    def __init__(self, raw_data: str, durability: Optional[DurabilityPolicy] = None,
+                 max_segment_bytes: Optional[int] = None, log_level: int = logging.DEBUG,
+                 data_dictionary: Optional[str] = None, index_message_logs: bool = True,
+                 metrics: Optional[Metrics] = None, binary_journal: bool = False,
+                 dedup: Optional[DedupPolicy] = None, offload: Optional[OffloadPolicy] = None,
+                 log_dir: str = 'human_readable_logs', report_ring: Optional[RingPublisher] = None):
         super().__init__()
         self.raw_data = raw_data
+        self.durability = durability or DurabilityPolicy()
+        self.max_segment_bytes = max_segment_bytes
+        self.log_level = log_level
+        self.index_message_logs = index_message_logs
+        # Directory of the readable, message and execution report logs
+        self.log_dir = log_dir
+        # Also journal raw messages in the length-prefixed binary format (see binary_journal)
+        self.binary_journal = binary_journal
+        # A data dictionary turns on readable logs (Side=1(BUY)); the lookup tables are built once here
+        self.formatter = MessageFormatter(load_dictionary(data_dictionary) if data_dictionary else None)
         self.logger = logging.getLogger('FIXApplication')
+        # Set by FIXClient; tracks incoming MsgSeqNums and drives chunked ResendRequests
+        self.gap_tracker = None
+        self.logged_on = threading.Event()
+        # Monotonic time of the last incoming message, for heartbeat loss detection
+        self.last_received = 0.0
+        # Set by FIXClient for failover; called with the SessionID on every logout
+        self.on_disconnect = None
+        # Current state of every order seen in an ExecutionReport, for live queries
+        self.orders = OrderStore()
+        # Per symbol/account position and P&L, aggregated from fills in small batches
+        self.positions = PositionEngine()
+        # Set while a recorded log is replayed through the callbacks, so replayed
+        # messages are not appended to the message and execution report logs again
+        self.replaying = False
+        # With a DedupPolicy, application messages received again (resends, PossDup
+        # copies) are dropped before they are formatted, logged or processed
+        self.duplicates = DuplicateFilter(dedup) if dedup is not None else None
+        # Optional shared-memory ring every ExecutionReport is published to, for local consumers
+        self.report_ring = report_ring
+        # Application messages are routed by MsgType; add handlers with
+        # dispatcher.subscribe, e.g. for OrderCancelReject or TradeCaptureReport
+        self.dispatcher = MessageDispatcher()
+        self.dispatcher.subscribe(fix.MsgType_ExecutionReport, self.on_execution_report, EXECUTION_REPORT_TAGS)
+        # Optional instrumentation; callbacks skip all bookkeeping when None
+        self.metrics = metrics
+        if metrics is not None:
+            self._log_latency = {
+                writer: metrics.histogram('fix_log_latency_seconds', (writer,))
+                for writer in ('message', 'execution_report')
+            }
         self._setup_logger()
+        # With an OffloadPolicy, callbacks only serialize and queue each message; formatting,
+        # logging and handlers run on worker threads, each session's messages on one worker in order
+        self.pipeline = None
+        self._offload_sessions = {}
+        if offload is not None:
+            self.pipeline = MessagePipeline(self._process_offloaded, offload, metrics=metrics)
 
     def _setup_logger(self) -> None:
         """
         Sets up the logger for the FIX application.
         """
         try:
-            log_date = datetime.now().strftime("%Y-%m-%d")
-            session_log_filename = f"human_readable_logs/{log_date}_fix.log"
-            communal_log_filename = "human_readable_logs/communal_fix.log"
-            os.makedirs(os.path.dirname(session_log_filename), exist_ok=True)
+            communal_log_filename = os.path.join(self.log_dir, "communal_fix.log")
+            os.makedirs(os.path.dirname(communal_log_filename), exist_ok=True)
 
-            session_handler = logging.FileHandler(session_log_filename)
+            # The dated log moves to the next day's file at midnight, like the journals
+            session_handler = DatedFileHandler(os.path.join(self.log_dir, "{date}_fix.log"))
             communal_handler = logging.FileHandler(communal_log_filename, mode='a')
             formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
             session_handler.setFormatter(formatter)
             communal_handler.setFormatter(formatter)
 
-            self.logger.setLevel(logging.DEBUG)
+            self.logger.setLevel(self.log_level)
             self.logger.addHandler(session_handler)
             self.logger.addHandler(communal_handler)
 
             # Ensure no logs are sent to the console
             self.logger.propagate = False
 
-            # Setup message logs
-            message_log_filename = f"human_readable_logs/{log_date}_messages.current.log"
-            communal_message_log_filename = "human_readable_logs/communal_messages.current.log"
-            os.makedirs(os.path.dirname(message_log_filename), exist_ok=True)
-
-            self.session_message_log = open(message_log_filename, 'a')
-            self.communal_message_log = open(communal_message_log_filename, 'a')
+            # Setup message and execution report journals; segments follow the date
+            # and roll over on the writer threads, so handles stay open between writes.
+            # Applications logging to the same directory share one journal per file
+            self.message_writer = LogWriter(
+                [
+                    shared_journal(os.path.join(self.log_dir, "{date}_messages.current.log"),
+                                   self.max_segment_bytes, index=self.index_message_logs),
+                    shared_journal(os.path.join(self.log_dir, "communal_messages.current.log"),
+                                   self.max_segment_bytes, index=self.index_message_logs),
+                ],
+                self.durability,
+                name='FIXMessageWriter'
+            )
+            self.execution_report_writer = LogWriter(
+                [
+                    shared_journal(os.path.join(self.log_dir, "{date}_execution_reports.log"),
+                                   self.max_segment_bytes),
+                    shared_journal(os.path.join(self.log_dir, "communal_execution_reports.log"),
+                                   self.max_segment_bytes),
+                ],
+                self.durability,
+                name='FIXExecutionReportWriter'
+            )
+            self.binary_writer = None
+            if self.binary_journal:
+                self.binary_writer = LogWriter(
+                    [
+                        open_journal(os.path.join(self.log_dir, "{date}_messages.current.fixj"),
+                                     self.max_segment_bytes),
+                        open_journal(os.path.join(self.log_dir, "communal_messages.current.fixj"),
+                                     self.max_segment_bytes),
+                    ],
+                    self.durability,
+                    name='FIXBinaryJournalWriter'
+                )
         except Exception as e:
             self.logger.error(f"Error setting up logger: {e}")
             raise
@@ -66,9 +153,7 @@ class FIXApplication(fix.Application):
         Returns:
             str: The formatted message.
         """
-        fields = message.toString().split('\x01')
-        formatted_message = ' | '.join(f'{field}' for field in fields if field)
-        return formatted_message
+        return self.formatter.format(message.toString())
 
     def onCreate(self, sessionID: fix.SessionID) -> None:
         """
@@ -85,7 +170,16 @@ class FIXApplication(fix.Application):
         """
         try:
             self.sessionID = sessionID
+            self._logon_event_for(sessionID).set()
             self.logger.info(f'Successful logon to session {sessionID}')
+            gap_tracker = self._gap_tracker_for(sessionID)
+            if gap_tracker is not None:
+                session = fix.Session.lookupSession(sessionID)
+                gap_tracker.reset(session.getExpectedTargetNum() if session else None)
+            if self.duplicates is not None:
+                session = fix.Session.lookupSession(sessionID)
+                if session:
+                    self.duplicates.sequence_reset(sessionID.toString(), session.getExpectedTargetNum())
         except Exception as e:
             self.logger.error(f"Error in onLogon: {e}")
 
@@ -94,127 +188,332 @@ class FIXApplication(fix.Application):
         Callback for when a logout is successful.
         """
         try:
+            self._logon_event_for(sessionID).clear()
             self.logger.info(f'Successful logout from session {sessionID}')
+            if self.on_disconnect is not None:
+                self.on_disconnect(sessionID)
         except Exception as e:
             self.logger.error(f"Error in onLogout: {e}")
 
+    def wait_for_logon(self, timeout: float, sessionID: Optional[fix.SessionID] = None) -> bool:
+        """
+        Blocks until onLogon fires or the timeout expires.
+
+        Args:
+            timeout (float): Maximum seconds to wait.
+            sessionID (fix.SessionID): Session to wait for, for applications serving several.
+
+        Returns:
+            bool: True if the session is logged on.
+        """
+        return self._logon_event_for(sessionID).wait(timeout)
+
+    def _raw_data_for(self, sessionID: Optional[fix.SessionID]) -> str:
+        """
+        Returns the RawData sent on logon for a session.
+        """
+        return self.raw_data
+
+    def _gap_tracker_for(self, sessionID: Optional[fix.SessionID]):
+        """
+        Returns the gap tracker of a session, if any.
+        """
+        return self.gap_tracker
+
+    def _logon_event_for(self, sessionID: Optional[fix.SessionID]) -> threading.Event:
+        """
+        Returns the event that is set while a session is logged on.
+        """
+        return self.logged_on
+
     def toAdmin(self, message: fix.Message, sessionID: fix.SessionID) -> None:
         """
         Callback for sending administrative messages.
         """
+        started = time.perf_counter_ns()
+        msg_type = ''
         try:
             msgType = fix.MsgType()
             message.getHeader().getField(msgType)
-            if msgType.getValue() == fix.MsgType_Logon:
-                message.setField(fix.RawData(self.raw_data))
-                message.setField(fix.RawDataLength(len(self.raw_data)))
-            self.logger.debug(f'toAdmin: {self.format_fix_message(message)}')
-            self.log_message_raw(message)
+            msg_type = msgType.getValue()
+            if msg_type == fix.MsgType_Logon:
+                raw_data = self._raw_data_for(sessionID)
+                message.setField(fix.RawData(raw_data))
+                message.setField(fix.RawDataLength(len(raw_data)))
+            if self.pipeline is not None:
+                self._offload(sessionID, message.toString(), OUTGOING)
+            else:
+                self.process_outgoing(message, sessionID, admin=True)
         except Exception as e:
             self.logger.error(f"Error in toAdmin: {e}")
+        if self.metrics is not None:
+            self.metrics.callback('toAdmin', sessionID, msg_type, started)
 
     def fromAdmin(self, message: fix.Message, sessionID: fix.SessionID) -> None:
         """
         Callback for receiving administrative messages.
         """
+        started = time.perf_counter_ns()
+        raw = None
         try:
-            self.logger.debug(f'fromAdmin: {self.format_fix_message(message)}')
-            self.log_message_raw(message)
+            self.last_received = time.monotonic()
+            if self.pipeline is not None:
+                raw = message.toString()
+                self._offload(sessionID, raw, INCOMING)
+            else:
+                raw = self.process_admin(message, sessionID)
         except Exception as e:
             self.logger.error(f"Error in fromAdmin: {e}")
+        if self.metrics is not None:
+            self.metrics.callback('fromAdmin', sessionID, self._msg_type(raw), started)
 
     def toApp(self, message: fix.Message, sessionID: fix.SessionID) -> None:
         """
         Callback for sending application-level messages.
         """
+        started = time.perf_counter_ns()
+        raw = None
         try:
-            self.logger.debug(f'toApp: {self.format_fix_message(message)}')
-            self.log_message_raw(message)
+            if self.pipeline is not None:
+                raw = message.toString()
+                self._offload(sessionID, raw, OUTGOING)
+            else:
+                raw = self.process_outgoing(message, sessionID)
         except Exception as e:
             self.logger.error(f"Error in toApp: {e}")
+        if self.metrics is not None:
+            self.metrics.callback('toApp', sessionID, self._msg_type(raw), started)
 
     def fromApp(self, message: fix.Message, sessionID: fix.SessionID) -> None:
         """
         Callback for receiving application-level messages.
         """
+        started = time.perf_counter_ns()
+        msg_type = ''
         try:
-            msgType = fix.MsgType()
-            message.getHeader().getField(msgType)
-            self.logger.info(f'fromApp: {self.format_fix_message(message)}')
-            if msgType.getValue() == fix.MsgType_ExecutionReport:
-                self.process_execution_report(message)
+            self.last_received = time.monotonic()
+            if self.pipeline is not None:
+                raw = message.toString()
+                msg_type = self._msg_type(raw)
+                self._offload(sessionID, raw, INCOMING)
             else:
-                self.logger.info(f'Received message: {self.format_fix_message(message)}')
-            self.log_message_raw(message)
+                msg_type = self.process_app(message, sessionID)
         except Exception as e:
             self.logger.error(f"Error in fromApp: {e}")
+        if self.metrics is not None:
+            self.metrics.callback('fromApp', sessionID, msg_type, started)
 
-    def process_execution_report(self, message: fix.Message) -> None:
+    def process_admin(self, message: fix.Message, sessionID: Optional[fix.SessionID] = None,
+                      raw: Optional[str] = None, timestamp_ns: Optional[int] = None) -> Optional[str]:
         """
-        Processes Execution Report messages.
+        Logs a received administrative message and feeds its MsgSeqNum to the gap tracker.
+
+        Returns:
+            Optional[str]: The serialized message.
         """
-        try:
-            exec_id = fix.ExecID()
-            symbol = fix.Symbol()
-            side = fix.Side()
-            order_qty = fix.OrderQty()
-            last_px = fix.LastPx()
-            last_qty = fix.LastQty()
-            transact_time = fix.TransactTime()
-            exec_type = fix.ExecType()
-            ord_status = fix.OrdStatus()
-
-            message.getField(exec_id)
-            message.getField(symbol)
-            message.getField(side)
-            message.getField(order_qty)
-            message.getField(last_px)
-            message.getField(last_qty)
-            message.getField(transact_time)
-            message.getField(exec_type)
-            message.getField(ord_status)
-
-            log_message = (
-                f"Execution Report: ExecID={exec_id.getValue()}, "
-                f"Symbol={symbol.getValue()}, Side={side.getValue()}, "
-                f"OrderQty={order_qty.getValue()}, LastPx={last_px.getValue()}, "
-                f"LastQty={last_qty.getValue()}, TransactTime={transact_time.getValue()}, "
-                f"ExecType={exec_type.getValue()}, OrdStatus={ord_status.getValue()}"
-            )
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('fromAdmin: %s', LazyMessage(message, self.formatter))
+        raw = self.log_message_raw(message, sessionID, raw=raw, timestamp_ns=timestamp_ns)
+        self.track_sequence(message, sessionID)
+        return raw
+
+    def process_outgoing(self, message: fix.Message, sessionID: Optional[fix.SessionID] = None,
+                         raw: Optional[str] = None, admin: bool = False,
+                         timestamp_ns: Optional[int] = None) -> Optional[str]:
+        """
+        Logs a sent message.
+
+        Returns:
+            Optional[str]: The serialized message.
+        """
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('toAdmin: %s' if admin else 'toApp: %s', LazyMessage(message, self.formatter))
+        return self.log_message_raw(message, sessionID, OUTGOING, raw, timestamp_ns)
+
+    def process_app(self, message: fix.Message, sessionID: Optional[fix.SessionID] = None,
+                    raw: Optional[str] = None, timestamp_ns: Optional[int] = None) -> str:
+        """
+        Processes a received application message: drops duplicates, runs the
+        handlers of its MsgType, logs it and feeds its MsgSeqNum to the gap tracker.
+
+        Returns:
+            str: The MsgType.
+        """
+        if raw is None:
+            raw = message.toString()
+        if self.duplicates is not None:
+            if self.duplicates.seen_message(sessionID.toString() if sessionID is not None else '', raw):
+                # Still counts as received, so resend chunks it belongs to complete
+                self.track_sequence(message, sessionID)
+                return self._msg_type(raw)
+        # Only build the formatter's wrapper when the INFO records will be emitted
+        formatted = LazyMessage(message, self.formatter) if self.logger.isEnabledFor(logging.INFO) else None
+        if formatted is not None:
+            self.logger.info('fromApp: %s', formatted)
+        msg_type = self._msg_type(raw)
+        if not self.dispatcher.dispatch(msg_type, raw, message, sessionID) and formatted is not None:
+            self.logger.info('Received message: %s', formatted)
+        self.log_message_raw(message, sessionID, raw=raw, timestamp_ns=timestamp_ns)
+        self.track_sequence(message, sessionID)
+        return msg_type
+
+    def _offload(self, sessionID: Optional[fix.SessionID], raw: str, direction: int) -> None:
+        """
+        Queue a serialized message for the pipeline, keeping a copy of its SessionID
+        for the worker, since QuickFIX's own does not outlive the callback.
+        """
+        session = sessionID.toString() if sessionID is not None else ''
+        if session and session not in self._offload_sessions:
+            self._offload_sessions[session] = fix.SessionID(
+                sessionID.getBeginString().getValue(), sessionID.getSenderCompID().getValue(),
+                sessionID.getTargetCompID().getValue(), sessionID.getSessionQualifier())
+        self.pipeline.submit(session, raw, direction)
 
-            self.logger.info(log_message)
-            self.log_to_file(log_message)
+    def _process_offloaded(self, raw: str, session: str, direction: int, enqueued_ns: int) -> None:
+        """
+        Pipeline handler: rebuilds the message from its string and processes it
+        as the callback would have, journaling it with the time it was queued.
+        """
+        message = fix.Message(raw, False)
+        sessionID = self._offload_sessions.get(session)
+        admin = self._msg_type(raw) in ADMIN_MSG_TYPES
+        if direction == OUTGOING:
+            self.process_outgoing(message, sessionID, raw, admin, enqueued_ns)
+        elif admin:
+            self.process_admin(message, sessionID, raw, enqueued_ns)
+        else:
+            self.process_app(message, sessionID, raw, enqueued_ns)
+
+    @staticmethod
+    def _msg_type(raw: Optional[str]) -> str:
+        """
+        MsgType read from the serialized message, which is cheaper than a header lookup.
+        """
+        start = raw.find('\x0135=') if raw else -1
+        if start < 0:
+            return ''
+        return raw[start + 4:raw.find('\x01', start + 4)]
+
+    def track_sequence(self, message: fix.Message, sessionID: Optional[fix.SessionID] = None) -> None:
+        """
+        Feeds the incoming MsgSeqNum (or a SequenceReset range) to the session's gap
+        tracker, and the TestReqID of a Heartbeat, which may mark the end of a resend.
+        """
+        gap_tracker = self._gap_tracker_for(sessionID)
+        if gap_tracker is None:
+            return
+        header = message.getHeader()
+        seqnum = int(header.getField(fix.MsgSeqNum().getField()))
+        msg_type = header.getField(fix.MsgType().getField())
+        if msg_type == fix.MsgType_Heartbeat and message.isSetField(fix.TestReqID().getField()):
+            gap_tracker.observe(seqnum)
+            gap_tracker.acknowledge(message.getField(fix.TestReqID().getField()))
+            return
+        if msg_type == fix.MsgType_SequenceReset:
+            new_seq_no = int(message.getField(fix.NewSeqNo().getField()))
+            gap_fill = message.isSetField(fix.GapFillFlag().getField()) and \
+                message.getField(fix.GapFillFlag().getField()) == 'Y'
+            if gap_fill:
+                gap_tracker.fill(seqnum, new_seq_no - 1)
+            else:
+                gap_tracker.reset(new_seq_no)
+                if self.duplicates is not None and sessionID is not None:
+                    self.duplicates.sequence_reset(sessionID.toString(), new_seq_no)
+            return
+        gap_tracker.observe(seqnum)
+
+    def on_execution_report(self, fields: FieldRecord, message: fix.Message,
+                            sessionID: Optional[fix.SessionID] = None) -> None:
+        """
+        Default ExecutionReport handler: updates the order store and positions,
+        publishes the report to the report ring, if any, then logs it.
+
+        Values are logged as they were sent; tags a report does not carry, such
+        as LastPx on a New ack, are logged empty.
+        """
+        get = fields.get
+        try:
+            self.orders.apply(get)
+            self.positions.add_fields(get)
         except Exception as e:
-            self.logger.error(f"Error processing execution report: {e}")
+            self.logger.error(f"Error updating order state: {e}")
+        if self.report_ring is not None and not self.replaying:
+            try:
+                self.report_ring.publish(get, sessionID.toString() if sessionID is not None else '')
+            except Exception as e:
+                self.logger.error(f"Error publishing execution report: {e}")
+        log_message = (
+            f"Execution Report: ExecID={get(EXEC_ID, '')}, "
+            f"Symbol={get(SYMBOL, '')}, Side={get(SIDE, '')}, "
+            f"OrderQty={get(ORDER_QTY, '')}, LastPx={get(LAST_PX, '')}, "
+            f"LastQty={get(LAST_QTY, '')}, TransactTime={get(TRANSACT_TIME, '')}, "
+            f"ExecType={get(EXEC_TYPE, '')}, OrdStatus={get(ORD_STATUS, '')}"
+        )
+        self.logger.info(log_message)
+        self.log_to_file(log_message)
 
-    def log_message_raw(self, message: fix.Message) -> None:
+    def log_message_raw(self, message: fix.Message, sessionID: Optional[fix.SessionID] = None,
+                        direction: int = INCOMING, raw: Optional[str] = None,
+                        timestamp_ns: Optional[int] = None) -> Optional[str]:
         """
-        Logs the raw FIX message to the session and communal log files.
-        
+        Queues the raw FIX message for the session and communal log files.
+
+        The files are written by the background message writer, so this only
+        serializes the message and returns. With binary_journal the message is
+        also framed, with the current time, session and direction, for the binary journals.
+
         Args:
             message (fix.Message): The FIX message to log.
+            sessionID (fix.SessionID): The session it was sent or received on.
+            direction (int): INCOMING or OUTGOING.
+            raw (str): The message already serialized by the caller, if it was.
+            timestamp_ns (int): Journal timestamp, when the message was taken earlier than now.
+
+        Returns:
+            Optional[str]: The serialized message, or None if it could not be logged.
         """
+        started = time.perf_counter_ns()
         try:
-            raw_message = message.toString() + '\n'
-            self.session_message_log.write(raw_message)
-            self.session_message_log.flush()
-            self.communal_message_log.write(raw_message)
-            self.communal_message_log.flush()
+            if raw is None:
+                raw = message.toString()
+            if not self.replaying:
+                self.message_writer.write(raw + '\n')
+                if self.binary_writer is not None:
+                    session = sessionID.toString().encode() if sessionID is not None else b''
+                    timestamp_ns = timestamp_ns or time.time_ns()
+                    self.binary_writer.write(encode_record(raw.encode(), timestamp_ns, direction, session))
         except Exception as e:
             self.logger.error(f"Error logging raw message: {e}")
+        if self.metrics is not None:
+            self._log_latency['message'].record(time.perf_counter_ns() - started)
+        return raw
 
     def log_to_file(self, message: str) -> None:
         """
-        Logs the message to a file.
+        Queues the message for the session and communal execution report logs.
         """
+        started = time.perf_counter_ns()
         try:
-            log_date = datetime.now().strftime("%Y-%m-%d")
-            session_log_filename = f"human_readable_logs/{log_date}_execution_reports.log"
-            communal_log_filename = "human_readable_logs/communal_execution_reports.log"
-            os.makedirs(os.path.dirname(session_log_filename), exist_ok=True)
-            with open(session_log_filename, 'a') as f:
-                f.write(message + '\n')
-            with open(communal_log_filename, 'a') as communal_file:
-                communal_file.write(message + '\n')
+            if not self.replaying:
+                self.execution_report_writer.write(message + '\n')
         except Exception as e:
             self.logger.error(f"Error logging message to file: {e}")
+        if self.metrics is not None:
+            self._log_latency['execution_report'].record(time.perf_counter_ns() - started)
+
+    def close(self) -> None:
+        """
+        Drains the offload pipeline, then the message, execution report and binary journal writers.
+        """
+        if self.pipeline is not None:
+            try:
+                self.pipeline.close()
+            except Exception as e:
+                self.logger.error(f"Error closing the offload pipeline: {e}")
+        for writer in (self.message_writer, self.execution_report_writer, self.binary_writer):
+            if writer is None:
+                continue
+            try:
+                writer.close()
+            except Exception as e:
+                self.logger.error(f"Error closing {writer.name}: {e}")
@@ -3,13 +3,37 @@ import time
 import quickfix as fix
 import quickfix44 as fix44
 from .fix_application import FIXApplication
-import configparser
+from .gap_tracker import GapTracker
+from .failover import FailoverMonitor, probe_hosts
+from .session_registry import SessionProfile
+from .metrics import Metrics
 import logging
+from typing import Optional
 
 class FIXClient:
-    def __init__(self, config_file_path: str, fix_application: FIXApplication):
+    def __init__(self, config_file_path: str, fix_application: FIXApplication, resend_chunk_size: int = 1000,
+                 resend_max_in_flight: int = 2, resend_timeout: float = 60.0,
+                 logon_timeout: float = 10.0, failover: str = 'sequential', probe_timeout: float = 2.0,
+                 heartbeat_timeout: Optional[float] = None, profile: Optional[SessionProfile] = None,
+                 metrics: Optional[Metrics] = None):
         """
         Initialize settings, application, store factory, log factory, and initiator.
+
+        Session identity, hosts and CompIDs come from `profile`, which is parsed
+        from the .cfg file once (here, if the caller does not pass one).
+
+        `logon_timeout` is how long each host gets to complete the logon. With
+        `failover='race'` both hosts are probed in parallel before logon, and a
+        FailoverMonitor switches hosts when the session dies mid-day (unexpected
+        logout, or `heartbeat_timeout` seconds without any incoming message).
+
+        ResendRequests go through a GapTracker that splits ranges into chunks of
+        `resend_chunk_size`, with at most `resend_max_in_flight` outstanding.
+        The same size becomes the session's ResendRequestChunkSize (unless the
+        .cfg sets one), so gaps QuickFIX requests itself are chunked alike.
+
+        With `metrics`, sends are counted and timed, and the session's logon
+        state, resend backlog and writer counters are exported.
         """
         self.config_file_path = config_file_path
         self.fix_application = fix_application
@@ -18,41 +42,48 @@ class FIXClient:
         self.storeFactory = None
         self.logFactory = None
         self.initiator = None
+        self.profile = profile
         self.session_id = None
+        self.logon_timeout = logon_timeout
+        self.connected_host = None
+        if failover not in ('sequential', 'race'):
+            raise ValueError(f"Unknown failover mode: {failover}")
+        self.failover = failover
+        self.probe_timeout = probe_timeout
+        self.failover_monitor = None
+        if failover == 'race':
+            self.failover_monitor = FailoverMonitor(self, heartbeat_timeout)
+            self.application.on_disconnect = lambda sessionID: self.failover_monitor.trigger("logged out")
+        self.gap_tracker = GapTracker(
+            self._send_resend_chunk, resend_chunk_size, resend_max_in_flight, resend_timeout
+        )
+        self.resend_chunk_size = resend_chunk_size
+        self.application.gap_tracker = self.gap_tracker
+        self.metrics = metrics
 
         self._initialize_settings()
+        if self.metrics is not None:
+            self.metrics.track_client(self)
 
     def _initialize_settings(self) -> None:
         """
         Initialize settings from the configuration file.
         """
         try:
+            if self.profile is None:
+                self.profile = SessionProfile.from_config(self.config_file_path)
             self.settings = fix.SessionSettings(self.config_file_path)
             self.storeFactory = fix.FileStoreFactory(self.settings)
             self.logFactory = fix.FileLogFactory(self.settings)
-            self.session_id = self._get_session_id_from_config(self.config_file_path)
-        except (fix.ConfigError, fix.RuntimeError) as e:
-            logging.error(f"Error initializing FIX client with config {self.config_file_path}: {e}")
-            raise
-
-    def _get_session_id_from_config(self, config_file_path: str) -> fix.SessionID:
-        """
-        Extract the SessionID from the configuration file.
-        """
-        try:
-            config = configparser.ConfigParser()
-            config.read(config_file_path)
-            session_cfg = config['SESSION']
-            return fix.SessionID(
-                session_cfg['BeginString'],
-                session_cfg['SenderCompID'],
-                session_cfg['TargetCompID']
-            )
+            self.session_id = self.profile.session_id
+            session_settings = self.settings.get(self.session_id)
+            if not session_settings.has("ResendRequestChunkSize"):
+                session_settings.setInt("ResendRequestChunkSize", self.resend_chunk_size)
         except KeyError as e:
-            logging.error(f"Missing key in config file {config_file_path}: {e}")
+            logging.error(f"Missing key in config file {self.config_file_path}: {e}")
             raise
-        except configparser.Error as e:
-            logging.error(f"ConfigParser error reading {config_file_path}: {e}")
+        except (fix.ConfigError, fix.RuntimeError) as e:
+            logging.error(f"Error initializing FIX client with config {self.config_file_path}: {e}")
             raise
 
     def logon(self) -> None:
@@ -60,36 +91,58 @@ class FIXClient:
         Start the connection and wait until logon is successful.
         """
         primary_host, secondary_host = self._get_hosts()
+        if self.failover == 'race':
+            self._race_logon(primary_host, secondary_host)
+            return
         if self._try_logon(primary_host):
+            self.connected_host = primary_host
             logging.info(f"Successfully logged on using primary host: {primary_host}")
         elif secondary_host and self._try_logon(secondary_host):
+            self.connected_host = secondary_host
             logging.info(f"Successfully logged on using secondary host: {secondary_host}")
         else:
             logging.error("Failed to logon using both primary and secondary hosts.")
             raise RuntimeError("Logon failed for both primary and secondary hosts.")
 
+    def _race_logon(self, primary_host: str, secondary_host: Optional[str]) -> None:
+        """
+        Probe both hosts in parallel and log on to the first that answers,
+        falling back to the other one.
+        """
+        started = time.monotonic()
+        hosts = [h for h in (primary_host, secondary_host) if h]
+        winner = probe_hosts(hosts, self.port, self.probe_timeout)
+        ordered = [winner] + [h for h in hosts if h != winner] if winner else hosts
+        for host in ordered:
+            if self._try_logon(host):
+                self.connected_host = host
+                logging.info(f"Logged on to {host} in {time.monotonic() - started:.2f}s (probe winner: {winner})")
+                self.failover_monitor.start()
+                return
+        logging.error("Failed to logon using both primary and secondary hosts.")
+        raise RuntimeError("Logon failed for both primary and secondary hosts.")
+
+    @property
+    def port(self) -> int:
+        return self.profile.port
+
     def _get_hosts(self) -> tuple:
         """
-        Retrieve primary and secondary hosts from the configuration.
+        Retrieve primary and secondary hosts from the session profile.
         """
-        config = configparser.ConfigParser()
-        config.read(self.config_file_path)
-        primary_host = config['SESSION'].get('SocketConnectHostPrimary')
-        secondary_host = config['SESSION'].get('SocketConnectHostSecondary')
-        return primary_host, secondary_host
+        return self.profile.primary_host, self.profile.secondary_host
 
     def _try_logon(self, host: str) -> bool:
         """
-        Attempt to logon to the specified host.
+        Attempt to logon to the specified host, waiting for the application's
+        onLogon callback for up to logon_timeout seconds.
         """
         try:
             self._set_socket_connect_host(host)
             self.initiator = fix.SocketInitiator(self.application, self.storeFactory, self.settings, self.logFactory)
             self.initiator.start()
-            for _ in range(10):  # Try for a certain number of attempts
-                if self.initiator.isLoggedOn():
-                    return True
-                time.sleep(1)
+            if self.application.wait_for_logon(self.logon_timeout):
+                return True
             self.initiator.stop()
         except fix.RuntimeError as e:
             logging.error(f"Failed to logon to host {host}: {e}")
@@ -106,12 +159,19 @@ class FIXClient:
             logging.error(f"Error setting SocketConnectHost to {host}: {e}")
             raise
 
-    def logout(self) -> None:
+    def logout(self, drain: bool = True) -> None:
         """
-        Stop the connection.
+        Stop the connection and drain the application's message writer.
+
+        With `drain=False` the writers stay open, so the session can log on again.
         """
         try:
-            self.initiator.stop()
+            if self.failover_monitor is not None:
+                self.failover_monitor.stop()
+            if self.initiator is not None:
+                self.initiator.stop()
+            if drain:
+                self.application.close()
         except fix.RuntimeError as e:
             logging.error(f"Error during logout: {e}")
             raise
@@ -120,24 +180,23 @@ class FIXClient:
         """
         Send the FIX message to the target.
         """
+        started = time.perf_counter_ns()
         try:
-            sender_comp_id = self._get_session_info('SenderCompID')
-            target_comp_id = self._get_session_info('TargetCompID')
-            fix.Session.sendToTarget(msg, sender_comp_id, target_comp_id)
+            fix.Session.sendToTarget(msg, self.profile.sender_comp_id, self.profile.target_comp_id)
         except fix.RuntimeError as e:
             logging.error(f"Error sending message: {e}")
             raise
+        if self.metrics is not None:
+            session = self.session_id.toString()
+            self.metrics.observe('fix_send_latency_seconds', (session,), time.perf_counter_ns() - started)
+            self.metrics.inc('fix_messages_sent_total', (session, FIXApplication._msg_type(msg.toString())))
 
     def _get_session_info(self, field_name: str) -> str:
         """
-        Get session information based on the provided field name.
+        Get session information based on the provided field name, from the
+        precomputed profile rather than SessionSettings.
         """
-        try:
-            session_settings = self.settings.get(self.session_id)
-            return session_settings.getString(field_name) if session_settings.has(field_name) else 'SESSION'
-        except (fix.ConfigError, fix.RuntimeError) as e:
-            logging.error(f"Error getting session info for {field_name}: {e}")
-            raise
+        return self.profile.settings.get(field_name, 'SESSION')
 
     def _create_header(self, msg: fix.Message, msg_type: str) -> None:
         """
@@ -147,12 +206,8 @@ class FIXClient:
             header = msg.getHeader()
             header.setField(fix.BeginString(fix.BeginString_FIX44))
             header.setField(fix.MsgType(msg_type))
-            
-            sender_comp_id = self._get_session_info('SenderCompID')
-            target_comp_id = self._get_session_info('TargetCompID')
-            
-            header.setField(fix.SenderCompID(sender_comp_id))
-            header.setField(fix.TargetCompID(target_comp_id))
+            header.setField(fix.SenderCompID(self.profile.sender_comp_id))
+            header.setField(fix.TargetCompID(self.profile.target_comp_id))
             
             transact_time = datetime.utcnow().strftime('%Y%m%d-%H:%M:%S.%f')[:-3]
             header.setField(fix.StringField(60, transact_time))
@@ -162,11 +217,18 @@ class FIXClient:
 
     def send_resend_request(self, begin_seq_no: int, end_seq_no: int) -> None:
         """
-        Send a ResendRequest message to request the resending of messages.
+        Request the resending of messages, in chunks paced by the gap tracker.
 
         :param begin_seq_no: Begin sequence number for the resend.
         :param end_seq_no: End sequence number for the resend. Use 0 to request all subsequent messages.
         """
+        self.gap_tracker.request(begin_seq_no, end_seq_no)
+
+    def _send_resend_chunk(self, begin_seq_no: int, end_seq_no: int) -> None:
+        """
+        Send a single ResendRequest message, followed by the TestRequest whose
+        Heartbeat tells the gap tracker the counterparty has finished resending it.
+        """
         try:
             resend_request = fix44.ResendRequest()
             resend_request.setField(fix.BeginSeqNo(begin_seq_no))
@@ -174,6 +236,10 @@ class FIXClient:
 
             self._send_message(resend_request)
             logging.info(f"ResendRequest sent from {begin_seq_no} to {end_seq_no}")
+            if end_seq_no:
+                test_request = fix44.TestRequest()
+                test_request.setField(fix.TestReqID(GapTracker.marker(begin_seq_no, end_seq_no)))
+                self._send_message(test_request)
         except (fix.ConfigError, fix.RuntimeError) as e:
             logging.error(f"Error sending ResendRequest from {begin_seq_no} to {end_seq_no}: {e}")
             raise
@@ -0,0 +1,48 @@
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from typing import Dict
+from .fix_field import FIXField
+
+
+class FIXDictionary:
+    def __init__(self, fields: Dict[int, FIXField]):
+        """
+        Field definitions from a QuickFIX data dictionary, with lookup tables
+        precomputed for formatting.
+
+        Args:
+            fields (Dict[int, FIXField]): Field definitions keyed by tag number.
+        """
+        self.fields = fields
+        # Keyed by the tag text as it appears on the wire, so formatting never converts to int
+        self.tag_names: Dict[str, str] = {str(number): field.name for number, field in fields.items()}
+        self.value_names: Dict[str, Dict[str, str]] = {
+            str(number): dict(field.values) for number, field in fields.items() if field.values
+        }
+
+    @classmethod
+    def from_xml(cls, path: str) -> 'FIXDictionary':
+        """
+        Parse the <fields> section of a QuickFIX XML data dictionary.
+
+        Args:
+            path (str): Path to the dictionary, e.g. data/FIX44.xml.
+
+        Returns:
+            FIXDictionary: The parsed dictionary.
+        """
+        root = ET.parse(path).getroot()
+        fields = {}
+        for element in root.iterfind('fields/field'):
+            number = int(element.get('number'))
+            values = [(value.get('enum'), value.get('description')) for value in element.iterfind('value')]
+            fields[number] = FIXField(number, element.get('name'), element.get('type'), values)
+        return cls(fields)
+
+
+@lru_cache(maxsize=None)
+def load_dictionary(path: str) -> FIXDictionary:
+    """
+    Load a data dictionary once per path and share it between applications.
+    """
+    return FIXDictionary.from_xml(path)
@@ -0,0 +1,249 @@
+import time
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Callable, Iterator, List, Optional, Tuple
+
+
+class IntervalSet:
+    def __init__(self):
+        """
+        A set of integers stored as sorted, disjoint, inclusive [begin, end] ranges.
+        """
+        self._begins: List[int] = []
+        self._ends: List[int] = []
+
+    def add(self, begin: int, end: int) -> None:
+        """
+        Add every integer in [begin, end], merging with adjacent ranges.
+        """
+        if begin > end:
+            return
+        lo = bisect_left(self._ends, begin - 1)
+        hi = bisect_right(self._begins, end + 1)
+        if lo < hi:
+            begin = min(begin, self._begins[lo])
+            end = max(end, self._ends[hi - 1])
+        self._begins[lo:hi] = [begin]
+        self._ends[lo:hi] = [end]
+
+    def remove(self, begin: int, end: Optional[int] = None) -> int:
+        """
+        Remove every integer in [begin, end] and return how many were present.
+        """
+        end = begin if end is None else end
+        lo = bisect_left(self._ends, begin)
+        hi = bisect_right(self._begins, end)
+        if lo >= hi:
+            return 0
+        removed = 0
+        begins, ends = [], []
+        for b, e in zip(self._begins[lo:hi], self._ends[lo:hi]):
+            removed += min(e, end) - max(b, begin) + 1
+            if b < begin:
+                begins.append(b)
+                ends.append(begin - 1)
+            if e > end:
+                begins.append(end + 1)
+                ends.append(e)
+        self._begins[lo:hi] = begins
+        self._ends[lo:hi] = ends
+        return removed
+
+    def overlaps(self, begin: int, end: int) -> bool:
+        lo = bisect_left(self._ends, begin)
+        return lo < len(self._begins) and self._begins[lo] <= end
+
+    def __contains__(self, value: int) -> bool:
+        return self.overlaps(value, value)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return iter(list(zip(self._begins, self._ends)))
+
+    def __len__(self) -> int:
+        return len(self._begins)
+
+    def __bool__(self) -> bool:
+        return bool(self._begins)
+
+    def first(self) -> Tuple[int, int]:
+        return self._begins[0], self._ends[0]
+
+    def total(self) -> int:
+        return sum(e - b + 1 for b, e in zip(self._begins, self._ends))
+
+    def clear(self) -> None:
+        self._begins.clear()
+        self._ends.clear()
+
+
+# TestReqID prefix of the TestRequest that follows each ResendRequest chunk
+MARKER_PREFIX = 'RESEND-'
+
+
+class GapTracker:
+    def __init__(self, send_request: Callable[[int, int], None], chunk_size: int = 1000,
+                 max_in_flight: int = 2, timeout: float = 60.0):
+        """
+        Tracks incoming MsgSeqNums for one session and paces explicit ResendRequests in chunks.
+
+        A requested range is sent `chunk_size` seqnums at a time with at most
+        `max_in_flight` chunks outstanding. QuickFIX drops resent copies of
+        seqnums it has already received before any callback sees them, so a
+        chunk cannot be counted off message by message. `send_request` therefore
+        follows each ResendRequest with a TestRequest whose TestReqID is
+        marker(begin, end). The counterparty answers it after resending the
+        chunk, and passing that Heartbeat's TestReqID to acknowledge() releases
+        the next chunk. A chunk whose seqnums all arrive, or that a
+        SequenceReset-GapFill covers, completes too. Gaps in live traffic are
+        left to QuickFIX, which requests them itself.
+
+        Args:
+            send_request (Callable[[int, int], None]): Sends one ResendRequest(BeginSeqNo, EndSeqNo)
+                and its marker TestRequest.
+            chunk_size (int): Maximum number of seqnums per ResendRequest.
+            max_in_flight (int): Maximum number of outstanding ResendRequests.
+            timeout (float): Seconds after which an unacknowledged chunk is given up on.
+        """
+        if chunk_size < 1 or max_in_flight < 1:
+            raise ValueError("chunk_size and max_in_flight must be at least 1")
+        self.send_request = send_request
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.logger = logging.getLogger('GapTracker')
+        self.next_expected: Optional[int] = None
+        self.missing = IntervalSet()      # not yet requested
+        self.outstanding = IntervalSet()  # requested, not yet resent
+        self.in_flight: List[Tuple[int, int, float]] = []
+        self.requests_sent = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def marker(begin: int, end: int) -> str:
+        """
+        TestReqID that marks the end of the resend of [begin, end].
+        """
+        return f"{MARKER_PREFIX}{begin}-{end}"
+
+    def reset(self, next_expected: Optional[int] = None) -> None:
+        """
+        Forget all state, e.g. after a logon that reset sequence numbers.
+        """
+        with self._lock:
+            self.next_expected = next_expected
+            self.missing.clear()
+            self.outstanding.clear()
+            self.in_flight.clear()
+
+    def observe(self, seqnum: int) -> None:
+        """
+        Record an incoming MsgSeqNum.
+        """
+        self.fill(seqnum, seqnum)
+
+    def fill(self, begin: int, end: int) -> None:
+        """
+        Record that [begin, end] has been received, e.g. from a SequenceReset-GapFill.
+        """
+        with self._lock:
+            if self.next_expected is None or end >= self.next_expected:
+                self.next_expected = end + 1
+            self.missing.remove(begin, end)
+            if self.outstanding.remove(begin, end):
+                self._complete_filled()
+            chunks = self._take_chunks()
+        self._send(chunks, raise_errors=False)
+
+    def request(self, begin: int, end: int) -> None:
+        """
+        Request [begin, end] explicitly. An end of 0 means up to the last seqnum seen.
+        """
+        with self._lock:
+            if end == 0 and (self.next_expected is None or self.next_expected <= begin):
+                # Nothing seen past begin yet, so there is no range to chunk
+                chunks = None
+            else:
+                if end == 0:
+                    end = self.next_expected - 1
+                self.missing.add(begin, end)
+                chunks = self._take_chunks()
+        if chunks is None:
+            self.send_request(begin, 0)
+            self.requests_sent += 1
+            return
+        self._send(chunks, raise_errors=True)
+
+    def acknowledge(self, test_req_id: str) -> None:
+        """
+        Complete the chunk whose marker came back as a Heartbeat's TestReqID.
+        """
+        if not test_req_id.startswith(MARKER_PREFIX):
+            return
+        try:
+            begin, end = (int(value) for value in test_req_id[len(MARKER_PREFIX):].split('-'))
+        except ValueError:
+            return
+        with self._lock:
+            self.outstanding.remove(begin, end)
+            self._complete_filled()
+            chunks = self._take_chunks()
+        self._send(chunks, raise_errors=False)
+
+    def pending(self) -> int:
+        """
+        Return the number of seqnums still missing or outstanding.
+        """
+        with self._lock:
+            return self.missing.total() + self.outstanding.total()
+
+    def _complete_filled(self) -> None:
+        still_open = []
+        for begin, end, sent_at in self.in_flight:
+            if self.outstanding.overlaps(begin, end):
+                still_open.append((begin, end, sent_at))
+            else:
+                self.logger.info(f"Resend chunk {begin}-{end} complete")
+        self.in_flight = still_open
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for begin, end, sent_at in list(self.in_flight):
+            if now - sent_at >= self.timeout:
+                lost = self.outstanding.remove(begin, end)
+                self.logger.error(f"Resend chunk {begin}-{end} timed out with {lost} seqnums unacknowledged")
+                self.in_flight.remove((begin, end, sent_at))
+
+    def _take_chunks(self) -> List[Tuple[int, int]]:
+        """
+        Move the next chunks from missing to in flight. Called with the lock held;
+        the requests themselves are sent after releasing it, so a send never waits
+        on the engine while holding the lock its callbacks need.
+        """
+        self._expire()
+        chunks = []
+        while self.missing and len(self.in_flight) < self.max_in_flight:
+            begin, end = self.missing.first()
+            end = min(end, begin + self.chunk_size - 1)
+            self.missing.remove(begin, end)
+            self.outstanding.add(begin, end)
+            self.in_flight.append((begin, end, time.monotonic()))
+            chunks.append((begin, end))
+        return chunks
+
+    def _send(self, chunks: List[Tuple[int, int]], raise_errors: bool) -> None:
+        for i, (begin, end) in enumerate(chunks):
+            try:
+                self.send_request(begin, end)
+                self.requests_sent += 1
+            except Exception as e:
+                with self._lock:
+                    for b, e_ in chunks[i:]:
+                        self.outstanding.remove(b, e_)
+                        self.missing.add(b, e_)
+                    unsent = set(chunks[i:])
+                    self.in_flight = [c for c in self.in_flight if (c[0], c[1]) not in unsent]
+                if raise_errors:
+                    raise
+                self.logger.error(f"Error sending ResendRequest {begin}-{end}: {e}")
+                return
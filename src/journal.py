@@ -0,0 +1,243 @@
+import os
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from .log_index import IndexWriter, ENTRY, index_path
+
+
+def next_midnight(now: float) -> float:
+    """
+    Return the timestamp of the first local midnight after `now`.
+    """
+    tomorrow = datetime.fromtimestamp(now).date() + timedelta(days=1)
+    return datetime.combine(tomorrow, datetime.min.time()).timestamp()
+
+
+class JournalFile:
+    def __init__(self, path_template: str, max_bytes: Optional[int] = None,
+                 clock: Callable[[], float] = time.time, index: bool = False, header: bytes = b''):
+        """
+        An append-only log file that stays open and rolls over to a new segment.
+
+        If the template contains `{date}` the segment follows the local date and a new
+        file is opened at midnight. If `max_bytes` is set, a segment that reaches that
+        size is sealed by renaming it with a timestamp and a fresh one is started.
+
+        Args:
+            path_template (str): File path, optionally containing a `{date}` placeholder.
+            max_bytes (int): Size at which the current segment is sealed; None for no limit.
+            clock (Callable[[], float]): Time source, mainly for tests.
+            index (bool): Keep a sidecar index (see log_index) next to each segment.
+            header (bytes): Written at the start of every new segment, e.g. a file format magic.
+        """
+        self.path_template = path_template
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.logger = logging.getLogger('JournalFile')
+        self.dated = '{date}' in path_template
+        self.indexed = index
+        self.header = header
+        self.index = None
+        self.path = None
+        self.size = 0
+        self.closed = False
+        self._file = None
+        self._next_rollover = None
+        # Several LogWriter threads append to a shared journal; each write is one locked append
+        self._lock = threading.RLock()
+        self._users = 1
+        self._shared_key = None
+        self._open(clock())
+
+    @property
+    def name(self) -> str:
+        return self.path
+
+    def _open(self, now: float) -> None:
+        if self.dated:
+            date = datetime.fromtimestamp(now).strftime("%Y-%m-%d")
+            self.path = self.path_template.format(date=date)
+            self._next_rollover = next_midnight(now)
+        else:
+            self.path = self.path_template
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'ab')
+        self.size = self._file.tell()
+        if self.header and not self.size:
+            self._file.write(self.header)
+            self.size = len(self.header)
+        if self.indexed:
+            self._check_index()
+            self.index = IndexWriter(index_path(self.path))
+
+    def _check_index(self) -> None:
+        """
+        Warn if an existing segment has messages its sidecar index does not cover.
+        """
+        sidecar = index_path(self.path)
+        indexed_to = 0
+        if os.path.exists(sidecar):
+            with open(sidecar, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                entries = f.tell() // ENTRY.size
+                if entries:
+                    f.seek((entries - 1) * ENTRY.size)
+                    offset, length = ENTRY.unpack(f.read(ENTRY.size))[:2]
+                    indexed_to = offset + length + 1
+        if indexed_to < self.size:
+            self.logger.warning(
+                f"{sidecar} does not cover all of {self.path}; run python -m src.log_index rebuild {self.path}"
+            )
+
+    def write(self, data: bytes, records: Optional[List[bytes]] = None) -> int:
+        """
+        Append data to the current segment, rolling over first if needed.
+
+        Args:
+            data (bytes): Encoded records to append.
+            records (List[bytes]): The individual records making up data, for the index.
+
+        Returns:
+            int: Offset in the current segment at which the data starts.
+        """
+        with self._lock:
+            if self._next_rollover is not None and self.clock() >= self._next_rollover:
+                self.rollover()
+            elif (self.max_bytes is not None and self.size > len(self.header)
+                  and self.size + len(data) > self.max_bytes):
+                self.rollover(seal=True)
+            offset = self.size
+            self._file.write(data)
+            self.size += len(data)
+            if self.index is not None and records is not None:
+                self.index.append(offset, records)
+            return offset
+
+    def rollover(self, seal: bool = False) -> None:
+        """
+        Close the current segment and open the next one.
+
+        Args:
+            seal (bool): Rename the closed segment so the path can be reused.
+        """
+        with self._lock:
+            old_path = self.path
+            self._close_files()
+            sealed_path = None
+            if seal:
+                sealed_path = self._sealed_path(old_path)
+                os.replace(old_path, sealed_path)
+                if self.index is not None:
+                    os.replace(index_path(old_path), index_path(sealed_path))
+            self._open(self.clock())
+        self.logger.info(f"Rolled over {sealed_path or old_path} -> {self.path}")
+
+    def _sealed_path(self, path: str) -> str:
+        stamp = datetime.fromtimestamp(self.clock()).strftime("%Y%m%d-%H%M%S")
+        directory, filename = os.path.split(path)
+        if '.current' in filename:
+            candidate = filename.replace('.current', f'.{stamp}', 1)
+        else:
+            root, ext = os.path.splitext(filename)
+            candidate = f"{root}.{stamp}{ext}"
+        sealed = os.path.join(directory, candidate)
+        counter = 1
+        while os.path.exists(sealed):
+            root, ext = os.path.splitext(candidate)
+            sealed = os.path.join(directory, f"{root}-{counter}{ext}")
+            counter += 1
+        return sealed
+
+    def flush(self, fsync: bool = False) -> None:
+        """
+        Flush buffered data (and the index) to the OS, optionally fsyncing it.
+        """
+        with self._lock:
+            self._file.flush()
+            if self.index is not None:
+                self.index.flush()
+            if fsync:
+                os.fsync(self._file.fileno())
+                if self.index is not None:
+                    os.fsync(self.index.fileno())
+
+    def close(self) -> None:
+        """
+        Close the journal; a shared journal stays open until its last user closes it.
+        """
+        with _shared_lock:
+            if self.closed:
+                return
+            self._users -= 1
+            if self._users > 0:
+                return
+            if self._shared_key is not None and _shared.get(self._shared_key) is self:
+                del _shared[self._shared_key]
+        with self._lock:
+            self._close_files()
+            self.closed = True
+
+    def _close_files(self) -> None:
+        self._file.close()
+        if self.index is not None:
+            self.index.close()
+
+
+class DatedFileHandler(logging.FileHandler):
+    def __init__(self, path_template: str, clock: Callable[[], float] = time.time):
+        """
+        A logging FileHandler on a `{date}` path that moves to the next day's file at local midnight.
+
+        The switch happens on the first record after midnight, so a quiet handler
+        keeps the previous day's file open until it logs again.
+        """
+        self.path_template = path_template
+        self.clock = clock
+        now = clock()
+        self._next_rollover = next_midnight(now)
+        super().__init__(self._path(now))
+
+    def _path(self, now: float) -> str:
+        return self.path_template.format(date=datetime.fromtimestamp(now).strftime("%Y-%m-%d"))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        now = self.clock()
+        if now >= self._next_rollover:
+            # Called with the handler lock held; FileHandler.emit reopens at baseFilename
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+            self.baseFilename = os.path.abspath(self._path(now))
+            self._next_rollover = next_midnight(now)
+        super().emit(record)
+
+
+_shared: Dict[str, JournalFile] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_journal(path_template: str, max_bytes: Optional[int] = None, index: bool = False,
+                   header: bytes = b'') -> JournalFile:
+    """
+    The process-wide JournalFile for a path template, opened on first use.
+
+    Every application of a process that logs to the same directory appends to the
+    same files. Separate JournalFiles on one path would each track their own size,
+    so index offsets, size-based rollover and segment headers would all go wrong;
+    sharing one keeps a single offset and a single rollover per file. The first
+    caller's settings apply, and every call must be matched by a close().
+    """
+    key = os.path.abspath(path_template)
+    with _shared_lock:
+        journal = _shared.get(key)
+        if journal is not None:
+            journal._users += 1
+            return journal
+        journal = JournalFile(path_template, max_bytes, index=index, header=header)
+        journal._shared_key = key
+        _shared[key] = journal
+        return journal
@@ -0,0 +1,326 @@
+import os
+import sys
+import mmap
+import zlib
+import struct
+import hashlib
+import logging
+import argparse
+import calendar
+from bisect import bisect_left, bisect_right
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from .log_parser import iter_spans
+
+# offset, length, session key, MsgSeqNum, SendingTime (ms since epoch, UTC), ExecID hash
+ENTRY = struct.Struct('<QIIIqQ')
+INDEX_SUFFIX = '.idx'
+
+_SENDER = b'\x0149='
+_TARGET = b'\x0156='
+_SEQNUM = b'\x0134='
+_SENDING_TIME = b'\x0152='
+_EXEC_ID = b'\x0117='
+
+
+def index_path(log_path: str) -> str:
+    return log_path + INDEX_SUFFIX
+
+
+def session_key(sender_comp_id, target_comp_id) -> int:
+    """
+    Key identifying one direction of a session, as (SenderCompID, TargetCompID) on the wire.
+    """
+    sender = sender_comp_id.encode() if isinstance(sender_comp_id, str) else bytes(sender_comp_id)
+    target = target_comp_id.encode() if isinstance(target_comp_id, str) else bytes(target_comp_id)
+    return zlib.crc32(sender + b'\x01' + target)
+
+
+def exec_id_hash(exec_id) -> int:
+    """
+    64-bit hash of an ExecID; 0 is reserved for messages without one.
+    """
+    value = exec_id.encode() if isinstance(exec_id, str) else bytes(exec_id)
+    return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), 'little') or 1
+
+
+_day_cache: Dict[bytes, int] = {}
+
+
+def parse_sending_time(value: bytes) -> int:
+    """
+    Convert a FIX UTCTimestamp (YYYYMMDD-HH:MM:SS[.sss]) to milliseconds since the epoch.
+    Returns 0 if the value cannot be parsed.
+    """
+    try:
+        day = _day_cache.get(value[:8])
+        if day is None:
+            day = calendar.timegm((int(value[0:4]), int(value[4:6]), int(value[6:8]), 0, 0, 0)) * 1000
+            _day_cache[value[:8]] = day
+        ms = int(value[18:21].ljust(3, b'0')) if len(value) > 18 else 0
+        return day + (int(value[9:11]) * 3600 + int(value[12:14]) * 60 + int(value[15:17])) * 1000 + ms
+    except ValueError:
+        return 0
+
+
+def _field(buf, pattern: bytes, start: int, end: int) -> Optional[bytes]:
+    pos = buf.find(pattern, start, end)
+    if pos < 0:
+        return None
+    pos += len(pattern)
+    stop = buf.find(b'\x01', pos, end)
+    return buf[pos:stop if stop >= 0 else end]
+
+
+def index_entry(buf, start: int, end: int, offset: Optional[int] = None) -> Tuple[int, int, int, int, int, int]:
+    """
+    Build the index entry for the message occupying buf[start:end].
+
+    Args:
+        buf: Buffer holding the message.
+        start (int): Offset of the message in buf.
+        end (int): Offset just past the message (excluding the newline).
+        offset (int): Offset to record, if different from `start` (e.g. for a batch buffer).
+    """
+    # Tags are matched with a leading SOH; the header never starts with these tags
+    sender = _field(buf, _SENDER, start, end) or b''
+    target = _field(buf, _TARGET, start, end) or b''
+    seqnum = _field(buf, _SEQNUM, start, end)
+    sending_time = _field(buf, _SENDING_TIME, start, end)
+    exec_id = _field(buf, _EXEC_ID, start, end)
+    return (
+        start if offset is None else offset,
+        end - start,
+        session_key(sender, target),
+        int(seqnum) if seqnum and seqnum.isdigit() else 0,
+        parse_sending_time(sending_time) if sending_time else 0,
+        exec_id_hash(exec_id) if exec_id else 0,
+    )
+
+
+class IndexWriter:
+    def __init__(self, path: str):
+        """
+        Appends index entries to a sidecar file as the log is written.
+
+        Args:
+            path (str): Path of the sidecar, normally the log path plus '.idx'.
+        """
+        self.path = path
+        self._file = open(path, 'ab')
+
+    def append(self, offset: int, records: List[bytes]) -> None:
+        """
+        Index records that were written back to back starting at `offset`.
+        """
+        pack = ENTRY.pack
+        out = []
+        for record in records:
+            end = len(record) - 1 if record.endswith(b'\n') else len(record)
+            out.append(pack(*index_entry(record, 0, end, offset)))
+            offset += len(record)
+        self._file.write(b''.join(out))
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def rebuild_index(log_path: str) -> int:
+    """
+    Write a fresh sidecar index for an existing log.
+
+    Returns:
+        int: Number of messages indexed.
+    """
+    target = index_path(log_path)
+    tmp = target + '.tmp'
+    count = 0
+    with open(log_path, 'rb') as log, open(tmp, 'wb') as out:
+        size = os.fstat(log.fileno()).st_size
+        if size:
+            buf = mmap.mmap(log.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                pack = ENTRY.pack
+                batch = []
+                for start, end in iter_spans(buf, 0, size):
+                    batch.append(pack(*index_entry(buf, start, end)))
+                    if len(batch) >= 65536:
+                        out.write(b''.join(batch))
+                        count += len(batch)
+                        batch = []
+                out.write(b''.join(batch))
+                count += len(batch)
+            finally:
+                buf.close()
+    os.replace(tmp, target)
+    return count
+
+
+class LogIndex:
+    def __init__(self, log_path: str):
+        """
+        Point and range lookups over a log using its sidecar index.
+
+        Entries are read straight from a memory map of the index. Time range queries
+        binary-search it in place; seqnum and ExecID lookups build their sorted array
+        and hash table on first use and reuse them afterwards.
+
+        Args:
+            log_path (str): Path of the log; the index is expected at log_path + '.idx'.
+        """
+        self.log_path = log_path
+        self.logger = logging.getLogger('LogIndex')
+        with open(index_path(log_path), 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.count = len(self._buf) // ENTRY.size
+        self._log_file = open(log_path, 'rb')
+        self._by_session = None
+        self._by_exec_id = None
+        self._by_time = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def entry(self, i: int) -> Tuple[int, int, int, int, int, int]:
+        return ENTRY.unpack_from(self._buf, i * ENTRY.size)
+
+    def _entries(self) -> Iterator[Tuple[int, int, int, int, int, int]]:
+        return ENTRY.iter_unpack(memoryview(self._buf)[:self.count * ENTRY.size])
+
+    def read(self, i: int) -> bytes:
+        """
+        Read the raw message for index entry i from the log.
+        """
+        offset, length = self.entry(i)[:2]
+        self._log_file.seek(offset)
+        return self._log_file.read(length)
+
+    def _session_tables(self) -> Dict[int, Tuple[array, array]]:
+        if self._by_session is None:
+            grouped: Dict[int, List[Tuple[int, int]]] = {}
+            for i, (_, _, session, seqnum, _, _) in enumerate(self._entries()):
+                grouped.setdefault(session, []).append((seqnum, i))
+            tables = {}
+            for session, pairs in grouped.items():
+                pairs.sort()
+                tables[session] = (array('Q', (p[0] for p in pairs)), array('Q', (p[1] for p in pairs)))
+            self._by_session = tables
+        return self._by_session
+
+    def find_seqnums(self, sender_comp_id: str, target_comp_id: str, begin: int, end: int) -> List[int]:
+        """
+        Return entry numbers for MsgSeqNum in [begin, end] sent from sender to target.
+        Resent copies of a seqnum are all returned, in log order.
+        """
+        table = self._session_tables().get(session_key(sender_comp_id, target_comp_id))
+        if table is None:
+            return []
+        seqnums, entries = table
+        return list(entries[bisect_left(seqnums, begin):bisect_right(seqnums, end)])
+
+    def find_exec_id(self, exec_id: str) -> List[int]:
+        """
+        Return entry numbers of messages carrying this ExecID.
+        Hash matches are confirmed against the log, so collisions are never returned.
+        """
+        if self._by_exec_id is None:
+            table: Dict[int, List[int]] = {}
+            for i, entry in enumerate(self._entries()):
+                if entry[5]:
+                    table.setdefault(entry[5], []).append(i)
+            self._by_exec_id = table
+        needle = b'\x0117=' + exec_id.encode() + b'\x01'
+        return [i for i in self._by_exec_id.get(exec_id_hash(exec_id), []) if needle in self.read(i)]
+
+    def find_time_range(self, begin_ms: int, end_ms: int) -> Sequence[int]:
+        """
+        Return the entry numbers with SendingTime in [begin_ms, end_ms], in log order.
+
+        A log written in SendingTime order, such as one session's log or a
+        consolidated one, is binary-searched in place. Logs that several sessions
+        append to interleave their SendingTimes, so for those a sorted time table
+        is built on first use instead, like the seqnum and ExecID tables.
+        """
+        if self._by_time is None:
+            times = _TimeColumn(self)
+            ordered = all(times[i - 1] <= times[i] for i in range(1, self.count))
+            self._by_time = times if ordered else sorted((entry[4], i) for i, entry in enumerate(self._entries()))
+        if isinstance(self._by_time, _TimeColumn):
+            return range(bisect_left(self._by_time, begin_ms), bisect_right(self._by_time, end_ms))
+        found = self._by_time[bisect_left(self._by_time, (begin_ms,)):bisect_right(self._by_time, (end_ms, self.count))]
+        return sorted(i for _, i in found)
+
+    def close(self) -> None:
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+        self._log_file.close()
+
+
+class _TimeColumn:
+    def __init__(self, index: LogIndex):
+        self.index = index
+
+    def __len__(self) -> int:
+        return self.index.count
+
+    def __getitem__(self, i: int) -> int:
+        return self.index.entry(i)[4]
+
+
+def parse_time_arg(value: str) -> int:
+    return parse_sending_time(value.encode()) if '-' in value else int(value)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    """
+    Command line entry point: python -m src.log_index {rebuild,exec-id,seq,time} LOG ...
+    """
+    parser = argparse.ArgumentParser(description="Build and query sidecar indexes of raw FIX message logs.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    rebuild = commands.add_parser('rebuild', help="Rebuild the index of existing logs")
+    rebuild.add_argument('logs', nargs='+')
+    exec_id = commands.add_parser('exec-id', help="Find messages by ExecID")
+    exec_id.add_argument('log')
+    exec_id.add_argument('exec_id')
+    seq = commands.add_parser('seq', help="Find messages by MsgSeqNum range")
+    seq.add_argument('log')
+    seq.add_argument('sender')
+    seq.add_argument('target')
+    seq.add_argument('begin', type=int)
+    seq.add_argument('end', type=int)
+    times = commands.add_parser('time', help="Find messages by SendingTime range (YYYYMMDD-HH:MM:SS or epoch ms)")
+    times.add_argument('log')
+    times.add_argument('begin')
+    times.add_argument('end')
+    args = parser.parse_args(argv)
+
+    if args.command == 'rebuild':
+        for log in args.logs:
+            print(f"{log}: {rebuild_index(log)} messages indexed")
+        return
+
+    index = LogIndex(args.log)
+    try:
+        if args.command == 'exec-id':
+            found = index.find_exec_id(args.exec_id)
+        elif args.command == 'seq':
+            found = index.find_seqnums(args.sender, args.target, args.begin, args.end)
+        else:
+            found = index.find_time_range(parse_time_arg(args.begin), parse_time_arg(args.end))
+        out = sys.stdout.buffer
+        for i in found:
+            out.write(index.read(i) + b'\n')
+        out.flush()
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
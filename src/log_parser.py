@@ -0,0 +1,415 @@
+import os
+import sys
+import mmap
+import time
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+SOH = b'\x01'
+NEWLINE = b'\n'
+
+
+def _encode_all(values: Optional[Iterable]) -> Optional[Tuple[bytes, ...]]:
+    if not values:
+        return None
+    return tuple(v if isinstance(v, bytes) else str(v).encode() for v in values)
+
+
+class MessageFilter:
+    def __init__(self, msg_types: Optional[Iterable] = None, sender_comp_ids: Optional[Iterable] = None):
+        """
+        Selects messages by MsgType (35) and SenderCompID (49) without decoding them.
+
+        Args:
+            msg_types (Iterable): MsgType values to keep, e.g. ['8', 'AE']; None keeps all.
+            sender_comp_ids (Iterable): SenderCompID values to keep; None keeps all.
+        """
+        self.msg_types = _encode_all(msg_types)
+        self.sender_comp_ids = _encode_all(sender_comp_ids)
+        # Field patterns, including the terminating SOH so '8' does not match '80'
+        self._patterns = [
+            [b'\x01' + tag + b'=' + value + SOH for value in values]
+            for tag, values in ((b'35', self.msg_types), (b'49', self.sender_comp_ids)) if values
+        ]
+
+    def matches(self, buf, start: int, end: int) -> bool:
+        """
+        Check the message occupying buf[start:end] against the filter.
+        """
+        for alternatives in self._patterns:
+            if not any(buf.find(pattern, start, end) >= 0 for pattern in alternatives):
+                return False
+        return True
+
+    def __bool__(self) -> bool:
+        return bool(self._patterns)
+
+
+class MessageView:
+    __slots__ = ('buf', 'start', 'end', '_fields')
+
+    def __init__(self, buf, start: int, end: int):
+        """
+        A read-only tag -> value view over one message inside a larger buffer.
+
+        Nothing is copied until a value is requested; values are returned as
+        memoryview slices of the underlying buffer (usually an mmap).
+
+        Args:
+            buf: The buffer holding the message (mmap, bytes or bytearray).
+            start (int): Offset of the first byte of the message.
+            end (int): Offset just past the last field (excluding the newline).
+        """
+        self.buf = buf
+        self.start = start
+        self.end = end
+        self._fields = None
+
+    def _index(self) -> Dict[int, Tuple[int, int]]:
+        if self._fields is None:
+            buf, pos, end = self.buf, self.start, self.end
+            fields = {}
+            while pos < end:
+                eq = buf.find(b'=', pos, end)
+                if eq < 0:
+                    break
+                soh = buf.find(SOH, eq, end)
+                if soh < 0:
+                    soh = end
+                # First occurrence wins, so repeating groups keep their leading entry
+                fields.setdefault(int(buf[pos:eq]), (eq + 1, soh))
+                pos = soh + 1
+            self._fields = fields
+        return self._fields
+
+    def __getitem__(self, tag: int) -> memoryview:
+        start, end = self._index()[int(tag)]
+        return memoryview(self.buf)[start:end]
+
+    def __contains__(self, tag) -> bool:
+        return int(tag) in self._index()
+
+    def get(self, tag: int, default=None):
+        span = self._index().get(int(tag))
+        if span is None:
+            return default
+        return memoryview(self.buf)[span[0]:span[1]]
+
+    def get_str(self, tag: int, default: Optional[str] = None) -> Optional[str]:
+        value = self.get(tag)
+        return default if value is None else bytes(value).decode('ascii', 'replace')
+
+    def tags(self) -> List[int]:
+        return list(self._index())
+
+    def raw(self) -> bytes:
+        return bytes(self.buf[self.start:self.end])
+
+    def to_dict(self) -> Dict[int, str]:
+        buf = self.buf
+        return {tag: buf[s:e].decode('ascii', 'replace') for tag, (s, e) in self._index().items()}
+
+
+def iter_spans(buf, start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) offsets of each non-empty line in buf[start:end].
+    """
+    pos = start
+    while pos < end:
+        nl = buf.find(NEWLINE, pos, end)
+        if nl < 0:
+            nl = end
+        line_end = nl - 1 if nl > pos and buf[nl - 1] == 13 else nl
+        if line_end > pos:
+            yield pos, line_end
+        pos = nl + 1
+
+
+def chunk_boundaries(buf, size: int, chunks: int, min_chunk: int = 1 << 20) -> List[Tuple[int, int]]:
+    """
+    Split buf[0:size] into roughly equal ranges that start and end on line boundaries.
+
+    Args:
+        buf: The buffer to split.
+        size (int): Number of bytes of buf to cover.
+        chunks (int): Desired number of chunks.
+        min_chunk (int): Smallest chunk worth handing to a worker.
+    """
+    chunks = max(1, min(chunks, size // min_chunk or 1))
+    bounds = [0]
+    for i in range(1, chunks):
+        nl = buf.find(NEWLINE, max(size * i // chunks, bounds[-1]))
+        if nl < 0:
+            break
+        if nl + 1 > bounds[-1]:
+            bounds.append(nl + 1)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+def _open_map(path: str):
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _close_map(buf) -> None:
+    try:
+        buf.close()
+    except BufferError:
+        pass  # a caller still holds a value from one of the views; the map goes with it
+
+
+def _scan(buf, start: int, end: int, message_filter: MessageFilter) -> array:
+    offsets = array('Q')
+    for s, e in iter_spans(buf, start, end):
+        if not message_filter or message_filter.matches(buf, s, e):
+            offsets.append(s)
+            offsets.append(e)
+    return offsets
+
+
+def _scan_chunk(path: str, start: int, end: int, message_filter: MessageFilter) -> array:
+    """
+    Worker: return interleaved (start, end) offsets of matching messages in a chunk.
+    """
+    buf = _open_map(path)
+    try:
+        return _scan(buf, start, end, message_filter)
+    finally:
+        buf.close()
+
+
+def _extract(buf, start: int, end: int, message_filter: MessageFilter,
+             tags: Tuple[int, ...]) -> Dict[int, List[Optional[bytes]]]:
+    columns = {tag: [] for tag in tags}
+    # (tag, pattern inside the message, column); the first field has no leading SOH
+    keys = [(str(tag).encode(), SOH + str(tag).encode() + b'=', columns[tag]) for tag in tags]
+    find = buf.find
+    for s, e in iter_spans(buf, start, end):
+        if message_filter and not message_filter.matches(buf, s, e):
+            continue
+        eq = find(b'=', s, e)
+        first = buf[s:eq] if eq > 0 else None
+        for tag, pattern, column in keys:
+            # find returns the first occurrence, so repeating groups keep their leading entry as in MessageView
+            if tag == first:
+                pos = eq + 1
+            else:
+                pos = find(pattern, s, e)
+                if pos < 0:
+                    column.append(None)
+                    continue
+                pos += len(pattern)
+            stop = find(SOH, pos, e)
+            # Only the value itself is copied out of the map
+            column.append(buf[pos:stop if stop >= 0 else e])
+    return columns
+
+
+def _extract_chunk(path: str, start: int, end: int, message_filter: MessageFilter,
+                   tags: Tuple[int, ...]) -> Dict[int, List[Optional[bytes]]]:
+    """
+    Worker: return the requested tags of matching messages in a chunk as columns.
+    """
+    buf = _open_map(path)
+    try:
+        return _extract(buf, start, end, message_filter, tags)
+    finally:
+        buf.close()
+
+
+class LogParser:
+    def __init__(self, path: str, workers: Optional[int] = None, message_filter: Optional[MessageFilter] = None):
+        """
+        Parses a raw message log (one SOH-delimited message per line) using a
+        memory map split into newline-aligned chunks across a process pool.
+
+        Args:
+            path (str): Path to the log, e.g. human_readable_logs/communal_messages.current.log.
+            workers (int): Number of worker processes; defaults to os.cpu_count().
+            message_filter (MessageFilter): Optional MsgType/SenderCompID filter.
+        """
+        self.path = path
+        self.workers = workers or os.cpu_count() or 1
+        self.message_filter = message_filter or MessageFilter()
+
+    def _chunks(self, buf) -> List[Tuple[int, int]]:
+        return chunk_boundaries(buf, len(buf), self.workers * 4)
+
+    def iter_messages(self) -> Iterator[MessageView]:
+        """
+        Yield a MessageView for every matching message, in file order.
+
+        Workers only return offsets; the views are built over this process's own
+        mmap, so message bytes never cross the process boundary. The map is closed
+        when the iteration ends, so copy out anything needed beyond that.
+        """
+        for batch in self.iter_view_batches():
+            yield from batch
+
+    def iter_view_batches(self, batch_size: int = 4096) -> Iterator[List[MessageView]]:
+        """
+        Like iter_messages, `batch_size` views at a time; every batch is yielded before the map is closed.
+        """
+        buf = _open_map(self.path)
+        if buf is None:
+            return
+        try:
+            chunks = self._chunks(buf)
+            if self.workers == 1 or len(chunks) == 1:
+                results = (_scan(buf, s, e, self.message_filter) for s, e in chunks)
+                yield from self._views(buf, results, batch_size)
+                return
+            with ProcessPoolExecutor(self.workers) as pool:
+                futures = [pool.submit(_scan_chunk, self.path, s, e, self.message_filter) for s, e in chunks]
+                yield from self._views(buf, (f.result() for f in futures), batch_size)
+        finally:
+            _close_map(buf)
+
+    @staticmethod
+    def _views(buf, results: Iterable[array], batch_size: int) -> Iterator[List[MessageView]]:
+        batch = []
+        for offsets in results:
+            for i in range(0, len(offsets), 2):
+                batch.append(MessageView(buf, offsets[i], offsets[i + 1]))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def iter_batches(self, tags: Sequence[int]) -> Iterator[Dict[int, List[Optional[bytes]]]]:
+        """
+        Yield one batch per chunk, in file order, holding the requested tags as columns.
+
+        Args:
+            tags (Sequence[int]): Tags to extract; missing tags are returned as None.
+        """
+        tags = tuple(int(tag) for tag in tags)
+        buf = _open_map(self.path)
+        if buf is None:
+            return
+        chunks = self._chunks(buf)
+        if self.workers == 1 or len(chunks) == 1:
+            try:
+                for s, e in chunks:
+                    yield _extract(buf, s, e, self.message_filter, tags)
+            finally:
+                buf.close()
+            return
+        buf.close()
+        with ProcessPoolExecutor(self.workers) as pool:
+            futures = [pool.submit(_extract_chunk, self.path, s, e, self.message_filter, tags) for s, e in chunks]
+            for future in futures:
+                yield future.result()
+
+    def count(self) -> int:
+        """
+        Count matching messages using the process pool, or in this process with one worker.
+        """
+        buf = _open_map(self.path)
+        if buf is None:
+            return 0
+        chunks = self._chunks(buf)
+        if self.workers == 1 or len(chunks) == 1:
+            try:
+                return sum(len(_scan(buf, s, e, self.message_filter)) // 2 for s, e in chunks)
+            finally:
+                buf.close()
+        buf.close()
+        with ProcessPoolExecutor(self.workers) as pool:
+            futures = [pool.submit(_scan_chunk, self.path, s, e, self.message_filter) for s, e in chunks]
+            return sum(len(f.result()) // 2 for f in futures)
+
+
+def naive_count(path: str, message_filter: Optional[MessageFilter] = None) -> int:
+    """
+    Baseline: readline + split('\\x01') into a dict per message, as ad-hoc scripts do.
+    """
+    msg_types = {v.decode() for v in message_filter.msg_types} if message_filter and message_filter.msg_types else None
+    senders = ({v.decode() for v in message_filter.sender_comp_ids}
+               if message_filter and message_filter.sender_comp_ids else None)
+    count = 0
+    with open(path, 'r', newline='\n') as f:
+        line = f.readline()
+        while line:
+            fields = dict(field.split('=', 1) for field in line.rstrip('\r\n').split('\x01') if '=' in field)
+            if (msg_types is None or fields.get('35') in msg_types) and \
+                    (senders is None or fields.get('49') in senders):
+                count += 1
+            line = f.readline()
+    return count
+
+
+def benchmark(path: str, workers: Optional[int] = None, message_filter: Optional[MessageFilter] = None) -> dict:
+    """
+    Compare the pooled mmap scan against the naive readline baseline.
+
+    Returns:
+        dict: Message counts, elapsed seconds and throughput in GB/s for both.
+    """
+    size = os.path.getsize(path)
+    parser = LogParser(path, workers, message_filter)
+
+    started = time.perf_counter()
+    naive = naive_count(path, message_filter)
+    naive_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    parallel = parser.count()
+    parallel_elapsed = time.perf_counter() - started
+
+    return {
+        'bytes': size,
+        'workers': parser.workers,
+        'naive': {'messages': naive, 'seconds': naive_elapsed, 'gb_per_s': size / naive_elapsed / 1e9},
+        'mmap': {'messages': parallel, 'seconds': parallel_elapsed, 'gb_per_s': size / parallel_elapsed / 1e9},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point: python -m src.log_parser LOG [options]
+    """
+    parser = argparse.ArgumentParser(description="Scan raw FIX message logs.")
+    parser.add_argument('path', help="Raw message log, e.g. human_readable_logs/communal_messages.current.log")
+    parser.add_argument('--msg-type', action='append', help="Keep only this MsgType (repeatable)")
+    parser.add_argument('--sender', action='append', help="Keep only this SenderCompID (repeatable)")
+    parser.add_argument('--tags', help="Comma separated tags to print as tab separated columns")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--count', action='store_true', help="Only print the number of matching messages")
+    parser.add_argument('--bench', action='store_true', help="Report throughput against a readline baseline")
+    args = parser.parse_args(argv)
+
+    message_filter = MessageFilter(args.msg_type, args.sender)
+    if args.bench:
+        result = benchmark(args.path, args.workers, message_filter)
+        print(f"{result['bytes'] / 1e9:.3f} GB, {result['workers']} workers")
+        for name in ('naive', 'mmap'):
+            r = result[name]
+            print(f"{name:>6}: {r['messages']} messages in {r['seconds']:.3f}s ({r['gb_per_s']:.3f} GB/s)")
+        return
+
+    log_parser = LogParser(args.path, args.workers, message_filter)
+    if args.count:
+        print(log_parser.count())
+        return
+
+    out = sys.stdout.buffer
+    if args.tags:
+        tags = [int(tag) for tag in args.tags.split(',')]
+        for batch in log_parser.iter_batches(tags):
+            for row in zip(*(batch[tag] for tag in tags)):
+                out.write(b'\t'.join(value or b'' for value in row) + NEWLINE)
+    else:
+        for view in log_parser.iter_messages():
+            out.write(view.buf[view.start:view.end] + NEWLINE)
+    out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import queue
+import threading
+import time
+import logging
+from typing import List, Optional, Union
+from .journal import JournalFile
+
+_STOP = object()
+
+
+class DurabilityPolicy:
+    def __init__(self, flush_every: int = 256, flush_interval_ms: int = 100,
+                 fsync: bool = False, queue_size: int = 65536):
+        """
+        Controls when the background writer commits buffered records to disk.
+
+        Args:
+            flush_every (int): Flush after this many records have been written.
+            flush_interval_ms (int): Flush at most this many milliseconds after the first uncommitted record.
+            fsync (bool): Call os.fsync on every commit, not just flush the Python buffers.
+            queue_size (int): Maximum number of records waiting for the writer before callers block.
+        """
+        if flush_every < 1:
+            raise ValueError("flush_every must be at least 1")
+        if flush_interval_ms < 0:
+            raise ValueError("flush_interval_ms must not be negative")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.flush_every = flush_every
+        self.flush_interval_ms = flush_interval_ms
+        self.fsync = fsync
+        self.queue_size = queue_size
+
+
+class LogWriter:
+    def __init__(self, targets: List[Union[str, JournalFile]], policy: Optional[DurabilityPolicy] = None,
+                 name: str = 'LogWriter'):
+        """
+        Open the target journals and start the background writer thread.
+
+        Records passed to write() are queued and appended to every target by a
+        dedicated thread, which batches them into group commits according to the policy.
+        Segment rollover also happens on that thread, never on the caller's.
+
+        Args:
+            targets (List[Union[str, JournalFile]]): Journals (or plain paths) that every record is appended to.
+            policy (DurabilityPolicy): Commit policy; defaults to DurabilityPolicy().
+            name (str): Name of the writer thread.
+        """
+        self.name = name
+        self.policy = policy or DurabilityPolicy()
+        self.logger = logging.getLogger('LogWriter')
+        self.files = [t if isinstance(t, JournalFile) else JournalFile(t) for t in targets]
+
+        self.records_written = 0  # records every target file took
+        self.records_dropped = 0  # records lost to a bad record type, a failed write or a dead writer thread
+        self.bytes_written = 0  # per target, i.e. not multiplied by the number of files
+        self.commits = 0
+        self.blocked_writes = 0
+        self.errors = 0  # records or batches the writer thread failed on and skipped
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=self.policy.queue_size)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def write(self, record: Union[str, bytes]) -> None:
+        """
+        Queue a record for the writer thread.
+
+        Returns immediately unless the queue is full, in which case the caller blocks
+        until the writer catches up. Should the writer thread have died, the record
+        is dropped and logged instead of blocking the caller for good.
+
+        Args:
+            record (Union[str, bytes]): The text to append, including any line terminator,
+                or an already encoded record such as a binary journal frame.
+        """
+        if self._closed:
+            raise RuntimeError("LogWriter is closed")
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.blocked_writes += 1
+            if not self._put(record, None):
+                self.errors += 1
+                self.records_dropped += 1
+                self.logger.error(f"Writer thread {self.name} has stopped; dropping a record")
+
+    def _put(self, item, timeout: Optional[float]) -> bool:
+        """
+        Block until `item` is queued, giving up once the writer thread is gone or `timeout` expires.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                if not self._thread.is_alive() or (deadline is not None and time.monotonic() >= deadline):
+                    return False
+
+    def pending(self) -> int:
+        """
+        Return the number of records waiting for the writer thread.
+        """
+        return self._queue.qsize()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Drain every queued record, commit it and close the target files.
+
+        Args:
+            timeout (float): Maximum seconds to wait for the writer thread.
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._put(_STOP, timeout):
+            self.logger.error(f"Writer thread {self.name} did not take the stop request within {timeout}s")
+            return
+        self._thread.join(None if deadline is None else max(deadline - time.monotonic(), 0))
+        if self._thread.is_alive():
+            self.logger.error(f"Writer thread {self.name} did not drain within {timeout}s")
+            return
+        for f in self.files:
+            f.close()
+
+    def _run(self) -> None:
+        """
+        Writer loop: batch queued records and commit them per the durability policy.
+        """
+        interval = self.policy.flush_interval_ms / 1000.0
+        uncommitted = 0
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._commit()
+                uncommitted, deadline = 0, None
+                continue
+
+            batch = []
+            stop = False
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                written = 0
+                try:
+                    records = self._encode(batch)
+                    self._write_batch(records)
+                    written = len(records)
+                except Exception as e:
+                    # One bad batch must not kill the thread: write() would then block for good
+                    self.errors += 1
+                    self.logger.error(f"Error writing a batch of {len(batch)} records in {self.name}: {e}")
+                self.records_written += written
+                self.records_dropped += len(batch) - written
+                uncommitted += len(batch)
+                if deadline is None:
+                    deadline = time.monotonic() + interval
+
+            if stop:
+                self._commit()
+                return
+            if uncommitted >= self.policy.flush_every or time.monotonic() >= deadline:
+                self._commit()
+                uncommitted, deadline = 0, None
+
+    def _encode(self, batch: list) -> List[bytes]:
+        records = []
+        for record in batch:
+            if isinstance(record, bytes):
+                records.append(record)
+            elif isinstance(record, str):
+                records.append(record.encode())
+            else:
+                self.errors += 1
+                self.logger.error(f"Skipping a {type(record).__name__} record in {self.name}; expected str or bytes")
+        return records
+
+    def _write_batch(self, records: List[bytes]) -> None:
+        """
+        Append the records to every target file. Each file is tried even if an
+        earlier one fails, and any failure is raised afterwards, since the batch
+        is then missing from that file.
+        """
+        data = b''.join(records)
+        failures = []
+        for f in self.files:
+            try:
+                f.write(data, records)
+            except OSError as e:
+                failures.append(f"{f.name}: {e}")
+        if failures:
+            raise OSError('; '.join(failures))
+        self.bytes_written += len(data)
+
+    def _commit(self) -> None:
+        for f in self.files:
+            try:
+                f.flush(self.policy.fsync)
+            except Exception as e:
+                self.logger.error(f"Error committing {f.name}: {e}")
+        self.commits += 1
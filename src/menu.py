@@ -1,6 +1,8 @@
 import subprocess
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from rich.console import Console
 from rich.prompt import Prompt
 from rich.table import Table
@@ -8,21 +10,26 @@ from rich.panel import Panel
 from typing import List, Callable, Optional, Tuple
 
 from src.fix_client import FIXClient
+from src.order_store import ORD_STATUS_NAMES
 
 console = Console()
 running = True
+sessions_live = False  # set once the operator has logged on; sessions added later log on by themselves
 
-def main_menu(*clients: List['FIXClient']) -> None:
+def main_menu(clients: List['FIXClient']) -> None:
     """
     Displays the main menu and handles user interactions.
     
     Args:
-        clients (List[FIXClient]): List of FIXClient instances.
+        clients (List[FIXClient]): List of FIXClient instances. It may grow or
+            shrink while the menu runs, when config.yaml is reloaded.
     """
     menu_options: dict[str, Tuple[str, Callable[[], None]]] = {
         "1": ("Logon", lambda: logon_clients(clients)),
         "2": ("Send ResendRequest", lambda: send_resend_request_to_clients(clients)),
-        "3": ("Logout and exit", lambda: logout_clients(clients))
+        "3": ("Query orders", lambda: query_orders(clients)),
+        "4": ("Show positions", lambda: show_positions(clients)),
+        "5": ("Logout and exit", lambda: logout_clients(clients))
     }
 
     while running:
@@ -31,7 +38,7 @@ def main_menu(*clients: List['FIXClient']) -> None:
             display_menu(menu_options)
             choice: str = Prompt.ask("\n[bold cyan]Enter your choice[/bold cyan]", choices=list(menu_options.keys()), default="1")
             menu_options[choice][1]()
-            if choice == "3":
+            if choice == "5":
                 break
         except Exception as e:
             console.print(Panel(f"[red]An error occurred in the main menu: {e}[/red]", title="Error", border_style="red"))
@@ -55,18 +62,50 @@ def display_menu(menu_options: dict[str, Tuple[str, Callable[[], None]]]) -> Non
 
     console.print(table)
 
+def _timed_logon(client: 'FIXClient') -> Tuple[Optional[Exception], float]:
+    """
+    Logs on a single client and measures how long it took.
+
+    Returns:
+        Tuple[Optional[Exception], float]: The logon error (None on success) and elapsed seconds.
+    """
+    started = time.monotonic()
+    try:
+        client.logon()
+        return None, time.monotonic() - started
+    except Exception as e:
+        return e, time.monotonic() - started
+
 def logon_clients(clients: List['FIXClient']) -> None:
     """
-    Logs on all clients.
+    Logs on all clients concurrently and prints a per-session summary.
     
     Args:
         clients (List[FIXClient]): List of FIXClient instances.
     """
+    global sessions_live
     console.clear()
+    clients = list(clients)
+    sessions_live = True
     try:
-        for client in clients:
-            client.logon()
-        console.print(Panel("[green]All clients logged on successfully.[/green]", title="Success", border_style="green"))
+        with ThreadPoolExecutor(max_workers=max(len(clients), 1), thread_name_prefix='logon') as pool:
+            results = list(pool.map(_timed_logon, clients))
+
+        table: Table = Table(title="Logon summary", show_header=True, header_style="bold magenta")
+        table.add_column("Session", style="cyan")
+        table.add_column("Host")
+        table.add_column("Status")
+        table.add_column("Time (s)", justify="right")
+        for client, (error, elapsed) in zip(clients, results):
+            status = "[green]logged on[/green]" if error is None else f"[red]{error}[/red]"
+            table.add_row(str(client.session_id), client.connected_host or "-", status, f"{elapsed:.1f}")
+        console.print(table)
+
+        failed = sum(1 for error, _ in results if error is not None)
+        if failed:
+            console.print(Panel(f"[red]{failed} of {len(clients)} sessions failed to log on.[/red]", title="Error", border_style="red"))
+        else:
+            console.print(Panel("[green]All clients logged on successfully.[/green]", title="Success", border_style="green"))
     except Exception as e:
         console.print(Panel(f"[red]An error occurred during logon: {e}[/red]", title="Error", border_style="red"))
     finally:
@@ -83,7 +122,7 @@ def send_resend_request_to_clients(clients: List['FIXClient']) -> None:
     try:
         begin_seq_no: int = int(Prompt.ask("Enter BeginSeqNo:", default="1"))
         end_seq_no: int = int(Prompt.ask("Enter EndSeqNo (0 for all subsequent messages):", default="0"))
-        for client in clients:
+        for client in list(clients):
             client.send_resend_request(begin_seq_no, end_seq_no)
         console.print(Panel("[green]ResendRequest sent to all clients.[/green]", title="Success", border_style="green"))
     except Exception as e:
@@ -91,6 +130,73 @@ def send_resend_request_to_clients(clients: List['FIXClient']) -> None:
     finally:
         console.input("Press ENTER to continue...")
 
+def query_orders(clients: List['FIXClient'], max_rows: int = 50) -> None:
+    """
+    Looks up orders in the clients' order stores by ClOrdID, OrderID, Symbol or OrdStatus.
+    
+    Args:
+        clients (List[FIXClient]): List of FIXClient instances.
+        max_rows (int): Maximum number of orders to print.
+    """
+    console.clear()
+    try:
+        query: str = Prompt.ask("ClOrdID, OrderID, Symbol or OrdStatus (blank for open orders)", default="").strip()
+        # Clients of a shared initiator share one application, and so one store
+        stores = list({id(client.application.orders): client.application.orders for client in clients}.values())
+        orders = []
+        for store in stores:
+            if not query:
+                orders.extend(store.open_orders())
+                continue
+            order = store.get(query) or store.by_order_id(query)
+            if order is not None:
+                orders.append(order)
+            else:
+                statuses = [code for code, name in ORD_STATUS_NAMES.items() if query.upper() in (code, name)]
+                orders.extend(store.by_status(*statuses) if statuses else store.by_symbol(query))
+
+        table: Table = Table(title=f"{len(orders)} orders", show_header=True, header_style="bold magenta")
+        for column in ("ClOrdID", "OrderID", "Symbol", "Side", "OrderQty", "CumQty", "AvgPx", "LeavesQty", "Status"):
+            table.add_column(column, justify="right" if column.endswith(("Qty", "Px")) else "left")
+        for order in orders[:max_rows]:
+            table.add_row(order.cl_ord_id or "-", order.order_id or "-", order.symbol or "-", order.side or "-",
+                          f"{order.order_qty:g}", f"{order.cum_qty:g}", f"{order.avg_px:g}",
+                          f"{order.leaves_qty:g}", order.status_name)
+        console.print(table)
+        if len(orders) > max_rows:
+            console.print(f"[yellow]Showing the first {max_rows} of {len(orders)} orders.[/yellow]")
+    except Exception as e:
+        console.print(Panel(f"[red]An error occurred while querying orders: {e}[/red]", title="Error", border_style="red"))
+    finally:
+        console.input("Press ENTER to continue...")
+
+def show_positions(clients: List['FIXClient']) -> None:
+    """
+    Prints net position, traded value, VWAP and realized P&L per symbol and account.
+    
+    Args:
+        clients (List[FIXClient]): List of FIXClient instances.
+    """
+    console.clear()
+    try:
+        engines = list({id(client.application.positions): client.application.positions for client in clients}.values())
+        table: Table = Table(title="Positions", show_header=True, header_style="bold magenta")
+        table.add_column("Symbol", style="cyan")
+        table.add_column("Account")
+        for column in ("Net", "Bought", "Sold", "Gross value", "VWAP", "Realized P&L"):
+            table.add_column(column, justify="right")
+        for engine in engines:
+            for row in engine.positions():
+                pnl = row['realized_pnl']
+                table.add_row(row['symbol'], row['account'] or "-", f"{row['net_qty']:g}", f"{row['bought_qty']:g}",
+                              f"{row['sold_qty']:g}", f"{row['gross_value']:,.2f}", f"{row['vwap']:.4f}",
+                              f"[{'green' if pnl >= 0 else 'red'}]{pnl:,.2f}[/]")
+        console.print(table)
+    except Exception as e:
+        console.print(Panel(f"[red]An error occurred while computing positions: {e}[/red]", title="Error", border_style="red"))
+    finally:
+        console.input("Press ENTER to continue...")
+
 def logout_clients(clients: List['FIXClient']) -> None:
     """
     Logs out all clients.
@@ -100,7 +206,7 @@ def logout_clients(clients: List['FIXClient']) -> None:
     """
     console.clear()
     try:
-        for client in clients:
+        for client in list(clients):
             client.logout()
         console.print(Panel("[green]All clients logged out successfully.[/green]", title="Success", border_style="green"))
     except Exception as e:
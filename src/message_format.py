@@ -0,0 +1,69 @@
+from typing import Optional
+from .fix_dictionary import FIXDictionary
+
+SOH = '\x01'
+
+
+class MessageFormatter:
+    def __init__(self, dictionary: Optional[FIXDictionary] = None, separator: str = ' | '):
+        """
+        Renders raw FIX messages for the human readable logs.
+
+        Without a dictionary fields are printed as they arrive (`54=1`). With one,
+        tag names and enum descriptions are added (`Side=1(BUY)`).
+
+        Args:
+            dictionary (FIXDictionary): Optional dictionary used for readable output.
+            separator (str): Text placed between fields.
+        """
+        self.dictionary = dictionary
+        self.separator = separator
+
+    def format(self, raw: str) -> str:
+        """
+        Format a raw, SOH-delimited FIX message.
+
+        Args:
+            raw (str): The message as returned by fix.Message.toString().
+
+        Returns:
+            str: The formatted message.
+        """
+        fields = [field for field in raw.split(SOH) if field]
+        if self.dictionary is None:
+            return self.separator.join(fields)
+
+        tag_names = self.dictionary.tag_names
+        value_names = self.dictionary.value_names
+        rendered = []
+        for field in fields:
+            tag, sep, value = field.partition('=')
+            name = tag_names.get(tag, tag)
+            labels = value_names.get(tag)
+            label = labels.get(value) if labels else None
+            rendered.append(f'{name}={value}({label})' if label else f'{name}{sep}{value}')
+        return self.separator.join(rendered)
+
+
+class LazyMessage:
+    __slots__ = ('message', 'formatter', '_text')
+
+    def __init__(self, message, formatter: MessageFormatter):
+        """
+        Defers formatting of a FIX message until a log handler emits it.
+
+        Pass an instance as a %-style logging argument; str() formats the message
+        on first use and caches the result, so several log calls share one format.
+
+        Args:
+            message (fix.Message): The message to format.
+            formatter (MessageFormatter): The formatter to use.
+        """
+        self.message = message
+        self.formatter = formatter
+        self._text = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = self.formatter.format(self.message.toString())
+        return self._text
@@ -0,0 +1,370 @@
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class LatencyHistogram:
+    def __init__(self, max_bits: int = 40):
+        """
+        HDR-style histogram of non-negative integer values (nanoseconds).
+
+        Values are bucketed log-linearly: every power of two is split into 16
+        linear sub-buckets, so any recorded value is reported within 1/16
+        (about 6%) of its true value, from 1ns up to 2**max_bits ns (about
+        18 minutes). Recording is a few integer operations and one list
+        increment; larger values are clamped into the last bucket.
+
+        Args:
+            max_bits (int): Highest power of two tracked.
+        """
+        self.max_bits = max_bits
+        self.counts = [0] * ((max_bits - SUB_BUCKET_BITS + 1) * SUB_BUCKETS)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def bucket(value: int) -> int:
+        if value < SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        return (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+    @staticmethod
+    def bucket_upper(index: int) -> int:
+        """
+        Highest value that falls into bucket `index`.
+        """
+        if index < SUB_BUCKETS:
+            return index
+        shift = index // SUB_BUCKETS - 1
+        mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+        return ((mantissa + 1) << shift) - 1
+
+    def _index(self, value: int) -> int:
+        # bucket() inlined: this runs once per recorded value
+        if value < SUB_BUCKETS:
+            return value if value > 0 else 0
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        index = (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+        return index if index < len(self.counts) else len(self.counts) - 1
+
+    def record(self, value: int) -> None:
+        index = self._index(value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> int:
+        """
+        Value at quantile `q` (0..1), as the upper bound of its bucket.
+        """
+        with self._lock:
+            if not self.count:
+                return 0
+            target = max(1, int(q * self.count + 0.5))
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= target:
+                    return min(self.bucket_upper(index), self.max)
+        return self.max
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        with self._lock:
+            for index, count in enumerate(other.counts[:len(self.counts)]):
+                self.counts[index] += count
+            self.count += other.count
+            self.total += other.total
+            self.max = max(self.max, other.max)
+
+
+class CallbackStats(LatencyHistogram):
+    def __init__(self):
+        """
+        Latency histogram of one callback, plus its message count by MsgType.
+        """
+        super().__init__()
+        self.messages: Dict[str, int] = {}
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        super().merge(other)
+        if isinstance(other, CallbackStats):
+            with other._lock:
+                messages = dict(other.messages)
+            with self._lock:
+                for msg_type, count in messages.items():
+                    self.messages[msg_type] = self.messages.get(msg_type, 0) + count
+
+    def record_message(self, msg_type: str, value: int) -> None:
+        index = self._index(value)
+        with self._lock:
+            self.messages[msg_type] = self.messages.get(msg_type, 0) + 1
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metrics:
+    def __init__(self):
+        """
+        Counters, latency histograms and scrape-time gauges, rendered in the
+        Prometheus text exposition format.
+
+        Hot paths only touch dicts and histograms (inc, observe). Anything
+        that already has a counter of its own, such as the log writers'
+        totals and queue depth, is read when the metrics are rendered instead,
+        so it costs nothing per message.
+        """
+        self._families: Dict[str, Tuple[str, str, Tuple[str, ...]]] = {}
+        self._counters: Dict[str, Dict[Tuple, float]] = {}
+        self._histograms: Dict[str, Dict[Tuple, LatencyHistogram]] = {}
+        self._callbacks: Dict[Tuple[str, str], CallbackStats] = {}
+        self._collectors: Dict[int, List[Callable[[], Iterable[Tuple[str, Tuple, float]]]]] = {}
+        self._writer_owner: Dict[int, object] = {}
+        self._lock = threading.Lock()
+
+        self.define('fix_messages_total', 'counter', 'FIX messages seen by each application callback.',
+                    ('session', 'callback', 'msg_type'))
+        self.define('fix_callback_latency_seconds', 'summary', 'Time spent in each application callback.',
+                    ('session', 'callback'))
+        self.define('fix_log_latency_seconds', 'summary', 'Time spent queueing a record for a log writer.',
+                    ('writer',))
+        self.define('fix_messages_sent_total', 'counter', 'Messages sent by the client.', ('session', 'msg_type'))
+        self.define('fix_send_latency_seconds', 'summary', 'Time spent in Session.sendToTarget.', ('session',))
+        self.define('fix_session_logged_on', 'gauge', 'Whether the session is logged on.', ('session',))
+        self.define('fix_log_records_written_total', 'counter', 'Records written by a log writer.', ('owner', 'writer'))
+        self.define('fix_log_records_dropped_total', 'counter',
+                    'Records a log writer failed to write to every target and gave up on.', ('owner', 'writer'))
+        self.define('fix_log_bytes_written_total', 'counter', 'Bytes written by a log writer.', ('owner', 'writer'))
+        self.define('fix_log_commits_total', 'counter', 'Group commits made by a log writer.', ('owner', 'writer'))
+        self.define('fix_log_blocked_writes_total', 'counter',
+                    'Writes that blocked on a full log writer queue.', ('owner', 'writer'))
+        self.define('fix_log_queue_depth', 'gauge', 'Records queued and not yet written.', ('owner', 'writer'))
+        self.define('fix_resend_pending', 'gauge', 'Seqnums missing or outstanding in ResendRequests.', ('session',))
+        self.define('fix_duplicates_suppressed_total', 'counter',
+                    'Messages received again and dropped by the duplicate filter.', ('owner', 'key'))
+        self.define('fix_offload_lag_seconds', 'summary',
+                    'Time a message waited in the offload queue before a worker took it.', ('session',))
+        self.define('fix_offload_queue_depth', 'gauge', 'Messages queued or spilled for an offload worker.',
+                    ('owner', 'shard'))
+        self.define('fix_offload_processed_total', 'counter', 'Messages processed by an offload worker.',
+                    ('owner', 'shard'))
+        self.define('fix_offload_spilled_total', 'counter', 'Messages spilled to disk by a full offload queue.',
+                    ('owner', 'shard'))
+        self.define('fix_offload_blocked_total', 'counter', 'Callbacks that waited on a full offload queue.',
+                    ('owner', 'shard'))
+
+    def define(self, name: str, kind: str, help_text: str, label_names: Tuple[str, ...]) -> None:
+        self._families[name] = (kind, help_text, tuple(label_names))
+
+    def inc(self, name: str, labels: Tuple, amount: float = 1) -> None:
+        with self._lock:
+            family = self._counters.setdefault(name, {})
+            family[labels] = family.get(labels, 0) + amount
+
+    def histogram(self, name: str, labels: Tuple) -> LatencyHistogram:
+        family = self._histograms.get(name)
+        histogram = family.get(labels) if family is not None else None
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, {}).setdefault(labels, LatencyHistogram())
+        return histogram
+
+    def observe(self, name: str, labels: Tuple, nanoseconds: int) -> None:
+        self.histogram(name, labels).record(nanoseconds)
+
+    def callback(self, callback: str, sessionID, msg_type: str, started: int) -> None:
+        """
+        Record one application callback that began at perf_counter_ns() `started`.
+
+        This is the per-message hot path: one dict lookup and one lock for both
+        the message counter and the latency histogram.
+        """
+        elapsed = time.perf_counter_ns() - started
+        key = (sessionID.toString() if sessionID is not None else '', callback)
+        stats = self._callbacks.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._callbacks.setdefault(key, CallbackStats())
+        stats.record_message(msg_type, elapsed)
+
+    def callback_stats(self, callback: str, session: Optional[str] = None) -> CallbackStats:
+        """
+        Latency and message counts of one callback, merged across sessions unless `session` is given.
+        """
+        with self._lock:
+            selected = [stats for (name, cb), stats in self._callbacks.items()
+                        if cb == callback and session in (None, name)]
+        merged = CallbackStats()
+        for stats in selected:
+            merged.merge(stats)
+        return merged
+
+    def collect(self, collector: Callable[[], Iterable[Tuple[str, Tuple, float]]], owner=None) -> None:
+        """
+        Register a function returning (name, labels, value) samples at render time.
+        """
+        with self._lock:
+            self._collectors.setdefault(id(owner), []).append(collector)
+
+    def forget(self, owner) -> None:
+        """
+        Drop the collectors registered for `owner`, e.g. a client removed on reload.
+        """
+        with self._lock:
+            self._collectors.pop(id(owner), None)
+            for key, client in list(self._writer_owner.items()):
+                if client is owner:
+                    del self._writer_owner[key]
+
+    def track_client(self, client) -> None:
+        """
+        Export a client's logon state, resend backlog and its application's writer, duplicate and offload counters.
+
+        Writer counters are labelled with the session, or `shared` for the
+        application of a shared initiator, which is only exported once.
+        """
+        application = client.application
+        shared = hasattr(application, 'contexts')
+
+        def samples():
+            session = client.session_id.toString()
+            yield 'fix_session_logged_on', (session,), int(application.wait_for_logon(0, client.session_id))
+            yield 'fix_resend_pending', (session,), client.gap_tracker.pending()
+            if shared and self._writer_owner.get(id(application)) is not client:
+                return
+            owner = 'shared' if shared else session
+            for writer in (application.message_writer, application.execution_report_writer):
+                labels = (owner, writer.name)
+                yield 'fix_log_records_written_total', labels, writer.records_written
+                yield 'fix_log_records_dropped_total', labels, writer.records_dropped
+                yield 'fix_log_bytes_written_total', labels, writer.bytes_written
+                yield 'fix_log_commits_total', labels, writer.commits
+                yield 'fix_log_blocked_writes_total', labels, writer.blocked_writes
+                yield 'fix_log_queue_depth', labels, writer.pending()
+            duplicates = application.duplicates
+            if duplicates is not None:
+                yield 'fix_duplicates_suppressed_total', (owner, 'seqnum'), duplicates.suppressed_seqnum
+                yield 'fix_duplicates_suppressed_total', (owner, 'exec_id'), duplicates.suppressed_exec_id
+                yield 'fix_duplicates_suppressed_total', (owner, 'probable'), duplicates.suppressed_probable
+            pipeline = getattr(application, 'pipeline', None)
+            if pipeline is not None:
+                for shard in pipeline.shard_stats():
+                    labels = (owner, str(shard['shard']))
+                    yield 'fix_offload_queue_depth', labels, shard['queued'] + shard['spill_pending']
+                    yield 'fix_offload_processed_total', labels, shard['processed']
+                    yield 'fix_offload_spilled_total', labels, shard['spilled']
+                    yield 'fix_offload_blocked_total', labels, shard['blocked']
+        self._writer_owner.setdefault(id(application), client)
+        self.collect(samples, owner=client)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format (version 0.0.4).
+        """
+        samples: Dict[str, Dict[Tuple, float]] = {}
+        with self._lock:
+            for name, family in self._counters.items():
+                samples[name] = dict(family)
+            histograms = {name: dict(family) for name, family in self._histograms.items()}
+            callbacks = dict(self._callbacks)
+            collectors = [collector for owned in self._collectors.values() for collector in owned]
+        if callbacks:
+            messages = samples.setdefault('fix_messages_total', {})
+            latency = histograms.setdefault('fix_callback_latency_seconds', {})
+            for (session, callback), stats in callbacks.items():
+                with stats._lock:
+                    counts = dict(stats.messages)
+                for msg_type, count in counts.items():
+                    labels = (session, callback, msg_type)
+                    messages[labels] = messages.get(labels, 0) + count
+                latency[(session, callback)] = stats
+        for collector in collectors:
+            try:
+                for name, labels, value in collector():
+                    samples.setdefault(name, {})[labels] = value
+            except Exception as e:
+                logging.error(f"Error collecting metrics: {e}")
+
+        lines = []
+        for name, (kind, help_text, label_names) in self._families.items():
+            if name not in samples and name not in histograms:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(samples.get(name, {}).items()):
+                lines.append(f"{name}{_labels(label_names, labels)} {value:g}")
+            for labels, histogram in sorted(histograms.get(name, {}).items()):
+                for q in QUANTILES:
+                    quantile_label = f'quantile="{q}"'
+                    quantile = histogram.quantile(q) / 1e9
+                    lines.append(f"{name}{_labels(label_names, labels, quantile_label)} {quantile:.9g}")
+                lines.append(f"{name}_sum{_labels(label_names, labels)} {histogram.total / 1e9:.9g}")
+                lines.append(f"{name}_count{_labels(label_names, labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    def __init__(self, metrics: Metrics, host: str = '127.0.0.1', port: int = 9108):
+        """
+        Serves GET /metrics for Prometheus from a background thread.
+
+        Args:
+            metrics (Metrics): The metrics to export.
+            host (str): Address to listen on.
+            port (int): Port to listen on; 0 picks a free one.
+        """
+        self.metrics = metrics
+        metrics_ref = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics_ref.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.server.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.server.serve_forever, name='MetricsServer', daemon=True)
+        self._thread.start()
+        logging.info(f"Metrics on http://{self.server.server_address[0]}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
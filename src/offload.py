@@ -0,0 +1,241 @@
+import os
+import time
+import zlib
+import queue
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+from .binary_journal import FILE_HEADER, BinaryJournalReader, encode_record
+from .metrics import Metrics
+
+_STOP = object()
+_WAKE = object()  # sent when a shard spills with its queue already empty, so the worker reads the spill
+BACKPRESSURE_POLICIES = ('block', 'spill')
+
+# Called on a worker thread with (raw, session, direction, enqueued at in ns since the epoch)
+Handler = Callable[[str, str, int, int], None]
+
+
+class OffloadPolicy:
+    def __init__(self, workers: int = 2, queue_size: int = 10000, backpressure: str = 'block',
+                 spill_dir: str = 'human_readable_logs/spill'):
+        """
+        Controls how an application hands messages from the QuickFIX callback thread to its workers.
+
+        Args:
+            workers (int): Worker threads; each owns the sessions hashed to it.
+            queue_size (int): Messages each worker may have queued.
+            backpressure (str): What a full queue does to the callback: 'block' waits for
+                the worker, 'spill' appends to a file on disk that the worker reads back.
+            spill_dir (str): Directory of the spill files.
+        """
+        if workers < 1 or queue_size < 1:
+            raise ValueError("workers and queue_size must be at least 1")
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"backpressure must be one of {', '.join(BACKPRESSURE_POLICIES)}")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.backpressure = backpressure
+        self.spill_dir = spill_dir
+
+
+class _Shard:
+    __slots__ = ('index', 'queue', 'thread', 'lock', 'spill', 'spill_path', 'spill_pending', 'spills',
+                 'spilled', 'blocked', 'processed')
+
+    def __init__(self, index: int, queue_size: int):
+        self.index = index
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.spill = None          # open spill file while the shard is spilling
+        self.spill_path = None
+        self.spill_pending = 0     # messages on disk, not yet processed
+        self.spills = 0            # spill files started, for unique names
+        self.spilled = 0
+        self.blocked = 0
+        self.processed = 0
+
+
+class MessagePipeline:
+    def __init__(self, handler: Handler, policy: Optional[OffloadPolicy] = None, name: str = 'offload',
+                 metrics: Optional[Metrics] = None):
+        """
+        Bounded queues and worker threads that take message processing off the QuickFIX callback thread.
+
+        Messages are sharded by session, so each session's messages are
+        handled by one worker, in the order they were submitted. When a
+        worker's queue is full, the policy decides: 'block' makes the caller
+        wait, 'spill' appends the message, framed as in the binary journal,
+        to a spill file. Once a shard spills, every later message for it goes
+        to the same file until the worker has emptied its queue and taken the
+        file over, so ordering holds across the switch.
+
+        Args:
+            handler (Handler): Processes one message on a worker thread.
+            policy (OffloadPolicy): Workers, queue size and backpressure.
+            name (str): Prefix of the worker thread names and spill files.
+            metrics (Metrics): Records the queue lag per session in fix_offload_lag_seconds.
+        """
+        self.handler = handler
+        self.policy = policy or OffloadPolicy()
+        self.name = name
+        self.metrics = metrics
+        self.logger = logging.getLogger('MessagePipeline')
+        self.errors = 0
+        self._lag: Dict[str, object] = {}
+        self._closed = False
+        self._shards = [_Shard(i, self.policy.queue_size) for i in range(self.policy.workers)]
+        if self.policy.backpressure == 'spill':
+            os.makedirs(self.policy.spill_dir, exist_ok=True)
+            leftovers = [f for f in os.listdir(self.policy.spill_dir) if f.startswith(f"{name}-")]
+            if leftovers:
+                self.logger.warning(f"Spill files left by an earlier run in {self.policy.spill_dir}: "
+                                    f"{', '.join(sorted(leftovers))}")
+        for shard in self._shards:
+            shard.thread = threading.Thread(target=self._run, args=(shard,), name=f'{name}-{shard.index}', daemon=True)
+            shard.thread.start()
+
+    def _shard(self, session: str) -> _Shard:
+        return self._shards[zlib.crc32(session.encode()) % len(self._shards)] if len(self._shards) > 1 \
+            else self._shards[0]
+
+    def submit(self, session: str, raw: str, direction: int) -> None:
+        """
+        Queue one message for its session's worker. Only blocks under the 'block' policy with a full queue.
+
+        Args:
+            session (str): The session id; messages of one session are processed in order.
+            raw (str): The serialized message.
+            direction (int): INCOMING or OUTGOING, as in binary_journal.
+        """
+        if self._closed:
+            raise RuntimeError("MessagePipeline is closed")
+        shard = self._shard(session)
+        item = (raw, session, direction, time.time_ns())
+        if self.policy.backpressure == 'block':
+            try:
+                shard.queue.put_nowait(item)
+            except queue.Full:
+                shard.blocked += 1
+                shard.queue.put(item)
+            return
+        with shard.lock:
+            if shard.spill is None:
+                try:
+                    shard.queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    self._start_spill(shard)
+            shard.spill.write(encode_record(raw.encode(), item[3], direction, session.encode()))
+            shard.spill_pending += 1
+            shard.spilled += 1
+            if shard.queue.empty():
+                shard.queue.put_nowait(_WAKE)
+
+    def _start_spill(self, shard: _Shard) -> None:
+        shard.spills += 1
+        shard.spill_path = os.path.join(self.policy.spill_dir,
+                                        f"{self.name}-{os.getpid()}-{shard.index}-{shard.spills}.fixj")
+        shard.spill = open(shard.spill_path, 'wb')
+        shard.spill.write(FILE_HEADER)
+        self.logger.warning(f"Worker {shard.index} of {self.name} is behind; spilling to {shard.spill_path}")
+
+    def _run(self, shard: _Shard) -> None:
+        """
+        Worker loop: process the queue; once it is empty, read back what was spilled meanwhile.
+        """
+        while True:
+            item = shard.queue.get()
+            if item is _STOP:
+                shard.queue.task_done()
+                self._drain_spill(shard)
+                return
+            if item is not _WAKE:
+                self._handle(shard, *item)
+            shard.queue.task_done()
+            if shard.spill is not None and shard.queue.empty():
+                self._drain_spill(shard)
+
+    def _drain_spill(self, shard: _Shard) -> None:
+        with shard.lock:
+            spill, path = shard.spill, shard.spill_path
+            shard.spill = None
+        if spill is None:
+            return
+        spill.close()
+        reader = BinaryJournalReader(path)
+        try:
+            for record in reader:
+                self._handle(shard, bytes(record.raw).decode(), record.session, record.direction,
+                             record.timestamp_ns)
+                with shard.lock:
+                    shard.spill_pending -= 1
+        finally:
+            reader.close()
+        os.remove(path)
+
+    def _handle(self, shard: _Shard, raw: str, session: str, direction: int, enqueued_ns: int) -> None:
+        if self.metrics is not None:
+            lag = self._lag.get(session)
+            if lag is None:
+                lag = self._lag[session] = self.metrics.histogram('fix_offload_lag_seconds', (session,))
+            lag.record(max(time.time_ns() - enqueued_ns, 0))
+        try:
+            self.handler(raw, session, direction, enqueued_ns)
+        except Exception as e:
+            self.errors += 1
+            self.logger.error(f"Error processing offloaded message for {session}: {e}")
+        shard.processed += 1
+
+    def pending(self) -> int:
+        """
+        Messages queued or spilled and not yet processed.
+        """
+        return sum(shard.queue.unfinished_tasks + shard.spill_pending for shard in self._shards)
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every message submitted so far has been processed.
+
+        Returns:
+            bool: False if `timeout` seconds passed first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.001)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Process everything queued or spilled, then stop the workers.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for shard in self._shards:
+            shard.queue.put(_STOP)
+        for shard in self._shards:
+            shard.thread.join(timeout)
+            if shard.thread.is_alive():
+                self.logger.error(f"Worker {shard.thread.name} did not drain within {timeout}s")
+
+    def shard_stats(self) -> List[Dict[str, int]]:
+        return [{
+            'shard': shard.index,
+            'queued': shard.queue.qsize(),
+            'spill_pending': shard.spill_pending,
+            'processed': shard.processed,
+            'spilled': shard.spilled,
+            'blocked': shard.blocked,
+        } for shard in self._shards]
+
+    def stats(self) -> Dict[str, int]:
+        shards = self.shard_stats()
+        totals = {key: sum(shard[key] for shard in shards)
+                  for key in ('queued', 'spill_pending', 'processed', 'spilled', 'blocked')}
+        totals['workers'] = len(shards)
+        totals['errors'] = self.errors
+        return totals
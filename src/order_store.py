@@ -0,0 +1,243 @@
+import sys
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set
+import quickfix as fix
+from .log_parser import LogParser, MessageFilter
+
+CL_ORD_ID, ORDER_ID, ORIG_CL_ORD_ID, EXEC_ID = 11, 37, 41, 17
+SYMBOL, SIDE, ACCOUNT, ORDER_QTY = 55, 54, 1, 38
+CUM_QTY, AVG_PX, LEAVES_QTY, LAST_QTY, LAST_PX = 14, 6, 151, 32, 31
+ORD_STATUS, TRANSACT_TIME = 39, 60
+
+ORD_STATUS_NAMES = {
+    '0': 'NEW', '1': 'PARTIALLY_FILLED', '2': 'FILLED', '3': 'DONE_FOR_DAY', '4': 'CANCELED',
+    '5': 'REPLACED', '6': 'PENDING_CANCEL', '7': 'STOPPED', '8': 'REJECTED', '9': 'SUSPENDED',
+    'A': 'PENDING_NEW', 'B': 'CALCULATED', 'C': 'EXPIRED', 'D': 'ACCEPTED_FOR_BIDDING', 'E': 'PENDING_REPLACE',
+}
+TERMINAL_STATUSES = frozenset('2348C')
+
+ORDER_TAGS = (CL_ORD_ID, ORDER_ID, ORIG_CL_ORD_ID, EXEC_ID, SYMBOL, SIDE, ACCOUNT, ORDER_QTY,
+              CUM_QTY, AVG_PX, LEAVES_QTY, LAST_QTY, LAST_PX, ORD_STATUS, TRANSACT_TIME)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+def _float(value: Optional[str]) -> Optional[float]:
+    return float(value) if value else None
+
+
+class OrderState:
+    __slots__ = ('cl_ord_id', 'order_id', 'symbol', 'side', 'account', 'order_qty', 'cum_qty', 'avg_px',
+                 'leaves_qty', 'status', 'last_exec_id', 'transact_time', 'updates')
+
+    def __init__(self, cl_ord_id: Optional[str], order_id: Optional[str]):
+        """
+        Current state of one order, as of the last ExecutionReport applied.
+
+        Slotted so millions of orders fit in memory; symbol, side, account and
+        status strings are interned and shared between orders.
+        """
+        self.cl_ord_id = cl_ord_id
+        self.order_id = order_id
+        self.symbol: Optional[str] = None
+        self.side: Optional[str] = None
+        self.account: Optional[str] = None
+        self.order_qty = 0.0
+        self.cum_qty = 0.0
+        self.avg_px = 0.0
+        self.leaves_qty = 0.0
+        self.status: Optional[str] = None
+        self.last_exec_id: Optional[str] = None
+        self.transact_time: Optional[str] = None
+        self.updates = 0
+
+    @property
+    def status_name(self) -> str:
+        return ORD_STATUS_NAMES.get(self.status, str(self.status))
+
+    @property
+    def is_open(self) -> bool:
+        return self.status not in TERMINAL_STATUSES
+
+    def to_dict(self) -> Dict[str, object]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (f"OrderState(ClOrdID={self.cl_ord_id}, OrderID={self.order_id}, Symbol={self.symbol}, "
+                f"CumQty={self.cum_qty:g}, AvgPx={self.avg_px:g}, Status={self.status_name})")
+
+
+class OrderStore:
+    def __init__(self):
+        """
+        In-memory order state built incrementally from ExecutionReports.
+
+        Orders are found in O(1) by ClOrdID or OrderID; secondary indexes by
+        Symbol and OrdStatus are kept up to date on every update, so live
+        queries never scan the whole store. A cancel/replace (OrigClOrdID) moves
+        the order to its new ClOrdID. Reports with an ExecID already applied to
+        the order (e.g. PossDup resends) are ignored.
+        """
+        self._by_cl_ord_id: Dict[str, OrderState] = {}
+        self._by_order_id: Dict[str, OrderState] = {}
+        self._by_symbol: Dict[str, Set[OrderState]] = {}
+        self._by_status: Dict[str, Set[OrderState]] = {}
+        self._lock = threading.Lock()
+        self._count = 0
+        self.reports_applied = 0
+
+    def apply(self, get: Callable[[int], Optional[str]]) -> Optional[OrderState]:
+        """
+        Apply one ExecutionReport.
+
+        Args:
+            get (Callable[[int], Optional[str]]): Returns a field's value by tag, or None
+                when absent, e.g. MessageView.get_str or dict.get.
+
+        Returns:
+            Optional[OrderState]: The updated order, or None if the report carries no order ID.
+        """
+        cl_ord_id = get(CL_ORD_ID)
+        order_id = get(ORDER_ID)
+        if order_id == 'NONE':  # OrderID 'NONE' on rejects of unknown orders
+            order_id = None
+        if not cl_ord_id and not order_id:
+            return None
+        exec_id = get(EXEC_ID)
+        orig_cl_ord_id = get(ORIG_CL_ORD_ID)
+
+        with self._lock:
+            order = (self._by_order_id.get(order_id) if order_id else None) \
+                or (self._by_cl_ord_id.get(orig_cl_ord_id) if orig_cl_ord_id else None) \
+                or (self._by_cl_ord_id.get(cl_ord_id) if cl_ord_id else None)
+            if order is None:
+                order = OrderState(cl_ord_id, order_id)
+                self._count += 1
+            elif exec_id is not None and exec_id == order.last_exec_id:
+                return order
+
+            self._unindex(order)
+            if cl_ord_id:
+                order.cl_ord_id = cl_ord_id
+            if order_id:
+                order.order_id = order_id
+            order.symbol = _intern(get(SYMBOL)) or order.symbol
+            order.side = _intern(get(SIDE)) or order.side
+            order.account = _intern(get(ACCOUNT)) or order.account
+            order.order_qty = _float(get(ORDER_QTY)) or order.order_qty
+
+            cum_qty, avg_px = _float(get(CUM_QTY)), _float(get(AVG_PX))
+            if cum_qty is None:
+                # No CumQty (pre-4.4 or partial drop copies): accumulate fills
+                last_qty, last_px = _float(get(LAST_QTY)) or 0.0, _float(get(LAST_PX)) or 0.0
+                if last_qty:
+                    cum_qty = order.cum_qty + last_qty
+                    avg_px = (order.avg_px * order.cum_qty + last_px * last_qty) / cum_qty
+                else:
+                    cum_qty, avg_px = order.cum_qty, order.avg_px
+            order.cum_qty = cum_qty
+            order.avg_px = avg_px if avg_px is not None else order.avg_px
+            leaves_qty = _float(get(LEAVES_QTY))
+            order.leaves_qty = leaves_qty if leaves_qty is not None else max(order.order_qty - order.cum_qty, 0.0)
+            order.status = _intern(get(ORD_STATUS)) or order.status
+            order.last_exec_id = exec_id or order.last_exec_id
+            order.transact_time = get(TRANSACT_TIME) or order.transact_time
+            order.updates += 1
+            self._index(order, orig_cl_ord_id)
+            self.reports_applied += 1
+            return order
+
+    def apply_message(self, message: fix.Message) -> Optional[OrderState]:
+        """
+        Apply an ExecutionReport received from QuickFIX.
+        """
+        values = {tag: message.getField(tag) for tag in ORDER_TAGS if message.isSetField(tag)}
+        return self.apply(values.get)
+
+    def load(self, log_path: str, workers: Optional[int] = None) -> int:
+        """
+        Rebuild state from a raw message log, e.g. after a restart mid-day.
+
+        Returns:
+            int: Number of ExecutionReports read.
+        """
+        parser = LogParser(log_path, workers=workers, message_filter=MessageFilter(msg_types=['8']))
+        return sum(self.apply_columns(batch) for batch in parser.iter_batches(ORDER_TAGS))
+
+    def apply_columns(self, columns: Dict[int, Sequence[Optional[bytes]]]) -> int:
+        """
+        Apply a column batch from LogParser.iter_batches, which must include ORDER_TAGS, in row order.
+
+        Returns:
+            int: Number of reports in the batch.
+        """
+        decoded = [[value.decode('latin-1') if value is not None else None for value in columns[tag]]
+                   for tag in ORDER_TAGS]
+        count = 0
+        for row in zip(*decoded):
+            self.apply(dict(zip(ORDER_TAGS, row)).get)
+            count += 1
+        return count
+
+    def _unindex(self, order: OrderState) -> None:
+        if order.cl_ord_id and self._by_cl_ord_id.get(order.cl_ord_id) is order:
+            del self._by_cl_ord_id[order.cl_ord_id]
+        for index, key in ((self._by_symbol, order.symbol), (self._by_status, order.status)):
+            members = index.get(key)
+            if members is not None:
+                members.discard(order)
+                if not members:
+                    del index[key]
+
+    def _index(self, order: OrderState, orig_cl_ord_id: Optional[str]) -> None:
+        if orig_cl_ord_id and self._by_cl_ord_id.get(orig_cl_ord_id) is order:
+            del self._by_cl_ord_id[orig_cl_ord_id]
+        if order.cl_ord_id:
+            self._by_cl_ord_id[order.cl_ord_id] = order
+        if order.order_id:
+            self._by_order_id[order.order_id] = order
+        self._by_symbol.setdefault(order.symbol, set()).add(order)
+        self._by_status.setdefault(order.status, set()).add(order)
+
+    def get(self, cl_ord_id: str) -> Optional[OrderState]:
+        return self._by_cl_ord_id.get(cl_ord_id)
+
+    def by_order_id(self, order_id: str) -> Optional[OrderState]:
+        return self._by_order_id.get(order_id)
+
+    def by_symbol(self, symbol: str) -> List[OrderState]:
+        with self._lock:
+            return list(self._by_symbol.get(symbol, ()))
+
+    def by_status(self, *statuses: str) -> List[OrderState]:
+        """
+        Orders currently in any of the given OrdStatus values ('1', '2', ...).
+        """
+        with self._lock:
+            return [order for status in statuses for order in self._by_status.get(status, ())]
+
+    def open_orders(self) -> List[OrderState]:
+        with self._lock:
+            return [order for status, orders in self._by_status.items()
+                    if status not in TERMINAL_STATUSES for order in orders]
+
+    def symbols(self) -> Iterable[str]:
+        with self._lock:
+            return [symbol for symbol in self._by_symbol if symbol is not None]
+
+    def status_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {ORD_STATUS_NAMES.get(status, str(status)): len(orders) for status, orders in self._by_status.items()}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_cl_ord_id.clear()
+            self._by_order_id.clear()
+            self._by_symbol.clear()
+            self._by_status.clear()
+            self._count = 0
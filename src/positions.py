@@ -0,0 +1,257 @@
+import sys
+import time
+import argparse
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import quickfix as fix
+from .log_parser import LogParser, MessageFilter
+
+EXEC_TYPE, SIDE, SYMBOL, ACCOUNT, LAST_QTY, LAST_PX = 150, 54, 55, 1, 32, 31
+FILL_TAGS = (EXEC_TYPE, SIDE, SYMBOL, ACCOUNT, LAST_QTY, LAST_PX)
+
+# ExecType F is a trade in FIX 4.4; 1 and 2 are FIX 4.2 partial fill / fill. H is a trade cancel.
+TRADE_EXEC_TYPES = frozenset(('F', '1', '2'))
+REVERSAL_EXEC_TYPES = frozenset(('H',))
+SELL_SIDES = frozenset(('2', '5', '6'))  # sell, sell short, sell short exempt
+BUY_SIDES = frozenset(('1', '3'))        # buy, buy minus
+
+BOUGHT_QTY, BUY_VALUE, SOLD_QTY, SELL_VALUE = range(4)
+
+
+class PositionEngine:
+    def __init__(self, batch_size: int = 1024, by_account: bool = True):
+        """
+        Per symbol (and account) position and P&L from fills, aggregated in NumPy batches.
+
+        Fills are appended to preallocated column arrays and folded into the
+        per-key totals with np.bincount once `batch_size` of them have been
+        buffered, or before any query, so reads are always current. Everything
+        derived (net position, gross traded value, VWAP, realized P&L) is
+        computed from four running totals per key: bought qty, buy value, sold
+        qty and sell value.
+
+        Realized P&L follows the usual intraday convention: the matched
+        quantity, min(bought, sold), times the difference between the average
+        sell and average buy prices. Trade cancels (ExecType H) reverse the fill.
+
+        Args:
+            batch_size (int): Fills buffered before they are aggregated.
+            by_account (bool): Keep positions per (symbol, account) instead of per symbol.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.batch_size = batch_size
+        self.by_account = by_account
+        self._keys: Dict[Tuple[str, Optional[str]], int] = {}
+        self._names: List[Tuple[str, Optional[str]]] = []
+        self._totals = np.zeros((4, 64))
+        self._buf_key = np.empty(batch_size, dtype=np.int64)
+        self._buf_sell = np.empty(batch_size, dtype=bool)
+        self._buf_qty = np.empty(batch_size)
+        self._buf_px = np.empty(batch_size)
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self.fills = 0
+
+    def _key(self, symbol: str, account: Optional[str]) -> int:
+        name = (symbol, account if self.by_account else None)
+        key = self._keys.get(name)
+        if key is None:
+            key = self._keys[name] = len(self._names)
+            self._names.append(name)
+            if key >= self._totals.shape[1]:
+                self._totals = np.concatenate([self._totals, np.zeros_like(self._totals)], axis=1)
+        return key
+
+    def add_fill(self, symbol: str, side: str, qty: float, px: float, account: Optional[str] = None,
+                 reverse: bool = False) -> None:
+        """
+        Buffer one fill. `reverse` backs out a previously added fill (trade cancel).
+        """
+        if side not in SELL_SIDES and side not in BUY_SIDES:
+            return
+        with self._lock:
+            i = self._buffered
+            self._buf_key[i] = self._key(symbol, account)
+            self._buf_sell[i] = side in SELL_SIDES
+            self._buf_qty[i] = -qty if reverse else qty
+            self._buf_px[i] = px
+            self._buffered = i + 1
+            self.fills += 1
+            if self._buffered == self.batch_size:
+                self._flush()
+
+    def add_fields(self, get: Callable[[int], Optional[str]]) -> bool:
+        """
+        Buffer the fill carried by an ExecutionReport, if it is a trade or trade cancel.
+
+        Args:
+            get (Callable[[int], Optional[str]]): Returns a field's value by tag, or None
+                when absent, e.g. FieldRecord.get or dict.get.
+
+        Returns:
+            bool: Whether the report was a fill.
+        """
+        exec_type, last_qty, symbol = get(EXEC_TYPE), get(LAST_QTY), get(SYMBOL)
+        if exec_type is None or not last_qty or not symbol:
+            return False
+        if exec_type not in TRADE_EXEC_TYPES and exec_type not in REVERSAL_EXEC_TYPES:
+            return False
+        qty = float(last_qty)
+        if not qty:
+            return False
+        last_px = get(LAST_PX)
+        self.add_fill(symbol, get(SIDE), qty, float(last_px) if last_px else 0.0, get(ACCOUNT),
+                      reverse=exec_type in REVERSAL_EXEC_TYPES)
+        return True
+
+    def add_message(self, message: fix.Message) -> bool:
+        """
+        Buffer the fill carried by an ExecutionReport received from QuickFIX.
+        """
+        values = {tag: message.getField(tag) for tag in FILL_TAGS if message.isSetField(tag)}
+        return self.add_fields(values.get)
+
+    def add_columns(self, columns: Dict[int, Sequence[Optional[bytes]]]) -> int:
+        """
+        Aggregate a column batch from LogParser.iter_batches(FILL_TAGS) in one pass.
+
+        Returns:
+            int: Number of fills found in the batch.
+        """
+        exec_types, qtys = columns[EXEC_TYPE], columns[LAST_QTY]
+        trades = {t.encode() for t in TRADE_EXEC_TYPES}
+        reversals = {t.encode() for t in REVERSAL_EXEC_TYPES}
+        sides = {s.encode() for s in SELL_SIDES | BUY_SIDES}
+        rows = [i for i, (exec_type, qty, side) in enumerate(zip(exec_types, qtys, columns[SIDE]))
+                if qty and side in sides and (exec_type in trades or exec_type in reversals)]
+        if not rows:
+            return 0
+        symbols, accounts, prices = columns[SYMBOL], columns[ACCOUNT], columns[LAST_PX]
+        qty = np.array([qtys[i] for i in rows], dtype='S').astype(float)
+        px = np.array([prices[i] or b'0' for i in rows], dtype='S').astype(float)
+        qty[np.array([exec_types[i] in reversals for i in rows])] *= -1
+        sell = np.isin(np.array([columns[SIDE][i] for i in rows], dtype='S'),
+                       [s.encode() for s in SELL_SIDES])
+        names = np.array([(symbols[i] or b'') + b'\x01' + ((accounts[i] or b'') if self.by_account else b'')
+                          for i in rows], dtype='S')
+        unique, inverse = np.unique(names, return_inverse=True)
+        with self._lock:
+            ids = np.array([self._key(*self._split_name(name)) for name in unique], dtype=np.int64)
+            self._flush()
+            self._aggregate(ids[inverse], sell, qty, px)
+            self.fills += len(rows)
+        return len(rows)
+
+    @staticmethod
+    def _split_name(name: bytes) -> Tuple[str, Optional[str]]:
+        symbol, _, account = name.decode('ascii', 'replace').partition('\x01')
+        return symbol, account or None
+
+    def _aggregate(self, keys: np.ndarray, sell: np.ndarray, qty: np.ndarray, px: np.ndarray) -> None:
+        size = self._totals.shape[1]
+        value = qty * px
+        buy = ~sell
+        self._totals[BOUGHT_QTY] += np.bincount(keys, weights=np.where(buy, qty, 0.0), minlength=size)
+        self._totals[BUY_VALUE] += np.bincount(keys, weights=np.where(buy, value, 0.0), minlength=size)
+        self._totals[SOLD_QTY] += np.bincount(keys, weights=np.where(sell, qty, 0.0), minlength=size)
+        self._totals[SELL_VALUE] += np.bincount(keys, weights=np.where(sell, value, 0.0), minlength=size)
+
+    def _flush(self) -> None:
+        n = self._buffered
+        if n:
+            self._aggregate(self._buf_key[:n], self._buf_sell[:n], self._buf_qty[:n], self._buf_px[:n])
+            self._buffered = 0
+
+    def flush(self) -> None:
+        """
+        Aggregate any buffered fills now.
+        """
+        with self._lock:
+            self._flush()
+
+    def metrics(self) -> Dict[str, np.ndarray]:
+        """
+        Current metrics for every key as column arrays, in the order of `keys()`.
+        """
+        with self._lock:
+            self._flush()
+            bought, buy_value, sold, sell_value = self._totals[:, :len(self._names)].copy()
+        traded = bought + sold
+        gross = buy_value + sell_value
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = np.where(traded != 0, gross / traded, 0.0)
+            avg_buy = np.where(bought != 0, buy_value / bought, 0.0)
+            avg_sell = np.where(sold != 0, sell_value / sold, 0.0)
+        matched = np.minimum(bought, sold)
+        return {
+            'net_qty': bought - sold,
+            'bought_qty': bought,
+            'sold_qty': sold,
+            'gross_value': gross,
+            'vwap': vwap,
+            'avg_buy_px': avg_buy,
+            'avg_sell_px': avg_sell,
+            'realized_pnl': np.where(matched > 0, matched * (avg_sell - avg_buy), 0.0),
+        }
+
+    def keys(self) -> List[Tuple[str, Optional[str]]]:
+        with self._lock:
+            return list(self._names)
+
+    def positions(self) -> List[Dict[str, object]]:
+        """
+        One dict per (symbol, account) with its position and P&L, sorted by symbol.
+        """
+        names = self.keys()
+        metrics = self.metrics()
+        rows = []
+        for i, (symbol, account) in enumerate(names):
+            row = {'symbol': symbol, 'account': account}
+            row.update((name, float(column[i])) for name, column in metrics.items())
+            rows.append(row)
+        return sorted(rows, key=lambda row: (row['symbol'], row['account'] or ''))
+
+    def position(self, symbol: str, account: Optional[str] = None) -> Optional[Dict[str, object]]:
+        for row in self.positions():
+            if row['symbol'] == symbol and (account is None or row['account'] == account):
+                return row
+        return None
+
+    @classmethod
+    def from_log(cls, log_path: str, workers: Optional[int] = None, by_account: bool = True) -> 'PositionEngine':
+        """
+        Recompute a full day from a raw message log, one column batch per parser chunk.
+        """
+        engine = cls(by_account=by_account)
+        parser = LogParser(log_path, workers=workers, message_filter=MessageFilter(msg_types=['8']))
+        for batch in parser.iter_batches(FILL_TAGS):
+            engine.add_columns(batch)
+        return engine
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point: python -m src.positions LOG [options]
+    """
+    parser = argparse.ArgumentParser(description="Per-symbol positions and P&L from a raw FIX message log.")
+    parser.add_argument('path', help="Raw message log, e.g. human_readable_logs/communal_messages.current.log")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--by-symbol', action='store_true', help="Aggregate accounts together")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    engine = PositionEngine.from_log(args.path, args.workers, by_account=not args.by_symbol)
+    rows = engine.positions()
+    elapsed = time.perf_counter() - started
+
+    columns = ('symbol', 'account', 'net_qty', 'bought_qty', 'sold_qty', 'gross_value', 'vwap', 'realized_pnl')
+    print('\t'.join(columns))
+    for row in rows:
+        print('\t'.join(str(row[c]) if c in ('symbol', 'account') else f"{row[c]:.6g}" for c in columns))
+    print(f"{engine.fills} fills, {len(rows)} positions in {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+import sys
+import time
+import logging
+import argparse
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import quickfix as fix
+from .log_parser import LogParser, MessageFilter, MessageView
+from .order_store import ORDER_TAGS
+from .positions import FILL_TAGS
+from .fix_application import FIXApplication
+
+ADMIN_MSG_TYPES = frozenset((b'0', b'1', b'2', b'3', b'4', b'5', b'A'))
+EXECUTION_REPORT = b'8'
+
+
+class ReplayStats:
+    __slots__ = ('messages', 'admin', 'app', 'errors', 'seconds')
+
+    def __init__(self):
+        """
+        Counters of one replay run.
+        """
+        self.messages = 0
+        self.admin = 0
+        self.app = 0
+        self.errors = 0
+        self.seconds = 0.0
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.messages / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        result = {name: getattr(self, name) for name in self.__slots__}
+        result['messages_per_second'] = self.messages_per_second
+        return result
+
+    def __repr__(self) -> str:
+        return (f"ReplayStats({self.messages} messages, {self.admin} admin, {self.app} app, "
+                f"{self.errors} errors, {self.messages_per_second:.0f} msg/s)")
+
+
+def _field(buf, start: int, end: int, tag: bytes) -> Optional[bytes]:
+    """
+    Value of `tag` (given as b'\\x01<tag>=') in buf[start:end], read without indexing the message.
+    """
+    pos = buf.find(tag, start, end)
+    if pos < 0:
+        return None
+    pos += len(tag)
+    soh = buf.find(b'\x01', pos, end)
+    return buf[pos:soh if soh >= 0 else end]
+
+
+def _sending_time(value: bytes) -> float:
+    """
+    SendingTime (YYYYMMDD-HH:MM:SS[.sss]) as seconds, for pacing only.
+    """
+    day = date(int(value[0:4]), int(value[4:6]), int(value[6:8])).toordinal()
+    return day * 86400 + int(value[9:11]) * 3600 + int(value[12:14]) * 60 + float(value[15:])
+
+
+class ReplayEngine:
+    def __init__(self, path: str, msg_types: Optional[Iterable[str]] = None,
+                 senders: Optional[Iterable[str]] = None, speed: Optional[float] = None,
+                 data_dictionary: Optional[str] = None, workers: int = 1):
+        """
+        Feeds a recorded raw message log back through an application's callbacks, with no network.
+
+        The QuickFIX engine is skipped entirely: the log is memory-mapped and
+        scanned by LogParser, and each selected message is handed straight to
+        fromAdmin or fromApp, as if it had just arrived. Messages are treated
+        as incoming, so the SessionID passed along is the receiver's
+        (SenderCompID and TargetCompID swapped); use `senders` to keep only
+        what the counterparty sent.
+
+        Args:
+            path (str): Raw message log, e.g. human_readable_logs/communal_messages.current.log.
+            msg_types (Iterable[str]): MsgTypes to replay; None replays all.
+            senders (Iterable[str]): SenderCompIDs to replay; None replays all.
+            speed (float): None replays as fast as possible; 1.0 keeps the original
+                SendingTime gaps, 10.0 replays ten times faster.
+            data_dictionary (str): Parse messages with this dictionary, so repeating groups are groups.
+            workers (int): Processes used to scan the log.
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be positive")
+        self.path = path
+        self.message_filter = MessageFilter(msg_types, senders)
+        self.speed = speed
+        self.data_dictionary = fix.DataDictionary(data_dictionary) if data_dictionary else None
+        self.workers = workers
+        self._session_ids: Dict[Tuple[bytes, bytes, bytes], fix.SessionID] = {}
+
+    def messages(self) -> Iterator[MessageView]:
+        """
+        Selected messages in file order, as zero-copy views.
+        """
+        return LogParser(self.path, self.workers, self.message_filter).iter_messages()
+
+    def iter_batches(self, batch_size: int = 4096) -> Iterator[List[MessageView]]:
+        """
+        Selected messages in file order, `batch_size` views at a time.
+        """
+        return LogParser(self.path, self.workers, self.message_filter).iter_view_batches(batch_size)
+
+    def _session_id(self, buf, start: int, end: int) -> fix.SessionID:
+        key = (_field(buf, start, end, b'8='), _field(buf, start, end, b'\x0149='),
+               _field(buf, start, end, b'\x0156='))
+        session_id = self._session_ids.get(key)
+        if session_id is None:
+            begin, sender, target = (value.decode('latin-1') if value else '' for value in key)
+            session_id = self._session_ids[key] = fix.SessionID(begin, target, sender)
+        return session_id
+
+    def _message(self, raw: str) -> fix.Message:
+        if self.data_dictionary is not None:
+            return fix.Message(raw, self.data_dictionary, False)
+        return fix.Message(raw, False)
+
+    def replay(self, application: fix.Application, limit: Optional[int] = None, record: bool = False) -> ReplayStats:
+        """
+        Drive `application.fromAdmin`/`fromApp` with every selected message.
+
+        Args:
+            application (fix.Application): Receives the messages, e.g. a FIXApplication.
+            limit (int): Stop after this many messages.
+            record (bool): Let a FIXApplication write the replayed messages to its logs again.
+                Off by default, since the log being replayed is usually one of them.
+
+        Returns:
+            ReplayStats: Messages replayed, by kind, and the time taken.
+        """
+        stats = ReplayStats()
+        replaying = getattr(application, 'replaying', None)
+        if replaying is not None:
+            application.replaying = not record
+        from_admin, from_app = application.fromAdmin, application.fromApp
+        started = time.perf_counter()
+        first_sent = None
+        try:
+            for view in self.messages():
+                if limit is not None and stats.messages >= limit:
+                    break
+                buf, start, end = view.buf, view.start, view.end
+                if self.speed is not None:
+                    sent = _field(buf, start, end, b'\x0152=')
+                    if sent:
+                        sent = _sending_time(sent)
+                        if first_sent is None:
+                            first_sent = sent
+                        delay = started + (sent - first_sent) / self.speed - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                admin = _field(buf, start, end, b'\x0135=') in ADMIN_MSG_TYPES
+                try:
+                    message = self._message(buf[start:end].decode('latin-1'))
+                    (from_admin if admin else from_app)(message, self._session_id(buf, start, end))
+                except Exception as e:
+                    stats.errors += 1
+                    logging.error(f"Error replaying message at offset {start} of {self.path}: {e}")
+                stats.messages += 1
+                if admin:
+                    stats.admin += 1
+                else:
+                    stats.app += 1
+        finally:
+            # An application that offloads processing has only queued the messages so far
+            pipeline = getattr(application, 'pipeline', None)
+            if pipeline is not None:
+                pipeline.drain()
+            stats.seconds = time.perf_counter() - started
+            if replaying is not None:
+                application.replaying = replaying
+        return stats
+
+    def replay_batches(self, handler: Callable[[List[MessageView]], None], batch_size: int = 4096) -> ReplayStats:
+        """
+        Hand every selected message to `handler` in batches of views, without building QuickFIX messages.
+
+        This is the fast path for consumers that read fields directly
+        (MessageView.get_str), such as rebuilding derived state.
+        """
+        stats = ReplayStats()
+        started = time.perf_counter()
+        for batch in self.iter_batches(batch_size):
+            handler(batch)
+            stats.messages += len(batch)
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+    def rebuild(self, application) -> ReplayStats:
+        """
+        Rebuild an application's order store and positions from the ExecutionReports in the log.
+
+        This skips the callbacks altogether: the fields both need are pulled
+        out as columns in one pass over each chunk (in `workers` processes)
+        and applied in bulk. Only ExecutionReports are read, whatever msg_types
+        the engine was created with.
+        """
+        stats = ReplayStats()
+        started = time.perf_counter()
+        message_filter = MessageFilter([EXECUTION_REPORT], self.message_filter.sender_comp_ids)
+        tags = sorted(set(ORDER_TAGS) | set(FILL_TAGS))
+        for batch in LogParser(self.path, self.workers, message_filter).iter_batches(tags):
+            stats.messages += application.orders.apply_columns(batch)
+            application.positions.add_columns(batch)
+        stats.app = stats.messages
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point: python -m src.replay LOG [options]
+    """
+    parser = argparse.ArgumentParser(description="Replay a raw FIX message log through FIXApplication.")
+    parser.add_argument('path', help="Raw message log, e.g. human_readable_logs/communal_messages.current.log")
+    parser.add_argument('--msg-type', action='append', help="Replay only this MsgType (repeatable)")
+    parser.add_argument('--sender', action='append', help="Replay only this SenderCompID (repeatable)")
+    parser.add_argument('--speed', type=float, default=None,
+                        help="1.0 keeps the original timing, 10 is ten times faster (default: max speed)")
+    parser.add_argument('--workers', type=int, default=1, help="Processes used to scan the log")
+    parser.add_argument('--limit', type=int, default=None, help="Stop after this many messages")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="Only rebuild orders and positions from ExecutionReports (fast path)")
+    parser.add_argument('--log-level', default='WARNING', help="Level of the application's readable log")
+    args = parser.parse_args(argv)
+
+    engine = ReplayEngine(args.path, args.msg_type, args.sender, args.speed, workers=args.workers)
+    application = FIXApplication('', log_level=logging.getLevelName(args.log_level.upper()))
+    try:
+        if args.rebuild:
+            stats = engine.rebuild(application)
+        else:
+            stats = engine.replay(application, args.limit)
+    finally:
+        application.close()
+    print(f"{stats.messages} messages ({stats.admin} admin, {stats.app} app, {stats.errors} errors) "
+          f"in {stats.seconds:.2f}s, {stats.messages_per_second:.0f} msg/s")
+    print(f"{len(application.orders)} orders, {application.positions.fills} fills, "
+          f"{len(application.positions.keys())} positions", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
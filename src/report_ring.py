@@ -0,0 +1,341 @@
+import sys
+import time
+import struct
+import logging
+import argparse
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from .order_store import (CL_ORD_ID, ORDER_ID, ORIG_CL_ORD_ID, EXEC_ID, SYMBOL, SIDE, ACCOUNT, ORDER_QTY,
+                          CUM_QTY, AVG_PX, LEAVES_QTY, LAST_QTY, LAST_PX, ORD_STATUS, TRANSACT_TIME)
+from .positions import EXEC_TYPE
+
+MAGIC = b'FIXRING\x01'
+HEADER = struct.Struct('<8sII')   # magic, record size, capacity
+HEAD_OFFSET = 64                  # records published so far, on a cache line of its own
+DATA_OFFSET = 128
+SEQ = struct.Struct('<Q')
+
+# (name, struct format, NumPy format) of one record; strings longer than their field are cut
+FIELDS = (
+    ('seq', 'Q', '<u8'),            # 1-based sequence number, written last; 0 while the slot is being written
+    ('timestamp_ns', 'q', '<i8'),   # when the report was published
+    ('order_qty', 'd', '<f8'),
+    ('cum_qty', 'd', '<f8'),
+    ('leaves_qty', 'd', '<f8'),
+    ('last_qty', 'd', '<f8'),
+    ('last_px', 'd', '<f8'),
+    ('avg_px', 'd', '<f8'),
+    ('side', '1s', 'S1'),
+    ('exec_type', '1s', 'S1'),
+    ('ord_status', '1s', 'S1'),
+    (None, '5x', None),
+    ('session', '40s', 'S40'),
+    ('exec_id', '32s', 'S32'),
+    ('cl_ord_id', '32s', 'S32'),
+    ('orig_cl_ord_id', '32s', 'S32'),
+    ('order_id', '32s', 'S32'),
+    ('symbol', '16s', 'S16'),
+    ('account', '16s', 'S16'),
+    ('transact_time', '24s', 'S24'),
+    (None, '24x', None),
+)
+RECORD = struct.Struct('<' + ''.join(fmt for _, fmt, _ in FIELDS))
+
+
+def _dtype() -> np.dtype:
+    names, formats, offsets, offset = [], [], [], 0
+    for name, fmt, np_format in FIELDS:
+        if name is not None:
+            names.append(name)
+            formats.append(np_format)
+            offsets.append(offset)
+        offset += struct.calcsize('<' + fmt)
+    return np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': RECORD.size})
+
+
+RECORD_DTYPE = _dtype()
+TEXT_FIELDS = tuple(name for name, _, np_format in FIELDS if np_format and np_format.startswith('S'))
+
+
+def _attach(name: str, create: bool = False, size: int = 0) -> shared_memory.SharedMemory:
+    """
+    Open a segment without handing it to the resource tracker, which would
+    unlink it when this process exits; the ring outlives its producers and consumers.
+    """
+    try:
+        return shared_memory.SharedMemory(name, create=create, size=size, track=False)
+    except TypeError:  # Python < 3.13
+        shm = shared_memory.SharedMemory(name, create=create, size=size)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+def _unlink(shm: shared_memory.SharedMemory) -> None:
+    if getattr(shm, '_track', True):
+        resource_tracker.register(shm._name, 'shared_memory')  # unlink() unregisters it again
+    shm.unlink()
+
+
+def _float(value: Optional[str]) -> float:
+    return float(value) if value else float('nan')
+
+
+def _text(value: Optional[str]) -> bytes:
+    return value.encode() if value else b''
+
+
+class RingPublisher:
+    def __init__(self, name: str, capacity: int = 65536):
+        """
+        Producer side of a shared-memory ring of fixed-size execution report records.
+
+        Records go round a ring of `capacity` slots; consumers in other
+        processes read them in place, each with its own cursor, and never
+        lock. A slot's sequence number is cleared before the slot is
+        rewritten and set after, and the ring's head is moved last, so a
+        reader can tell a complete record from one being overwritten.
+        Publishing is serialized by a lock, so several applications of one
+        process can share the ring; it has a single producer process.
+
+        The segment is left in place when the producer exits. A producer
+        started again with the same name carries on from the last sequence
+        number, so consumers keep their place. Remove it with unlink().
+
+        Args:
+            name (str): Shared memory name (/dev/shm/<name> on Linux).
+            capacity (int): Records kept; a consumer further behind loses the oldest.
+
+        Raises:
+            ValueError: An existing ring of that name has another layout or capacity.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.name = name
+        self.capacity = capacity
+        try:
+            self._shm = _attach(name, create=True, size=DATA_OFFSET + capacity * RECORD.size)
+            HEADER.pack_into(self._shm.buf, 0, MAGIC, RECORD.size, capacity)
+            SEQ.pack_into(self._shm.buf, HEAD_OFFSET, 0)
+        except FileExistsError:
+            self._shm = _attach(name)
+            magic, record_size, existing = HEADER.unpack_from(self._shm.buf, 0)
+            if (magic, record_size, existing) != (MAGIC, RECORD.size, capacity):
+                self._shm.close()
+                raise ValueError(f"Shared memory {name} holds another ring "
+                                 f"({existing} records of {record_size} bytes)")
+        self._buf = self._shm.buf
+        self.published = SEQ.unpack_from(self._buf, HEAD_OFFSET)[0]
+        if self.published:
+            logging.info(f"Report ring {name} resumed at record {self.published}")
+        self._lock = threading.Lock()
+
+    def publish(self, get: Callable[[int], Optional[str]], session: str = '',
+                timestamp_ns: Optional[int] = None) -> int:
+        """
+        Write one execution report, read through `get(tag)`, e.g. FieldRecord.get.
+
+        Returns:
+            int: The record's sequence number.
+        """
+        fields = (
+            timestamp_ns or time.time_ns(),
+            _float(get(ORDER_QTY)), _float(get(CUM_QTY)), _float(get(LEAVES_QTY)),
+            _float(get(LAST_QTY)), _float(get(LAST_PX)), _float(get(AVG_PX)),
+            _text(get(SIDE)), _text(get(EXEC_TYPE)), _text(get(ORD_STATUS)),
+            session.encode(), _text(get(EXEC_ID)), _text(get(CL_ORD_ID)), _text(get(ORIG_CL_ORD_ID)),
+            _text(get(ORDER_ID)), _text(get(SYMBOL)), _text(get(ACCOUNT)), _text(get(TRANSACT_TIME)),
+        )
+        buf = self._buf
+        with self._lock:
+            seq = self.published + 1
+            offset = DATA_OFFSET + (self.published % self.capacity) * RECORD.size
+            RECORD.pack_into(buf, offset, 0, *fields)  # packed in order, so seq is cleared before the rest
+            SEQ.pack_into(buf, offset, seq)
+            SEQ.pack_into(buf, HEAD_OFFSET, seq)
+            self.published = seq
+        return seq
+
+    def close(self) -> None:
+        self._buf = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """
+        Remove the segment; attached consumers keep their mapping until they close.
+        """
+        _unlink(self._shm)
+
+
+class RingConsumer:
+    def __init__(self, name: str, start: str = 'latest'):
+        """
+        Reads a report ring in place, keeping its own cursor.
+
+        poll() returns a NumPy view of the next records, straight over the
+        shared memory, which stays valid until the producer laps it: keep up,
+        or use read(), which copies the records and drops any the producer
+        overwrote meanwhile. A consumer that falls more than a ring behind
+        skips to the oldest record still there and counts the rest in `lost`.
+
+        Args:
+            name (str): The ring's shared memory name.
+            start (str): 'latest' to read only new records, 'earliest' for everything still in the ring.
+
+        Raises:
+            FileNotFoundError: No ring of that name.
+            ValueError: The segment is not a report ring of this layout.
+        """
+        if start not in ('latest', 'earliest'):
+            raise ValueError("start must be 'latest' or 'earliest'")
+        self.name = name
+        self._shm = _attach(name)
+        magic, record_size, capacity = HEADER.unpack_from(self._shm.buf, 0)
+        if magic != MAGIC or record_size != RECORD.size:
+            self._shm.close()
+            raise ValueError(f"Shared memory {name} is not a report ring")
+        self.capacity = capacity
+        self.records = np.ndarray((capacity,), dtype=RECORD_DTYPE, buffer=self._shm.buf, offset=DATA_OFFSET)
+        self._head = np.ndarray((1,), dtype='<u8', buffer=self._shm.buf, offset=HEAD_OFFSET)
+        self._empty = self.records[:0]
+        head = int(self._head[0])
+        self.cursor = head if start == 'latest' else max(head - capacity, 0)
+        self.lost = 0
+
+    @property
+    def head(self) -> int:
+        """
+        Records published so far.
+        """
+        return int(self._head[0])
+
+    def available(self) -> int:
+        return self.head - self.cursor
+
+    def poll(self, max_records: Optional[int] = None) -> np.ndarray:
+        """
+        The next records as a zero-copy view, and move the cursor past them.
+
+        At most the records up to the end of the ring are returned, so call
+        again while available() is non-zero.
+        """
+        head = self.head
+        if head == self.cursor:
+            return self._empty
+        if head - self.cursor > self.capacity:
+            self.lost += head - self.capacity - self.cursor
+            self.cursor = head - self.capacity
+        start = self.cursor % self.capacity
+        count = min(head - self.cursor, self.capacity - start)
+        if max_records is not None:
+            count = min(count, max_records)
+        self.cursor += count
+        return self.records[start:start + count]
+
+    def read(self, max_records: Optional[int] = None) -> np.ndarray:
+        """
+        Like poll(), but a copy, across the end of the ring, without the
+        records the producer overwrote while they were copied.
+
+        This is the read side of a seqlock: a record counts only if its slot
+        held the expected seq both in the copy and in shared memory after the
+        copy. The producer clears a slot's seq before rewriting it, so a
+        record torn by a rewrite during the copy fails one of the two.
+        """
+        views = [self.poll(max_records)]
+        if self.available() and (max_records is None or len(views[0]) < max_records):
+            views.append(self.poll(None if max_records is None else max_records - len(views[0])))
+        copies = [view.copy() for view in views]
+        after = np.concatenate([view['seq'] for view in views])  # re-read once every copy is done
+        records = copies[0] if len(copies) == 1 else np.concatenate(copies)
+        expected = np.arange(self.cursor - len(records) + 1, self.cursor + 1, dtype='<u8')
+        current = (records['seq'] == expected) & (after == expected)
+        if not current.all():
+            self.lost += int((~current).sum())
+            records = records[current]
+        return records
+
+    def wait(self, timeout: Optional[float] = None, spin: float = 0.0) -> bool:
+        """
+        Wait until a record is available, busy-polling for `spin` seconds and then sleeping 1 ms between checks.
+
+        Returns:
+            bool: False if `timeout` seconds passed first.
+        """
+        started = time.perf_counter()
+        while self.head == self.cursor:
+            elapsed = time.perf_counter() - started
+            if timeout is not None and elapsed >= timeout:
+                return False
+            if elapsed >= spin:
+                time.sleep(0.001)
+        return True
+
+    def close(self) -> None:
+        """
+        Detach from the ring; views returned by poll() must not be used afterwards.
+        """
+        self.records = self._head = self._empty = None
+        self._shm.close()
+
+
+def unlink(name: str) -> None:
+    """
+    Remove the ring `name`, e.g. after its producer has been retired.
+
+    Raises:
+        FileNotFoundError: No ring of that name.
+    """
+    shm = _attach(name)
+    shm.close()
+    _unlink(shm)
+
+
+def to_dict(record) -> Dict:
+    """
+    One record as a dict of str and float values.
+    """
+    return {name: record[name].decode() if name in TEXT_FIELDS else record[name].item()
+            for name in RECORD_DTYPE.names}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line entry point: python -m src.report_ring {tail,stat,unlink} NAME
+    """
+    parser = argparse.ArgumentParser(description="Inspect a shared-memory execution report ring.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    tail = commands.add_parser('tail', help="Print records as they are published")
+    tail.add_argument('name')
+    tail.add_argument('--from-start', action='store_true', help="Start with the records still in the ring")
+    stat = commands.add_parser('stat', help="Print the ring's capacity and head")
+    stat.add_argument('name')
+    remove = commands.add_parser('unlink', help="Remove the ring")
+    remove.add_argument('name')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.command == 'unlink':
+        unlink(args.name)
+        return
+    consumer = RingConsumer(args.name, 'earliest' if getattr(args, 'from_start', False) else 'latest')
+    try:
+        if args.command == 'stat':
+            print(f"{args.name}: {consumer.capacity} records of {RECORD.size} bytes, {consumer.head} published")
+            return
+        while True:
+            consumer.wait()
+            for record in consumer.read():
+                print(' '.join(f"{key}={value}" for key, value in to_dict(record).items()))
+            if consumer.lost:
+                print(f"{consumer.lost} records lost", file=sys.stderr)
+                consumer.lost = 0
+    except KeyboardInterrupt:
+        pass
+    finally:
+        consumer.close()
+
+
+if __name__ == '__main__':
+    main()
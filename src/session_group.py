@@ -0,0 +1,192 @@
+import logging
+import threading
+import quickfix as fix
+from typing import Dict, List, Optional
+from .fix_application import FIXApplication
+from .fix_client import FIXClient
+from .gap_tracker import GapTracker
+
+
+class SessionContext:
+    def __init__(self, raw_data: str, gap_tracker: Optional[GapTracker] = None):
+        """
+        Per-session state kept by a MultiSessionApplication.
+
+        Args:
+            raw_data (str): RawData sent on logon.
+            gap_tracker (GapTracker): The session's gap tracker.
+        """
+        self.raw_data = raw_data
+        self.gap_tracker = gap_tracker
+        self.logged_on = threading.Event()
+
+
+class MultiSessionApplication(FIXApplication):
+    def __init__(self, **kwargs):
+        """
+        A single FIXApplication serving every session of a shared initiator.
+
+        Callbacks dispatch on SessionID to the session's own RawData, gap tracker
+        and logon event, while the log writers and formatter are shared.
+
+        Args:
+            **kwargs: Passed to FIXApplication (durability, log_level, ...).
+        """
+        super().__init__('', **kwargs)
+        self.contexts: Dict[str, SessionContext] = {}
+
+    def add_session(self, sessionID: fix.SessionID, raw_data: str,
+                    gap_tracker: Optional[GapTracker] = None) -> SessionContext:
+        context = SessionContext(raw_data, gap_tracker)
+        self.contexts[sessionID.toString()] = context
+        return context
+
+    def remove_session(self, sessionID: fix.SessionID) -> None:
+        self.contexts.pop(sessionID.toString(), None)
+
+    def _context(self, sessionID: fix.SessionID) -> SessionContext:
+        return self.contexts[sessionID.toString()]
+
+    def _raw_data_for(self, sessionID: Optional[fix.SessionID]) -> str:
+        return self._context(sessionID).raw_data
+
+    def _gap_tracker_for(self, sessionID: Optional[fix.SessionID]):
+        context = self.contexts.get(sessionID.toString()) if sessionID is not None else None
+        return context.gap_tracker if context else None
+
+    def _logon_event_for(self, sessionID: Optional[fix.SessionID]) -> threading.Event:
+        if sessionID is None:
+            raise ValueError("MultiSessionApplication needs a SessionID")
+        return self._context(sessionID).logged_on
+
+
+class SessionGroup:
+    def __init__(self, application: MultiSessionApplication):
+        """
+        Runs many sessions on one SocketInitiator, store factory and log factory.
+
+        Args:
+            application (MultiSessionApplication): The application shared by every session.
+        """
+        self.application = application
+        self.settings = fix.SessionSettings()
+        self.clients: List['SharedSessionClient'] = []
+        self.initiator = None
+        self._defaults_set = False
+        self._active = set()
+        self._lock = threading.Lock()
+
+    def add_client(self, config_file_path: str, raw_data: Optional[str] = None,
+                   **client_options) -> 'SharedSessionClient':
+        """
+        Add the session defined in a .cfg file to the group.
+
+        The primary and secondary hosts become SocketConnectHost and
+        SocketConnectHost1, so the initiator alternates between them on reconnect.
+
+        Args:
+            config_file_path (str): Path to the session's .cfg file.
+            raw_data (str): RawData sent on logon; defaults to the profile's RawData.
+            **client_options: Passed to FIXClient (resend and logon settings, profile).
+
+        Returns:
+            SharedSessionClient: Client handle for the new session.
+        """
+        if self.initiator is not None:
+            raise RuntimeError("Sessions cannot be added after the initiator has started")
+        if client_options.pop('failover', 'sequential') != 'sequential':
+            logging.info("Shared initiator: host failover is handled by SocketConnectHost1 alternation")
+        client_options.pop('heartbeat_timeout', None)
+        client = SharedSessionClient(config_file_path, self, **client_options)
+        if not self._defaults_set:
+            # The global log and store paths come from the first session's [DEFAULT] section
+            self.settings.set(client.settings.get())
+            self._defaults_set = True
+
+        session_settings = client.settings.get(client.session_id)
+        primary_host, secondary_host = client._get_hosts()
+        session_settings.setString("SocketConnectHost", primary_host)
+        if secondary_host:
+            session_settings.setString("SocketConnectHost1", secondary_host)
+            session_settings.setString("SocketConnectPort1", session_settings.getString("SocketConnectPort"))
+        self.settings.set(client.session_id, session_settings)
+
+        if raw_data is None:
+            raw_data = client.profile.raw_data or ''
+        self.application.add_session(client.session_id, raw_data, client.gap_tracker)
+        self.clients.append(client)
+        return client
+
+    def start(self) -> None:
+        """
+        Start the shared initiator, once. Later calls do nothing.
+        """
+        with self._lock:
+            if self.initiator is not None:
+                return
+            store_factory = fix.FileStoreFactory(self.settings)
+            log_factory = fix.FileLogFactory(self.settings)
+            self.initiator = fix.SocketInitiator(self.application, store_factory, self.settings, log_factory)
+            self.initiator.start()
+            self._active = {client.session_id.toString() for client in self.clients}
+            logging.info(f"Started shared initiator for {len(self.clients)} sessions")
+
+    def resume(self, client: 'SharedSessionClient') -> None:
+        """
+        Log a previously released session back on, while the initiator keeps running.
+        """
+        with self._lock:
+            key = client.session_id.toString()
+            if self.initiator is None or key in self._active:
+                return
+            session = fix.Session.lookupSession(client.session_id)
+            if session is not None:
+                session.logon()
+            self._active.add(key)
+
+    def release(self, client: 'SharedSessionClient', drain: bool = True) -> None:
+        """
+        Log out one session. The initiator is stopped once every session has
+        been released, and the application drained too unless `drain` is False.
+        """
+        with self._lock:
+            key = client.session_id.toString()
+            if self.initiator is None or key not in self._active:
+                return
+            self._active.discard(key)
+            if self._active:
+                session = fix.Session.lookupSession(client.session_id)
+                if session is not None:
+                    session.logout()
+                return
+            self.initiator.stop()
+            self.initiator = None
+        if drain:
+            self.application.close()
+
+
+class SharedSessionClient(FIXClient):
+    def __init__(self, config_file_path: str, group: SessionGroup, **client_options):
+        """
+        FIXClient for a session that runs on a SessionGroup's shared initiator.
+
+        Sending (ResendRequests, gap recovery) works as in FIXClient; logon and
+        logout go through the group instead of a private initiator.
+        """
+        self.group = group
+        super().__init__(config_file_path, group.application, **client_options)
+
+    def logon(self) -> None:
+        """
+        Start the shared initiator if needed and wait for this session's logon.
+        """
+        self.group.start()
+        self.group.resume(self)
+        if not self.application.wait_for_logon(self.logon_timeout, self.session_id):
+            raise RuntimeError(f"Logon timed out for session {self.session_id}")
+        # The initiator picks between SocketConnectHost and SocketConnectHost1 itself
+        self.connected_host = None
+        logging.info(f"Session {self.session_id} logged on via shared initiator")
+
+    def logout(self, drain: bool = True) -> None:
+        self.group.release(self, drain)
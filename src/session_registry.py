@@ -0,0 +1,224 @@
+import os
+import logging
+import threading
+import configparser
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional, Tuple
+import quickfix as fix
+import yaml
+
+
+class SessionProfile:
+    __slots__ = ('config_file', 'settings', 'options', 'session_id', 'begin_string', 'sender_comp_id',
+                 'target_comp_id', 'primary_host', 'secondary_host', 'port', 'raw_data', 'heartbeat_interval')
+
+    def __init__(self, config_file: str, settings: Mapping[str, str], options: Optional[Mapping] = None):
+        """
+        Immutable, precomputed view of one session's .cfg file.
+
+        Everything the client needs per message or per logon (SessionID, CompIDs,
+        hosts, RawData) is resolved once here instead of being re-read from the
+        file or from SessionSettings.
+
+        Args:
+            config_file (str): Path to the session's .cfg file.
+            settings (Mapping[str, str]): The [SESSION] section, [DEFAULT] values included.
+            options (Mapping): Per-session FIXClient keyword arguments (logon_timeout, resend limits, ...).
+        """
+        set_ = super().__setattr__
+        set_('config_file', config_file)
+        set_('settings', MappingProxyType(dict(settings)))
+        set_('options', MappingProxyType(dict(options or {})))
+        set_('begin_string', settings['BeginString'])
+        set_('sender_comp_id', settings['SenderCompID'])
+        set_('target_comp_id', settings['TargetCompID'])
+        set_('session_id', fix.SessionID(self.begin_string, self.sender_comp_id, self.target_comp_id))
+        set_('primary_host', settings.get('SocketConnectHostPrimary'))
+        set_('secondary_host', settings.get('SocketConnectHostSecondary'))
+        port = settings.get('SocketConnectPort')
+        set_('port', int(port) if port else None)
+        set_('raw_data', settings.get('RawData'))
+        interval = settings.get('HeartBtInt')
+        set_('heartbeat_interval', int(interval) if interval else None)
+
+    @classmethod
+    def from_config(cls, config_file: str, options: Optional[Mapping] = None) -> 'SessionProfile':
+        """
+        Parse a session .cfg file. This is the only place the file is read with configparser.
+
+        Raises:
+            KeyError: The [SESSION] section or one of BeginString/SenderCompID/TargetCompID is missing.
+            configparser.Error: The file is not valid.
+        """
+        config = configparser.ConfigParser()
+        config.optionxform = str  # keep QuickFIX's CamelCase keys
+        config.read(config_file)
+        return cls(config_file, config['SESSION'], options)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("SessionProfile is immutable")
+
+    def _key(self) -> tuple:
+        return self.config_file, tuple(sorted(self.settings.items())), tuple(sorted(self.options.items(), key=str))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SessionProfile) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return f"SessionProfile({self.session_id.toString()}, {self.config_file})"
+
+
+class SessionRegistry:
+    def __init__(self, config_path: str, on_add: Callable[[SessionProfile], None],
+                 on_remove: Callable[[SessionProfile], None], client_options: Optional[Mapping] = None,
+                 poll_interval: float = 2.0, frozen: Optional[Callable[[], bool]] = None):
+        """
+        Keeps the set of live sessions in line with the `sessions` list of config.yaml.
+
+        `sync` diffs a parsed config against the current profiles and calls
+        `on_add` / `on_remove` for sessions that appeared, disappeared or whose
+        .cfg (or per-session options) changed; untouched sessions are left alone.
+        `start` polls the modification times of config.yaml and every referenced
+        .cfg file and re-syncs when one of them changes.
+
+        Each `sessions` entry may carry FIXClient keyword arguments next to
+        `config_file` (e.g. `logon_timeout: 5`); they override `client_options`.
+
+        While `frozen` returns True (a shared initiator that has started and
+        cannot take new sessions), new and changed sessions are deferred: a
+        changed session keeps running on its current profile, and both are
+        listed in `deferred` until a restart picks them up. Removals still apply.
+
+        Args:
+            config_path (str): Path to config.yaml.
+            on_add (Callable[[SessionProfile], None]): Starts a new session.
+            on_remove (Callable[[SessionProfile], None]): Stops a removed session.
+            client_options (Mapping): Default FIXClient keyword arguments for every session.
+            poll_interval (float): Seconds between modification time checks.
+            frozen (Callable[[], bool]): Whether sessions can currently only be removed.
+        """
+        self.config_path = config_path
+        self.on_add = on_add
+        self.on_remove = on_remove
+        self.client_options = dict(client_options or {})
+        self.poll_interval = poll_interval
+        self.frozen = frozen
+        self.profiles: Dict[str, SessionProfile] = {}
+        self.deferred: Dict[str, SessionProfile] = {}  # changes waiting for a restart
+        self.config: dict = {}  # the last config synced
+        self._files = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._mtimes = self._snapshot()
+
+    def sync(self, config: dict) -> Tuple[int, int]:
+        """
+        Apply the `sessions` list of a parsed config.yaml.
+
+        A session whose .cfg cannot be read keeps its current profile, so a
+        half-saved file never takes a live session down.
+
+        Returns:
+            Tuple[int, int]: Number of sessions added and removed.
+        """
+        with self._lock:
+            self.config = config or {}
+            wanted: Dict[str, SessionProfile] = {}
+            for entry in (config or {}).get('sessions') or []:
+                config_file = entry.get('config_file')
+                if not config_file:
+                    logging.warning("No config_file found for a session in the configuration.")
+                    continue
+                options = {**self.client_options, **{k: v for k, v in entry.items() if k != 'config_file'}}
+                try:
+                    wanted[config_file] = SessionProfile.from_config(config_file, options)
+                except FileNotFoundError:
+                    logging.error(f"Config file {config_file} not found.")
+                except KeyError as e:
+                    logging.error(f"Key error in config file {config_file}: {e}")
+                except (configparser.Error, ValueError) as e:
+                    logging.error(f"ConfigParser error reading {config_file}: {e}")
+                if config_file not in wanted and config_file in self.profiles:
+                    wanted[config_file] = self.profiles[config_file]
+            self._files = [entry.get('config_file') for entry in (config or {}).get('sessions') or []
+                           if entry.get('config_file')]
+
+            added = removed = 0
+            frozen = self.frozen is not None and self.frozen()
+            deferred = {}
+            for config_file, profile in list(self.profiles.items()):
+                if wanted.get(config_file) != profile:
+                    if frozen and config_file in wanted:
+                        deferred[config_file] = wanted[config_file]
+                        continue
+                    try:
+                        self.on_remove(profile)
+                    except Exception as e:
+                        logging.error(f"Error removing session {profile.session_id}: {e}")
+                    del self.profiles[config_file]
+                    removed += 1
+            for config_file, profile in wanted.items():
+                if config_file in self.profiles or config_file in deferred:
+                    continue
+                if frozen:
+                    deferred[config_file] = profile
+                    continue
+                try:
+                    self.on_add(profile)
+                except Exception as e:
+                    logging.error(f"Error adding session {profile.session_id}: {e}")
+                    continue
+                self.profiles[config_file] = profile
+                added += 1
+            for config_file, profile in deferred.items():
+                if self.deferred.get(config_file) != profile:
+                    logging.warning(f"Session {profile.session_id} from {config_file} was added or changed while "
+                                    f"sessions cannot be started; it is picked up on the next restart")
+            self.deferred = deferred
+            self._mtimes = self._snapshot()
+        if added or removed:
+            logging.info(f"Session registry: {added} added, {removed} removed, {len(self.profiles)} live")
+        return added, removed
+
+    def reload(self) -> Tuple[int, int]:
+        """
+        Re-read config.yaml and sync. A file that fails to parse changes nothing.
+        """
+        try:
+            with open(self.config_path, 'r') as file:
+                config = yaml.safe_load(file)
+        except (OSError, yaml.YAMLError) as e:
+            logging.error(f"Error reloading {self.config_path}: {e}")
+            return 0, 0
+        return self.sync(config)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._watch, name='SessionRegistry', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.poll_interval):
+            if self._snapshot() != self._mtimes:
+                self.reload()
+
+    def _snapshot(self) -> Dict[str, Optional[int]]:
+        paths = [self.config_path] + self._files
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
@@ -0,0 +1,365 @@
+import os
+import copy
+import time
+import logging
+import threading
+import multiprocessing
+from multiprocessing.connection import Connection, wait
+from typing import Callable, Dict, List, Optional, Tuple
+import quickfix as fix
+from .fix_application import EXECUTION_REPORT_TAGS
+from .order_store import OrderStore
+from .positions import PositionEngine
+
+# One normalized ExecutionReport: the session id and the values of EXECUTION_REPORT_TAGS, None when absent
+Report = Tuple[str, Tuple[Optional[str], ...]]
+# Builds and returns the clients of one shard from (config_path, shard config); must be picklable
+ClientFactory = Callable[[str, dict], List]
+
+
+def shard_configs(config: dict, workers: int) -> List[dict]:
+    """
+    Split the `sessions` of a config.yaml into at most `workers` shard configurations.
+
+    Sessions are dealt round-robin in the order they are listed. Each shard logs
+    to its own `shard-N` directory under human_readable_log.directory and
+    publishes to its own `<name>-shard-N` report ring, since neither can be
+    shared between processes. Config reload, metrics, archiving and the
+    fan-out server are left to the supervisor.
+    """
+    sessions = list(config.get('sessions') or [])
+    shards = []
+    for i in range(min(workers, len(sessions))):
+        shard = copy.deepcopy(config)
+        shard['sessions'] = sessions[i::workers]
+        readable_log = dict(shard.get('human_readable_log') or {})
+        readable_log['directory'] = os.path.join(readable_log.get('directory', 'human_readable_logs'), f'shard-{i}')
+        shard['human_readable_log'] = readable_log
+        report_ring = shard.get('report_ring')
+        if report_ring:
+            report_ring['name'] = f"{report_ring.get('name', 'fix_execution_reports')}-shard-{i}"
+        offload = shard.get('offload')
+        if offload and offload.get('spill_dir'):
+            offload['spill_dir'] = os.path.join(offload['spill_dir'], f'shard-{i}')
+        for section in ('reload', 'metrics', 'archive', 'supervisor', 'fanout'):
+            shard.pop(section, None)
+        shards.append(shard)
+    return shards
+
+
+class ReportStream:
+    def __init__(self, conn: Connection, batch_size: int = 1024, received=None):
+        """
+        Worker side of the report channel: batches normalized ExecutionReports for the supervisor.
+
+        Reports are appended by the ExecutionReport handler and sent by the
+        worker's main loop in batches, so the callback thread never waits on
+        the pipe and the parent pays one unpickle per batch. A batch not yet
+        sent dies with the worker; `received`, a shared-memory counter of every
+        report appended, lets the supervisor count such losses.
+        """
+        self.conn = conn
+        self.batch_size = batch_size
+        self.received = received
+        self.sent = 0
+        self._batch: List[Report] = []
+        self._lock = threading.Lock()
+        self.ready = threading.Event()
+
+    def on_execution_report(self, fields, message, sessionID: Optional[fix.SessionID] = None) -> None:
+        report = (sessionID.toString() if sessionID is not None else '',
+                  tuple(fields.get(tag) for tag in EXECUTION_REPORT_TAGS))
+        with self._lock:
+            self._batch.append(report)
+            if self.received is not None:
+                self.received.value += 1
+            if len(self._batch) >= self.batch_size:
+                self.ready.set()
+
+    def flush(self) -> None:
+        with self._lock:
+            batch, self._batch = self._batch, []
+            self.ready.clear()
+        if batch:
+            self.conn.send(('reports', batch))
+            self.sent += len(batch)
+
+
+def _run_shard(build_clients: ClientFactory, config_path: str, config: dict, conn: Connection,
+               stop, flush_interval: float, heartbeat_interval: float, received) -> None:
+    """
+    Entry point of a shard process: run its clients and stream their ExecutionReports to the supervisor.
+    """
+    clients = build_clients(config_path, config)
+    if not clients:
+        logging.error("Shard has no clients; exiting")
+        conn.send(('stopped', {'reports': 0}))
+        return
+    stream = ReportStream(conn, received=received)
+    applications = {id(client.application): client.application for client in clients}
+    for application in applications.values():
+        application.dispatcher.subscribe(fix.MsgType_ExecutionReport, stream.on_execution_report,
+                                         EXECUTION_REPORT_TAGS)
+    for client in clients:
+        threading.Thread(target=client.logon, name=f'logon-{client.session_id}', daemon=True).start()
+
+    def heartbeat() -> dict:
+        return {
+            'sessions': len(clients),
+            'logged_on': sum(bool(client.application.wait_for_logon(0, client.session_id)) for client in clients),
+            'reports': stream.sent,
+        }
+
+    next_heartbeat = 0.0
+    try:
+        while not stop.is_set():
+            stream.ready.wait(flush_interval)
+            stream.flush()
+            if time.monotonic() >= next_heartbeat:
+                conn.send(('heartbeat', heartbeat()))
+                next_heartbeat = time.monotonic() + heartbeat_interval
+    finally:
+        for client in clients:
+            try:
+                client.logout()
+            except Exception as e:
+                logging.error(f"Error stopping session {client.session_id}: {e}")
+        stream.flush()
+        conn.send(('stopped', heartbeat()))
+        conn.close()
+
+
+class _ShardProcess:
+    __slots__ = ('index', 'config', 'process', 'conn', 'stop', 'started', 'last_heartbeat', 'health',
+                 'restarts', 'failures', 'restart_at', 'reports', 'received', 'applied', 'lost')
+
+    def __init__(self, index: int, config: dict, stop, received):
+        self.index = index
+        self.config = config
+        self.process = None
+        self.conn: Optional[Connection] = None
+        self.stop = stop
+        self.started = 0.0
+        self.last_heartbeat = 0.0
+        self.health: dict = {}
+        self.restarts = 0
+        self.failures = 0           # restarts since the last heartbeat, for the backoff
+        self.restart_at = None      # monotonic time of a pending restart
+        self.reports = 0
+        self.received = received    # shared counter of reports the current process has taken in
+        self.applied = 0            # reports applied from the current process
+        self.lost = 0               # reports that died in a shard's unsent batch
+
+
+class Supervisor:
+    def __init__(self, config_path: str, config: dict, build_clients: ClientFactory, workers: int = 2,
+                 heartbeat_interval: float = 1.0, heartbeat_timeout: float = 10.0, restart_delay: float = 1.0,
+                 max_restart_delay: float = 60.0, flush_interval: float = 0.05,
+                 on_reports: Optional[Callable[[int, List[Report]], None]] = None):
+        """
+        Runs the sessions of a config.yaml in several processes, so they are not all held by one GIL.
+
+        The sessions are dealt across `workers` shard processes (spawned, like
+        the archiver), each running its own clients. ExecutionReports are
+        normalized in the shard to a tuple of EXECUTION_REPORT_TAGS values and
+        sent to the supervisor in batches over a pipe. The supervisor applies
+        them to a combined order store and position engine, and passes them on
+        to `on_reports`.
+
+        A shard whose process exits, or that misses heartbeats for
+        `heartbeat_timeout` seconds, is killed and started again. Restarts back
+        off from `restart_delay` up to `max_restart_delay` seconds while a shard
+        keeps failing before its first heartbeat. Its sessions resume from
+        their QuickFIX stores. Reports still in a killed shard's unsent batch
+        are lost: QuickFIX had already counted them as received, so they are
+        not resent. They are counted in `lost_reports` and logged.
+
+        Args:
+            config_path (str): Path to config.yaml; passed to `build_clients`.
+            config (dict): The parsed configuration.
+            build_clients (ClientFactory): Module-level function building a shard's clients.
+            workers (int): Shard processes; at most one per session.
+            heartbeat_interval (float): Seconds between shard heartbeats.
+            heartbeat_timeout (float): Seconds without a heartbeat before a shard is restarted.
+            restart_delay (float): Seconds before the first restart of a failed shard.
+            max_restart_delay (float): Upper bound of the restart backoff.
+            flush_interval (float): Longest a shard holds a partial batch of reports.
+            on_reports (Callable[[int, List[Report]], None]): Called with the shard and each batch.
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.config_path = config_path
+        self.build_clients = build_clients
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.flush_interval = flush_interval
+        self.on_reports = on_reports
+        self.orders = OrderStore()
+        self.positions = PositionEngine()
+        self.reports = 0
+        self.lost_reports = 0
+        self._context = multiprocessing.get_context('spawn')
+        self.shards = [_ShardProcess(i, shard, self._context.Event(), self._context.RawValue('q', 0))
+                       for i, shard in enumerate(shard_configs(config, workers))]
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        for shard in self.shards:
+            self._spawn(shard)
+        self._thread = threading.Thread(target=self._run, name='supervisor', daemon=True)
+        self._thread.start()
+        logging.info(f"Supervisor started {len(self.shards)} shard processes")
+
+    def _spawn(self, shard: _ShardProcess) -> None:
+        receiver, sender = self._context.Pipe(duplex=False)
+        shard.stop.clear()
+        shard.received.value = shard.applied = 0
+        shard.health = {}
+        shard.process = self._context.Process(
+            target=_run_shard, name=f'shard-{shard.index}', daemon=True,
+            args=(self.build_clients, self.config_path, shard.config, sender, shard.stop,
+                  self.flush_interval, self.heartbeat_interval, shard.received)
+        )
+        shard.process.start()
+        sender.close()  # the parent keeps only the reading end, so EOF shows the shard is gone
+        shard.conn = receiver
+        shard.started = shard.last_heartbeat = time.monotonic()
+        shard.restart_at = None
+
+    def _run(self) -> None:
+        """
+        Supervisor loop: read batches and heartbeats, restart shards that died or went silent.
+        """
+        while True:
+            conns = {shard.conn: shard for shard in self.shards if shard.conn is not None}
+            if conns:
+                for conn in wait(list(conns), timeout=0.2):
+                    self._receive(conns[conn])
+            elif self._stopping.is_set():
+                return
+            else:
+                time.sleep(0.2)  # every shard is waiting for its restart
+            if not self._stopping.is_set():
+                self._check_health()
+
+    def _receive(self, shard: _ShardProcess) -> None:
+        try:
+            while shard.conn.poll():
+                kind, payload = shard.conn.recv()
+                if kind == 'reports':
+                    self._apply(shard, payload)
+                    continue
+                shard.health = payload
+                if kind == 'heartbeat':
+                    shard.last_heartbeat = time.monotonic()
+                    shard.failures = 0
+        except (EOFError, OSError):
+            shard.conn.close()
+            shard.conn = None
+
+    def _apply(self, shard: _ShardProcess, batch: List[Report]) -> None:
+        for _, values in batch:
+            get = dict(zip(EXECUTION_REPORT_TAGS, values)).get
+            try:
+                self.orders.apply(get)
+                self.positions.add_fields(get)
+            except Exception as e:
+                logging.error(f"Error applying a report from shard {shard.index}: {e}")
+        shard.reports += len(batch)
+        shard.applied += len(batch)
+        self.reports += len(batch)
+        if self.on_reports is not None:
+            try:
+                self.on_reports(shard.index, batch)
+            except Exception as e:
+                logging.error(f"Error in on_reports for shard {shard.index}: {e}")
+
+    def _check_health(self) -> None:
+        now = time.monotonic()
+        for shard in self.shards:
+            if shard.restart_at is not None:
+                if now >= shard.restart_at and not self._stopping.is_set():
+                    logging.info(f"Restarting shard {shard.index}")
+                    self._spawn(shard)
+                continue
+            if not shard.process.is_alive():
+                reason = f"exited with code {shard.process.exitcode}"
+            elif now - shard.last_heartbeat > self.heartbeat_timeout:
+                reason = f"sent no heartbeat for {now - shard.last_heartbeat:.0f}s"
+            else:
+                continue
+            self._kill(shard)
+            delay = min(self.restart_delay * 2 ** shard.failures, self.max_restart_delay)
+            shard.failures += 1
+            shard.restarts += 1
+            shard.restart_at = now + delay
+            logging.error(f"Shard {shard.index} {reason}; restarting in {delay:.1f}s")
+
+    @staticmethod
+    def _terminate(process) -> None:
+        if process.is_alive():
+            process.terminate()
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+    def _kill(self, shard: _ShardProcess) -> None:
+        self._terminate(shard.process)
+        if shard.conn is not None:
+            self._receive(shard)  # whatever the shard sent before it went
+            if shard.conn is not None:
+                shard.conn.close()
+                shard.conn = None
+        self._count_lost(shard)
+
+    def _count_lost(self, shard: _ShardProcess) -> None:
+        """
+        Count the reports a dead shard took in but never sent. Called once its pipe is drained.
+        """
+        lost = shard.received.value - shard.applied
+        if lost > 0:
+            shard.lost += lost
+            self.lost_reports += lost
+            shard.applied += lost
+            logging.error(f"Shard {shard.index} died with {lost} ExecutionReports unsent; they are missing "
+                          f"from the combined order store and positions")
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """
+        Log every shard's sessions off, collect their last reports and stop the processes.
+        """
+        self._stopping.set()
+        for shard in self.shards:
+            shard.stop.set()
+        deadline = time.monotonic() + timeout
+        for shard in self.shards:
+            if shard.process is not None:
+                shard.process.join(max(deadline - time.monotonic(), 0))
+                if shard.process.is_alive():
+                    logging.error(f"Shard {shard.index} did not stop within {timeout}s")
+                    self._terminate(shard.process)
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+        for shard in self.shards:
+            if shard.process is not None and shard.conn is None:
+                self._count_lost(shard)  # a shard that never sent its last batch
+        logging.info("Supervisor stopped")
+
+    def stats(self) -> List[Dict]:
+        now = time.monotonic()
+        return [{
+            'shard': shard.index,
+            'pid': shard.process.pid if shard.process is not None else None,
+            'alive': shard.process is not None and shard.process.is_alive(),
+            'sessions': len(shard.config.get('sessions') or []),
+            'logged_on': shard.health.get('logged_on', 0),
+            'reports': shard.reports,
+            'lost_reports': shard.lost,
+            'restarts': shard.restarts,
+            'heartbeat_age': round(now - shard.last_heartbeat, 3),
+        } for shard in self.shards]
@@ -0,0 +1,91 @@
+import os
+import gzip
+import time
+from datetime import date
+from src.archive import ArchiveReader, Archiver, archive_file, archive_pass, is_closed
+from src.log_index import parse_sending_time
+
+SOH = "\x01"
+
+def raw(seq, sending_time, sender="BROKER", target="CLIENT"):
+    body = f"35=8{SOH}34={seq}{SOH}49={sender}{SOH}52={sending_time}{SOH}56={target}{SOH}58={'x' * 60}{SOH}"
+    return f"8=FIX.4.4{SOH}9={len(body)}{SOH}{body}10=000{SOH}\n"
+
+def write_log(path, count=2000):
+    lines = [raw(seq, f"20240717-10:{seq // 60 % 60:02d}:{seq % 60:02d}.000") for seq in range(1, count + 1)]
+    path.write_text("".join(lines))
+    return lines
+
+def test_closed_segments():
+    today = date(2024, 7, 18)
+    assert is_closed("2024-07-17_messages.current.log", today)
+    assert not is_closed("2024-07-18_messages.current.log", today)
+    assert is_closed("communal_messages.20240717-153000.log", today)
+    assert is_closed("FIX.4.4-A-B.messages.backup.2.log", today)
+    for live in ("communal_messages.current.log", "communal_execution_reports.log", "FIX.4.4-A-B.messages.current.log",
+                 "FIX.4.4-A-B.body", "2024-07-17_messages.current.log.gz", "2024-07-17_messages.current.log.idx"):
+        assert not is_closed(live, today)
+
+def test_archive_is_plain_gzip_and_replaces_source(tmp_path):
+    path = tmp_path / "2024-07-17_messages.current.log"
+    lines = write_log(path)
+    (tmp_path / "2024-07-17_messages.current.log.idx").write_bytes(b"")
+    archive = archive_file(str(path), frame_bytes=16 << 10)
+    assert not path.exists() and not os.path.exists(str(path) + ".idx")
+    with gzip.open(archive, "rt", newline="") as f:
+        assert f.read() == "".join(lines)
+    reader = ArchiveReader(archive)
+    assert len(reader) > 5
+    assert list(reader.iter_lines()) == [line.rstrip("\n").encode() for line in lines]
+    reader.close()
+
+def test_ranges_only_inflate_needed_frames(tmp_path):
+    path = tmp_path / "2024-07-17_messages.current.log"
+    lines = write_log(path)
+    reader = ArchiveReader(archive_file(str(path), frame_bytes=16 << 10))
+    found = list(reader.seqnums("BROKER", "CLIENT", 100, 120))
+    assert [int(line.split(b"\x0134=")[1].split(b"\x01")[0]) for line in found] == list(range(100, 121))
+    assert reader.frames_read <= 2
+    reader.frames_read = 0
+    begin, end = parse_sending_time(b"20240717-10:05:00.000"), parse_sending_time(b"20240717-10:05:09.000")
+    assert [line.split(b"\x0134=")[1][:3] for line in reader.time_range(begin, end)] == [str(seq).encode() for seq in range(300, 310)]
+    assert reader.frames_read < len(reader)
+    assert list(reader.seqnums("CLIENT", "BROKER", 1, 10)) == []
+    reader.close()
+
+def test_pass_skips_live_and_recent_files(tmp_path):
+    old = tmp_path / "2000-01-01_messages.current.log"
+    write_log(old, 10)
+    live = tmp_path / "communal_messages.current.log"
+    write_log(live, 10)
+    recent = tmp_path / "communal_messages.20240717-153000.log"
+    write_log(recent, 10)
+    past = time.time() - 120
+    os.utime(old, (past, past))
+    os.utime(live, (past, past))
+    written = archive_pass([str(tmp_path)], min_age=60, keep_source=True)
+    assert written == [str(old) + ".gz"]
+    os.utime(recent, (past, past))
+    assert archive_pass([str(tmp_path)], min_age=60) == [str(recent) + ".gz"]
+    assert live.exists() and not recent.exists()
+
+def test_pass_skips_files_still_held_open(tmp_path):
+    held = tmp_path / "2000-01-01_fix.log"
+    write_log(held, 10)
+    past = time.time() - 120
+    os.utime(held, (past, past))
+    with open(held, "ab"):
+        assert archive_pass([str(tmp_path)], min_age=60) == []
+    assert archive_pass([str(tmp_path)], min_age=60) == [str(held) + ".gz"]
+
+def test_background_archiver(tmp_path):
+    path = tmp_path / "2000-01-01_messages.current.log"
+    write_log(path, 100)
+    archiver = Archiver([str(tmp_path)], interval=0.1, min_age=0)
+    archiver.start()
+    deadline = time.time() + 30
+    while path.exists() and time.time() < deadline:
+        time.sleep(0.1)
+    archiver.stop()
+    assert not path.exists()
+    assert len(list(ArchiveReader(str(path) + ".gz").iter_lines())) == 100
@@ -0,0 +1,22 @@
+import json
+from src.benchmark import Scenario, compare, format_results
+
+def test_scenario_against_local_acceptor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = Scenario(sessions=2, messages=50, resend=20, workdir=str(tmp_path / "run"), timeout=60).run()
+    reports = result["execution_reports"]
+    assert reports["messages"] == 100
+    assert reports["messages_per_second"] > 0
+    assert 0 < reports["callback_latency_us"]["p50"] <= reports["callback_latency_us"]["p999"]
+    assert reports["rss_mb"] > 0 and reports["cpu_seconds"] > 0
+    assert result["resend_replay"]["messages"] == 40
+    json.dumps(result)
+
+def test_compare_against_baseline():
+    def suite(rate, p99):
+        phase = {"messages": 10, "messages_per_second": rate, "cpu_percent": 50.0, "rss_mb": 70.0,
+                 "callback_latency_us": {"p50": 1.0, "p99": p99, "p999": p99}}
+        return {"commit": "abc", "cpus": 1, "python": "3.11", "results": [{"sessions": 1, "execution_reports": phase}]}
+    lines = compare(suite(1000, 100.0), suite(900, 150.0))
+    assert len(lines) == 1 and "(-10.0%)" in lines[0] and "(+50.0%)" in lines[0]
+    assert len(format_results(suite(900, 150.0))) == 2
@@ -0,0 +1,84 @@
+import logging
+import quickfix as fix
+import pytest
+from src.binary_journal import (
+    FILE_HEADER, INCOMING, OUTGOING, UNKNOWN, BinaryJournalReader, encode_record, from_text, open_journal, to_text
+)
+from src.fix_application import FIXApplication
+
+SOH = "\x01"
+
+def raw(seq, sender="BROKER", target="CLIENT", text="ok"):
+    body = f"35=8{SOH}34={seq}{SOH}49={sender}{SOH}52=20240717-10:00:0{seq % 10}.000{SOH}56={target}{SOH}58={text}{SOH}"
+    return f"8=FIX.4.4{SOH}9={len(body)}{SOH}{body}10=000{SOH}".encode()
+
+def test_records_round_trip_with_newlines(tmp_path):
+    path = str(tmp_path / "messages.fixj")
+    journal = open_journal(path)
+    journal.write(encode_record(raw(1, text="line one\nline two"), 1000, INCOMING, b"FIX.4.4:CLIENT->BROKER"))
+    journal.write(encode_record(raw(2, "CLIENT", "BROKER"), 2000, OUTGOING, b"FIX.4.4:CLIENT->BROKER"))
+    journal.close()
+    reader = BinaryJournalReader(path, verify=True)
+    records = list(reader)
+    assert [(r.timestamp_ns, r.direction, r.session) for r in records] == [
+        (1000, INCOMING, "FIX.4.4:CLIENT->BROKER"), (2000, OUTGOING, "FIX.4.4:CLIENT->BROKER")]
+    assert bytes(records[0].raw) == raw(1, text="line one\nline two")
+    assert records[0].view().get_str(58) == "line one\nline two"
+    assert not reader.truncated
+    del records
+    reader.close()
+
+def test_journals_on_one_path_write_one_header(tmp_path):
+    path = str(tmp_path / "communal.fixj")
+    first, second = open_journal(path), open_journal(path)
+    first.write(encode_record(raw(1), 1, INCOMING, b"A"))
+    second.write(encode_record(raw(2), 2, INCOMING, b"B"))
+    first.close()
+    second.write(encode_record(raw(3), 3, INCOMING, b"B"))
+    second.close()
+    reader = BinaryJournalReader(path, verify=True)
+    assert [r.session for r in reader] == ["A", "B", "B"] and not reader.truncated
+    reader.close()
+
+def test_torn_and_corrupt_records_end_iteration(tmp_path):
+    path = tmp_path / "messages.fixj"
+    good, bad = encode_record(raw(1), 1, INCOMING, b"S"), encode_record(raw(2), 2, INCOMING, b"S")
+    path.write_bytes(FILE_HEADER + good + bad[:-5])
+    reader = BinaryJournalReader(str(path))
+    assert len(list(reader)) == 1 and reader.truncated
+    reader.close()
+    corrupt = bytearray(bad)
+    corrupt[-3] ^= 0xFF
+    path.write_bytes(FILE_HEADER + good + bytes(corrupt))
+    assert len(list(BinaryJournalReader(str(path)))) == 2
+    reader = BinaryJournalReader(str(path), verify=True)
+    assert len(list(reader)) == 1 and reader.truncated
+    reader.close()
+    (tmp_path / "text.log").write_bytes(raw(1))
+    with pytest.raises(ValueError):
+        BinaryJournalReader(str(tmp_path / "text.log"))
+
+def test_text_conversions(tmp_path):
+    text = tmp_path / "messages.log"
+    text.write_bytes(raw(1) + b"\n" + raw(2, "CLIENT", "BROKER") + b"\n" + raw(3, "X", "Y") + b"\n")
+    assert from_text(str(text), str(tmp_path / "messages.fixj"), local_comp_ids=["CLIENT"]) == 3
+    reader = BinaryJournalReader(str(tmp_path / "messages.fixj"), verify=True)
+    assert [(r.direction, r.session) for r in reader] == [
+        (INCOMING, "FIX.4.4:CLIENT->BROKER"), (OUTGOING, "FIX.4.4:CLIENT->BROKER"), (UNKNOWN, "FIX.4.4:X->Y")]
+    assert next(iter(reader)).timestamp_ns == 1721210401000 * 1000000
+    reader.close()
+    assert to_text(str(tmp_path / "messages.fixj"), str(tmp_path / "back.log")) == 3
+    assert (tmp_path / "back.log").read_bytes() == text.read_bytes()
+    assert (tmp_path / "back.log.idx").exists()
+
+def test_application_writes_binary_journal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    application = FIXApplication("pw", log_level=logging.WARNING, binary_journal=True)
+    session = fix.SessionID("FIX.4.4", "CLIENT", "BROKER")
+    application.log_message_raw(fix.Message(raw(1).decode(), False), session)
+    application.log_message_raw(fix.Message(raw(2, "CLIENT", "BROKER").decode(), False), session, OUTGOING)
+    application.close()
+    reader = BinaryJournalReader(str(tmp_path / "human_readable_logs" / "communal_messages.current.fixj"))
+    records = [(r.direction, r.session, r.view().get_str(34)) for r in reader]
+    assert records == [(INCOMING, "FIX.4.4:CLIENT->BROKER", "1"), (OUTGOING, "FIX.4.4:CLIENT->BROKER", "2")]
+    reader.close()
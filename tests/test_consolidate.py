@@ -0,0 +1,67 @@
+import os
+import pytest
+from src.consolidate import consolidate, merge_key
+from src.log_index import LogIndex
+
+SOH = "\x01"
+
+def raw(sender, target, seq, sending_time, poss_dup=None, msg_type="8"):
+    body = f"35={msg_type}{SOH}34={seq}{SOH}"
+    if poss_dup:
+        body += f"43=Y{SOH}"
+    body += f"49={sender}{SOH}52={sending_time}{SOH}56={target}{SOH}"
+    if poss_dup:
+        body += f"122={poss_dup}{SOH}"
+    return f"8=FIX.4.4{SOH}9={len(body)}{SOH}{body}10=000{SOH}\n"
+
+def write(path, lines):
+    path.write_text("".join(lines))
+    return str(path)
+
+def seqs(path):
+    return [(merge_key(line.encode())[2].decode(), merge_key(line.encode())[1])
+            for line in open(path, encoding="latin-1").read().splitlines()]
+
+@pytest.fixture
+def logs(tmp_path):
+    one = write(tmp_path / "one.log", [raw("B1", "C", 1, "20240717-10:00:00.100"),
+                                       raw("B1", "C", 2, "20240717-10:00:00.300"),
+                                       raw("B1", "C", 3, "20240717-10:00:01")])
+    two = write(tmp_path / "two.log", [raw("B2", "C", 1, "20240717-10:00:00.200"),
+                                       raw("B2", "C", 2, "20240717-10:00:00.300"),
+                                       raw("B2", "C", 3, "20240717-10:00:00.900")])
+    return one, two
+
+def test_merges_by_sending_time_then_seqnum(logs, tmp_path):
+    output = str(tmp_path / "out" / "consolidated.log")
+    os.makedirs(os.path.dirname(output))
+    stats = consolidate(list(logs), output)
+    assert seqs(output) == [("B1", 1), ("B2", 1), ("B1", 2), ("B2", 2), ("B2", 3), ("B1", 3)]
+    assert (stats.read, stats.written, stats.out_of_order) == (6, 6, 0)
+    assert len(LogIndex(output)) == 6
+    assert sorted(os.listdir(os.path.dirname(output))) == ["consolidated.log", "consolidated.log.idx"]
+
+def test_drops_possdup_resends_and_repeated_inputs(logs, tmp_path):
+    resend = write(tmp_path / "resend.log", [raw("B1", "C", 2, "20240717-11:00:00", poss_dup="20240717-10:00:00.300")])
+    output = str(tmp_path / "consolidated.log")
+    stats = consolidate([*logs, resend, logs[0]], output)
+    assert seqs(output) == [("B1", 1), ("B2", 1), ("B1", 2), ("B2", 2), ("B2", 3), ("B1", 3)]
+    assert (stats.possdup_dropped, stats.duplicates_dropped) == (1, 3)
+
+def test_resend_fills_a_gap_in_place(tmp_path):
+    log = write(tmp_path / "gap.log", [raw("B1", "C", 1, "20240717-10:00:00"), raw("B1", "C", 3, "20240717-10:00:02"),
+                                       raw("B1", "C", 2, "20240717-10:00:03", poss_dup="20240717-10:00:01")])
+    output = str(tmp_path / "consolidated.log")
+    unsorted = consolidate([log], output)
+    assert unsorted.out_of_order == 1
+    stats = consolidate([log], output, sort_inputs=True, workers=1)
+    assert seqs(output) == [("B1", 1), ("B1", 2), ("B1", 3)]
+    assert stats.out_of_order == 0 and stats.written == 3
+
+def test_presort_in_small_runs(tmp_path):
+    lines = [raw("B1", "C", seq, f"20240717-10:{59 - seq % 60:02d}:{seq % 60:02d}") for seq in range(1, 301)]
+    log = write(tmp_path / "shuffled.log", lines)
+    output = str(tmp_path / "consolidated.log")
+    stats = consolidate([log], output, sort_inputs=True, workers=2, run_bytes=4096)
+    keys = [merge_key(line.encode()) for line in open(output, encoding="latin-1").read().splitlines()]
+    assert stats.runs > 1 and stats.written == 300 and keys == sorted(keys)
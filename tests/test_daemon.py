@@ -0,0 +1,103 @@
+import json
+import asyncio
+import threading
+import quickfix as fix
+from unittest.mock import MagicMock
+from src.daemon import Daemon
+
+def make_client(sender):
+    client = MagicMock()
+    client.session_id = fix.SessionID("FIX.4.4", sender, "BROKER")
+    client.connected_host = "127.0.0.1"
+    client.failover_monitor = None
+    client.application.wait_for_logon.return_value = True
+    client.gap_tracker.pending.return_value = 0
+    client.gap_tracker.requests_sent = 3
+    client.application.orders.__len__.return_value = 2
+    client.application.positions.fills = 5
+    for writer in (client.application.message_writer, client.application.execution_report_writer):
+        writer.records_written, writer.records_dropped, writer.commits, writer.blocked_writes = 10, 0, 2, 0
+        writer.pending.return_value = 0
+    return client
+
+async def request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    data = json.dumps(body).encode() if body is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(payload)
+
+def run_with(daemon, scenario):
+    async def main():
+        task = asyncio.create_task(daemon.run())
+        while daemon.server is None or not daemon.server.is_serving():
+            await asyncio.sleep(0.01)
+        try:
+            return await scenario(daemon.port)
+        finally:
+            await request(daemon.port, "POST", "/shutdown")
+            await task
+    return asyncio.run(main())
+
+def test_control_api_routes_to_clients():
+    clients = [make_client("CLIENT1"), make_client("CLIENT2")]
+    stopped = MagicMock()
+    daemon = Daemon(clients, port=0, on_shutdown=stopped)
+
+    async def scenario(port):
+        status, body = await request(port, "GET", "/status")
+        assert status == 200 and [s["session"] for s in body] == ["FIX.4.4:CLIENT1->BROKER", "FIX.4.4:CLIENT2->BROKER"]
+        status, body = await request(port, "POST", "/resend", {"session": "CLIENT2", "begin": 5, "end": 9})
+        assert status == 200 and body == [{"session": "FIX.4.4:CLIENT2->BROKER", "ok": True}]
+        status, body = await request(port, "GET", "/stats?session=CLIENT1")
+        assert body[0]["message_log"]["records_written"] == 10 and body[0]["orders"] == 2
+        assert (await request(port, "POST", "/status"))[0] == 405
+        assert (await request(port, "GET", "/nope"))[0] == 404
+        assert (await request(port, "POST", "/logon", {"session": "UNKNOWN"}))[0] == 400
+
+    run_with(daemon, scenario)
+    for client in clients:
+        client.logon.assert_called_once()
+        client.logout.assert_called_once_with()
+    clients[1].send_resend_request.assert_called_once_with(5, 9)
+    clients[0].send_resend_request.assert_not_called()
+    stopped.assert_called_once()
+    assert daemon.live
+
+def test_slow_logon_does_not_block_the_api():
+    release = threading.Event()
+    slow = make_client("SLOW")
+    slow.logon.side_effect = lambda: release.wait(5)
+    daemon = Daemon([slow], port=0, logon_on_start=False)
+
+    async def scenario(port):
+        logon = asyncio.create_task(request(port, "POST", "/logon"))
+        await asyncio.sleep(0.05)
+        status, body = await asyncio.wait_for(request(port, "GET", "/status"), 1)
+        assert status == 200 and not logon.done()
+        release.set()
+        assert (await logon)[1][0]["ok"]
+        status, _ = await request(port, "POST", "/logout")
+        slow.logout.assert_called_once_with(drain=False)
+
+    run_with(daemon, scenario)
+
+def test_request_timeout_bounds_reading_not_handling():
+    slow = make_client("SLOW")
+    slow.logon.side_effect = lambda: threading.Event().wait(0.3)
+    daemon = Daemon([slow], port=0, logon_on_start=False, request_timeout=0.1)
+
+    async def scenario(port):
+        status, body = await request(port, "POST", "/logon")
+        assert status == 200 and body[0]["ok"]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b"GET /status HTTP/1.1\r\n")  # headers never finish
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        assert response.split()[1] == b"400" and b"request timed out" in response
+
+    run_with(daemon, scenario)
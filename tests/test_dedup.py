@@ -0,0 +1,67 @@
+import logging
+import os
+import quickfix as fix
+import pytest
+from src.dedup import BloomFilter, DedupPolicy, DuplicateFilter
+from src.fix_application import FIXApplication
+
+SOH = "\x01"
+SESSION = "FIX.4.4:CLIENT->BROKER"
+
+def raw(seq, exec_id, poss_dup=False, cum_qty=40):
+    flag = f"43=Y{SOH}122=20240717-10:00:00.000{SOH}" if poss_dup else ""
+    body = (f"35=8{SOH}34={seq}{SOH}{flag}49=BROKER{SOH}52=20240717-10:00:01.000{SOH}56=CLIENT{SOH}"
+            f"1=ACC1{SOH}6=10{SOH}11=C1{SOH}14={cum_qty}{SOH}17={exec_id}{SOH}31=10{SOH}32=40{SOH}37=O1{SOH}"
+            f"38=100{SOH}39=1{SOH}54=1{SOH}55=PETR4{SOH}60=20240717-10:00:00.000{SOH}150=F{SOH}151={100 - cum_qty}{SOH}")
+    return f"8=FIX.4.4{SOH}9={len(body)}{SOH}{body}10=000{SOH}"
+
+def test_bloom_filter_error_rate():
+    bloom = BloomFilter(10000, 0.01)
+    for i in range(10000):
+        bloom.add(("S", i))
+    assert all(("S", i) in bloom for i in range(10000))
+    false_positives = sum(("T", i) in bloom for i in range(10000))
+    assert false_positives < 300
+
+def test_exact_window_and_exec_ids():
+    duplicates = DuplicateFilter(DedupPolicy(capacity=1000, window=100))
+    assert not duplicates.seen_message(SESSION, raw(1, "E1"))
+    assert duplicates.seen_message(SESSION, raw(1, "E1", poss_dup=True))
+    assert duplicates.seen_message(SESSION, raw(5, "E1"))          # same execution under a new seqnum
+    assert not duplicates.seen_message("FIX.4.4:CLIENT->OTHER", raw(1, "E1"))
+    assert duplicates.stats() == {'checked': 4, 'suppressed': 2, 'suppressed_seqnum': 1,
+                                  'suppressed_exec_id': 1, 'suppressed_probable': 0}
+
+def test_bloom_covers_keys_beyond_the_window_for_resends_only():
+    duplicates = DuplicateFilter(DedupPolicy(capacity=1000, window=10))
+    for seq in range(1, 101):
+        duplicates.seen(SESSION, seq, f"E{seq}")
+    assert duplicates.seen(SESSION, 5, "E5", poss_dup=True)
+    assert duplicates.suppressed_probable == 1
+    assert not duplicates.seen(SESSION, 6, "E6")    # not marked as resent: never dropped on the Bloom filter alone
+    assert not duplicates.seen(SESSION, 500, "E500", poss_dup=True)
+
+def test_sequence_reset_starts_new_epoch():
+    duplicates = DuplicateFilter()
+    for seq in range(1, 11):
+        duplicates.seen(SESSION, seq)
+    duplicates.sequence_reset(SESSION, 11)
+    assert duplicates.seen(SESSION, 10)
+    duplicates.sequence_reset(SESSION, 1)
+    assert not duplicates.seen(SESSION, 1) and not duplicates.seen(SESSION, 10)
+    with pytest.raises(ValueError):
+        DedupPolicy(error_rate=1.5)
+
+def test_application_drops_resent_reports_before_processing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    application = FIXApplication("pw", log_level=logging.WARNING, dedup=DedupPolicy(capacity=1000, window=100))
+    session = fix.SessionID("FIX.4.4", "CLIENT", "BROKER")
+    application.fromApp(fix.Message(raw(1, "E1"), False), session)
+    application.fromApp(fix.Message(raw(1, "E1", poss_dup=True), False), session)
+    application.fromApp(fix.Message(raw(2, "E2", cum_qty=80), False), session)
+    application.close()
+    assert application.positions.position("PETR4", "ACC1")["net_qty"] == 80
+    assert application.orders.get("C1").cum_qty == 80
+    with open(os.path.join("human_readable_logs", "communal_messages.current.log")) as f:
+        assert len(f.readlines()) == 2
+    assert application.duplicates.suppressed == 1
@@ -0,0 +1,96 @@
+import logging
+import threading
+import tracemalloc
+import quickfix as fix
+from src.dispatch import FieldExtractor, MessageDispatcher
+from src.fix_application import FIXApplication
+
+SOH = "\x01"
+
+def raw(msg_type, **fields):
+    body = f"35={msg_type}{SOH}34=2{SOH}49=BROKER{SOH}52=20240717-10:00:00.000{SOH}56=CLIENT{SOH}"
+    body += "".join(f"{tag}={value}{SOH}" for tag, value in fields.items())
+    return f"8=FIX.4.4{SOH}9={len(body)}{SOH}{body}10=000{SOH}"
+
+def test_extractor_single_pass_first_occurrence_and_reuse():
+    extractor = FieldExtractor([55, 448, 31, 55])
+    assert extractor.tags == (55, 448, 31)
+    record = extractor.extract(raw("8", **{"55": "PETR4", "453": 2, "448": "A", "447": "D", "452": 1}) + f"448=B{SOH}")
+    assert (record.get(55), record[448], record.get(31), 31 in record) == ("PETR4", "A", None, False)
+    again = extractor.extract(raw("8", **{"31": "10.5"}), record)
+    assert again is record and record.to_dict() == {31: "10.5"}
+    assert record.get(999, "x") == "x"
+
+def test_extractor_allocates_only_the_values_it_returns():
+    message = raw("8", **{str(tag): f"value-{tag}" for tag in range(100, 140)})
+    extractor = FieldExtractor([55, 448, 31])
+    record = extractor.extract(message)
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        extractor.extract(message, record)  # none of the declared tags is present
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak - before < len(message) // 4  # splitting the message alone would allocate more than its size
+    assert record.to_dict() == {}
+
+def test_dispatcher_routes_by_msg_type_and_isolates_errors():
+    dispatcher = MessageDispatcher()
+    seen = []
+    def first(fields, message, sessionID):
+        seen.append(("first", fields.get(11)))
+    def failing(fields, message, sessionID):
+        raise ValueError("boom")
+    def second(fields, message, sessionID):
+        seen.append(("second", fields.get(11), fields.get(58)))
+    dispatcher.subscribe("9", first, [11])
+    dispatcher.subscribe("9", failing)
+    dispatcher.subscribe("9", second, [11, 58])
+    message = raw("9", **{"11": "C1", "58": "Too late"})
+    assert dispatcher.dispatch("9", message, None) == 3
+    assert seen == [("first", "C1"), ("second", "C1", "Too late")]
+    assert dispatcher.errors == 1
+    assert dispatcher.dispatch("AE", raw("AE"), None) == 0
+    dispatcher.unsubscribe("9", failing)
+    dispatcher.unsubscribe("9", first)
+    dispatcher.unsubscribe("9", second)
+    assert not dispatcher.handles("9") and dispatcher.msg_types() == []
+
+def test_concurrent_dispatches_get_their_own_records():
+    dispatcher = MessageDispatcher()
+    both_inside = threading.Barrier(2, timeout=5)
+    seen = {}
+    def handler(fields, message, sessionID):
+        before = fields.get(11)
+        both_inside.wait()  # the other thread has extracted its message by now
+        seen[message] = (before, fields.get(11))
+    dispatcher.subscribe("9", handler, [11])
+    threads = [threading.Thread(target=dispatcher.dispatch, args=("9", raw("9", **{"11": name}), name))
+               for name in ("C1", "C2")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert seen == {"C1": ("C1", "C1"), "C2": ("C2", "C2")} and dispatcher.errors == 0
+
+def test_application_handlers(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    application = FIXApplication("pw", log_level=logging.WARNING)
+    rejects = []
+    application.dispatcher.subscribe(fix.MsgType_OrderCancelReject,
+                                     lambda fields, message, sessionID: rejects.append(fields.get(11)), [11])
+    session = fix.SessionID("FIX.4.4", "CLIENT", "BROKER")
+    # A New ack carries no LastPx/LastQty; the report is still applied and logged
+    new_ack = raw("8", **{"11": "C1", "17": "E1", "37": "O1", "38": "100", "39": "0", "54": "1", "55": "PETR4",
+                          "60": "20240717-10:00:00.000", "150": "0", "151": "100", "14": "0", "6": "0"})
+    application.fromApp(fix.Message(new_ack, False), session)
+    application.fromApp(fix.Message(raw("9", **{"11": "C2", "37": "O2", "39": "8", "41": "C1", "434": "1"}), False),
+                        session)
+    application.close()
+    assert application.orders.get("C1").status == "0"
+    assert rejects == ["C2"]
+    with open(tmp_path / "human_readable_logs" / "communal_execution_reports.log") as f:
+        assert f.read() == ("Execution Report: ExecID=E1, Symbol=PETR4, Side=1, OrderQty=100, LastPx=, LastQty=, "
+                            "TransactTime=20240717-10:00:00.000, ExecType=0, OrdStatus=0\n")
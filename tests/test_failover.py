@@ -0,0 +1,66 @@
+import socket
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from src.failover import probe_hosts, FailoverMonitor
+
+@pytest.fixture
+def listener():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen()
+    yield server.getsockname()[1]
+    server.close()
+
+def test_probe_returns_first_reachable_host(listener):
+    assert probe_hosts(["127.0.0.2", "127.0.0.1"], listener, timeout=1) == "127.0.0.1"
+    assert probe_hosts(["127.0.0.1", "127.0.0.2"], listener, timeout=1) == "127.0.0.1"
+
+def test_probe_returns_none_when_all_down(listener):
+    assert probe_hosts(["127.0.0.2", "127.0.0.3"], listener, timeout=1) is None
+    assert probe_hosts([None, ""], listener) is None
+
+def make_client():
+    client = MagicMock()
+    client.session_id = "FIX.4.4:CLIENT->BROKER"
+    client._get_hosts.return_value = ("primary", "secondary")
+    client.connected_host = "primary"
+    client.application.logged_on = threading.Event()
+    client.application.last_received = 0.0
+    return client
+
+def wait_for_recovery(monitor):
+    for _ in range(200):
+        if monitor.recoveries:
+            return
+        threading.Event().wait(0.01)
+
+def test_trigger_fails_over_to_other_host():
+    client = make_client()
+    client._try_logon.return_value = True
+    monitor = FailoverMonitor(client)
+    monitor.trigger("ignored before start")
+    assert monitor.recoveries == 0
+
+    monitor.start()
+    with patch("src.failover.probe_hosts", return_value="secondary") as probe:
+        monitor.trigger("logged out")
+        wait_for_recovery(monitor)
+    probe.assert_called_once_with(["secondary", "primary"], client.port, client.probe_timeout)
+    client.initiator.stop.assert_called_once()
+    client._try_logon.assert_called_once_with("secondary")
+    assert client.connected_host == "secondary"
+    assert monitor.last_recovery_seconds is not None
+    monitor.stop()
+
+def test_heartbeat_loss_triggers_recovery():
+    client = make_client()
+    client._try_logon.return_value = True
+    client.application.logged_on.set()
+    monitor = FailoverMonitor(client, heartbeat_timeout=0.5, check_interval=0.01)
+    with patch("src.failover.probe_hosts", return_value=None):
+        monitor.start()
+        wait_for_recovery(monitor)
+    monitor.stop()
+    assert monitor.recoveries >= 1
+    client._try_logon.assert_any_call("secondary")
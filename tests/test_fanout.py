@@ -0,0 +1,110 @@
+import json
+import time
+import socket
+import pytest
+import logging
+import quickfix as fix
+from src.fix_application import FIXApplication
+from src.fanout import FanoutServer, REPORT_TAGS, normalize
+
+SOH = "\x01"
+
+def fields(exec_id, symbol="PETR4", account="ACC1", side="1", cl_ord_id=None, cum_qty="100"):
+    return {17: exec_id, 11: cl_ord_id or f"C-{exec_id}", 37: f"O-{exec_id}", 55: symbol, 1: account, 54: side,
+            150: "F", 39: "2", 38: "100", 32: "100", 31: "10.5", 14: cum_qty, 6: "10.5", 151: "0"}.get
+
+def connect(address, subscription, family=socket.AF_INET):
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(10)
+    sock.connect(address)
+    sock.sendall(json.dumps(subscription).encode() + b'\n')
+    stream = sock.makefile('rb')
+    return sock, stream, json.loads(stream.readline())
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+def test_normalize_reads_numbers_as_floats():
+    report = normalize(fields("E1"), "FIX.4.4:A->B")
+    assert report['session'] == "FIX.4.4:A->B" and report['symbol'] == "PETR4" and report['side'] == "1"
+    assert report['last_px'] == 10.5 and report['cum_qty'] == 100.0 and report['transact_time'] is None
+
+def test_filters_match_every_given_key():
+    server = FanoutServer()
+    everything = server.subscribe({})
+    petr_buys = server.subscribe({'symbol': ["PETR4", "VALE3"], 'side': "1"})
+    account = server.subscribe({'account': "ACC2", 'session': "S2"})
+    assert server.match("PETR4", "ACC1", "1", "S1") == {everything.id, petr_buys.id}
+    assert server.match("PETR4", "ACC1", "2", "S1") == {everything.id}
+    assert server.match("VALE3", "ACC2", "1", "S2") == {everything.id, petr_buys.id, account.id}
+    server.unsubscribe(everything)
+    assert server.match("PETR4", "ACC1", "2", "S1") == frozenset()
+    assert server.publish(fields("E1", side="2"), "S1") == 0 and server.publish(fields("E2"), "S1") == 1
+    with pytest.raises(ValueError):
+        server.subscribe({'price': "10"})
+    with pytest.raises(ValueError):
+        server.subscribe({}, mode='block')
+    numeric = server.subscribe({'side': 2})
+    assert numeric.id in server.match("PETR4", "ACC1", "2", "S1")
+    with pytest.raises(TypeError):
+        server.subscribe({'side': {'value': 1}})
+
+def test_slow_subscribers_are_dropped_or_conflated():
+    server = FanoutServer(max_buffer=3)
+    dropped = server.subscribe({}, mode='drop')
+    conflated = server.subscribe({}, mode='conflate')
+    for i in range(4):
+        server.publish(fields(f"E{i}", cl_ord_id="C1", cum_qty=str(i)), "S1")
+    assert dropped.closed and server.dropped == 1 and list(server.subscribers) == [conflated.id]
+    assert conflated.conflated == 3 and [json.loads(data)['cum_qty'] for data in conflated.take()] == [3.0]
+    for i in range(5):
+        server.publish(fields(f"F{i}"), "S1")
+    assert conflated.overflowed == 2 and [json.loads(data)['exec_id'] for data in conflated.take()] == \
+        ["F2", "F3", "F4"]
+
+def test_application_streams_execution_reports(tmp_path):
+    server = FanoutServer()
+    subscriber = server.subscribe({'account': "ACC1"})
+    application = FIXApplication("pw", log_level=logging.WARNING, log_dir=str(tmp_path))
+    application.dispatcher.subscribe(fix.MsgType_ExecutionReport, server.on_execution_report, REPORT_TAGS)
+    body = (f"35=8{SOH}34=2{SOH}49=BROKER{SOH}52=20240717-10:00:00.000{SOH}56=CLIENT{SOH}1=ACC1{SOH}6=10{SOH}"
+            f"11=C1{SOH}14=100{SOH}17=E1{SOH}31=10{SOH}32=100{SOH}37=O1{SOH}38=100{SOH}39=2{SOH}54=1{SOH}"
+            f"55=PETR4{SOH}150=F{SOH}151=0{SOH}")
+    session_id = fix.SessionID("FIX.4.4", "CLIENT", "BROKER")
+    application.fromApp(fix.Message(f"8=FIX.4.4{SOH}9={len(body)}{SOH}{body}10=000{SOH}", False), session_id)
+    application.close()
+    [report] = [json.loads(data) for data in subscriber.take()]
+    assert report['session'] == session_id.toString() and report['exec_id'] == "E1" and report['last_qty'] == 100.0
+
+def test_subscribers_receive_filtered_reports_over_tcp_and_unix_sockets(tmp_path):
+    path = str(tmp_path / "fanout.sock")
+    server = FanoutServer(port=0, path=path)
+    server.start()
+    try:
+        tcp, tcp_stream, ack = connect(("127.0.0.1", server.port), {'symbol': "VALE3"})
+        unix, unix_stream, _ = connect(path, {'side': "2"}, socket.AF_UNIX)
+        assert ack == {'subscribed': 1}
+        _, rejected_stream, rejected = connect(("127.0.0.1", server.port), {'format': "xml"})
+        assert 'error' in rejected and rejected_stream.readline() == b''
+        _, rejected_stream, rejected = connect(("127.0.0.1", server.port), {'side': {'value': 1}})
+        assert 'error' in rejected and rejected_stream.readline() == b''
+        wait_for(lambda: len(server.subscribers) == 2)
+        for i in range(100):
+            server.publish(fields(f"E{i}", symbol="VALE3" if i % 2 else "PETR4", side="2" if i % 5 == 0 else "1"),
+                           "S1")
+        assert [json.loads(tcp_stream.readline())['exec_id'] for _ in range(50)] == \
+            [f"E{i}" for i in range(1, 100, 2)]
+        assert [json.loads(unix_stream.readline())['exec_id'] for _ in range(20)] == \
+            [f"E{i}" for i in range(0, 100, 5)]
+        tcp_stream.close()
+        tcp.close()
+        wait_for(lambda: len(server.subscribers) == 1)
+        assert server.stats()['clients'][0]['sent'] == 20
+    finally:
+        server.stop()
+    assert unix_stream.readline() == b''
+    unix_stream.close()
+    unix.close()
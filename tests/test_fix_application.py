@@ -1,19 +1,23 @@
+import shutil
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
-from datetime import datetime
 import quickfix as fix
 from src.fix_application import FIXApplication
 
 class TestFIXApplication(unittest.TestCase):
 
     @patch('src.fix_application.logging.getLogger')
-    @patch('src.fix_application.datetime')
     @patch('src.fix_application.os.makedirs')
-    def setUp(self, mock_makedirs, mock_datetime, mock_getLogger):
-        mock_datetime.now.return_value = datetime(2024, 7, 17)
+    def setUp(self, mock_makedirs, mock_getLogger):
         mock_getLogger.return_value = MagicMock()
         self.raw_data = "test_raw_data"
-        self.app = FIXApplication(self.raw_data)
+        self.log_dir = tempfile.mkdtemp()
+        self.app = FIXApplication(self.raw_data, log_dir=self.log_dir)
+
+    def tearDown(self):
+        self.app.close()
+        shutil.rmtree(self.log_dir, ignore_errors=True)
 
     def test_format_fix_message(self):
         message = MagicMock()
@@ -36,44 +40,70 @@ class TestFIXApplication(unittest.TestCase):
         self.app.onLogout(sessionID)
         self.app.logger.info.assert_called_with(f'Successful logout from session {sessionID}')
 
+    def test_logon_event(self):
+        sessionID = fix.SessionID("FIX.4.4", "SENDER", "TARGET")
+        self.assertFalse(self.app.wait_for_logon(0))
+        self.app.onLogon(sessionID)
+        self.assertTrue(self.app.wait_for_logon(0))
+        self.app.onLogout(sessionID)
+        self.assertFalse(self.app.wait_for_logon(0))
+
     def test_fromAdmin(self):
         message = MagicMock()
+        message.toString.return_value = "8=FIX.4.4\x019=102\x01"
         sessionID = fix.SessionID("FIX.4.4", "SENDER", "TARGET")
         self.app.fromAdmin(message, sessionID)
         self.app.logger.debug.assert_called()
 
     def test_toApp(self):
         message = MagicMock()
+        message.toString.return_value = "8=FIX.4.4\x019=102\x01"
         sessionID = fix.SessionID("FIX.4.4", "SENDER", "TARGET")
         self.app.toApp(message, sessionID)
         self.app.logger.debug.assert_called()
 
     def test_fromApp(self):
         message = MagicMock()
+        message.toString.return_value = "8=FIX.4.4\x019=102\x01"
         msgType = fix.MsgType(fix.MsgType_ExecutionReport)
         message.getHeader.return_value.getField.return_value = msgType
         sessionID = fix.SessionID("FIX.4.4", "SENDER", "TARGET")
         self.app.fromApp(message, sessionID)
         self.app.logger.info.assert_called()
 
-    @patch('builtins.open', new_callable=unittest.mock.mock_open)
-    def test_log_message_raw(self, mock_open):
+    def test_log_message_raw(self):
         message = MagicMock()
         message.toString.return_value = "8=FIX.4.4\x019=102\x01"
-        
-        # Mock the session_message_log and communal_message_log to use mock_open
-        self.app.session_message_log = mock_open.return_value
-        self.app.communal_message_log = mock_open.return_value
-        
+        self.app.message_writer = MagicMock()
+
         self.app.log_message_raw(message)
-        mock_open().write.assert_any_call("8=FIX.4.4\x019=102\x01\n")
-        mock_open().flush.assert_any_call()
-        
-    @patch('builtins.open', new_callable=unittest.mock.mock_open)
-    def test_log_to_file(self, mock_open):
-        message = "Test log message"
-        self.app.log_to_file(message)
-        mock_open().write.assert_called_with("Test log message\n")
+        self.app.message_writer.write.assert_called_once_with("8=FIX.4.4\x019=102\x01\n")
+
+    def test_close_drains_writers(self):
+        self.app.message_writer = MagicMock()
+        self.app.execution_report_writer = MagicMock()
+        self.app.close()
+        self.app.message_writer.close.assert_called_once()
+        self.app.execution_report_writer.close.assert_called_once()
+
+    def test_log_to_file(self):
+        self.app.execution_report_writer = MagicMock()
+        self.app.log_to_file("Test log message")
+        self.app.execution_report_writer.write.assert_called_once_with("Test log message\n")
+
+    def test_track_sequence(self):
+        self.app.gap_tracker = MagicMock()
+        message = fix.Message("8=FIX.4.4\x019=20\x0135=0\x0134=7\x0110=000\x01", False)
+        self.app.track_sequence(message)
+        self.app.gap_tracker.observe.assert_called_once_with(7)
+
+        marker = fix.Message("8=FIX.4.4\x019=20\x0135=0\x0134=8\x01112=RESEND-1-5\x0110=000\x01", False)
+        self.app.track_sequence(marker)
+        self.app.gap_tracker.acknowledge.assert_called_once_with("RESEND-1-5")
+
+        gap_fill = fix.Message("8=FIX.4.4\x019=20\x0135=4\x0134=8\x0136=12\x01123=Y\x0110=000\x01", False)
+        self.app.track_sequence(gap_fill)
+        self.app.gap_tracker.fill.assert_called_once_with(8, 11)
 
 if __name__ == '__main__':
     unittest.main()
@@ -33,6 +33,15 @@ def test_initialize_settings(config_file, mock_fix_application):
     assert client.logFactory is not None
     assert client.session_id is not None
 
+def test_resend_chunk_size_becomes_resend_request_chunk_size(config_file, mock_fix_application):
+    client = FIXClient(str(config_file), mock_fix_application, resend_chunk_size=250)
+    assert client.settings.get(client.session_id).getInt("ResendRequestChunkSize") == 250
+
+def test_config_resend_request_chunk_size_is_kept(config_file, mock_fix_application):
+    config_file.write_text(config_file.read_text() + "ResendRequestChunkSize=50\n")
+    client = FIXClient(str(config_file), mock_fix_application, resend_chunk_size=250)
+    assert client.settings.get(client.session_id).getInt("ResendRequestChunkSize") == 50
+
 def test_logon_primary_host(config_file, mock_fix_application):
     client = FIXClient(str(config_file), mock_fix_application)
     client._try_logon = MagicMock(return_value=True)
@@ -58,13 +67,46 @@ def test_send_resend_request(config_file, mock_fix_application):
     client = FIXClient(str(config_file), mock_fix_application)
     client._send_message = MagicMock()
     client.send_resend_request(1, 1000)
-    client._send_message.assert_called_once()
-    args, _ = client._send_message.call_args
-    message = args[0]
-    assert message.getHeader().getField(fix.MsgType().getField()) == fix.MsgType_ResendRequest
+    resend_request, test_request = (call.args[0] for call in client._send_message.call_args_list)
+    assert resend_request.getHeader().getField(fix.MsgType().getField()) == fix.MsgType_ResendRequest
+    assert test_request.getHeader().getField(fix.MsgType().getField()) == fix.MsgType_TestRequest
+    assert test_request.getField(fix.TestReqID().getField()) == "RESEND-1-1000"
 
 def test_set_socket_connect_host(config_file, mock_fix_application):
     client = FIXClient(str(config_file), mock_fix_application)
     client._set_socket_connect_host("127.0.0.3")
     session_settings = client.settings.get(client.session_id)
     assert session_settings.getString("SocketConnectHost") == "127.0.0.3"
+
+def test_try_logon_waits_for_logon_event(config_file, mock_fix_application):
+    client = FIXClient(str(config_file), mock_fix_application, logon_timeout=3)
+    mock_fix_application.wait_for_logon.return_value = True
+    with patch('src.fix_client.fix.SocketInitiator') as mock_initiator:
+        assert client._try_logon("127.0.0.1")
+    mock_fix_application.wait_for_logon.assert_called_once_with(3)
+    mock_initiator.return_value.stop.assert_not_called()
+
+def test_try_logon_timeout_stops_initiator(config_file, mock_fix_application):
+    client = FIXClient(str(config_file), mock_fix_application, logon_timeout=0.1)
+    mock_fix_application.wait_for_logon.return_value = False
+    with patch('src.fix_client.fix.SocketInitiator') as mock_initiator:
+        assert not client._try_logon("127.0.0.1")
+    mock_initiator.return_value.stop.assert_called_once()
+
+def test_logon_records_connected_host(config_file, mock_fix_application):
+    client = FIXClient(str(config_file), mock_fix_application)
+    client._try_logon = MagicMock(side_effect=[False, True])
+    with patch.object(client, '_get_hosts', return_value=("127.0.0.1", "127.0.0.2")):
+        client.logon()
+    assert client.connected_host == "127.0.0.2"
+
+def test_race_logon_uses_probe_winner(config_file, mock_fix_application):
+    client = FIXClient(str(config_file), mock_fix_application, failover='race')
+    client._try_logon = MagicMock(return_value=True)
+    with patch('src.fix_client.probe_hosts', return_value="127.0.0.2") as probe, \
+            patch.object(client.failover_monitor, 'start') as start_monitor:
+        client.logon()
+    probe.assert_called_once_with(["127.0.0.1", "127.0.0.2"], 5000, 2.0)
+    client._try_logon.assert_called_once_with("127.0.0.2")
+    assert client.connected_host == "127.0.0.2"
+    start_monitor.assert_called_once()
@@ -0,0 +1,79 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from src.gap_tracker import IntervalSet, GapTracker
+
+def test_interval_set_merges_and_splits():
+    s = IntervalSet()
+    s.add(10, 20)
+    s.add(21, 25)
+    s.add(30, 40)
+    assert list(s) == [(10, 25), (30, 40)]
+    assert s.remove(15, 32) == 14
+    assert list(s) == [(10, 14), (33, 40)]
+    assert 12 in s and 20 not in s
+    s.add(5, 50)
+    assert list(s) == [(5, 50)]
+    assert s.total() == 46
+
+def test_request_is_chunked_with_bounded_in_flight():
+    sent = []
+    tracker = GapTracker(lambda b, e: sent.append((b, e)), chunk_size=100, max_in_flight=2)
+    tracker.request(1, 450)
+    assert sent == [(1, 100), (101, 200)]
+    for seq in range(1, 100):
+        tracker.observe(seq)
+    assert len(sent) == 2
+    tracker.observe(100)
+    assert sent[-1] == (201, 300)
+    tracker.fill(101, 200)
+    assert sent[-1] == (301, 400)
+    assert tracker.pending() == 250
+
+def test_open_ended_request_uses_last_seen_seqnum():
+    sent = []
+    tracker = GapTracker(lambda b, e: sent.append((b, e)), chunk_size=1000, max_in_flight=1)
+    tracker.request(1, 0)
+    assert sent == [(1, 0)]
+    tracker.reset(2500)
+    tracker.request(1, 0)
+    assert sent[1:] == [(1, 1000)]
+    assert tracker.pending() == 2499
+
+def test_received_range_completes_on_its_marker():
+    sent = []
+    tracker = GapTracker(lambda b, e: sent.append((b, e)), chunk_size=10, max_in_flight=1)
+    tracker.reset(101)
+    tracker.request(1, 25)
+    # QuickFIX drops the resent copies, so only the marker Heartbeat comes back
+    tracker.observe(101)
+    assert sent == [(1, 10)]
+    tracker.acknowledge("unrelated")
+    tracker.acknowledge(GapTracker.marker(1, 10))
+    assert sent == [(1, 10), (11, 20)] and tracker.pending() == 15
+    tracker.acknowledge(GapTracker.marker(11, 20))
+    tracker.acknowledge(GapTracker.marker(21, 25))
+    assert sent[-1] == (21, 25) and tracker.pending() == 0
+
+def test_live_gaps_are_left_to_quickfix():
+    sent = []
+    tracker = GapTracker(lambda b, e: sent.append((b, e)))
+    tracker.observe(1)
+    tracker.observe(25)
+    assert sent == [] and tracker.next_expected == 26
+
+def test_failed_send_returns_chunk_to_missing():
+    send = MagicMock(side_effect=RuntimeError("not logged on"))
+    tracker = GapTracker(send, chunk_size=10)
+    with pytest.raises(RuntimeError):
+        tracker.request(1, 15)
+    assert tracker.in_flight == []
+    assert list(tracker.missing) == [(1, 15)]
+
+def test_unfilled_chunk_times_out():
+    sent = []
+    tracker = GapTracker(lambda b, e: sent.append((b, e)), chunk_size=10, max_in_flight=1, timeout=5)
+    with patch('src.gap_tracker.time.monotonic', return_value=100.0):
+        tracker.request(1, 20)
+    with patch('src.gap_tracker.time.monotonic', return_value=106.0):
+        tracker.observe(30)
+    assert sent == [(1, 10), (11, 20)]
@@ -0,0 +1,84 @@
+import os
+import logging
+from datetime import datetime
+from src.log_writer import LogWriter
+from src.journal import DatedFileHandler, JournalFile, next_midnight, shared_journal
+
+class FakeClock:
+    def __init__(self, when):
+        self.now = when.timestamp()
+
+    def __call__(self):
+        return self.now
+
+def test_next_midnight():
+    now = datetime(2024, 7, 17, 23, 59, 59).timestamp()
+    assert next_midnight(now) == datetime(2024, 7, 18).timestamp()
+
+def test_dated_journal_rolls_over_at_midnight(tmp_path):
+    clock = FakeClock(datetime(2024, 7, 17, 23, 59))
+    journal = JournalFile(str(tmp_path / "{date}_messages.current.log"), clock=clock)
+    journal.write(b"before\n")
+    clock.now = datetime(2024, 7, 18, 0, 0, 1).timestamp()
+    journal.write(b"after\n")
+    journal.close()
+    assert (tmp_path / "2024-07-17_messages.current.log").read_bytes() == b"before\n"
+    assert (tmp_path / "2024-07-18_messages.current.log").read_bytes() == b"after\n"
+
+def test_size_limit_seals_segment(tmp_path):
+    clock = FakeClock(datetime(2024, 7, 17, 15, 30))
+    path = tmp_path / "communal_messages.current.log"
+    journal = JournalFile(str(path), max_bytes=11, clock=clock)
+    assert journal.write(b"12345\n") == 0
+    assert journal.write(b"6789\n") == 6
+    assert journal.write(b"abc\n") == 0
+    journal.close()
+    assert (tmp_path / "communal_messages.20240717-153000.log").read_bytes() == b"12345\n6789\n"
+    assert path.read_bytes() == b"abc\n"
+
+def test_sealed_names_do_not_collide(tmp_path):
+    clock = FakeClock(datetime(2024, 7, 17, 15, 30))
+    journal = JournalFile(str(tmp_path / "exec.log"), max_bytes=1, clock=clock)
+    for chunk in (b"a", b"b", b"c"):
+        journal.write(chunk)
+    journal.close()
+    assert sorted(os.listdir(tmp_path)) == ["exec.20240717-153000-1.log", "exec.20240717-153000.log", "exec.log"]
+
+def test_reopen_appends(tmp_path):
+    path = str(tmp_path / "x.log")
+    JournalFile(path).close()
+    journal = JournalFile(path)
+    journal.write(b"one\n")
+    journal.close()
+    journal = JournalFile(path)
+    assert journal.size == 4
+    journal.close()
+
+def test_writers_on_one_path_share_the_journal(tmp_path):
+    template = str(tmp_path / "communal.current.log")
+    writers = [LogWriter([shared_journal(template, max_bytes=60)]) for _ in range(3)]
+    assert writers[0].files[0] is writers[2].files[0]
+    for i in range(20):
+        writers[i % 3].write(f"S{i % 3} message {i:02d}\n")
+    for writer in writers[:2]:
+        writer.close()
+    assert not writers[2].files[0].closed
+    writers[2].close()
+    assert writers[2].files[0].closed
+    lines = b''.join(path.read_bytes() for path in sorted(tmp_path.iterdir())).splitlines()
+    assert sorted(lines) == sorted(f"S{i % 3} message {i:02d}".encode() for i in range(20))
+    assert len(os.listdir(tmp_path)) > 1
+    assert shared_journal(template) is not writers[0].files[0]
+
+def test_dated_handler_moves_to_the_next_day(tmp_path):
+    clock = FakeClock(datetime(2024, 7, 17, 23, 59))
+    handler = DatedFileHandler(str(tmp_path / "{date}_fix.log"), clock=clock)
+    logger = logging.getLogger('test_dated_handler')
+    logger.addHandler(handler)
+    logger.warning("before")
+    clock.now = datetime(2024, 7, 18, 0, 0, 1).timestamp()
+    logger.warning("after")
+    logger.removeHandler(handler)
+    handler.close()
+    assert (tmp_path / "2024-07-17_fix.log").read_text() == "before\n"
+    assert (tmp_path / "2024-07-18_fix.log").read_text() == "after\n"
@@ -0,0 +1,95 @@
+import os
+import pytest
+import logging
+from src.journal import JournalFile
+from src.fix_application import FIXApplication
+from src.log_index import LogIndex, rebuild_index, index_path, parse_sending_time, main
+
+def message(seq, exec_id=None, sender="BROKER", target="CLIENT", second=0):
+    fields = [f"8=FIX.4.4", "9=100", "35=8" if exec_id else "35=0", f"34={seq}", f"49={sender}",
+              f"52=20240717-12:00:{second:02d}.000", f"56={target}"]
+    if exec_id:
+        fields.append(f"17={exec_id}")
+    fields.append("10=000")
+    return "\x01".join(fields) + "\x01\n"
+
+@pytest.fixture
+def log_file(tmp_path):
+    lines = [message(i, f"E{i}" if i % 2 else None, second=i // 10) for i in range(1, 101)]
+    lines.append(message(1, sender="CLIENT", target="BROKER", second=59))
+    path = tmp_path / "communal_messages.current.log"
+    path.write_text(''.join(lines))
+    return str(path)
+
+def test_parse_sending_time():
+    assert parse_sending_time(b"19700101-00:00:01.250") == 1250
+    assert parse_sending_time(b"19700102-00:00:00") == 86400000
+    assert parse_sending_time(b"garbage") == 0
+
+def test_rebuild_and_lookups(log_file):
+    assert rebuild_index(log_file) == 101
+    index = LogIndex(log_file)
+    try:
+        found = index.find_seqnums("BROKER", "CLIENT", 10, 12)
+        assert [index.entry(i)[3] for i in found] == [10, 11, 12]
+        assert b"\x0134=11\x01" in index.read(found[1])
+        assert len(index.find_seqnums("CLIENT", "BROKER", 0, 100)) == 1
+        assert [index.read(i) for i in index.find_exec_id("E7")] == [message(7, "E7").rstrip("\n").encode()]
+        assert index.find_exec_id("E8") == []
+        start = parse_sending_time(b"20240717-12:00:01")
+        assert len(index.find_time_range(start, start + 999)) == 10
+    finally:
+        index.close()
+
+def test_applications_sharing_a_directory_index_the_communal_log(tmp_path):
+    applications = [FIXApplication("pw", log_level=logging.WARNING, log_dir=str(tmp_path)) for _ in range(2)]
+    # Two sessions whose SendingTimes interleave out of order in the communal log
+    for i in range(1, 41):
+        sender = "BROKER" if i % 2 else "OTHER"
+        applications[i % 2].log_message_raw(None, raw=message(i, f"E{i}", sender=sender,
+                                                              second=i if i % 2 else 40 - i).rstrip("\n"))
+    for application in applications:
+        application.close()
+    path = os.path.join(tmp_path, "communal_messages.current.log")
+    index = LogIndex(path)
+    try:
+        assert len(index) == 40
+        assert [index.read(i) for i in index.find_exec_id("E2")] == [message(2, "E2", sender="OTHER", second=38)
+                                                                     .rstrip("\n").encode()]
+        start = parse_sending_time(b"20240717-12:00:10")
+        found = index.find_time_range(start, start + 4999)
+        assert list(found) == sorted(found)
+        assert sorted(index.entry(i)[3] for i in found) == [11, 13, 26, 28, 30]
+    finally:
+        index.close()
+
+def test_journal_writes_index(tmp_path):
+    path = str(tmp_path / "messages.current.log")
+    journal = JournalFile(path, index=True)
+    records = [message(1, "A").encode(), message(2, "B").encode()]
+    journal.write(b''.join(records), records)
+    journal.write(records[0], [records[0]])
+    journal.close()
+    with open(index_path(path), 'rb') as f:
+        written = f.read()
+    rebuild_index(path)
+    with open(index_path(path), 'rb') as f:
+        assert f.read() == written
+
+def test_sealed_segment_keeps_its_index(tmp_path):
+    path = str(tmp_path / "messages.current.log")
+    journal = JournalFile(path, max_bytes=10, index=True)
+    record = message(1, "A").encode()
+    journal.write(record, [record])
+    journal.write(record, [record])
+    journal.close()
+    logs = sorted(p.name for p in tmp_path.iterdir())
+    assert len(logs) == 4
+    sealed = next(name for name in logs if name.endswith(".log") and name != "messages.current.log")
+    assert index_path(sealed) in logs
+
+def test_cli_exec_id(log_file, capsysbinary):
+    main(["rebuild", log_file])
+    capsysbinary.readouterr()
+    main(["exec-id", log_file, "E9"])
+    assert capsysbinary.readouterr().out == message(9, "E9").encode()
@@ -0,0 +1,61 @@
+import pytest
+from src.log_parser import LogParser, MessageFilter, MessageView, chunk_boundaries, iter_spans, naive_count, main
+
+MESSAGES = [
+    "8=FIX.4.4\x019=70\x0135=8\x0149=BROKER\x0156=CLIENT\x0134=1\x0117=E1\x0155=PETR4\x0110=000\x01",
+    "8=FIX.4.4\x019=50\x0135=0\x0149=BROKER\x0156=CLIENT\x0134=2\x0110=000\x01",
+    "8=FIX.4.4\x019=70\x0135=8\x0149=OTHER\x0156=CLIENT\x0134=3\x0117=E2\x0155=VALE3\x0110=000\x01",
+    "8=FIX.4.4\x019=70\x0135=80\x0149=BROKER\x0156=CLIENT\x0134=4\x0110=000\x01",
+]
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "communal_messages.current.log"
+    path.write_bytes(''.join(m + '\n' for m in MESSAGES * 50).encode())
+    return str(path)
+
+def test_message_view():
+    buf = ("junk\n" + MESSAGES[0] + "\n").encode()
+    view = MessageView(buf, 5, len(buf) - 1)
+    assert bytes(view[35]) == b"8"
+    assert view.get_str(55) == "PETR4"
+    assert view.get(58) is None
+    assert 17 in view
+    assert view.to_dict()[49] == "BROKER"
+    assert view.raw() == MESSAGES[0].encode()
+
+def test_chunk_boundaries_align_to_newlines():
+    buf = b"aaa\nbbbb\ncc\ndddd\n"
+    chunks = chunk_boundaries(buf, len(buf), 3, min_chunk=1)
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(buf)
+    for start, end in chunks:
+        assert start == 0 or buf[start - 1:start] == b"\n"
+    assert [buf[s:e] for s, e in iter_spans(buf, 0, len(buf))] == [b"aaa", b"bbbb", b"cc", b"dddd"]
+
+def test_filter_does_not_match_prefixes():
+    f = MessageFilter(msg_types=["8"])
+    buf = MESSAGES[3].encode()
+    assert not f.matches(buf, 0, len(buf))
+
+def test_iter_messages_filtered(log_file):
+    parser = LogParser(log_file, workers=1, message_filter=MessageFilter(["8"], ["BROKER"]))
+    exec_ids = [view.get_str(17) for view in parser.iter_messages()]
+    assert exec_ids == ["E1"] * 50
+    assert [len(batch) for batch in parser.iter_view_batches(20)] == [20, 20, 10]
+
+def test_count_matches_naive_baseline(log_file):
+    message_filter = MessageFilter(msg_types=["8"])
+    assert LogParser(log_file, workers=2, message_filter=message_filter).count() == 100
+    assert naive_count(log_file, message_filter) == 100
+
+def test_iter_batches(log_file):
+    parser = LogParser(log_file, workers=1, message_filter=MessageFilter(msg_types=["8"]))
+    batches = list(parser.iter_batches([34, 55]))
+    symbols = [v for batch in batches for v in batch[55]]
+    assert symbols[:2] == [b"PETR4", b"VALE3"]
+    assert len(symbols) == 100
+
+def test_cli_prints_columns(log_file, capsysbinary):
+    main([log_file, "--msg-type", "8", "--tags", "17,55", "--workers", "1"])
+    lines = capsysbinary.readouterr().out.splitlines()
+    assert lines[:2] == [b"E1\tPETR4", b"E2\tVALE3"]
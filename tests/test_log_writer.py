@@ -0,0 +1,98 @@
+import threading
+import pytest
+from unittest.mock import patch
+from src.log_writer import LogWriter, DurabilityPolicy, _STOP
+
+@pytest.fixture
+def log_paths(tmp_path):
+    return [str(tmp_path / "logs" / "session.log"), str(tmp_path / "logs" / "communal.log")]
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+def test_close_drains_all_records(log_paths):
+    writer = LogWriter(log_paths, DurabilityPolicy(flush_every=1000, flush_interval_ms=10000))
+    for i in range(500):
+        writer.write(f"msg{i}\n")
+    writer.close()
+    expected = ''.join(f"msg{i}\n" for i in range(500))
+    assert read(log_paths[0]) == expected
+    assert read(log_paths[1]) == expected
+    assert writer.records_written == 500
+
+def test_records_are_batched_into_group_commits(log_paths):
+    writer = LogWriter(log_paths, DurabilityPolicy(flush_every=100, flush_interval_ms=10000))
+    for i in range(1000):
+        writer.write("x\n")
+    writer.close()
+    assert writer.commits <= 11
+
+def test_flush_interval_commits_without_close(log_paths):
+    writer = LogWriter(log_paths, DurabilityPolicy(flush_every=1000, flush_interval_ms=10))
+    writer.write("hello\n")
+    for _ in range(200):
+        if writer.commits:
+            break
+        threading.Event().wait(0.01)
+    assert read(log_paths[0]) == "hello\n"
+    writer.close()
+
+def test_fsync_on_commit(log_paths):
+    with patch('src.journal.os.fsync') as mock_fsync:
+        writer = LogWriter(log_paths, DurabilityPolicy(fsync=True))
+        writer.write("x\n")
+        writer.close()
+    assert mock_fsync.call_count >= 2
+
+def test_write_blocks_when_queue_is_full(log_paths):
+    writer = LogWriter(log_paths, DurabilityPolicy(queue_size=1))
+    gate = threading.Event()
+    original = writer._write_batch
+    writer._write_batch = lambda data: (gate.wait(), original(data))
+    writer.write("a\n")
+    writer.write("b\n")
+    done = threading.Event()
+    threading.Thread(target=lambda: (writer.write("c\n"), done.set())).start()
+    assert not done.wait(0.1)
+    gate.set()
+    assert done.wait(1)
+    writer.close()
+    assert read(log_paths[0]) == "a\nb\nc\n"
+    assert writer.blocked_writes >= 1
+
+def test_write_after_close_raises(log_paths):
+    writer = LogWriter(log_paths)
+    writer.close()
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.write("x\n")
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        DurabilityPolicy(flush_every=0)
+
+def test_bad_records_do_not_stop_the_writer(log_paths):
+    writer = LogWriter(log_paths, DurabilityPolicy(queue_size=2))
+    writer.write(object())
+    writer.write("after\n")
+    writer.close(timeout=5)
+    assert read(log_paths[0]) == "after\n" and writer.errors == 1
+    assert (writer.records_written, writer.records_dropped) == (1, 1)
+
+def test_close_does_not_hang_on_a_dead_writer(log_paths):
+    writer = LogWriter(log_paths, DurabilityPolicy(queue_size=1))
+    writer._queue.put(_STOP)  # the thread exits as if it had died
+    writer._thread.join()
+    writer._queue.put("stuck\n")
+    writer.write("dropped\n")
+    writer.close(timeout=1)
+    assert writer.errors == 1 and writer.records_dropped == 1
+
+def test_failed_writes_are_counted_as_dropped(log_paths):
+    writer = LogWriter(log_paths)
+    with patch.object(writer.files[1], 'write', side_effect=OSError("disk full")):
+        writer.write("lost\n")
+        writer.close(timeout=5)
+    assert read(log_paths[0]) == "lost\n"  # the other target still took it
+    assert (writer.records_written, writer.records_dropped, writer.bytes_written) == (0, 1, 0)
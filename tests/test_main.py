@@ -22,13 +22,22 @@ class TestLoadClients(unittest.TestCase):
     })
     @patch("configparser.ConfigParser.read", return_value=None)
     @patch("configparser.ConfigParser.__getitem__", return_value={
+        "BeginString": "FIX.4.4",
+        "SenderCompID": "CLIENT",
+        "TargetCompID": "BROKER",
         "RawData": "test_raw_data"
     })
     @patch("src.fix_client.FIXClient.__init__", return_value=None)
-    def test_load_clients(self, mock_init, mock_getitem, mock_read, mock_safe_load, mock_open):
+    @patch("main.FIXApplication")
+    def test_load_clients(self, mock_application, mock_init, mock_getitem, mock_read, mock_safe_load, mock_open):
         clients = load_clients("config.yaml")
         self.assertEqual(len(clients), 2)
         mock_init.assert_called()
+        mock_application.assert_called_with("test_raw_data", durability=unittest.mock.ANY, max_segment_bytes=None,
+                                            log_level=unittest.mock.ANY, data_dictionary=None,
+                                            index_message_logs=True, binary_journal=False, dedup=None,
+                                            offload=None, log_dir="human_readable_logs", report_ring=None,
+                                            metrics=None)
 
     @patch("builtins.open", new_callable=mock_open)
     @patch("yaml.safe_load", side_effect=yaml.YAMLError("Error parsing YAML"))
@@ -0,0 +1,60 @@
+import logging
+from unittest.mock import MagicMock, patch
+import pytest
+from src.fix_dictionary import load_dictionary
+from src.message_format import MessageFormatter, LazyMessage
+from src.fix_application import FIXApplication
+
+RAW = "8=FIX.4.4\x019=102\x0135=8\x0154=1\x0155=PETR4\x0120000=X\x01"
+
+@pytest.fixture(scope="module")
+def dictionary():
+    return load_dictionary("data/FIX44.xml")
+
+def test_dictionary_fields(dictionary):
+    side = dictionary.fields[54]
+    assert side.name == "Side"
+    assert ("1", "BUY") in side.values
+    assert dictionary.tag_names["55"] == "Symbol"
+    assert dictionary.value_names["35"]["8"] == "EXECUTION_REPORT"
+
+def test_load_dictionary_is_cached():
+    assert load_dictionary("data/FIX44.xml") is load_dictionary("data/FIX44.xml")
+
+def test_plain_format():
+    assert MessageFormatter().format(RAW) == "8=FIX.4.4 | 9=102 | 35=8 | 54=1 | 55=PETR4 | 20000=X"
+
+def test_readable_format(dictionary):
+    formatted = MessageFormatter(dictionary).format(RAW)
+    assert formatted == (
+        "BeginString=FIX.4.4 | BodyLength=102 | MsgType=8(EXECUTION_REPORT) | "
+        "Side=1(BUY) | Symbol=PETR4 | 20000=X"
+    )
+
+def test_lazy_message_formats_once():
+    message = MagicMock()
+    message.toString.return_value = RAW
+    lazy = LazyMessage(message, MessageFormatter())
+    message.toString.assert_not_called()
+    assert str(lazy) == str(lazy)
+    message.toString.assert_called_once()
+
+def test_lazy_message_not_formatted_when_level_disabled():
+    message = MagicMock()
+    logger = logging.getLogger("test_message_format")
+    logger.setLevel(logging.INFO)
+    logger.debug("toApp: %s", LazyMessage(message, MessageFormatter()))
+    message.toString.assert_not_called()
+
+def test_application_builds_no_lazy_message_when_level_disabled(tmp_path):
+    application = FIXApplication("pw", log_level=logging.WARNING, log_dir=str(tmp_path))
+    raw = "8=FIX.4.4\x019=5\x0135=0\x0134=2\x0110=000\x01"
+    message = MagicMock()
+    message.toString.return_value = raw
+    message.getHeader.return_value.getField.side_effect = {34: "2", 35: "0"}.get
+    with patch('src.fix_application.LazyMessage') as lazy:
+        application.process_admin(message, raw=raw)
+        application.process_outgoing(message, raw=raw, admin=True)
+        application.process_app(message, raw=raw)
+    application.close()
+    lazy.assert_not_called()
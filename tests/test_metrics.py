@@ -0,0 +1,74 @@
+import random
+import urllib.request
+import quickfix as fix
+from unittest.mock import MagicMock
+from src.metrics import LatencyHistogram, Metrics, MetricsServer
+from src.fix_application import FIXApplication
+
+def test_histogram_quantiles_within_bucket_error():
+    histogram = LatencyHistogram()
+    values = [random.randint(1, 10_000_000) for _ in range(20000)]
+    for value in values:
+        histogram.record(value)
+    values.sort()
+    for q in (0.5, 0.99, 0.999):
+        exact = values[int(q * len(values)) - 1]
+        assert abs(histogram.quantile(q) - exact) <= exact / 16 + 1
+    assert histogram.count == len(values) and histogram.max == values[-1]
+
+def test_bucket_bounds_round_trip():
+    for value in (0, 1, 15, 16, 17, 31, 32, 1000, 123456789):
+        index = LatencyHistogram.bucket(value)
+        assert value <= LatencyHistogram.bucket_upper(index)
+        assert index == 0 or LatencyHistogram.bucket_upper(index - 1) < value
+
+def test_render_prometheus_text():
+    metrics = Metrics()
+    metrics.inc('fix_messages_total', ('FIX.4.4:A->B', 'fromApp', '8'), 3)
+    metrics.observe('fix_callback_latency_seconds', ('FIX.4.4:A->B', 'fromApp'), 2000)
+    text = metrics.render()
+    assert '# TYPE fix_messages_total counter' in text
+    assert 'fix_messages_total{session="FIX.4.4:A->B",callback="fromApp",msg_type="8"} 3' in text
+    assert 'fix_callback_latency_seconds{session="FIX.4.4:A->B",callback="fromApp",quantile="0.99"}' in text
+    assert 'fix_callback_latency_seconds_count{session="FIX.4.4:A->B",callback="fromApp"} 1' in text
+    assert 'fix_log_queue_depth' not in text
+
+def test_application_callbacks_are_counted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "human_readable_logs").mkdir()
+    metrics = Metrics()
+    application = FIXApplication("pw", metrics=metrics)
+    session_id = fix.SessionID("FIX.4.4", "A", "B")
+    heartbeat = fix.Message("8=FIX.4.4\x019=20\x0135=0\x0134=7\x0110=000\x01", False)
+    application.fromAdmin(heartbeat, session_id)
+    application.fromAdmin(heartbeat, session_id)
+
+    client = MagicMock()
+    client.session_id = session_id
+    client.application = application
+    client.gap_tracker.pending.return_value = 0
+    metrics.track_client(client)
+    application.close()
+
+    text = metrics.render()
+    assert 'fix_messages_total{session="FIX.4.4:A->B",callback="fromAdmin",msg_type="0"} 2' in text
+    assert 'fix_log_latency_seconds_count{writer="message"} 2' in text
+    assert 'fix_log_records_written_total{owner="FIX.4.4:A->B",writer="FIXMessageWriter"} 2' in text
+    assert 'fix_session_logged_on{session="FIX.4.4:A->B"} 0' in text
+    merged = metrics.callback_stats('fromAdmin')
+    assert merged.messages == {'0': 2} and merged.count == 2
+
+    metrics.forget(client)
+    assert 'fix_session_logged_on' not in metrics.render()
+
+def test_metrics_server():
+    metrics = Metrics()
+    metrics.inc('fix_messages_sent_total', ('FIX.4.4:A->B', '2'))
+    server = MetricsServer(metrics, port=0)
+    server.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+            assert response.headers['Content-Type'].startswith('text/plain')
+            assert b'fix_messages_sent_total{session="FIX.4.4:A->B",msg_type="2"} 1' in response.read()
+    finally:
+        server.stop()
@@ -0,0 +1,109 @@
+import logging
+import threading
+import quickfix as fix
+import pytest
+from src.binary_journal import INCOMING, OUTGOING
+from src.fix_application import FIXApplication
+from src.metrics import Metrics
+from src.offload import MessagePipeline, OffloadPolicy
+
+SOH = "\x01"
+
+def raw(msg_type, seqnum, **fields):
+    body = f"35={msg_type}{SOH}34={seqnum}{SOH}49=BROKER{SOH}52=20240717-10:00:00.000{SOH}56=CLIENT{SOH}"
+    body += "".join(f"{tag}={value}{SOH}" for tag, value in fields.items())
+    return f"8=FIX.4.4{SOH}9={len(body)}{SOH}{body}10=000{SOH}"
+
+def test_policy_validation():
+    with pytest.raises(ValueError):
+        OffloadPolicy(workers=0)
+    with pytest.raises(ValueError):
+        OffloadPolicy(backpressure='drop')
+
+def test_per_session_order_across_workers():
+    seen = {}
+    lock = threading.Lock()
+    def handler(message, session, direction, enqueued_ns):
+        with lock:
+            seen.setdefault(session, []).append(int(message))
+    metrics = Metrics()
+    pipeline = MessagePipeline(handler, OffloadPolicy(workers=3, queue_size=8), metrics=metrics)
+    sessions = [f"FIX.4.4:CLIENT{i}->BROKER" for i in range(6)]
+    for n in range(500):
+        for session in sessions:
+            pipeline.submit(session, str(n), INCOMING)
+    assert pipeline.drain(10)
+    pipeline.close()
+    assert seen == {session: list(range(500)) for session in sessions}
+    stats = pipeline.stats()
+    assert stats['processed'] == 3000 and stats['workers'] == 3
+    assert metrics.histogram('fix_offload_lag_seconds', (sessions[0],)).count == 500
+    with pytest.raises(RuntimeError):
+        pipeline.submit(sessions[0], "late", INCOMING)
+
+def test_block_waits_for_the_worker():
+    started, release = threading.Event(), threading.Event()
+    def handler(*args):
+        started.set()
+        release.wait(10)
+    pipeline = MessagePipeline(handler, OffloadPolicy(workers=1, queue_size=2))
+    pipeline.submit("S", "0", INCOMING)
+    assert started.wait(10)
+    pipeline.submit("S", "1", INCOMING)
+    pipeline.submit("S", "2", INCOMING)
+    blocked = threading.Thread(target=pipeline.submit, args=("S", "3", INCOMING))
+    blocked.start()
+    blocked.join(0.2)
+    assert blocked.is_alive() and pipeline.stats()['blocked'] == 1
+    release.set()
+    blocked.join(10)
+    pipeline.close()
+    assert pipeline.stats()['processed'] == 4
+
+def test_spill_keeps_order(tmp_path):
+    release = threading.Event()
+    seen = []
+    def handler(message, session, direction, enqueued_ns):
+        release.wait(10)
+        seen.append((message, direction))
+    policy = OffloadPolicy(workers=1, queue_size=4, backpressure='spill', spill_dir=str(tmp_path))
+    pipeline = MessagePipeline(handler, policy)
+    expected = [(f"m{n}", OUTGOING if n % 2 else INCOMING) for n in range(100)]
+    for message, direction in expected:
+        pipeline.submit("FIX.4.4:CLIENT->BROKER", message, direction)
+    assert pipeline.stats()['spilled'] >= 90
+    release.set()
+    assert pipeline.drain(10)
+    assert seen == expected
+    # The shard spills again once the worker falls behind a second time
+    release.clear()
+    pipeline.submit("FIX.4.4:CLIENT->BROKER", "x", INCOMING)
+    for n in range(6):
+        pipeline.submit("FIX.4.4:CLIENT->BROKER", f"y{n}", INCOMING)
+    release.set()
+    assert pipeline.drain(10)
+    pipeline.close()
+    assert [message for message, _ in seen[100:]] == ["x"] + [f"y{n}" for n in range(6)]
+    assert list(tmp_path.iterdir()) == []
+
+def test_application_offloads_callbacks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    application = FIXApplication("pw", log_level=logging.WARNING, offload=OffloadPolicy(workers=2))
+    handled = []
+    application.dispatcher.subscribe(fix.MsgType_ExecutionReport,
+                                     lambda fields, message, sessionID: handled.append(
+                                         (threading.current_thread().name, sessionID.toString())), [11])
+    session = fix.SessionID("FIX.4.4", "CLIENT", "BROKER")
+    application.fromAdmin(fix.Message(raw("0", 1), False), session)
+    for seqnum, status in ((2, "0"), (3, "1"), (4, "2")):
+        report = raw("8", seqnum, **{"6": "10", "11": "C1", "14": "100" if status == "2" else "0", "17": f"E{seqnum}",
+                                     "37": "O1", "38": "100", "39": status, "54": "1", "55": "PETR4", "150": status,
+                                     "151": "0" if status == "2" else "100"})
+        application.fromApp(fix.Message(report, False), session)
+    assert application.pipeline.drain(10)
+    assert application.orders.get("C1").status == "2"
+    assert {name for name, _ in handled} <= {"offload-0", "offload-1"}
+    assert {sid for _, sid in handled} == {"FIX.4.4:CLIENT->BROKER"}
+    application.close()
+    with open(tmp_path / "human_readable_logs" / "communal_messages.current.log") as f:
+        assert [line.split(SOH)[3] for line in f] == ["34=1", "34=2", "34=3", "34=4"]
@@ -0,0 +1,71 @@
+import quickfix as fix
+import quickfix44 as fix44
+from src.order_store import OrderStore
+
+SOH = "\x01"
+
+def report(**fields):
+    tags = {"cl_ord_id": 11, "order_id": 37, "orig": 41, "exec_id": 17, "symbol": 55, "side": 54,
+            "qty": 38, "cum": 14, "avg": 6, "leaves": 151, "last_qty": 32, "last_px": 31, "status": 39}
+    return {tags[name]: str(value) for name, value in fields.items()}.get
+
+def test_fills_update_state_and_indexes():
+    store = OrderStore()
+    store.apply(report(cl_ord_id="C1", order_id="O1", exec_id="E1", symbol="PETR4", side=1, qty=300,
+                       cum=0, avg=0, leaves=300, status=0))
+    store.apply(report(cl_ord_id="C1", order_id="O1", exec_id="E2", symbol="PETR4", side=1, qty=300,
+                       cum=100, avg=10.5, leaves=200, status=1))
+    order = store.get("C1")
+    assert store.by_order_id("O1") is order
+    assert (order.cum_qty, order.avg_px, order.leaves_qty, order.status_name) == (100, 10.5, 200, "PARTIALLY_FILLED")
+    assert store.by_status("1") == [order]
+    assert store.by_status("0") == []
+    assert store.by_symbol("PETR4") == [order]
+    assert store.open_orders() == [order]
+
+    store.apply(report(cl_ord_id="C1", order_id="O1", exec_id="E3", cum=300, avg=10.6, leaves=0, status=2))
+    assert order.status_name == "FILLED" and order.symbol == "PETR4"
+    assert store.open_orders() == []
+    assert len(store) == 1
+
+def test_duplicate_exec_id_is_ignored():
+    store = OrderStore()
+    fill = report(cl_ord_id="C1", order_id="O1", exec_id="E1", last_qty=100, last_px=10, status=1)
+    store.apply(fill)
+    store.apply(fill)
+    assert store.get("C1").cum_qty == 100
+    assert store.reports_applied == 1
+
+def test_accumulates_fills_without_cum_qty():
+    store = OrderStore()
+    store.apply(report(cl_ord_id="C1", exec_id="E1", qty=200, last_qty=100, last_px=10, status=1))
+    store.apply(report(cl_ord_id="C1", exec_id="E2", last_qty=100, last_px=12, status=2))
+    order = store.get("C1")
+    assert (order.cum_qty, order.avg_px, order.leaves_qty) == (200, 11, 0)
+
+def test_replace_moves_order_to_new_cl_ord_id():
+    store = OrderStore()
+    store.apply(report(cl_ord_id="C1", order_id="O1", exec_id="E1", symbol="VALE3", qty=100, status=0))
+    store.apply(report(cl_ord_id="C2", orig="C1", order_id="O1", exec_id="E2", qty=150, status=5))
+    assert store.get("C1") is None
+    assert store.get("C2").order_qty == 150
+    assert len(store) == 1
+
+def test_apply_message():
+    store = OrderStore()
+    message = fix44.ExecutionReport()
+    for field in (fix.ClOrdID("C1"), fix.OrderID("O1"), fix.ExecID("E1"), fix.Symbol("ITUB4"),
+                  fix.CumQty(50), fix.AvgPx(20.25), fix.LeavesQty(50), fix.OrdStatus("1")):
+        message.setField(field)
+    order = store.apply_message(message)
+    assert (order.symbol, order.cum_qty, order.avg_px) == ("ITUB4", 50, 20.25)
+
+def test_load_from_log(tmp_path):
+    def raw(exec_id, cum):
+        body = f"35=8{SOH}49=BROKER{SOH}11=C1{SOH}37=O1{SOH}17={exec_id}{SOH}55=BBAS3{SOH}14={cum}{SOH}39=1{SOH}"
+        return f"8=FIX.4.4{SOH}9={len(body)}{SOH}{body}10=000{SOH}\n"
+    path = tmp_path / "messages.log"
+    path.write_text(raw("E1", 10) + raw("E2", 30))
+    store = OrderStore()
+    assert store.load(str(path), workers=1) == 2
+    assert store.get("C1").cum_qty == 30
@@ -0,0 +1,67 @@
+import pytest
+import quickfix as fix
+import quickfix44 as fix44
+from src.positions import PositionEngine
+
+SOH = "\x01"
+
+def raw_fill(symbol, side, qty, px, account="ACC1", exec_type="F"):
+    body = (f"35=8{SOH}49=BROKER{SOH}1={account}{SOH}150={exec_type}{SOH}54={side}{SOH}"
+            f"55={symbol}{SOH}32={qty}{SOH}31={px}{SOH}")
+    return f"8=FIX.4.4{SOH}9={len(body)}{SOH}{body}10=000{SOH}\n"
+
+def test_position_and_pnl_across_micro_batches():
+    engine = PositionEngine(batch_size=2)
+    engine.add_fill("PETR4", "1", 100, 10.0, "ACC1")
+    engine.add_fill("PETR4", "1", 100, 12.0, "ACC1")
+    engine.add_fill("PETR4", "2", 150, 13.0, "ACC1")
+    row = engine.position("PETR4", "ACC1")
+    assert row["net_qty"] == 50
+    assert row["gross_value"] == pytest.approx(100 * 10 + 100 * 12 + 150 * 13)
+    assert row["vwap"] == pytest.approx(row["gross_value"] / 350)
+    assert row["realized_pnl"] == pytest.approx(150 * (13.0 - 11.0))
+
+def test_accounts_kept_apart_unless_by_symbol():
+    fills = [("VALE3", "1", 10, 60.0, "A"), ("VALE3", "2", 4, 61.0, "B")]
+    per_account = PositionEngine()
+    per_symbol = PositionEngine(by_account=False)
+    for fill in fills:
+        per_account.add_fill(*fill)
+        per_symbol.add_fill(*fill)
+    assert [(r["account"], r["net_qty"]) for r in per_account.positions()] == [("A", 10), ("B", -4)]
+    assert [(r["account"], r["net_qty"]) for r in per_symbol.positions()] == [(None, 6)]
+
+def test_trade_cancel_reverses_fill():
+    engine = PositionEngine()
+    for exec_type in ("F", "H"):
+        message = fix44.ExecutionReport()
+        for field in (fix.ExecType(exec_type), fix.Side("1"), fix.Symbol("ITUB4"),
+                      fix.LastQty(100), fix.LastPx(30.0)):
+            message.setField(field)
+        assert engine.add_message(message)
+    row = engine.position("ITUB4")
+    assert row["net_qty"] == 0 and row["gross_value"] == 0
+
+def test_new_order_report_is_not_a_fill():
+    message = fix44.ExecutionReport()
+    message.setField(fix.ExecType("0"))
+    message.setField(fix.LastQty(0))
+    assert not PositionEngine().add_message(message)
+
+def test_from_log_matches_live_engine(tmp_path):
+    fills = [("PETR4", "1", 100, 10.0), ("PETR4", "2", 60, 11.0), ("BBAS3", "5", 10, 50.0)]
+    path = tmp_path / "messages.log"
+    path.write_text("".join(raw_fill(*fill) for fill in fills)
+                    + raw_fill("PETR4", "1", 0, 0, exec_type="0")
+                    + raw_fill("BBAS3", "5", 10, 50.0, exec_type="H"))
+    live = PositionEngine(batch_size=1)
+    for fill in fills:
+        live.add_fill(*fill, account="ACC1")
+    live.add_fill("BBAS3", "5", 10, 50.0, "ACC1", reverse=True)
+
+    replayed = PositionEngine.from_log(str(path), workers=1)
+    assert replayed.fills == 4
+    for expected, actual in zip(live.positions(), replayed.positions()):
+        assert expected.keys() == actual.keys()
+        for name, value in expected.items():
+            assert actual[name] == (pytest.approx(value) if isinstance(value, float) else value)
@@ -0,0 +1,81 @@
+import os
+import time
+import logging
+import pytest
+import quickfix as fix
+from src.replay import ReplayEngine
+from src.fix_application import FIXApplication
+
+SOH = "\x01"
+
+def raw(msg_type, seq, sending_time="20240717-10:00:00.000", **fields):
+    body = f"35={msg_type}{SOH}34={seq}{SOH}49=BROKER{SOH}52={sending_time}{SOH}56=CLIENT{SOH}"
+    body += "".join(f"{tag}={value}{SOH}" for tag, value in fields.items())
+    return f"8=FIX.4.4{SOH}9={len(body)}{SOH}{body}10=000{SOH}\n"
+
+def fill(seq, exec_id, qty, cum_qty, status, sending_time="20240717-10:00:00.000"):
+    return raw("8", seq, sending_time, **{"1": "ACC1", "6": "10", "11": "C1", "14": cum_qty, "17": exec_id,
+                                          "31": "10", "32": qty, "37": "O1", "38": "100", "39": status,
+                                          "54": "1", "55": "PETR4", "150": "F", "151": 100 - cum_qty})
+
+class Recorder(fix.Application):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def fromAdmin(self, message, sessionID):
+        self.calls.append(("admin", message.getHeader().getField(35), sessionID.toString()))
+
+    def fromApp(self, message, sessionID):
+        self.calls.append(("app", message.getHeader().getField(35), sessionID.toString()))
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "messages.log"
+    path.write_text(raw("A", 1) + fill(2, "E1", 40, 40, "1") + raw("0", 3) + fill(4, "E2", 60, 100, "2"))
+    return str(path)
+
+def test_dispatches_admin_and_app_as_incoming(log):
+    recorder = Recorder()
+    stats = ReplayEngine(log).replay(recorder)
+    assert (stats.messages, stats.admin, stats.app, stats.errors) == (4, 2, 2, 0)
+    assert [call[:2] for call in recorder.calls] == [("admin", "A"), ("app", "8"), ("admin", "0"), ("app", "8")]
+    assert recorder.calls[0][2] == "FIX.4.4:CLIENT->BROKER"
+
+def test_msg_type_filter_and_limit(log):
+    recorder = Recorder()
+    ReplayEngine(log, msg_types=["8"]).replay(recorder, limit=1)
+    assert [call[:2] for call in recorder.calls] == [("app", "8")]
+
+def test_replay_rebuilds_application_state_without_relogging(log, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    application = FIXApplication("pw", log_level=logging.WARNING)
+    ReplayEngine(log).replay(application)
+    application.close()
+    order = application.orders.get("C1")
+    assert order.cum_qty == 100 and order.status == "2"
+    assert application.positions.position("PETR4", "ACC1")["net_qty"] == 100
+    assert not application.replaying
+    logs = tmp_path / "human_readable_logs"
+    assert os.path.getsize(logs / "communal_messages.current.log") == 0
+    assert os.path.getsize(logs / "communal_execution_reports.log") == 0
+
+def test_rebuild_fast_path_matches_callbacks(log, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    replayed, rebuilt = FIXApplication("pw", log_level=logging.WARNING), FIXApplication("pw", log_level=logging.WARNING)
+    ReplayEngine(log).replay(replayed)
+    stats = ReplayEngine(log).rebuild(rebuilt)
+    replayed.close()
+    rebuilt.close()
+    assert stats.messages == 2
+    assert rebuilt.orders.get("C1").to_dict() == replayed.orders.get("C1").to_dict()
+    assert rebuilt.positions.positions() == replayed.positions.positions()
+
+def test_original_timing_is_scaled_by_speed(tmp_path):
+    path = tmp_path / "timed.log"
+    path.write_text(raw("0", 1, "20240717-10:00:00.000") + raw("0", 2, "20240717-10:00:00.400"))
+    started = time.perf_counter()
+    ReplayEngine(str(path), speed=2.0).replay(Recorder())
+    assert 0.18 <= time.perf_counter() - started < 1.0
+    with pytest.raises(ValueError):
+        ReplayEngine(str(path), speed=0)
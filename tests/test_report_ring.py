@@ -0,0 +1,113 @@
+import os
+import math
+import logging
+import multiprocessing
+import quickfix as fix
+import pytest
+import numpy as np
+from src.fix_application import FIXApplication
+from src.report_ring import RingConsumer, RingPublisher, to_dict, unlink
+
+SOH = "\x01"
+FILL = {55: "PETR4", 54: "1", 150: "F", 39: "1", 17: "E1", 11: "C1", 37: "O1", 32: "100", 31: "10.5", 14: "100",
+        151: "200", 38: "300", 60: "20240717-10:00:00.000"}
+
+@pytest.fixture
+def ring_name():
+    name = f"test_ring_{os.getpid()}"
+    yield name
+    unlink(name)
+
+def consume(name, last, results):
+    consumer = RingConsumer(name, 'earliest')
+    seen = []
+    while (not seen or seen[-1] != last) and consumer.wait(10):
+        seen.extend(consumer.read()['exec_id'].tolist())
+    consumer.close()
+    results.put(seen)
+
+def test_publish_and_read_in_place(ring_name):
+    publisher = RingPublisher(ring_name, 8)
+    consumer = RingConsumer(ring_name)
+    assert consumer.poll().size == 0 and not consumer.wait(0)
+    assert publisher.publish(FILL.get, "FIX.4.4:CLIENT->BROKER", timestamp_ns=123) == 1
+    view = consumer.poll()
+    record = to_dict(view[0])
+    assert record['seq'] == 1 and record['timestamp_ns'] == 123 and record['session'] == "FIX.4.4:CLIENT->BROKER"
+    assert (record['symbol'], record['side'], record['exec_type'], record['transact_time']) == \
+        ("PETR4", "1", "F", "20240717-10:00:00.000")
+    assert (record['last_qty'], record['last_px'], record['leaves_qty']) == (100.0, 10.5, 200.0)
+    assert math.isnan(record['avg_px']) and record['account'] == ""
+    del view
+    consumer.close()
+    publisher.close()
+
+def test_lapped_consumer_skips_to_oldest_and_publisher_resumes(ring_name):
+    publisher = RingPublisher(ring_name, 8)
+    consumer = RingConsumer(ring_name, 'earliest')
+    for i in range(20):
+        publisher.publish({**FILL, 17: f"E{i}"}.get)
+    records = consumer.read()
+    assert records['seq'].tolist() == list(range(13, 21)) and consumer.lost == 12
+    assert records['exec_id'].tolist()[-1] == b"E19"
+    publisher.close()
+    with pytest.raises(ValueError):
+        RingPublisher(ring_name, 16)
+    publisher = RingPublisher(ring_name, 8)
+    assert publisher.publish(FILL.get) == 21 and consumer.read()['seq'].tolist() == [21]
+    consumer.close()
+    publisher.close()
+
+def test_read_drops_a_record_overwritten_after_its_copy(ring_name):
+    publisher = RingPublisher(ring_name, 8)
+    consumer = RingConsumer(ring_name, 'earliest')
+    for i in range(4):
+        publisher.publish({**FILL, 17: f"E{i}"}.get)
+
+    class OverwrittenAfterCopy(np.ndarray):
+        def copy(self, *args, **kwargs):
+            copied = np.asarray(self).copy(*args, **kwargs)
+            for i in range(4, 9):  # seq 9 lands in the first slot, which was just copied intact
+                publisher.publish({**FILL, 17: f"E{i}"}.get)
+            return copied
+
+    records = consumer.records
+    consumer.records = records.view(OverwrittenAfterCopy)
+    assert consumer.read()['seq'].tolist() == [2, 3, 4] and consumer.lost == 1
+    consumer.records = records
+    assert consumer.read()['seq'].tolist() == [5, 6, 7, 8, 9]
+    del records
+    consumer.close()
+    publisher.close()
+
+def test_consumer_in_another_process(ring_name):
+    publisher = RingPublisher(ring_name, 64)
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=consume, args=(ring_name, b"E199", results))
+    process.start()
+    for i in range(200):
+        publisher.publish({**FILL, 17: f"E{i}"}.get)
+        if i % 50 == 0:
+            process.join(0.05)  # let the consumer keep up with the 64 slots
+    seen = results.get(timeout=30)
+    process.join(10)
+    publisher.close()
+    assert seen[-1] == b"E199" and len(set(seen)) == len(seen)
+
+def test_application_publishes_execution_reports(ring_name, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    publisher = RingPublisher(ring_name, 8)
+    consumer = RingConsumer(ring_name)
+    application = FIXApplication("pw", log_level=logging.WARNING, report_ring=publisher)
+    body = f"35=8{SOH}34=2{SOH}49=BROKER{SOH}52=20240717-10:00:00.000{SOH}56=CLIENT{SOH}" + \
+        "".join(f"{tag}={value}{SOH}" for tag, value in FILL.items())
+    message = fix.Message(f"8=FIX.4.4{SOH}9={len(body)}{SOH}{body}10=000{SOH}", False)
+    application.fromApp(message, fix.SessionID("FIX.4.4", "CLIENT", "BROKER"))
+    application.replaying = True
+    application.fromApp(message, fix.SessionID("FIX.4.4", "CLIENT", "BROKER"))
+    application.close()
+    records = consumer.read()
+    assert records['cl_ord_id'].tolist() == [b"C1"] and records['session'].tolist() == [b"FIX.4.4:CLIENT->BROKER"]
+    consumer.close()
+    publisher.close()
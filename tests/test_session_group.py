@@ -0,0 +1,73 @@
+import pytest
+import quickfix as fix
+from unittest.mock import MagicMock
+from src.session_group import SessionGroup, MultiSessionApplication
+
+CONFIG = """
+[DEFAULT]
+ConnectionType=initiator
+ReconnectInterval=60
+FileStorePath={tmp}/store
+FileLogPath={tmp}/log
+StartTime=00:00:00
+EndTime=00:00:00
+HeartBtInt=30
+UseDataDictionary=N
+
+[SESSION]
+BeginString=FIX.4.4
+SenderCompID={sender}
+TargetCompID=BROKER
+RawData={raw_data}
+SocketConnectPort=1
+SocketConnectHostPrimary=127.0.0.1
+SocketConnectHostSecondary=127.0.0.2
+"""
+
+@pytest.fixture
+def group(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    group = SessionGroup(MultiSessionApplication())
+    for sender, raw_data in (("CLIENT1", "pw1"), ("CLIENT2", "pw2")):
+        path = tmp_path / f"{sender}.cfg"
+        path.write_text(CONFIG.format(tmp=tmp_path, sender=sender, raw_data=raw_data))
+        group.add_client(str(path), raw_data, logon_timeout=0.2)
+    yield group
+    group.application.close()
+
+def test_sessions_share_one_settings_object(group):
+    assert group.settings.size() == 2
+    first = group.settings.get(group.clients[0].session_id)
+    assert first.getString("SocketConnectHost") == "127.0.0.1"
+    assert first.getString("SocketConnectHost1") == "127.0.0.2"
+    assert first.getString("SocketConnectPort1") == "1"
+    assert first.getInt("ResendRequestChunkSize") == 1000
+
+def test_callbacks_dispatch_on_session_id(group):
+    app = group.application
+    first, second = (client.session_id for client in group.clients)
+    logon = fix.Message()
+    logon.getHeader().setField(fix.MsgType(fix.MsgType_Logon))
+    app.toAdmin(logon, second)
+    assert logon.getField(fix.RawData().getField()) == "pw2"
+
+    app.onLogon(first)
+    assert app.wait_for_logon(0, first)
+    assert not app.wait_for_logon(0, second)
+
+    app.contexts[second.toString()].gap_tracker = MagicMock()
+    heartbeat = fix.Message("8=FIX.4.4\x019=20\x0135=0\x0134=7\x0110=000\x01", False)
+    app.fromAdmin(heartbeat, second)
+    app.contexts[second.toString()].gap_tracker.observe.assert_called_once_with(7)
+
+def test_logon_timeout_and_release(group):
+    with pytest.raises(RuntimeError, match="Logon timed out"):
+        group.clients[0].logon()
+    initiator = group.initiator
+    assert initiator is not None
+    group.start()
+    assert group.initiator is initiator
+    group.clients[0].logout()
+    assert group.initiator is initiator
+    group.clients[1].logout()
+    assert group.initiator is None
@@ -0,0 +1,90 @@
+import pytest
+import yaml
+from src.session_registry import SessionProfile, SessionRegistry
+
+CONFIG = """
+[DEFAULT]
+HeartBtInt=30
+
+[SESSION]
+BeginString=FIX.4.4
+SenderCompID={sender}
+TargetCompID=BROKER
+RawData={raw_data}
+SocketConnectPort=5000
+SocketConnectHostPrimary=127.0.0.1
+SocketConnectHostSecondary=127.0.0.2
+"""
+
+def write_cfg(tmp_path, sender, raw_data="pw"):
+    path = tmp_path / f"{sender}.cfg"
+    path.write_text(CONFIG.format(sender=sender, raw_data=raw_data))
+    return str(path)
+
+@pytest.fixture
+def registry(tmp_path):
+    events = []
+    registry = SessionRegistry(
+        str(tmp_path / "config.yaml"),
+        on_add=lambda profile: events.append(("add", profile.sender_comp_id)),
+        on_remove=lambda profile: events.append(("remove", profile.sender_comp_id)),
+        client_options={"logon_timeout": 10.0},
+    )
+    registry.events = events
+    return registry
+
+def test_profile_is_precomputed_and_immutable(tmp_path):
+    profile = SessionProfile.from_config(write_cfg(tmp_path, "CLIENT1", "secret"))
+    assert profile.session_id.toString() == "FIX.4.4:CLIENT1->BROKER"
+    assert (profile.primary_host, profile.secondary_host, profile.port) == ("127.0.0.1", "127.0.0.2", 5000)
+    assert profile.raw_data == "secret"
+    assert profile.heartbeat_interval == 30
+    with pytest.raises(AttributeError):
+        profile.raw_data = "other"
+    assert profile == SessionProfile.from_config(profile.config_file)
+
+def test_sync_adds_removes_and_keeps_untouched_sessions(tmp_path, registry):
+    first, second = write_cfg(tmp_path, "CLIENT1"), write_cfg(tmp_path, "CLIENT2")
+    assert registry.sync({"sessions": [{"config_file": first}]}) == (1, 0)
+    live = registry.profiles[first]
+
+    assert registry.sync({"sessions": [{"config_file": first}, {"config_file": second}]}) == (1, 0)
+    assert registry.profiles[first] is live
+    assert registry.sync({"sessions": [{"config_file": second}]}) == (0, 1)
+    assert registry.events == [("add", "CLIENT1"), ("add", "CLIENT2"), ("remove", "CLIENT1")]
+
+def test_changed_session_is_replaced(tmp_path, registry):
+    path = write_cfg(tmp_path, "CLIENT1", "old")
+    registry.sync({"sessions": [{"config_file": path}]})
+    write_cfg(tmp_path, "CLIENT1", "new")
+    assert registry.sync({"sessions": [{"config_file": path, "logon_timeout": 5}]}) == (1, 1)
+    profile = registry.profiles[path]
+    assert profile.raw_data == "new"
+    assert profile.options["logon_timeout"] == 5
+
+def test_broken_cfg_keeps_live_session(tmp_path, registry):
+    path = write_cfg(tmp_path, "CLIENT1")
+    registry.sync({"sessions": [{"config_file": path}]})
+    (tmp_path / "CLIENT1.cfg").write_text("[SESSION]\nBeginString=FIX.4.4\n")
+    assert registry.sync({"sessions": [{"config_file": path}]}) == (0, 0)
+    assert registry.profiles[path].sender_comp_id == "CLIENT1"
+
+def test_reload_reads_config_file(tmp_path, registry):
+    path = write_cfg(tmp_path, "CLIENT1")
+    (tmp_path / "config.yaml").write_text(yaml.safe_dump({"sessions": [{"config_file": path}]}))
+    assert registry.reload() == (1, 0)
+    (tmp_path / "config.yaml").write_text("sessions: [")
+    assert registry.reload() == (0, 0)
+    assert list(registry.profiles) == [path]
+
+def test_frozen_registry_defers_new_and_changed_sessions(tmp_path, registry):
+    first, second = write_cfg(tmp_path, "CLIENT1", "old"), write_cfg(tmp_path, "CLIENT2")
+    registry.sync({"sessions": [{"config_file": first}]})
+    live = registry.profiles[first]
+    registry.frozen = lambda: True
+    write_cfg(tmp_path, "CLIENT1", "new")
+    assert registry.sync({"sessions": [{"config_file": first}, {"config_file": second}]}) == (0, 0)
+    assert registry.profiles == {first: live}
+    assert registry.deferred[first].raw_data == "new" and list(registry.deferred) == [first, second]
+    assert registry.sync({"sessions": []}) == (0, 1)
+    assert registry.deferred == {} and registry.events == [("add", "CLIENT1"), ("remove", "CLIENT1")]
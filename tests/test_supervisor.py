@@ -0,0 +1,93 @@
+import os
+import time
+import logging
+import quickfix as fix
+from src.fix_application import FIXApplication
+from src.supervisor import Supervisor, shard_configs
+
+SOH = "\x01"
+REPORTS = 50
+
+def report(sender, seqnum):
+    body = (f"35=8{SOH}34={seqnum}{SOH}49=BROKER{SOH}52=20240717-10:00:00.000{SOH}56={sender}{SOH}"
+            f"6=10{SOH}11={sender}-{seqnum}{SOH}14=100{SOH}17={sender}-E{seqnum}{SOH}31=10{SOH}32=100{SOH}"
+            f"37={sender}-O{seqnum}{SOH}38=100{SOH}39=2{SOH}54=1{SOH}55=PETR4{SOH}150=F{SOH}151=0{SOH}")
+    return f"8=FIX.4.4{SOH}9={len(body)}{SOH}{body}10=000{SOH}"
+
+class FakeClient:
+    def __init__(self, entry: dict, log_dir: str):
+        self.sender = entry['config_file']
+        self.crash_marker = entry.get('crash_marker')
+        self.crash_after_reports = entry.get('crash_after_reports')
+        self.session_id = fix.SessionID("FIX.4.4", self.sender, "BROKER")
+        self.application = FIXApplication("pw", log_level=logging.WARNING, log_dir=log_dir)
+
+    def logon(self):
+        if self.crash_marker and not os.path.exists(self.crash_marker):
+            open(self.crash_marker, 'w').close()
+            os._exit(3)
+        self.application.logged_on.set()
+        for seqnum in range(1, REPORTS + 1):
+            self.application.fromApp(fix.Message(report(self.sender, seqnum), False), self.session_id)
+        if self.crash_after_reports and not os.path.exists(self.crash_after_reports):
+            open(self.crash_after_reports, 'w').close()
+            os._exit(3)  # before the shard's main loop sends the batch
+
+    def logout(self):
+        self.application.close()
+
+def build_fake_clients(config_path, config):
+    log_dir = config['human_readable_log']['directory']
+    return [FakeClient(entry, log_dir) for entry in config['sessions']]
+
+def test_shard_configs_split_sessions_and_logs():
+    config = {'sessions': [{'config_file': f"c{i}.cfg"} for i in range(5)], 'reload': {'watch': True},
+              'metrics': {'enabled': True}, 'human_readable_log': {'level': 'INFO'},
+              'report_ring': {'enabled': True, 'name': 'reports'}}
+    shards = shard_configs(config, 2)
+    assert [[s['config_file'] for s in shard['sessions']] for shard in shards] == \
+        [["c0.cfg", "c2.cfg", "c4.cfg"], ["c1.cfg", "c3.cfg"]]
+    assert shards[1]['human_readable_log'] == {'level': 'INFO',
+                                               'directory': os.path.join('human_readable_logs', 'shard-1')}
+    assert 'reload' not in shards[0] and 'metrics' not in shards[0]
+    assert [shard['report_ring']['name'] for shard in shards] == ["reports-shard-0", "reports-shard-1"]
+    assert len(shard_configs(config, 8)) == 5 and config['human_readable_log'] == {'level': 'INFO'}
+
+def test_supervisor_streams_reports_and_restarts_crashed_shard(tmp_path):
+    config = {
+        'sessions': [{'config_file': "A", 'crash_marker': str(tmp_path / "crashed")}, {'config_file': "B"}],
+        'human_readable_log': {'directory': str(tmp_path)},
+    }
+    batches = []
+    supervisor = Supervisor("config.yaml", config, build_fake_clients, workers=2, heartbeat_interval=0.1,
+                            restart_delay=0.1, on_reports=lambda shard, batch: batches.append((shard, len(batch))))
+    supervisor.start()
+    try:
+        deadline = time.monotonic() + 60
+        while supervisor.reports < 2 * REPORTS and time.monotonic() < deadline:
+            time.sleep(0.1)
+    finally:
+        supervisor.stop()
+    stats = supervisor.stats()
+    assert [shard['restarts'] for shard in stats] == [1, 0]
+    assert [shard['reports'] for shard in stats] == [REPORTS, REPORTS]
+    assert [shard['lost_reports'] for shard in stats] == [0, 0]
+    assert sum(size for _, size in batches) == 2 * REPORTS
+    assert len(supervisor.orders) == 2 * REPORTS and supervisor.orders.get("A-1").status == "2"
+    assert sorted(os.listdir(tmp_path)) == ["crashed", "shard-0", "shard-1"]
+
+def test_reports_unsent_by_a_crashed_shard_are_counted(tmp_path):
+    config = {'sessions': [{'config_file': "A", 'crash_after_reports': str(tmp_path / "crashed")}],
+              'human_readable_log': {'directory': str(tmp_path)}}
+    supervisor = Supervisor("config.yaml", config, build_fake_clients, workers=1, heartbeat_interval=0.1,
+                            restart_delay=0.1, flush_interval=1.0)
+    supervisor.start()
+    try:
+        deadline = time.monotonic() + 60
+        while supervisor.reports < REPORTS and time.monotonic() < deadline:
+            time.sleep(0.1)
+    finally:
+        supervisor.stop()
+    [stats] = supervisor.stats()
+    assert stats['restarts'] == 1 and stats['reports'] == REPORTS
+    assert stats['lost_reports'] == REPORTS and supervisor.lost_reports == REPORTS